@@ -0,0 +1,169 @@
+# backend/authentication/db_router.py
+
+"""
+📖 Lectures des tableaux de bord et statistiques sur la réplica.
+
+- ReplicaRouter : les écritures vont toujours sur `default` ; les lectures
+  aussi, sauf pendant une vue marquée @read_replica.
+- @read_replica (vue fonction ou action de ViewSet) : les lectures de la vue
+  partent sur l'alias REPLICA_ALIAS, s'il est configuré et à jour.
+- Retard de réplication : mesuré au plus toutes les REPLICA_LAG_CHECK_INTERVAL
+  secondes (par processus) ; au-delà de REPLICA_MAX_LAG, ou réplica injoignable,
+  les lectures restent sur `default`.
+- Lire ses propres écritures : après une écriture réussie (POST/PUT/PATCH/DELETE),
+  l'utilisateur est épinglé sur `default` pendant REPLICA_PIN_SECONDS
+  (ReplicaPinMiddleware). L'épingle vit dans le cache Django : il doit être
+  partagé (Redis, Memcached) quand plusieurs processus servent l'API.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+from .structured_logging import get_logger
+
+logger = get_logger('authentication.db_router')
+
+REPLICA_ALIAS = 'replica'
+
+# Alias de lecture de la vue en cours (None : `default`)
+_read_alias = ContextVar('read_alias', default=None)
+
+# Retard en secondes ; NULL sur un serveur qui n'est pas une réplica (→ 0)
+POSTGRES_LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+class ReplicaRouter:
+    """Router Django : voir DATABASE_ROUTERS dans config/settings.py"""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mêmes données des deux côtés : un objet lu sur la réplica peut être lié à un objet de `default`
+        if {obj1._state.db, obj2._state.db} <= {'default', REPLICA_ALIAS, None}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica reçoit le schéma par réplication, jamais par migrate
+        if db == REPLICA_ALIAS:
+            return False
+        return None
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def replication_lag(alias=REPLICA_ALIAS):
+    """Retard de la réplica en secondes (0 hors PostgreSQL : base de test, miroir)"""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGRES_LAG_SQL)
+        row = cursor.fetchone()
+    return float(row[0] or 0)
+
+
+class ReplicaMonitor:
+    """État de la réplica (à jour / en retard / injoignable), mesuré au plus toutes les `interval` secondes"""
+
+    def __init__(self, interval=None):
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._usable = False
+        self._checked_at = None
+
+    @property
+    def interval(self):
+        if self._interval is not None:
+            return self._interval
+        return getattr(settings, 'REPLICA_LAG_CHECK_INTERVAL', 5)
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at = None
+
+    def usable(self):
+        if not replica_configured():
+            return False
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.interval:
+            return self._usable
+        with self._lock:
+            if self._checked_at is None or now - self._checked_at >= self.interval:
+                self._usable = self._check()
+                self._checked_at = now
+            return self._usable
+
+    def _check(self):
+        max_lag = getattr(settings, 'REPLICA_MAX_LAG', 10)
+        try:
+            lag = replication_lag()
+        except DatabaseError as e:
+            logger.warning("⚠️ Réplica injoignable, lectures sur default", error=str(e))
+            return False
+        if lag > max_lag:
+            logger.warning("⚠️ Réplica en retard, lectures sur default", lag=round(lag, 1), max_lag=max_lag)
+            return False
+        return True
+
+
+replica_monitor = ReplicaMonitor()
+
+
+# ==================== LIRE SES PROPRES ÉCRITURES ====================
+
+def _pin_key(user_pk):
+    return f'replica_pin:{user_pk}'
+
+
+def pin_to_primary(user):
+    """Lectures de cet utilisateur sur `default` pendant REPLICA_PIN_SECONDS (rien à faire sans réplica)"""
+    if not replica_configured():
+        return
+    cache.set(_pin_key(user.pk), True, getattr(settings, 'REPLICA_PIN_SECONDS', 30))
+
+
+def is_pinned(user):
+    return bool(user and user.is_authenticated and cache.get(_pin_key(user.pk)))
+
+
+def read_alias_for(request):
+    """Alias de lecture d'une requête : réplica si configurée, à jour, et utilisateur non épinglé"""
+    if is_pinned(getattr(request, 'user', None)):
+        return 'default'
+    return REPLICA_ALIAS if replica_monitor.usable() else 'default'
+
+
+def read_replica(view):
+    """
+    Décorateur : lectures de la vue sur la réplica (écritures inchangées, sur `default`).
+    Vue fonction : à placer sous @api_view / @permission_classes (utilisateur déjà authentifié).
+    Action de ViewSet : à placer sous @action.
+    """
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        # (request, ...) pour une vue fonction, (self, request, ...) pour une action
+        request = args[0] if hasattr(args[0], 'method') else args[1]
+        token = _read_alias.set(read_alias_for(request))
+        try:
+            return view(*args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+    return wrapped
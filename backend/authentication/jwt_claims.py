@@ -0,0 +1,115 @@
+# backend/authentication/jwt_claims.py
+
+"""
+🔐 Authentification JWT sans lecture de l'utilisateur à chaque requête.
+
+Les tokens portent role, tenant_id et is_superuser : les seuls champs lus
+par les permissions (BelongsToTenant, IsReceptionistOrAdmin...) et par le
+filtrage par centre. ClaimsJWTAuthentication construit à partir de ces
+claims un vrai User (utilisable dans les filtres et les clés étrangères)
+dont les autres champs sont différés : le premier accès à l'un d'eux
+(email, first_name...) charge l'utilisateur complet, en une seule requête.
+
+- Tokens émis avant l'ajout des claims : chargement classique en base.
+- Claims relus en base à chaque refresh : un changement de rôle ou de
+  centre s'applique au plus tard à l'expiration du token d'accès (60 min).
+  Même délai pour une désactivation (is_active=False) : le token d'accès
+  reste accepté jusqu'à son expiration.
+- Premier accès en base (champ différé lu, save()) : les claims non modifiés
+  sont relus depuis la ligne, jamais réécrits avec les valeurs du token.
+- Refresh token révoqué à la rotation (authentication/revocation.py) : un
+  refresh token rejoué est refusé.
+"""
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .revocation import revocation_store
+
+USER_CLAIMS = ('role', 'tenant_id', 'is_superuser')
+
+
+def add_user_claims(token, user):
+    """Ajouter au token (refresh ou accès) les claims lus par les permissions"""
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def user_from_claims(validated_token):
+    """
+    User construit sans requête : id et claims renseignés, autres champs différés.
+    is_active=True : un token n'est émis (ou rafraîchi) que pour un compte actif.
+    """
+    User = get_user_model()
+    values = {claim: validated_token[claim] for claim in USER_CLAIMS}
+    # user_id est une chaîne dans le token
+    id_field = User._meta.get_field(api_settings.USER_ID_FIELD)
+    values[id_field.attname] = id_field.to_python(validated_token[api_settings.USER_ID_CLAIM])
+    values['is_active'] = True
+
+    # from_db attend les valeurs dans l'ordre des champs du modèle
+    field_names = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+    user = User.from_db(None, field_names, [values[name] for name in field_names])
+    user._hydrate_deferred_at_once = True
+    # Valeurs issues du token : remplacées par celles de la ligne au premier accès en base (User.refresh_from_db / save)
+    user._claim_values = {name: value for name, value in values.items() if name != id_field.attname}
+    return user
+
+
+def has_user_claims(validated_token):
+    """Token utilisable sans lecture en base (hors vérification du mot de passe, CHECK_REVOKE_TOKEN)"""
+    claims = (api_settings.USER_ID_CLAIM,) + USER_CLAIMS
+    return not api_settings.CHECK_REVOKE_TOKEN and all(claim in validated_token for claim in claims)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication sans requête SQL quand le token porte les claims utilisateur"""
+
+    def get_user(self, validated_token):
+        # Vérification du mot de passe (CHECK_REVOKE_TOKEN) ou ancien token : utilisateur lu en base
+        if not has_user_claims(validated_token):
+            return super().get_user(validated_token)
+        return user_from_claims(validated_token)
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() pour les vues async (HttpRequest Django) : (user, token) ou None.
+        Seul un ancien token sans claims passe par l'ORM (dans un thread).
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if has_user_claims(validated_token):
+            return user_from_claims(validated_token), validated_token
+        return await sync_to_async(super().get_user)(validated_token), validated_token
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh : claims relus en base avant d'émettre le nouveau token d'accès"""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if revocation_store.is_revoked(refresh[api_settings.JTI_CLAIM]):
+            raise InvalidToken('Token révoqué')
+        # Rotation : l'ancien refresh token est révoqué avant d'en émettre un nouveau
+        # (SimpleJWT ne le fait qu'avec l'app token_blacklist, non installée)
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            if not revocation_store.revoke(refresh):
+                raise InvalidToken('Token révoqué')
+
+        user = get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is not None:
+            # Même jti et même expiration : seul le contenu des claims change
+            attrs = {**attrs, 'refresh': str(add_user_claims(refresh, user))}
+        return super().validate(attrs)
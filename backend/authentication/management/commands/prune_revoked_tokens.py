@@ -0,0 +1,13 @@
+# Fichier: backend/authentication/management/commands/prune_revoked_tokens.py
+
+from django.core.management.base import BaseCommand
+
+from authentication.revocation import prune_revoked_tokens
+
+
+class Command(BaseCommand):
+    help = 'Supprime les tokens révoqués dont le jour d\'expiration est passé (à lancer chaque jour)'
+
+    def handle(self, *args, **options):
+        deleted = prune_revoked_tokens()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} token(s) révoqué(s) expiré(s) supprimé(s)'))
@@ -1,14 +1,27 @@
 # backend/authentication/middleware.py
 
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
 from django.utils.deprecation import MiddlewareMixin
 from django.http import JsonResponse
+from .db_router import pin_to_primary
 from .models import GymCenter
+from .query_budget import QueryBudgetExceeded, QueryStats, resolve_budget, view_label
+from .structured_logging import get_logger
+from .tenant_registry import tenant_registry
+
+logger = get_logger('authentication.middleware')
+budget_logger = get_logger('authentication.query_budget')
 
 
 class SubdomainMiddleware(MiddlewareMixin):
     """
     Middleware pour détecter et valider le sous-domaine de chaque requête.
-    Ajoute l'objet GymCenter correspondant à la requête si trouvé.
+    Ajoute le centre (snapshot du registre) correspondant à la requête si trouvé.
     """
     
     def process_request(self, request):
@@ -31,14 +44,7 @@ class SubdomainMiddleware(MiddlewareMixin):
                 request.subdomain = subdomain
                 
                 # Chercher le centre correspondant
-                try:
-                    gym_center = GymCenter.objects.get(
-                        subdomain=subdomain,
-                        is_active=True
-                    )
-                    request.gym_center = gym_center
-                except GymCenter.DoesNotExist:
-                    pass
+                request.gym_center = tenant_registry.get_by_subdomain(subdomain)
         
         return None
 
@@ -54,16 +60,9 @@ class TenantMiddleware(MiddlewareMixin):
         tenant_subdomain = request.headers.get('X-Tenant-Subdomain')
         
         if tenant_subdomain:
-            try:
-                gym_center = GymCenter.objects.get(
-                    subdomain=tenant_subdomain,
-                    is_active=True
-                )
-                request.subdomain = tenant_subdomain
-                request.gym_center = gym_center
-            except GymCenter.DoesNotExist:
-                request.subdomain = None
-                request.gym_center = None
+            gym_center = tenant_registry.get_by_subdomain(tenant_subdomain)
+            request.subdomain = tenant_subdomain if gym_center else None
+            request.gym_center = gym_center
         
         return None
 
@@ -76,90 +75,74 @@ class AdminTenantMiddleware(MiddlewareMixin):
     2. Sous-domaine dans l'URL
     3. Tenant de l'utilisateur connecté
     4. Premier centre actif (fallback)
+    
+    Les centres sont résolus via le registre en mémoire (tenant_registry) :
+    aucune requête SQL sur un worker déjà chaud.
     """
     
     def process_request(self, request):
-        import logging
-        logger = logging.getLogger('authentication.middleware')
-        
         tenant_id = None
+        gym_center = None
+        subdomain = None
+        source = None
         
         # ✅ 1. Vérifier les headers (priorité la plus haute)
         tenant_subdomain = request.headers.get('X-Tenant-Subdomain')
         if tenant_subdomain:
-            logger.debug(f"🔍 Header X-Tenant-Subdomain détecté: {tenant_subdomain}")
-            try:
-                gym_center = GymCenter.objects.get(
-                    subdomain=tenant_subdomain,
-                    is_active=True
-                )
-                tenant_id = gym_center.tenant_id
-                request.gym_center = gym_center
-                request.subdomain = tenant_subdomain
-                logger.debug(f"✅ Gym center trouvé via header: {gym_center.name} (tenant_id={tenant_id})")
-            except GymCenter.DoesNotExist:
-                logger.warning(f"⚠️ Aucun centre trouvé pour subdomain: {tenant_subdomain}")
+            gym_center = tenant_registry.get_by_subdomain(tenant_subdomain)
+            if gym_center:
+                subdomain = tenant_subdomain
+                source = 'header'
+            else:
+                logger.warning("⚠️ Aucun centre pour ce sous-domaine", source='header', subdomain=tenant_subdomain)
         
         # ✅ 2. Vérifier via le sous-domaine dans l'URL
-        if not tenant_id:
+        if not gym_center:
             host = request.get_host().split(':')[0]
             parts = host.split('.')
             
             if len(parts) >= 3 and parts[0] not in ['www', 'api', 'admin']:
-                subdomain = parts[0]
-                logger.debug(f"🔍 Sous-domaine détecté dans URL: {subdomain}")
-                try:
-                    gym_center = GymCenter.objects.get(
-                        subdomain=subdomain,
-                        is_active=True
-                    )
-                    tenant_id = gym_center.tenant_id
-                    if not hasattr(request, 'gym_center'):
-                        request.gym_center = gym_center
-                        request.subdomain = subdomain
-                    logger.debug(f"✅ Gym center trouvé via URL: {gym_center.name} (tenant_id={tenant_id})")
-                except GymCenter.DoesNotExist:
-                    logger.warning(f"⚠️ Aucun centre trouvé pour subdomain URL: {subdomain}")
+                gym_center = tenant_registry.get_by_subdomain(parts[0])
+                if gym_center:
+                    subdomain = parts[0]
+                    source = 'url'
+                else:
+                    logger.warning("⚠️ Aucun centre pour ce sous-domaine", source='url', subdomain=parts[0])
+        
+        if gym_center:
+            tenant_id = gym_center.tenant_id
         
         # ✅ 3. Vérifier le tenant de l'utilisateur connecté
         if not tenant_id and request.user.is_authenticated:
             user_tenant_id = getattr(request.user, 'tenant_id', None)
             if user_tenant_id:
                 tenant_id = user_tenant_id
-                logger.debug(f"✅ Tenant trouvé via utilisateur: {request.user.email} (tenant_id={tenant_id})")
+                source = 'user'
                 # Essayer de charger le gym_center correspondant
-                try:
-                    gym_center = GymCenter.objects.get(
-                        tenant_id=tenant_id,
-                        is_active=True
-                    )
-                    if not hasattr(request, 'gym_center'):
-                        request.gym_center = gym_center
-                        request.subdomain = gym_center.subdomain
-                except GymCenter.DoesNotExist:
-                    logger.warning(f"⚠️ Aucun centre trouvé pour tenant_id: {tenant_id}")
+                gym_center = tenant_registry.get_by_tenant_id(tenant_id)
+                if gym_center:
+                    subdomain = gym_center.subdomain
+                else:
+                    logger.warning("⚠️ Aucun centre pour ce tenant_id", source='user', tenant_id=tenant_id)
         
         # ✅ 4. FALLBACK : Utiliser le premier centre actif (pour développement)
         if not tenant_id:
-            logger.debug("🔄 Aucun tenant trouvé, utilisation du fallback...")
-            try:
-                first_center = GymCenter.objects.filter(is_active=True).first()
-                if first_center:
-                    tenant_id = first_center.tenant_id
-                    if not hasattr(request, 'gym_center'):
-                        request.gym_center = first_center
-                        request.subdomain = first_center.subdomain
-                    logger.debug(f"✅ Fallback: {first_center.name} (tenant_id={tenant_id})")
-            except Exception as e:
-                logger.error(f"❌ Erreur lors du fallback: {e}")
+            gym_center = tenant_registry.get_default()
+            if gym_center:
+                tenant_id = gym_center.tenant_id
+                subdomain = gym_center.subdomain
+                source = 'fallback'
         
         # ✅ Stocker dans la requête
+        if gym_center:
+            request.gym_center = gym_center
+            request.subdomain = subdomain
         request.tenant_id = tenant_id
         
         if tenant_id:
-            logger.debug(f"✅ tenant_id final assigné: {tenant_id}")
+            logger.debug("✅ Tenant résolu", source=source, subdomain=subdomain, tenant_id=tenant_id)
         else:
-            logger.warning("⚠️ Aucun tenant_id n'a pu être déterminé!")
+            logger.warning("⚠️ Aucun tenant_id n'a pu être déterminé", path=request.path)
         
         return None
 
@@ -232,4 +215,144 @@ class TenantAccessControlMiddleware(MiddlewareMixin):
                 }, status=403)
         
         # Si tout est OK, laisser passer
-        return None
\ No newline at end of file
+        return None
+
+
+class QueryBudgetMiddleware:
+    """
+    📊 Instrumentation SQL de chaque requête (voir authentication/query_budget.py) :
+    nombre de requêtes, doublons (N+1), temps en base, par vue et par centre.
+
+    - En-tête Server-Timing : db (temps SQL, nombre de requêtes) et app (total).
+    - Budget de la vue dépassé : QueryBudgetExceeded si QUERY_BUDGET_ENFORCE
+      (tests), avertissement sinon.
+    Sans effet si settings.QUERY_INSTRUMENTATION est faux (lu à chaque requête).
+    À placer en tête de MIDDLEWARE pour compter aussi les autres middlewares.
+
+    Sous ASGI, les connexions sont propres au thread qui exécute l'ORM (un
+    thread par requête, celui de sync_to_async) : les compteurs y sont branchés.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', False):
+            return self.get_response(request)
+
+        stats = QueryStats()
+        request.query_stats = stats
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            self.instrument(stack, stats)
+            response = self.get_response(request)
+        return self.finish(request, response, stats, start)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', False):
+            return await self.get_response(request)
+
+        stats = QueryStats()
+        request.query_stats = stats
+        start = time.perf_counter()
+        stack = ExitStack()
+        await sync_to_async(self.instrument)(stack, stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, stats, start)
+
+    def instrument(self, stack, stats):
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(stats))
+
+    def finish(self, request, response, stats, start):
+        total = time.perf_counter() - start
+        # ⚠️ Valeur d'en-tête en latin-1 : description ASCII uniquement (pas de « requêtes »)
+        response['Server-Timing'] = (
+            f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} requetes, {stats.duplicates} doublons", '
+            f'app;dur={total * 1000:.1f}'
+        )
+        self.report(request, stats)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, 'query_stats'):
+            request.query_view = view_func
+        return None
+
+    def report(self, request, stats):
+        view_func = getattr(request, 'query_view', None)
+        if view_func is None:
+            return  # 404, ou réponse produite par un middleware
+
+        view = view_label(request, view_func)
+        tenant_id = getattr(request, 'tenant_id', None)
+        budget_logger.debug(
+            "📊 Requêtes SQL", method=request.method, path=request.path, view=view, tenant_id=tenant_id,
+            queries=stats.count, duplicates=stats.duplicates, db_ms=round(stats.duration * 1000, 1)
+        )
+
+        for shape, count in stats.repeated():
+            budget_logger.warning("⚠️ N+1 probable", view=view, tenant_id=tenant_id, count=count, sql=shape[:300])
+
+        budget = resolve_budget(view_func, request.method)
+        if budget is not None and stats.count > budget:
+            message = f"{view} : {stats.count} requêtes SQL pour un budget de {budget} ({request.method} {request.path})"
+            if getattr(settings, 'QUERY_BUDGET_ENFORCE', False):
+                raise QueryBudgetExceeded(message)
+            budget_logger.warning(
+                "⚠️ Budget de requêtes dépassé", view=view, method=request.method, path=request.path,
+                queries=stats.count, budget=budget
+            )
+
+
+class ReplicaPinMiddleware:
+    """
+    📖 Lire ses propres écritures (voir authentication/db_router.py) : après une
+    écriture réussie, les vues @read_replica de cet utilisateur lisent sur
+    `default` le temps que la réplica rattrape (REPLICA_PIN_SECONDS).
+    Sans effet si aucune réplica n'est configurée.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.is_write(request, response):
+            self.pin(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.is_write(request, response):
+            # request.user peut être paresseux (session) : lu hors de la boucle
+            await sync_to_async(self.pin)(request)
+        return response
+
+    def is_write(self, request, response):
+        return request.method not in self.SAFE_METHODS and response.status_code < 400
+
+    def pin(self, request):
+        # Utilisateur JWT : DRF le recopie sur la requête Django après authentification
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user)
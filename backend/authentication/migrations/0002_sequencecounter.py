@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='séquence')),
+                ('tenant_id', models.CharField(blank=True, default='', max_length=100, verbose_name='tenant ID')),
+                ('year', models.PositiveIntegerField(verbose_name='année')),
+                ('last_value', models.PositiveBigIntegerField(default=0, verbose_name='dernière valeur')),
+            ],
+            options={
+                'verbose_name': 'compteur de séquence',
+                'verbose_name_plural': 'compteurs de séquence',
+                'constraints': [models.UniqueConstraint(fields=('name', 'tenant_id', 'year'), name='unique_sequence_counter')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_sequencecounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=255, unique=True, verbose_name='identifiant du token')),
+                ('user_id', models.BigIntegerField(blank=True, null=True, verbose_name='utilisateur')),
+                ('expires_on', models.DateField(db_index=True, verbose_name="jour d'expiration")),
+                ('revoked_at', models.DateTimeField(auto_now_add=True, verbose_name='révoqué le')),
+            ],
+            options={
+                'verbose_name': 'token révoqué',
+                'verbose_name_plural': 'tokens révoqués',
+            },
+        ),
+    ]
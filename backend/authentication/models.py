@@ -57,6 +57,29 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.get_full_name()} ({self.get_role_display()})"
     
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Utilisateur construit depuis les claims du JWT (authentication/jwt_claims.py) :
+        # au premier champ différé lu, charger en une requête tous les champs manquants
+        # et les claims non modifiés (rôle, centre, is_active à jour, pas ceux du token)
+        if fields is not None and getattr(self, '_hydrate_deferred_at_once', False):
+            fields = list(self.get_deferred_fields() | set(fields) | self._unchanged_claim_fields())
+            self._hydrate_deferred_at_once = False
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+    
+    def _unchanged_claim_fields(self):
+        """Champs encore à la valeur lue dans le token (ceux modifiés par la vue sont conservés)"""
+        return {
+            name for name, value in getattr(self, '_claim_values', {}).items()
+            if self.__dict__.get(name) == value
+        }
+    
+    def save(self, *args, **kwargs):
+        # ✅ Utilisateur construit depuis les claims et pas encore chargé : relire la ligne avant
+        # d'écrire, sinon un rôle retiré ou un compte désactivé depuis l'émission du token serait rétabli
+        if getattr(self, '_hydrate_deferred_at_once', False):
+            self.refresh_from_db(fields=[])
+        super().save(*args, **kwargs)
+    
     @property
     def is_admin(self):
         return self.role == self.Role.ADMIN
@@ -143,4 +166,42 @@ class GymCenter(models.Model):
         """Vérifie si le sous-domaine est disponible"""
         if not self.pk:
             return not GymCenter.objects.filter(subdomain=self.subdomain).exists()
-        return not GymCenter.objects.filter(subdomain=self.subdomain).exclude(pk=self.pk).exists()
\ No newline at end of file
+        return not GymCenter.objects.filter(subdomain=self.subdomain).exclude(pk=self.pk).exists()
+
+class SequenceCounter(models.Model):
+    """
+    Compteur de numérotation (member_id, numéros de facture...) par nom, centre et année.
+    Incrémenté sous SELECT ... FOR UPDATE, voir authentication/sequences.py.
+    """
+    name = models.CharField(_('séquence'), max_length=50)
+    tenant_id = models.CharField(_('tenant ID'), max_length=100, blank=True, default='')
+    year = models.PositiveIntegerField(_('année'))
+    last_value = models.PositiveBigIntegerField(_('dernière valeur'), default=0)
+
+    class Meta:
+        verbose_name = _('compteur de séquence')
+        verbose_name_plural = _('compteurs de séquence')
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'tenant_id', 'year'], name='unique_sequence_counter'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} {self.tenant_id or '*'} {self.year} = {self.last_value}"
+
+
+class RevokedToken(models.Model):
+    """
+    Refresh token révoqué (rotation, déconnexion), voir authentication/revocation.py.
+    Rangé par jour d'expiration : un jour entier est supprimé d'un bloc une fois ses tokens expirés.
+    """
+    jti = models.CharField(_('identifiant du token'), max_length=255, unique=True)
+    user_id = models.BigIntegerField(_('utilisateur'), null=True, blank=True)
+    expires_on = models.DateField(_("jour d'expiration"), db_index=True)
+    revoked_at = models.DateTimeField(_('révoqué le'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('token révoqué')
+        verbose_name_plural = _('tokens révoqués')
+
+    def __str__(self):
+        return f"{self.jti} (expire le {self.expires_on})"
@@ -0,0 +1,197 @@
+# backend/authentication/pagination.py
+
+"""
+📄 Pagination par clé (keyset / curseur) pour les listes volumineuses.
+
+Au lieu d'un OFFSET (coût proportionnel à la page demandée), chaque page
+reprend après la dernière ligne vue :
+    WHERE (created_at, id) < (dernière valeur)  ORDER BY created_at DESC, id DESC  LIMIT n
+Le coût d'une page reste constant quel que soit le volume du centre.
+
+- Tri : celui du queryset s'il est explicite (order_by de la vue, ?ordering=,
+  rang de recherche), sinon `ordering` de la classe ; l'id est toujours ajouté
+  pour départager les égalités.
+- Curseur opaque (base64) contenant les valeurs de tri de la dernière ligne ;
+  un curseur émis pour un autre tri est refusé.
+- ?page_size= borné par max_page_size ; ?count=true ajoute le total (un COUNT).
+- apaginate_queryset : même page pour les vues async (ORM async).
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _encode_value(value):
+    """Valeur de tri → JSON sans perte (les microsecondes comptent pour le keyset)"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
+
+
+def _lookup_value(obj, path):
+    """Valeur de `path` (ex: 'course__date', 'pk', annotation) sur une ligne"""
+    for attr in path.split('__'):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _model_field(model, path):
+    """Champ modèle de `path`, None pour une annotation"""
+    field = None
+    for name in path.split('__'):
+        try:
+            field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        model = field.related_model or model
+    return field
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination par curseur. Sous-classer par endpoint pour ajuster
+    `ordering`, `page_size` et `max_page_size`.
+    Les champs de tri doivent être non nuls.
+    """
+
+    ordering = ('-created_at',)
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Curseur invalide'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        counted, page = self.prepare(queryset, request)
+        self.count = counted.count() if counted is not None else None
+        return self.set_page(list(page))
+
+    async def apaginate_queryset(self, queryset, request):
+        """Version async (vues ASGI) : COUNT et page lancés ensemble"""
+        counted, page = self.prepare(queryset, request)
+
+        async def rows():
+            return [row async for row in page]
+
+        if counted is None:
+            self.count = None
+            return self.set_page(await rows())
+        self.count, page_rows = await asyncio.gather(counted.acount(), rows())
+        return self.set_page(page_rows)
+
+    def prepare(self, queryset, request):
+        """→ (queryset à compter si ?count=true sinon None, queryset de la page : page_size + 1 lignes)"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_ordering(queryset)
+        queryset = queryset.order_by(*self.keys)
+
+        counted = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            counted = queryset
+
+        values = self.decode_cursor(request, queryset.model)
+        if values is not None:
+            queryset = queryset.filter(self.keyset_filter(values))
+        return counted, queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        """Ligne en trop → page suivante ; retourne les lignes de la page"""
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            requested = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def get_ordering(self, queryset):
+        """Tri explicite du queryset s'il est utilisable, sinon le tri par défaut ; id en dernier"""
+        explicit = queryset.query.order_by
+        keys = list(explicit) if explicit and all(isinstance(k, str) for k in explicit) else list(self.ordering)
+        keys = [k for k in keys if k.lstrip('-') not in ('pk', 'id')]
+        descending = keys[-1].startswith('-') if keys else True
+        keys.append('-pk' if descending else 'pk')
+        return tuple(keys)
+
+    def keyset_filter(self, values):
+        """(k1, k2, ...) strictement après `values` dans l'ordre de tri"""
+        condition = Q()
+        for index, key in enumerate(self.keys):
+            name = key.lstrip('-')
+            lookup = 'lt' if key.startswith('-') else 'gt'
+            branch = Q(**{f'{name}__{lookup}': values[index]})
+            for previous_key, previous_value in zip(self.keys[:index], values[:index]):
+                branch &= Q(**{previous_key.lstrip('-'): previous_value})
+            condition |= branch
+        return condition
+
+    def encode_cursor(self, row):
+        payload = {
+            'o': list(self.keys),
+            'v': [_encode_value(_lookup_value(row, key.lstrip('-'))) for key in self.keys],
+        }
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            payload = json.loads(raw)
+            if payload['o'] != list(self.keys) or len(payload['v']) != len(self.keys):
+                raise ValueError('tri différent')
+            values = []
+            for key, value in zip(self.keys, payload['v']):
+                field = _model_field(model, key.lstrip('-'))
+                values.append(field.to_python(value) if field is not None else value)
+            return values
+        except (binascii.Error, ValueError, KeyError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or self.last_row is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last_row))
+
+    def get_paginated_data(self, data):
+        body = {'next': self.get_next_link(), 'results': data}
+        if self.count is not None:
+            body = {'count': self.count, **body}
+        return body
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,105 @@
+# backend/authentication/query_budget.py
+
+"""
+📊 Instrumentation SQL par requête HTTP : nombre de requêtes, formes SQL en
+double (N+1), temps passé en base, budget de requêtes par vue.
+
+- Les requêtes sont observées par connection.execute_wrapper (sans DEBUG).
+- La « forme » d'une requête est son SQL avant paramètres : une boucle qui
+  exécute la même forme N fois est signalée comme N+1 probable.
+- Budget déclaré par vue :
+      @query_budget(4)            au-dessus de @api_view (vue fonction)
+      query_budget = 6            attribut d'un ViewSet (toutes actions)
+      query_budget = {'list': 6}  budget par action
+      @query_budget(3)            au-dessus de @action (action de ViewSet)
+  Dépassement : QueryBudgetExceeded si settings.QUERY_BUDGET_ENFORCE (tests),
+  simple avertissement sinon.
+
+Activée par settings.QUERY_INSTRUMENTATION (voir QueryBudgetMiddleware).
+"""
+
+import re
+import time
+from collections import Counter
+
+# Une même forme SQL exécutée au moins autant de fois dans une requête → N+1 probable
+N_PLUS_ONE_THRESHOLD = 5
+
+_IN_LIST = re.compile(r'\((?:%s|\?)(?:, (?:%s|\?))+\)')
+_SPACES = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Une vue a exécuté plus de requêtes que son budget déclaré"""
+
+
+def query_budget(limit):
+    """Décorateur : budget de requêtes SQL d'une vue ou d'une action de ViewSet"""
+    def decorate(view):
+        view.query_budget = limit
+        return view
+    return decorate
+
+
+def sql_shape(sql):
+    """Forme d'une requête : SQL paramétré, listes IN (...) réduites, espaces normalisés"""
+    return _SPACES.sub(' ', _IN_LIST.sub('(...)', sql)).strip()
+
+
+class QueryStats:
+    """Collecteur branché sur les connexions pendant une requête HTTP"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[sql_shape(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """Requêtes exécutées en plus de la première de chaque forme"""
+        return sum(count - 1 for count in self.shapes.values())
+
+    def repeated(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """[(forme, nombre)] exécutées au moins `threshold` fois"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+def resolve_budget(view_func, method):
+    """Budget déclaré pour la vue résolue (fonction, ViewSet ou action), None si aucun"""
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is not None:
+        return budget
+
+    view_class = getattr(view_func, 'cls', None)
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower())
+
+    if view_class is not None and action:
+        budget = getattr(getattr(view_class, action, None), 'query_budget', None)
+        if budget is not None:
+            return budget
+
+    budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        return budget.get(action)
+    return budget
+
+
+def view_label(request, view_func):
+    """Nom de la vue pour les logs : nom d'URL, sinon Classe.action ou module.fonction"""
+    match = getattr(request, 'resolver_match', None)
+    if match and match.view_name:
+        return match.view_name
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is not None:
+        return view_class.__name__
+    return f'{view_func.__module__}.{view_func.__name__}'
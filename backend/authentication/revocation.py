@@ -0,0 +1,150 @@
+# backend/authentication/revocation.py
+
+"""
+🔐 Révocation des refresh tokens (rotation, déconnexion).
+
+- Table RevokedToken rangée par jour d'expiration : `manage.py prune_revoked_tokens`
+  supprime d'un bloc les jours dont tous les tokens ont expiré. La table ne
+  contient donc que des tokens encore valides.
+- Devant la table, un filtre de Bloom par processus, reconstruit toutes les
+  TOKEN_REVOCATION_FILTER_TTL secondes : un jti absent du filtre n'a pas été
+  révoqué (jamais de faux négatif), seule une réponse « peut-être » interroge
+  la base. La plupart des refresh ne font donc aucune lecture.
+- Révoquer = insérer le jti (unique) : deux refresh simultanés du même token,
+  un seul gagne. Un token révoqué par un autre processus est détecté à
+  l'insertion, ou au plus tard à la reconstruction suivante du filtre.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .structured_logging import get_logger
+
+logger = get_logger('authentication.revocation')
+
+
+class BloomFilter:
+    """Ensemble probabiliste de taille fixe : faux positifs possibles (≈ error_rate), jamais de faux négatif"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        # Double hachage (Kirsch-Mitzenmacher) : k positions à partir d'un seul digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class RevocationStore:
+    """
+    Filtre de Bloom des jti révoqués (par processus) + table RevokedToken.
+    Dimensionné à chaque reconstruction sur le nombre de tokens révoqués
+    encore valides : mémoire bornée (≈ 1,2 octet par token à 1 %).
+    """
+
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._filter = None
+        self._expires_at = 0.0
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'TOKEN_REVOCATION_FILTER_TTL', 30)
+
+    def invalidate(self):
+        """Force la reconstruction du filtre au prochain accès."""
+        with self._lock:
+            self._expires_at = 0.0
+
+    def _ensure_built(self):
+        if time.monotonic() < self._expires_at:
+            return self._filter
+        with self._lock:
+            if time.monotonic() < self._expires_at:
+                return self._filter
+            self._filter = self._build()
+            self._expires_at = time.monotonic() + self.ttl
+            return self._filter
+
+    def _build(self):
+        from .models import RevokedToken  # Import ici pour éviter import circulaire
+
+        jtis = list(
+            RevokedToken.objects.filter(expires_on__gte=timezone.now().date()).values_list('jti', flat=True)
+        )
+        # Marge : les révocations de ce processus s'ajoutent jusqu'à la prochaine reconstruction
+        bloom = BloomFilter(
+            capacity=len(jtis) * 2 + 1024,
+            error_rate=getattr(settings, 'TOKEN_REVOCATION_ERROR_RATE', 0.01)
+        )
+        for jti in jtis:
+            bloom.add(jti)
+        logger.debug("🔐 Filtre de révocation reconstruit", tokens=len(jtis), bytes=len(bloom.bits))
+        return bloom
+
+    def is_revoked(self, jti):
+        """Absent du filtre → non révoqué, sans requête ; sinon vérification en base"""
+        from .models import RevokedToken
+
+        if jti not in self._ensure_built():
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, token):
+        """
+        Révoquer un refresh token validé. Retourne False s'il l'était déjà
+        (token rejoué, ou refresh concurrent qui a gagné).
+        """
+        from .models import RevokedToken
+
+        jti = token[api_settings.JTI_CLAIM]
+        expires_on = datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc).date()
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(
+                    jti=jti,
+                    user_id=token.payload.get(api_settings.USER_ID_CLAIM),
+                    expires_on=expires_on
+                )
+        except IntegrityError:
+            return False
+
+        bloom = self._ensure_built()
+        with self._lock:
+            bloom.add(jti)
+        return True
+
+
+def prune_revoked_tokens(today=None):
+    """Supprimer les jours d'expiration révolus (tokens expirés, inutiles à garder) → lignes supprimées"""
+    from .models import RevokedToken
+
+    today = today or timezone.now().date()
+    deleted, _ = RevokedToken.objects.filter(expires_on__lt=today).delete()
+    return deleted
+
+
+revocation_store = RevocationStore()
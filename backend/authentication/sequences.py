@@ -0,0 +1,61 @@
+# backend/authentication/sequences.py
+
+"""
+🔢 Allocation de numéros séquentiels sans lecture-puis-écriture concurrente.
+
+Chaque séquence (nom, tenant_id, année) est une ligne SequenceCounter,
+verrouillée par SELECT ... FOR UPDATE le temps de l'incrément : deux
+inscriptions simultanées obtiennent forcément deux numéros différents,
+sans retry sur violation d'unicité. Le verrou et l'incrément suivent la
+transaction de l'appelant : un rollback rend les numéros (pas de trou).
+
+Pour les imports et générations en masse, allocate() réserve un bloc
+de `count` numéros consécutifs en une seule requête d'écriture.
+"""
+
+from django.db import transaction
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from .models import SequenceCounter
+
+
+def allocate(name, tenant_id='', year=None, count=1, seed=None):
+    """
+    Réserve `count` numéros consécutifs et retourne le range correspondant.
+
+    seed : fonction (year) → dernier numéro déjà utilisé, appelée une seule fois
+    à la création du compteur (reprise des numéros existants en base).
+    """
+    if count < 1:
+        raise ValueError('count doit être >= 1')
+    year = year or timezone.now().year
+
+    with transaction.atomic():
+        counter, created = SequenceCounter.objects.select_for_update().get_or_create(
+            name=name,
+            tenant_id=tenant_id or '',
+            year=year,
+            defaults={'last_value': seed(year) if seed else 0}
+        )
+        start = counter.last_value + 1
+        counter.last_value += count
+        counter.save(update_fields=['last_value'])
+
+    return range(start, start + count)
+
+
+def last_number(queryset, field, prefix):
+    """
+    Plus grand suffixe numérique des valeurs `field` commençant par `prefix`
+    (reprise des anciens numéros, ex: MEM20250042 → 42). 0 si aucun.
+    """
+    values = queryset.filter(**{f'{field}__startswith': prefix}).order_by(
+        Length(field).desc(), f'-{field}'
+    ).values_list(field, flat=True)[:20]
+
+    for value in values:
+        suffix = value[len(prefix):]
+        if suffix.isdigit():
+            return int(suffix)
+    return 0
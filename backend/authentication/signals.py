@@ -0,0 +1,14 @@
+# backend/authentication/signals.py
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import GymCenter
+from .tenant_registry import tenant_registry
+
+
+@receiver(post_save, sender=GymCenter)
+@receiver(post_delete, sender=GymCenter)
+def invalidate_tenant_registry(sender, **kwargs):
+    """Toute modification d'un centre invalide le registre des tenants."""
+    tenant_registry.invalidate()
@@ -0,0 +1,118 @@
+# backend/authentication/structured_logging.py
+
+"""
+📝 Logs structurés à évaluation paresseuse, pour les chemins chauds.
+
+    log = get_logger('bookings.views')
+    log.debug("🔍 create()", view=self.__class__.__name__, fields=lambda: sorted(request.data))
+
+- Niveau désactivé : ni formatage ni appel des valeurs, un seul test de niveau.
+  Une valeur coûteuse (ex. `lambda: queryset.count()`) est passée comme
+  callable : elle n'est évaluée, une seule fois, qu'au formatage du message.
+- Échantillonnage par module des niveaux DEBUG/INFO (settings.LOG_SAMPLE_RATES,
+  ex. {'authentication.middleware': 0.01}) ; WARNING et au-delà toujours émis.
+- Sortie texte pour les formatteurs existants : « événement clé=valeur ... » ;
+  sortie JSON (une ligne par événement) avec JsonFormatter (LOG_FORMAT=json).
+"""
+
+import json
+import logging
+import random
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+
+class StructuredMessage:
+    """Événement + champs ; rendu (et évaluation des callables) à la demande"""
+
+    __slots__ = ('event', 'fields', '_resolved')
+
+    def __init__(self, event, fields):
+        self.event = event
+        self.fields = fields
+        self._resolved = None
+
+    def resolved(self):
+        if self._resolved is None:
+            self._resolved = {
+                key: value() if callable(value) else value
+                for key, value in self.fields.items()
+            }
+        return self._resolved
+
+    def __str__(self):
+        fields = ' '.join(f'{key}={value}' for key, value in self.resolved().items())
+        return f'{self.event} {fields}' if fields else self.event
+
+
+def sample_rate(name):
+    """Taux d'échantillonnage du logger `name` (préfixe le plus long de LOG_SAMPLE_RATES)"""
+    rates = getattr(settings, 'LOG_SAMPLE_RATES', None)
+    while rates and name:
+        if name in rates:
+            return rates[name]
+        name = name.rpartition('.')[0]
+    return 1.0
+
+
+class StructuredLogger:
+    """Enveloppe d'un logging.Logger : log.info("événement", clé=valeur, ...)"""
+
+    def __init__(self, name):
+        self.name = name
+        self.logger = logging.getLogger(name)
+
+    def isEnabledFor(self, level):
+        return self.logger.isEnabledFor(level)
+
+    def log(self, level, event, exc_info=None, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        if level < logging.WARNING:
+            rate = sample_rate(self.name)
+            if rate < 1 and random.random() >= rate:
+                return
+        # stacklevel : module / fonction / ligne de l'appelant, pas de cette classe
+        self.logger.log(level, StructuredMessage(event, fields), exc_info=exc_info, stacklevel=3)
+
+    def debug(self, event, **fields):
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event, **fields):
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event, **fields):
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event, **fields):
+        self.log(logging.ERROR, event, **fields)
+
+    def exception(self, event, **fields):
+        self.log(logging.ERROR, event, exc_info=True, **fields)
+
+
+def get_logger(name):
+    return StructuredLogger(name)
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement ; champs des événements structurés à plat"""
+
+    def format(self, record):
+        payload = {
+            'time': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+        }
+        message = record.msg
+        if isinstance(message, StructuredMessage):
+            payload['event'] = message.event
+            for key, value in message.resolved().items():
+                payload.setdefault(key, value)
+        else:
+            payload['event'] = record.getMessage()
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
@@ -6,6 +6,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework import status
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
+from .jwt_claims import add_user_claims
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -55,7 +56,7 @@ class SuperAdminLoginView(APIView):
             )
         
         # Générer les tokens JWT
-        refresh = RefreshToken.for_user(user)
+        refresh = add_user_claims(RefreshToken.for_user(user), user)
         
         # Préparer les données utilisateur
         user_data = {
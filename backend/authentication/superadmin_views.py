@@ -6,6 +6,8 @@ from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 from .models import GymCenter
 from .serializers import GymCenterSerializer, UserSerializer
+from .tenant_registry import tenant_registry
+from .db_router import read_replica
 from django.db.models import Count, Q
 
 User = get_user_model()
@@ -42,6 +44,7 @@ class SuperAdminGymCenterViewSet(viewsets.ModelViewSet):
         )
     
     @action(detail=False, methods=['get'])
+    @read_replica
     def statistics(self, request):
         """
         Retourne des statistiques globales sur toutes les salles.
@@ -73,6 +76,9 @@ class SuperAdminGymCenterViewSet(viewsets.ModelViewSet):
         gym.is_active = not gym.is_active
         gym.save()
         
+        # 🔄 Un centre désactivé ne doit plus être résolu par le middleware
+        tenant_registry.invalidate()
+        
         return Response({
             'message': f'Salle {"activée" if gym.is_active else "désactivée"} avec succès',
             'is_active': gym.is_active
@@ -142,6 +148,7 @@ class SuperAdminStaffViewSet(viewsets.ModelViewSet):
         return Response(result)
     
     @action(detail=False, methods=['get'])
+    @read_replica
     def statistics(self, request):
         """
         Statistiques sur le personnel.
@@ -0,0 +1,121 @@
+# backend/authentication/tenant_registry.py
+
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+
+class TenantSnapshot(namedtuple('TenantSnapshot', [
+    'id', 'name', 'subdomain', 'tenant_id', 'is_active', 'logo_url'
+])):
+    """
+    Copie immuable d'un GymCenter, stockée dans le registre en mémoire.
+    Expose les mêmes attributs que le modèle pour les usages en lecture
+    (request.gym_center.name, .tenant_id, .subdomain, .full_url...).
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_center(cls, center):
+        return cls(
+            id=center.id,
+            name=center.name,
+            subdomain=center.subdomain,
+            tenant_id=center.tenant_id,
+            is_active=center.is_active,
+            logo_url=center.logo.url if center.logo else None,
+        )
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def full_url(self):
+        """Retourne l'URL complète du sous-domaine"""
+        return f"https://{self.subdomain}.gymflow.com"
+
+
+class TenantRegistry:
+    """
+    Registre en mémoire (par processus) des centres actifs.
+
+    Tous les centres actifs sont chargés en UNE requête, puis servis depuis
+    la mémoire jusqu'à expiration du TTL (settings.TENANT_REGISTRY_TTL).
+    Les signaux post_save / post_delete de GymCenter invalident le registre
+    du processus courant ; les autres workers se resynchronisent au TTL.
+    """
+
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._by_subdomain = {}
+        self._by_tenant_id = {}
+        self._default = None
+        self._expires_at = 0.0
+        self._generation = 0
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'TENANT_REGISTRY_TTL', 300)
+
+    def invalidate(self):
+        """Force le rechargement au prochain accès."""
+        with self._lock:
+            self._generation += 1
+            self._expires_at = 0.0
+
+    def get_by_subdomain(self, subdomain):
+        if not subdomain:
+            return None
+        self._ensure_loaded()
+        return self._by_subdomain.get(subdomain.lower())
+
+    def get_by_tenant_id(self, tenant_id):
+        if not tenant_id:
+            return None
+        self._ensure_loaded()
+        return self._by_tenant_id.get(tenant_id)
+
+    def get_default(self):
+        """Premier centre actif (même ordre que GymCenter.Meta.ordering)."""
+        self._ensure_loaded()
+        return self._default
+
+    def _ensure_loaded(self):
+        if time.monotonic() < self._expires_at:
+            return
+        with self._lock:
+            if time.monotonic() < self._expires_at:
+                return
+            generation = self._generation
+        self._load(generation)
+
+    def _load(self, generation):
+        from .models import GymCenter  # Import ici pour éviter import circulaire
+
+        snapshots = [
+            TenantSnapshot.from_center(center)
+            for center in GymCenter.objects.filter(is_active=True)
+        ]
+
+        by_subdomain = {}
+        by_tenant_id = {}
+        for snapshot in snapshots:
+            by_subdomain.setdefault(snapshot.subdomain, snapshot)
+            by_tenant_id.setdefault(snapshot.tenant_id, snapshot)
+
+        with self._lock:
+            self._by_subdomain = by_subdomain
+            self._by_tenant_id = by_tenant_id
+            self._default = snapshots[0] if snapshots else None
+            # ⚠️ Une invalidation pendant le chargement rend ce résultat périmé
+            if generation == self._generation:
+                self._expires_at = time.monotonic() + self.ttl
+
+
+tenant_registry = TenantRegistry()
@@ -0,0 +1,195 @@
+# backend/authentication/tests_query_budgets.py
+# Tests de non-régression des budgets de requêtes déclarés sur les endpoints (N+1)
+
+import random
+import re
+from datetime import time, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.views import TenantTokenObtainPairSerializer
+from authentication.tenant_registry import tenant_registry
+from billing.models import Invoice
+from bookings.models import Booking, Course, CourseType, Room
+from coaching.models import TrainingProgram
+from generate_realistic_data import Command as GenerateRealisticData
+from members import portal_async_views
+from members.models import Member
+from members.portal_urls import portal_urlconf
+
+User = get_user_model()
+
+# Au moins autant de lignes que le seuil de détection N+1 (une même requête répétée 5 fois)
+MIN_ROWS = 6
+
+
+@override_settings(QUERY_INSTRUMENTATION=True, QUERY_BUDGET_ENFORCE=True)
+class QueryBudgetEndpointTestCase(TestCase):
+    """
+    Données réalistes (generate_realistic_data.py, 3 centres), puis chaque
+    endpoint qui déclare un budget (@query_budget ou query_budget par action)
+    est appelé avec assez de lignes pour révéler une requête par ligne :
+    QueryBudgetExceeded au moindre N+1.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        random.seed(2025)
+        GenerateRealisticData(stdout=StringIO()).handle(full=True, members=30)
+
+        cls.coach = User.objects.get(username='coach1_powerfit')
+        cls.member_user = User.objects.filter(
+            role='MEMBER', tenant_id='powerfit', member_profile__isnull=False
+        ).first()
+        member = cls.member_user.member_profile
+
+        # Compléments pour dépasser MIN_ROWS partout : salles, cours du jour et à venir du coach,
+        # réservations, factures, programmes actifs du coach
+        room = Room.objects.create(name='Salle budget', capacity=30, tenant_id='powerfit')
+        for index in range(MIN_ROWS):
+            Room.objects.create(name=f'Studio {index}', capacity=10, tenant_id='powerfit')
+        course_type = CourseType.objects.filter(tenant_id='powerfit').first()
+        today = timezone.now().date()
+        for index in range(MIN_ROWS):
+            course = Course.objects.create(
+                course_type=course_type, coach=cls.coach, room=room, title=f'Budget {index}',
+                date=today + timedelta(days=1 + index), start_time=time(6, 0), end_time=time(7, 0),
+                max_participants=20, tenant_id='powerfit'
+            )
+            Booking.objects.create(course=course, member=member, status='CONFIRMED', tenant_id='powerfit')
+            Invoice.objects.create(
+                member=member, amount=50, total_amount=0, customer_name=member.full_name,
+                customer_email=member.email, status='PAID', tenant_id='powerfit',
+                line_items=[{'description': 'Abonnement', 'quantity': 1, 'unit_price': 50, 'total': 50}]
+            )
+            Course.objects.create(
+                course_type=course_type, coach=cls.coach, room=room, title=f'Matin {index}',
+                date=today, start_time=time(index, 30), end_time=time(index + 1, 0),
+                max_participants=20, tenant_id='powerfit'
+            )
+        for coached in Member.objects.filter(tenant_id='powerfit')[:MIN_ROWS]:
+            TrainingProgram.objects.create(
+                title='Remise en forme', member=coached, coach=cls.coach, status='active',
+                start_date=today, end_date=today + timedelta(weeks=8), duration_weeks=8, tenant_id='powerfit'
+            )
+
+    def setUp(self):
+        tenant_registry.invalidate()
+        tenant_registry.get_default()  # Registre chaud : seules les requêtes de la vue comptent
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.get(username='admin_powerfit'))
+
+    def assertWithinBudget(self, url, budget, rows=lambda data: data['results'], user=None):
+        """GET `url` (au moins MIN_ROWS lignes) : budget respecté, Server-Timing cohérent"""
+        if user is not None:
+            self.client.force_authenticate(user=user)
+        # QueryBudgetExceeded (QUERY_BUDGET_ENFORCE) remonte jusqu'ici si le budget est dépassé
+        response = self.client.get(url, HTTP_X_TENANT_SUBDOMAIN='powerfit')
+        self.assertEqual(response.status_code, 200, f'{url}: {response.status_code}')
+
+        if rows is not None:
+            self.assertGreaterEqual(len(rows(response.json())), MIN_ROWS, f'{url}: trop peu de lignes pour un N+1')
+        queries = int(re.search(r'desc="(\d+) ', response['Server-Timing']).group(1))
+        self.assertLessEqual(queries, budget, url)
+        return queries
+
+    # ==================== bookings ====================
+
+    def test_rooms_list(self):
+        """Test: Liste des salles (courses_count annoté)"""
+        print("\n🧪 Test: Budget /api/bookings/rooms/")
+        queries = self.assertWithinBudget('/api/bookings/rooms/', 4, rows=lambda data: data)
+        print(f"✅ {queries} requêtes (budget 4)")
+
+    def test_courses_list_today_upcoming(self):
+        """Test: Liste des cours, cours du jour, cours à venir"""
+        print("\n🧪 Test: Budget /api/bookings/courses/")
+        self.assertWithinBudget('/api/bookings/courses/', 4, rows=lambda data: data)
+        self.assertWithinBudget('/api/bookings/courses/today/', 3, rows=lambda data: data)
+        queries = self.assertWithinBudget('/api/bookings/courses/upcoming/', 3, rows=lambda data: data)
+        print(f"✅ Budgets respectés (à venir : {queries} requêtes)")
+
+    def test_bookings_list(self):
+        """Test: Liste des réservations (membre et cours chargés avec la ligne)"""
+        print("\n🧪 Test: Budget /api/bookings/bookings/")
+        queries = self.assertWithinBudget('/api/bookings/bookings/', 4)
+        print(f"✅ {queries} requêtes (budget 4)")
+
+    def test_my_bookings(self):
+        """Test: Réservations du membre connecté (action my_bookings)"""
+        print("\n🧪 Test: Budget /api/bookings/bookings/my_bookings/")
+        queries = self.assertWithinBudget(
+            '/api/bookings/bookings/my_bookings/', 4, rows=lambda data: data, user=self.member_user
+        )
+        print(f"✅ {queries} requêtes (budget 4)")
+
+    def test_receptionist_search_and_checkin_stats(self):
+        """Test: Recherche membre au check-in, statistiques de check-in"""
+        print("\n🧪 Test: Budget réception")
+        self.assertWithinBudget('/api/bookings/receptionist/search-member/?q=test', 5)
+        queries = self.assertWithinBudget('/api/bookings/receptionist/checkin-stats/', 5, rows=None)
+        print(f"✅ Budgets respectés (statistiques : {queries} requêtes)")
+
+    # ==================== coaching ====================
+
+    def test_coach_upcoming_sessions(self):
+        """Test: Séances à venir du coach (participants = compteur dénormalisé)"""
+        print("\n🧪 Test: Budget /api/coaching/coach/upcoming-sessions/")
+        queries = self.assertWithinBudget(
+            '/api/coaching/coach/upcoming-sessions/', 3, rows=lambda data: data, user=self.coach
+        )
+        print(f"✅ {queries} requêtes (budget 3)")
+
+    def test_coach_my_members(self):
+        """Test: Membres suivis par le coach"""
+        print("\n🧪 Test: Budget /api/coaching/coach/my-members/")
+        queries = self.assertWithinBudget(
+            '/api/coaching/coach/my-members/', 3, rows=lambda data: data, user=self.coach
+        )
+        print(f"✅ {queries} requêtes (budget 3)")
+
+    # ==================== members, subscriptions, billing ====================
+
+    def test_members_list(self):
+        """Test: Liste des membres"""
+        print("\n🧪 Test: Budget /api/members/")
+        queries = self.assertWithinBudget('/api/members/', 4)
+        print(f"✅ {queries} requêtes (budget 4)")
+
+    def test_members_cards_export(self):
+        """Test: Export des cartes (requêtes de la vue, avant l'envoi en flux)"""
+        print("\n🧪 Test: Budget /api/members/cards-export/")
+        ids = ','.join(str(pk) for pk in Member.objects.filter(tenant_id='powerfit').values_list('pk', flat=True)[:MIN_ROWS])
+        queries = self.assertWithinBudget(f'/api/members/cards-export/?ids={ids}', 4, rows=None)
+        print(f"✅ {queries} requêtes (budget 4)")
+
+    def test_subscriptions_list(self):
+        """Test: Liste des abonnements"""
+        print("\n🧪 Test: Budget /api/subscriptions/subscriptions/")
+        queries = self.assertWithinBudget('/api/subscriptions/subscriptions/', 5)
+        print(f"✅ {queries} requêtes (budget 5)")
+
+    def test_invoices_list(self):
+        """Test: Liste des factures"""
+        print("\n🧪 Test: Budget /api/billing/invoices/")
+        queries = self.assertWithinBudget('/api/billing/invoices/', 4)
+        print(f"✅ {queries} requêtes (budget 4)")
+
+    # ==================== portail membre ====================
+
+    def test_portal_available_courses_and_bookings(self):
+        """Test: Portail membre, vues WSGI puis vues async (mêmes budgets)"""
+        print("\n🧪 Test: Budget du portail membre")
+        # Vues async authentifiées par JWT uniquement (pas de force_authenticate)
+        token = TenantTokenObtainPairSerializer.get_token(self.member_user).access_token
+        self.client.force_authenticate(user=None)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        for urlconf in (None, portal_urlconf(portal_async_views)):
+            with override_settings(ROOT_URLCONF=urlconf or 'config.urls'):
+                self.assertWithinBudget('/api/members-portal/courses/available/', 4, rows=lambda data: data)
+                queries = self.assertWithinBudget('/api/members-portal/bookings/', 4)
+        print(f"✅ Budgets respectés (réservations async : {queries} requêtes)")
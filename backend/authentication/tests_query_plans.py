@@ -0,0 +1,126 @@
+# backend/authentication/tests_query_plans.py
+# Tests de non-régression des plans d'exécution (EXPLAIN) des requêtes chaudes
+
+import random
+import re
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from authentication.tenant_registry import tenant_registry
+from generate_realistic_data import Command as GenerateRealisticData
+
+User = get_user_model()
+
+
+def explain(sql):
+    """Plan d'exécution de `sql` (lignes de texte), index préférés au parcours séquentiel"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # Petit volume de test : sans cela PostgreSQL préfère souvent un Seq Scan.
+            # Un Seq Scan restant signifie alors qu'aucun index ne convient.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(plan):
+    """Tables lues intégralement (SQLite : SCAN <table>, PostgreSQL : Seq Scan on <table>)"""
+    scans = []
+    for line in plan:
+        match = re.search(r'Seq Scan on (\w+)', line) or re.match(r'\s*SCAN (\w+)(?! CONSTANT)', line)
+        if match:
+            scans.append(match.group(1))
+    return scans
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    Données réalistes (generate_realistic_data.py, 3 centres), puis EXPLAIN de
+    la requête principale de chaque endpoint chaud : elle doit passer par un
+    index, jamais par un parcours complet de la table.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        random.seed(2025)
+        GenerateRealisticData(stdout=StringIO()).handle(full=True, members=60)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        tenant_registry.invalidate()
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.get(username='admin_powerfit'))
+
+    def _main_queries(self, url, table):
+        """Requêtes SELECT de l'endpoint qui lisent `table` en premier (FROM "table")"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, HTTP_X_TENANT_SUBDOMAIN='powerfit')
+        self.assertEqual(response.status_code, 200, f'{url}: {response.status_code}')
+
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and re.search(rf'FROM "{table}"', query['sql'])
+        ]
+        self.assertTrue(queries, f'{url}: aucune requête sur {table}')
+        return queries
+
+    def assertUsesIndex(self, url, table):
+        for sql in self._main_queries(url, table):
+            plan = explain(sql)
+            self.assertEqual(full_scans(plan), [], f'{url}\n{sql}\n' + '\n'.join(plan))
+
+    def test_booking_queries_use_indexes(self):
+        """
+        Test: Liste des réservations et statistiques de check-in sans parcours complet.
+        """
+        print("\n🧪 Test: Plans des requêtes de réservations")
+
+        self.assertUsesIndex('/api/bookings/bookings/', 'bookings_booking')
+        self.assertUsesIndex('/api/bookings/receptionist/checkin-stats/', 'bookings_booking')
+
+        print("✅ Réservations : index utilisés")
+
+    def test_course_queries_use_indexes(self):
+        """
+        Test: Cours du jour et cours à venir par (tenant_id, date, status).
+        """
+        print("\n🧪 Test: Plans des requêtes de cours")
+
+        self.assertUsesIndex('/api/bookings/courses/today/', 'bookings_course')
+        self.assertUsesIndex('/api/bookings/courses/upcoming/', 'bookings_course')
+
+        print("✅ Cours : index utilisés")
+
+    def test_member_queries_use_indexes(self):
+        """
+        Test: Liste des membres (avec et sans filtre de statut) par (tenant_id, status, created_at).
+        """
+        print("\n🧪 Test: Plans des requêtes de membres")
+
+        self.assertUsesIndex('/api/members/', 'members_member')
+        self.assertUsesIndex('/api/members/?status=ACTIVE', 'members_member')
+
+        print("✅ Membres : index utilisés")
+
+    def test_subscription_and_invoice_queries_use_indexes(self):
+        """
+        Test: Listes paginées des abonnements et factures, abonnement actif d'un membre.
+        """
+        print("\n🧪 Test: Plans des requêtes d'abonnements et factures")
+
+        self.assertUsesIndex('/api/subscriptions/subscriptions/', 'subscriptions_subscription')
+        self.assertUsesIndex('/api/billing/invoices/', 'billing_invoice')
+
+        member_user = User.objects.filter(role='MEMBER', tenant_id='powerfit', member_profile__isnull=False).first()
+        self.client.force_authenticate(user=member_user)
+        self.assertUsesIndex('/api/members-portal/subscriptions/', 'subscriptions_subscription')
+
+        print("✅ Abonnements et factures : index utilisés")
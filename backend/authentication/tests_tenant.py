@@ -1,9 +1,12 @@
 # backend/authentication/tests_tenant.py
 # Tests pour vérifier l'isolation multi-tenant
 
-from django.test import TestCase, Client
+from django.test import TestCase, Client, RequestFactory
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
 from authentication.models import GymCenter
+from authentication.middleware import AdminTenantMiddleware
+from authentication.tenant_registry import tenant_registry
 from rest_framework.test import APIClient
 import json
 
@@ -373,6 +376,83 @@ class TenantMiddlewareTestCase(TestCase):
         print("   ✅ Register accessible sans contrôle de tenant")
 
 
+
+class TenantRegistryTestCase(TestCase):
+    """
+    Tests du registre des centres en mémoire utilisé par le middleware.
+    """
+    
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@gymflow.com',
+            password='admin123'
+        )
+        
+        self.powerfit = GymCenter.objects.create(
+            name='PowerFit',
+            subdomain='powerfit',
+            email='contact@powerfit.com',
+            phone='123456',
+            address='123 Street',
+            owner=self.admin,
+            tenant_id='powerfit'
+        )
+        
+        tenant_registry.invalidate()
+        self.client = APIClient()
+    
+    def test_warm_registry_costs_no_query(self):
+        """
+        Test: Une fois chaud, le registre résout le tenant sans requête SQL.
+        """
+        self.assertEqual(tenant_registry.get_by_subdomain('powerfit').tenant_id, 'powerfit')
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(tenant_registry.get_by_subdomain('powerfit').name, 'PowerFit')
+            self.assertEqual(tenant_registry.get_by_tenant_id('powerfit').subdomain, 'powerfit')
+            self.assertIsNone(tenant_registry.get_by_subdomain('inconnu'))
+            self.assertEqual(tenant_registry.get_default().tenant_id, 'powerfit')
+    
+    def test_middleware_resolves_header_from_registry(self):
+        """
+        Test: Le middleware n'interroge plus GymCenter sur un worker chaud.
+        """
+        tenant_registry.get_default()
+        
+        request = RequestFactory().get('/api/auth/centers/', HTTP_X_TENANT_SUBDOMAIN='powerfit')
+        request.user = AnonymousUser()
+        
+        with self.assertNumQueries(0):
+            AdminTenantMiddleware(lambda r: None).process_request(request)
+        
+        self.assertEqual(request.tenant_id, 'powerfit')
+        self.assertEqual(request.gym_center.full_url, 'https://powerfit.gymflow.com')
+    
+    def test_save_invalidates_registry(self):
+        """
+        Test: Désactiver un centre le retire immédiatement du registre.
+        """
+        self.assertIsNotNone(tenant_registry.get_by_subdomain('powerfit'))
+        
+        self.powerfit.is_active = False
+        self.powerfit.save()
+        
+        self.assertIsNone(tenant_registry.get_by_subdomain('powerfit'))
+    
+    def test_toggle_status_invalidates_registry(self):
+        """
+        Test: L'action toggle_status du super-admin invalide le registre.
+        """
+        self.assertIsNotNone(tenant_registry.get_by_tenant_id('powerfit'))
+        
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(f'/api/superadmin/gyms/{self.powerfit.id}/toggle_status/')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(tenant_registry.get_by_tenant_id('powerfit'))
+
+
 # Pour exécuter les tests :
 # python manage.py test authentication.tests_tenant
 # 
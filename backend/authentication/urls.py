@@ -2,7 +2,6 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     register, 
     get_user_profile, 
@@ -11,6 +10,8 @@ from .views import (
     delete_profile_picture,
     GymCenterViewSet,
     TenantTokenObtainPairView,
+    TenantTokenRefreshView,
+    logout,
     request_password_reset,
     verify_reset_token,
     reset_password_confirm,
@@ -25,7 +26,8 @@ urlpatterns = [
     # Authentification
     path('register/', register, name='register'),
     path('token/', TenantTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', TenantTokenRefreshView.as_view(), name='token_refresh'),
+    path('logout/', logout, name='logout'),
     
     # Récupération de mot de passe
     path('password-reset/request/', request_password_reset, name='password_reset_request'),
@@ -5,8 +5,10 @@ from rest_framework.decorators import api_view, permission_classes, parser_class
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
@@ -22,6 +24,8 @@ from .serializers import (
     CheckSubdomainSerializer
 )
 from authentication.models import GymCenter
+from .jwt_claims import add_user_claims, ClaimsTokenRefreshSerializer
+from .revocation import revocation_store
 
 User = get_user_model()
 
@@ -34,6 +38,11 @@ class TenantTokenObtainPairSerializer(TokenObtainPairSerializer):
     Empêche la connexion sur un sous-domaine différent de celui d'inscription.
     """
     
+    @classmethod
+    def get_token(cls, user):
+        # role / tenant_id / is_superuser dans le token : pas de lecture du User à chaque requête
+        return add_user_claims(super().get_token(user), user)
+    
     def validate(self, attrs):
         # Obtenir le gym_center depuis le contexte (ajouté par le middleware)
         request = self.context.get('request')
@@ -102,6 +111,32 @@ class TenantTokenObtainPairView(TokenObtainPairView):
     serializer_class = TenantTokenObtainPairSerializer
 
 
+class TenantTokenRefreshView(TokenRefreshView):
+    """
+    Refresh avec les claims utilisateur relus en base (rôle ou centre modifiés).
+    """
+    serializer_class = ClaimsTokenRefreshSerializer
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def logout(request):
+    """
+    Déconnexion : le refresh token fourni est révoqué et ne pourra plus être rafraîchi.
+    Le token d'accès reste valable jusqu'à son expiration (60 min maximum).
+    """
+    try:
+        refresh = RefreshToken(request.data.get('refresh', ''))
+    except TokenError:
+        return Response(
+            {"detail": "Token invalide ou expiré"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    revocation_store.revoke(refresh)
+    return Response({"message": "Déconnexion réussie"}, status=status.HTTP_200_OK)
+
+
 # ========== INSCRIPTION (REGISTER) ==========
 
 @api_view(['POST'])
@@ -1,7 +1,7 @@
 # backend/billing/admin.py
 
 from django.contrib import admin
-from .models import Invoice, Payment
+from .models import Invoice, InvoiceRun, Payment
 
 @admin.register(Invoice)
 class InvoiceAdmin(admin.ModelAdmin):
@@ -46,4 +46,11 @@ class PaymentAdmin(admin.ModelAdmin):
     list_display = ['invoice', 'amount', 'payment_date', 'payment_method']
     list_filter = ['payment_date', 'payment_method']
     search_fields = ['invoice__invoice_number', 'reference']
-    date_hierarchy = 'payment_date'
\ No newline at end of file
+    date_hierarchy = 'payment_date'
+
+@admin.register(InvoiceRun)
+class InvoiceRunAdmin(admin.ModelAdmin):
+    list_display = ['tenant_id', 'period', 'status', 'invoices_created', 'pdfs_rendered', 'pdfs_failed', 'attempts', 'finished_at']
+    list_filter = ['status', 'period']
+    search_fields = ['tenant_id']
+    readonly_fields = [field.name for field in InvoiceRun._meta.fields]
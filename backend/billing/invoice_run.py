@@ -0,0 +1,243 @@
+# backend/billing/invoice_run.py
+
+"""
+🧾 Facturation de fin de mois d'un centre (`manage.py generate_invoices`).
+
+1. Abonnements facturables lus en une requête : démarrés dans la période,
+   payés ou en cours (ACTIVE / EXPIRED), sans facture (ventes au comptoir ;
+   les paiements Stripe sont déjà facturés par le webhook).
+2. Par lots de BATCH_SIZE, dans une transaction : un bloc de numéros
+   (Invoice.allocate_invoice_numbers), puis bulk_create.
+3. PDF rendus par lots de RENDER_CHUNK dans un pool de processus « spawn »
+   (billing/invoice_worker.py), un InvoiceRenderer par centre et par processus.
+
+Reprise : un lot validé n'est jamais refait (ses abonnements ont une facture),
+et seuls les PDF non prêts sont rendus. Relancer la commande après un arrêt
+reprend le même InvoiceRun là où il s'était arrêté.
+"""
+
+import calendar
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from authentication.models import GymCenter
+from authentication.structured_logging import get_logger
+from subscriptions.models import Subscription
+from .invoice_worker import init_worker, render_invoice_batch
+from .models import Invoice, InvoiceRun
+
+logger = get_logger('billing.invoice_run')
+
+# Factures par bulk_create (et par transaction)
+BATCH_SIZE = 500
+# Factures par tâche envoyée au pool de rendu
+RENDER_CHUNK = 25
+# En dessous : rendu dans le processus courant (démarrer un pool coûte plus cher)
+POOL_MIN_INVOICES = 50
+# Run RUNNING sans progression depuis ce délai → processus considéré arrêté, reprise autorisée
+STALE_AFTER = timedelta(minutes=10)
+# Erreurs de rendu gardées dans le rapport
+MAX_REPORTED_ERRORS = 50
+
+
+class InvoiceRunInProgress(Exception):
+    """Un autre processus facture déjà ce centre pour cette période"""
+
+
+def parse_period(value):
+    """'AAAA-MM' → (premier jour, dernier jour) ; ValueError si invalide"""
+    try:
+        year, month = (int(part) for part in value.split('-'))
+        last_day = calendar.monthrange(year, month)[1]
+    except (ValueError, calendar.IllegalMonthError):
+        raise ValueError(f'Période invalide "{value}" (format attendu : AAAA-MM)')
+    return date(year, month, 1), date(year, month, last_day)
+
+
+def run_workers_count():
+    """Processus de rendu (settings.INVOICE_RUN_WORKERS, défaut : nombre de CPU)"""
+    return getattr(settings, 'INVOICE_RUN_WORKERS', None) or os.cpu_count() or 1
+
+
+def worker_settings():
+    """Réglages du processus courant transmis aux processus de rendu (voir invoice_worker.init_worker)"""
+    return {'DATABASES': settings.DATABASES, 'MEDIA_ROOT': str(settings.MEDIA_ROOT)}
+
+
+def billable_subscriptions(tenant_id, start, end):
+    """Abonnements du centre démarrés dans la période et pas encore facturés"""
+    return Subscription.objects.filter(
+        tenant_id=tenant_id,
+        status__in=['ACTIVE', 'EXPIRED'],
+        start_date__range=(start, end),
+        invoices__isnull=True
+    ).select_related('member', 'plan').order_by('start_date', 'pk')
+
+
+def build_invoice(subscription, invoice_number, issue_date, company):
+    """Facture non enregistrée d'un abonnement (montants calculés : bulk_create ne passe pas par save)"""
+    member = subscription.member
+    invoice = Invoice(
+        invoice_number=invoice_number,
+        member=member,
+        subscription=subscription,
+        amount=subscription.amount_paid,
+        tax_rate=19,
+        status='PAID' if subscription.payment_date else 'PENDING',
+        issue_date=issue_date,
+        payment_date=subscription.payment_date,
+        payment_method=subscription.payment_method,
+        company_name=company['name'],
+        company_address=company['address'],
+        customer_name=member.full_name,
+        customer_email=member.email,
+        customer_address=member.address or '',
+        line_items=[{
+            'description': f"Abonnement {subscription.plan.name} - {subscription.plan.duration_days} jours",
+            'quantity': 1,
+            'unit_price': float(subscription.amount_paid),
+            'total': float(subscription.amount_paid)
+        }],
+        tenant_id=subscription.tenant_id
+    )
+    invoice.compute_totals()
+    return invoice
+
+
+def pending_pdf_ids(tenant_id, start, end):
+    """Factures de la période dont le PDF n'est pas prêt (nouvelles, ou en échec au run précédent)"""
+    return list(
+        Invoice.objects.filter(
+            tenant_id=tenant_id,
+            subscription__start_date__range=(start, end)
+        ).exclude(pdf_status='READY').order_by('pk').values_list('pk', flat=True)
+    )
+
+
+def claim_run(tenant_id, period):
+    """Créer ou reprendre le run (centre, période) ; refusé si un autre processus y travaille"""
+    with transaction.atomic():
+        run, _ = InvoiceRun.objects.select_for_update().get_or_create(tenant_id=tenant_id, period=period)
+        if run.status == 'RUNNING' and run.attempts and run.updated_at > timezone.now() - STALE_AFTER:
+            raise InvoiceRunInProgress(f'Facturation {tenant_id} {period} déjà en cours')
+        run.status = 'RUNNING'
+        run.attempts += 1
+        # Les PDF en échec sont retentés à chaque passage
+        run.pdfs_failed = 0
+        run.finished_at = None
+        run.save()
+    return run
+
+
+def _progress(run, **counters):
+    """Cumuler les compteurs du run (et rafraîchir updated_at, qui sert de battement de cœur)"""
+    InvoiceRun.objects.filter(pk=run.pk).update(
+        updated_at=timezone.now(),
+        **{field: F(field) + value for field, value in counters.items()}
+    )
+
+
+def create_invoices(run, subscriptions, issue_date, company):
+    """bulk_create par lots de BATCH_SIZE, chacun avec son bloc de numéros → nombre de factures créées"""
+    created = 0
+    for offset in range(0, len(subscriptions), BATCH_SIZE):
+        batch = subscriptions[offset:offset + BATCH_SIZE]
+        with transaction.atomic():
+            numbers = Invoice.allocate_invoice_numbers(len(batch))
+            Invoice.objects.bulk_create([
+                build_invoice(subscription, number, issue_date, company)
+                for subscription, number in zip(batch, numbers)
+            ])
+            _progress(run, invoices_created=len(batch))
+        created += len(batch)
+        logger.info("🧾 Factures créées", tenant=run.tenant_id, period=run.period, created=created, total=len(subscriptions))
+    return created
+
+
+def render_pdfs(run, invoice_ids, workers, on_progress=None):
+    """Rendre les PDF par lots, en parallèle au-delà de POOL_MIN_INVOICES → (rendus, [(numéro, erreur)])"""
+    chunks = [invoice_ids[i:i + RENDER_CHUNK] for i in range(0, len(invoice_ids), RENDER_CHUNK)]
+    rendered = 0
+    failures = []
+
+    def collect(results):
+        nonlocal rendered
+        for count, errors in results:
+            rendered += count
+            failures.extend(errors)
+            _progress(run, pdfs_rendered=count, pdfs_failed=len(errors))
+            if on_progress:
+                on_progress(rendered + len(failures), len(invoice_ids))
+
+    if workers <= 1 or len(invoice_ids) < POOL_MIN_INVOICES:
+        collect(render_invoice_batch(chunk) for chunk in chunks)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+            initargs=(worker_settings(),)
+        ) as pool:
+            collect(pool.map(render_invoice_batch, chunks))
+    return rendered, failures
+
+
+def run_invoicing(tenant_id, period, workers=None, on_progress=None):
+    """
+    Facturer la période d'un centre, ou reprendre un run interrompu.
+    Retourne l'InvoiceRun à jour (compteurs cumulés, rapport du passage).
+    """
+    start, end = parse_period(period)
+    workers = run_workers_count() if workers is None else workers
+    run = claim_run(tenant_id, period)
+    report = {'attempt': run.attempts, 'workers': workers}
+    # Reste FAILED si le passage est interrompu (exception, Ctrl+C) : la relance reprend le run
+    status = 'FAILED'
+
+    try:
+        started = time.monotonic()
+        subscriptions = list(billable_subscriptions(tenant_id, start, end))
+        company = GymCenter.objects.filter(tenant_id=tenant_id).values('name', 'address').first() or {
+            'name': 'GymFlow', 'address': 'Tunis, Tunisie'
+        }
+        report['created'] = create_invoices(run, subscriptions, end, company)
+        report['create_seconds'] = round(time.monotonic() - started, 2)
+
+        started = time.monotonic()
+        invoice_ids = pending_pdf_ids(tenant_id, start, end)
+        rendered, failures = render_pdfs(run, invoice_ids, workers, on_progress)
+        report.update(
+            to_render=len(invoice_ids),
+            rendered=rendered,
+            failed=len(failures),
+            errors=[f'{number}: {error}' for number, error in failures[:MAX_REPORTED_ERRORS]],
+            render_seconds=round(time.monotonic() - started, 2)
+        )
+        status = 'FAILED' if failures else 'DONE'
+    except Exception as e:
+        logger.exception("❌ Facturation interrompue", tenant=tenant_id, period=period)
+        report['error'] = str(e)
+        raise
+    finally:
+        InvoiceRun.objects.filter(pk=run.pk).update(
+            status=status,
+            report=report,
+            finished_at=timezone.now(),
+            updated_at=timezone.now()
+        )
+        run.refresh_from_db()
+
+    summary = {key: value for key, value in report.items() if key != 'errors'}
+    if run.status == 'DONE':
+        logger.info("✅ Facturation terminée", tenant=tenant_id, period=period, **summary)
+    else:
+        logger.warning("⚠️ Facturation terminée avec des PDF en échec", tenant=tenant_id, period=period, **summary)
+    return run
@@ -0,0 +1,45 @@
+# backend/billing/invoice_worker.py
+
+"""
+Point d'entrée des processus de rendu de la facturation mensuelle (billing/invoice_run.py).
+Chargé par les workers « spawn » avant django.setup() : aucun modèle importé au chargement.
+"""
+
+import django
+
+
+def init_worker(overrides=None):
+    # « spawn » relit settings.py : reprendre la base et le MEDIA_ROOT du processus parent (base de test, surcharges)
+    if overrides:
+        from django.conf import settings
+        for name, value in overrides.items():
+            setattr(settings, name, value)
+    django.setup()
+
+
+def render_invoice_batch(invoice_ids):
+    """
+    Rendre les PDF d'un lot de factures, puis enregistrer les statuts en deux requêtes.
+    Retourne (nombre de PDF rendus, [(numéro de facture, erreur)]).
+    """
+    from .models import Invoice
+    from .pdf_generator import generate_invoice_pdf
+
+    rendered = []
+    failures = []
+    for invoice in Invoice.objects.filter(pk__in=invoice_ids).order_by('pk'):
+        try:
+            invoice.pdf_file = generate_invoice_pdf(invoice)
+        except Exception as e:
+            failures.append((invoice.invoice_number, str(e)))
+            continue
+        invoice.pdf_status = 'READY'
+        rendered.append(invoice)
+
+    # bulk_update plutôt que save() : pas de recalcul des montants ni de updated_at
+    Invoice.objects.bulk_update(rendered, ['pdf_file', 'pdf_status'])
+    if failures:
+        Invoice.objects.filter(
+            invoice_number__in=[number for number, _ in failures]
+        ).update(pdf_status='FAILED')
+    return len(rendered), failures
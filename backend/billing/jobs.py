@@ -0,0 +1,199 @@
+# backend/billing/jobs.py
+
+"""
+⚙️ File de tâches en base de données (sans broker) pour les rendus hors requête.
+
+- enqueue() ajoute une tâche dans la transaction de l'appelant : la tâche
+  n'existe que si la facture a bien été enregistrée.
+- claim_jobs() réserve des tâches prêtes (SELECT ... FOR UPDATE SKIP LOCKED
+  sur PostgreSQL, puis UPDATE conditionnel : un seul worker gagne chaque tâche).
+- run_job() exécute le handler enregistré pour `kind`, avec nouvelles
+  tentatives espacées (backoff) jusqu'à max_attempts.
+
+Le processus `manage.py run_workers` enchaîne claim_jobs() / run_job()
+dans un pool de processus.
+"""
+
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BackgroundJob, Invoice
+
+logger = logging.getLogger('billing.jobs')
+
+# Délai avant nouvelle tentative : RETRY_DELAY * 2^(tentatives-1)
+RETRY_DELAY = timedelta(seconds=30)
+
+# Tâche RUNNING sans nouvelles depuis ce délai → worker considéré mort, tâche remise en file
+STALE_AFTER = timedelta(minutes=10)
+
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    """Décorateur : enregistrer la fonction qui traite les tâches `kind` (reçoit le payload)"""
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def enqueue(kind, payload=None, key=''):
+    """
+    Ajouter une tâche. Avec `key`, idempotent : si une tâche QUEUED/RUNNING
+    existe déjà pour cette clé, elle est retournée au lieu d'en créer une autre.
+    Garanti par la contrainte backgroundjob_active_key_uniq : deux appels
+    simultanés (webhooks rejoués) ne créent qu'une tâche.
+    """
+    if not key:
+        return BackgroundJob.objects.create(kind=kind, payload=payload or {}, key=key)
+
+    active = BackgroundJob.objects.filter(key=key, status__in=['QUEUED', 'RUNNING'])
+    existing = active.first()
+    if existing:
+        return existing
+    try:
+        # Point de sauvegarde : l'échec n'annule pas la transaction de l'appelant
+        with transaction.atomic():
+            return BackgroundJob.objects.create(kind=kind, payload=payload or {}, key=key)
+    except IntegrityError:
+        # Créée entre-temps par un appel concurrent
+        existing = active.first()
+        if existing is None:
+            raise
+        return existing
+
+
+def requeue_stale_jobs(now=None):
+    """Remettre en file les tâches RUNNING d'un worker arrêté en cours de route"""
+    now = now or timezone.now()
+    return BackgroundJob.objects.filter(
+        status='RUNNING',
+        locked_at__lt=now - STALE_AFTER
+    ).update(status='QUEUED', locked_at=None, locked_by='')
+
+
+def claim_jobs(limit, worker=None):
+    """Réserver jusqu'à `limit` tâches prêtes pour ce worker, retourne leurs id"""
+    worker = worker or worker_name()
+    now = timezone.now()
+
+    with transaction.atomic():
+        ready = BackgroundJob.objects.filter(status='QUEUED', run_after__lte=now).order_by('run_after', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            ready = ready.select_for_update(skip_locked=True)
+        candidate_ids = list(ready.values_list('id', flat=True)[:limit])
+
+        claimed = []
+        for job_id in candidate_ids:
+            # UPDATE conditionnel : sans SKIP LOCKED (SQLite), un seul worker gagne la tâche
+            if BackgroundJob.objects.filter(pk=job_id, status='QUEUED').update(
+                status='RUNNING',
+                locked_at=now,
+                locked_by=worker,
+                attempts=F('attempts') + 1
+            ):
+                claimed.append(job_id)
+
+    return claimed
+
+
+def run_job(job_id):
+    """Exécuter une tâche réservée. Retourne le statut final (DONE, QUEUED pour réessai, FAILED)."""
+    job = BackgroundJob.objects.get(pk=job_id)
+    handler = JOB_HANDLERS.get(job.kind)
+
+    try:
+        if handler is None:
+            raise LookupError(f'Aucun handler pour la tâche "{job.kind}"')
+        handler(job.payload)
+    except Exception as e:
+        logger.error(f"❌ Tâche {job.kind} #{job.pk} (tentative {job.attempts}): {e}")
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = 'QUEUED'
+            job.run_after = timezone.now() + RETRY_DELAY * (2 ** (job.attempts - 1))
+        else:
+            job.status = 'FAILED'
+            job.finished_at = timezone.now()
+        job.last_error = error
+        job.locked_at = None
+        job.locked_by = ''
+        job.save(update_fields=['status', 'run_after', 'last_error', 'locked_at', 'locked_by', 'finished_at'])
+
+        if job.status == 'FAILED':
+            on_failure = getattr(handler, 'on_failure', None)
+            if on_failure:
+                on_failure(job.payload)
+        return job.status
+
+    BackgroundJob.objects.filter(pk=job.pk).update(
+        status='DONE',
+        finished_at=timezone.now(),
+        locked_at=None,
+        last_error=''
+    )
+    return 'DONE'
+
+
+# ==================== RENDU DES FACTURES ====================
+
+def enqueue_invoice_pdf(invoice, force=False):
+    """
+    Programmer le rendu PDF d'une facture (idempotent : une tâche en file par facture).
+    Un PDF déjà prêt n'est pas reprogrammé, sauf force=True (facture modifiée).
+    """
+    if not force and invoice_pdf_is_ready(invoice):
+        return None
+    if invoice.pdf_status != 'PENDING':
+        Invoice.objects.filter(pk=invoice.pk).update(pdf_status='PENDING')
+        invoice.pdf_status = 'PENDING'
+    return enqueue('render_invoice_pdf', {'invoice_id': invoice.pk}, key=f'invoice_pdf:{invoice.pk}')
+
+
+def render_invoice_pdf_now(invoice):
+    """Rendre le PDF et l'enregistrer (worker, ou secours synchrone du téléchargement)"""
+    from .pdf_generator import generate_invoice_pdf
+
+    Invoice.objects.filter(pk=invoice.pk).update(pdf_status='RENDERING')
+    pdf_path = generate_invoice_pdf(invoice)
+    # update() plutôt que save() : pas de recalcul des montants ni de updated_at
+    Invoice.objects.filter(pk=invoice.pk).update(pdf_file=pdf_path, pdf_status='READY')
+    invoice.pdf_file = pdf_path
+    invoice.pdf_status = 'READY'
+    return pdf_path
+
+
+def invoice_pdf_is_ready(invoice):
+    return invoice.pdf_status == 'READY' and bool(invoice.pdf_file) and os.path.exists(invoice.pdf_file.path)
+
+
+@job_handler('render_invoice_pdf')
+def render_invoice_pdf(payload):
+    """Handler : idempotent, un PDF prêt (statut READY) n'est pas régénéré"""
+    invoice = Invoice.objects.filter(pk=payload['invoice_id']).first()
+    if invoice is None:
+        logger.warning(f"⚠️ Facture {payload['invoice_id']} supprimée, rendu ignoré")
+        return
+    if invoice_pdf_is_ready(invoice):
+        return
+    render_invoice_pdf_now(invoice)
+    logger.info(f"✅ PDF facture {invoice.invoice_number} généré")
+
+
+def _invoice_pdf_failed(payload):
+    Invoice.objects.filter(pk=payload['invoice_id']).update(pdf_status='FAILED')
+
+
+render_invoice_pdf.on_failure = _invoice_pdf_failed
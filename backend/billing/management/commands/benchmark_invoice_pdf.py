@@ -0,0 +1,80 @@
+# backend/billing/management/commands/benchmark_invoice_pdf.py
+
+import io
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from billing.models import Invoice
+from billing.pdf_generator import InvoiceRenderer
+
+
+def sample_invoices(count):
+    """Factures en mémoire (non enregistrées) : le rendu seul est mesuré"""
+    invoices = []
+    for index in range(count):
+        amount = Decimal('90.000') + index % 7
+        tax_amount = amount * Decimal('0.19')
+        invoices.append(Invoice(
+            invoice_number=f'FAC-BENCH-{index + 1:05d}',
+            amount=amount,
+            tax_rate=Decimal('19'),
+            tax_amount=tax_amount,
+            total_amount=amount + tax_amount,
+            status='PAID' if index % 2 else 'PENDING',
+            issue_date=date(2025, 1, 31),
+            due_date=date(2025, 1, 31) + timedelta(days=30),
+            payment_method='CARD',
+            company_name='GymFlow',
+            company_address='Tunis, Tunisie',
+            customer_name=f'Membre {index}',
+            customer_email=f'membre{index}@example.com',
+            line_items=[
+                {'description': 'Abonnement mensuel', 'quantity': 1, 'unit_price': str(amount), 'total': str(amount)},
+                {'description': 'Frais de dossier', 'quantity': 1, 'unit_price': '0', 'total': '0'},
+            ],
+            tenant_id='benchmark',
+        ))
+    return invoices
+
+
+def measure(render, invoices, repeat):
+    """Meilleur temps moyen par facture (ms) sur `repeat` passes, PDF écrit dans un BytesIO"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for invoice in invoices:
+            render(invoice, io.BytesIO())
+        elapsed = (time.perf_counter() - started) / len(invoices)
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Mesure le temps de rendu PDF par facture, même cible (BytesIO) des deux côtés : '
+        'InvoiceRenderer recréé à chaque facture (styles et flowables reconstruits) vs renderer réutilisé'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200, help='Nombre de factures rendues par mesure')
+        parser.add_argument('--repeat', type=int, default=3, help='Passes par mesure (meilleur temps retenu)')
+
+    def handle(self, *args, **options):
+        invoices = sample_invoices(options['count'])
+        renderer = InvoiceRenderer()
+        # Premier rendu hors mesure (polices, imports paresseux de reportlab)
+        renderer.render(invoices[0])
+        pdf_size = sum(len(renderer.render(invoice)) for invoice in invoices) / len(invoices)
+
+        # ⚠️ Le rendu d'origine (cellules numériques en Paragraph) n'existe plus : la référence
+        # est le renderer actuel sans réutilisation, seule la précompilation est mesurée
+        before = measure(lambda invoice, output: InvoiceRenderer().render(invoice, output), invoices, options['repeat'])
+        after = measure(renderer.render, invoices, options['repeat'])
+
+        self.stdout.write(f'{len(invoices)} factures, {pdf_size / 1024:.1f} Ko/PDF en moyenne')
+        self.stdout.write(f'Avant (renderer recréé par facture) : {before:.2f} ms/facture')
+        self.stdout.write(f'Après (renderer réutilisé) : {after:.2f} ms/facture')
+        self.stdout.write(self.style.SUCCESS(f'Gain : x{before / after:.2f}'))
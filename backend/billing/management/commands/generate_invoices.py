@@ -0,0 +1,52 @@
+# Fichier: backend/billing/management/commands/generate_invoices.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from billing.invoice_run import InvoiceRunInProgress, run_invoicing
+
+
+def previous_period():
+    first_of_month = timezone.now().date().replace(day=1)
+    return (first_of_month - timedelta(days=1)).strftime('%Y-%m')
+
+
+class Command(BaseCommand):
+    help = 'Facturation de fin de mois : factures des abonnements de la période et PDF rendus en parallèle'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', required=True, help='tenant_id du centre')
+        parser.add_argument('--period', help='Période facturée AAAA-MM (défaut : mois précédent)')
+        parser.add_argument('--workers', type=int, help='Processus de rendu PDF (défaut : nombre de CPU)')
+
+    def handle(self, *args, **options):
+        period = options['period'] or previous_period()
+
+        def on_progress(done, total):
+            self.stdout.write(f'📄 {done}/{total} PDF traités')
+
+        try:
+            run = run_invoicing(options['tenant'], period, workers=options['workers'], on_progress=on_progress)
+        except ValueError as e:
+            raise CommandError(str(e))
+        except InvoiceRunInProgress as e:
+            raise CommandError(f'{e} (relancer une fois le run précédent terminé)')
+
+        report = run.report
+        self.stdout.write(
+            f'{run.tenant_id} {run.period} — passage n°{run.attempts} ({report["workers"]} processus)\n'
+            f'  Factures créées : {report["created"]} en {report["create_seconds"]}s\n'
+            f'  PDF rendus : {report["rendered"]}/{report["to_render"]} en {report["render_seconds"]}s\n'
+            f'  Total du run : {run.invoices_created} facture(s), {run.pdfs_rendered} PDF'
+        )
+        for error in report['errors']:
+            self.stdout.write(self.style.ERROR(f'  ❌ {error}'))
+
+        if run.status == 'DONE':
+            self.stdout.write(self.style.SUCCESS(f'✅ Facturation {run.period} terminée'))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ {run.pdfs_failed} PDF en échec : relancer la commande pour les reprendre'
+            ))
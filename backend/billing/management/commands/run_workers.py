@@ -0,0 +1,81 @@
+# Fichier: backend/billing/management/commands/run_workers.py
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from billing.jobs import claim_jobs, requeue_stale_jobs, run_job, worker_name
+
+
+def _init_worker():
+    """Processus du pool : Django prêt (méthode spawn) et connexions propres au processus"""
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Traite la file de tâches en base (rendu des PDF de factures) dans un pool de processus'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=2,
+            help='Nombre de processus de rendu (0 = dans le processus courant)'
+        )
+        parser.add_argument('--batch-size', type=int, default=10, help='Tâches réservées par tour')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Attente (s) quand la file est vide')
+        parser.add_argument('--once', action='store_true', help='Vider la file puis s\'arrêter')
+
+    def handle(self, *args, **options):
+        processes = max(options['processes'], 0)
+        batch_size = max(options['batch_size'], 1)
+        worker = worker_name()
+
+        self.stdout.write(f'👷 Worker {worker} démarré ({processes or "sans"} processus de rendu)')
+
+        pool = None
+        if processes:
+            # Les connexions ouvertes ne doivent pas être partagées avec les processus fils
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_worker)
+
+        totals = {'DONE': 0, 'QUEUED': 0, 'FAILED': 0}
+        try:
+            while True:
+                requeue_stale_jobs()
+                job_ids = claim_jobs(batch_size, worker=worker)
+
+                if not job_ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                started = time.monotonic()
+                if pool:
+                    results = list(pool.map(run_job, job_ids))
+                else:
+                    results = [run_job(job_id) for job_id in job_ids]
+
+                for result in results:
+                    totals[result] += 1
+                self.stdout.write(
+                    f'{len(job_ids)} tâche(s) traitée(s) en {time.monotonic() - started:.2f}s '
+                    f'({results.count("DONE")} ok, {results.count("QUEUED")} à réessayer, '
+                    f'{results.count("FAILED")} en échec)'
+                )
+        except KeyboardInterrupt:
+            self.stdout.write('⏹️ Arrêt demandé')
+        finally:
+            if pool:
+                pool.shutdown(wait=True)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{totals["DONE"]} tâche(s) terminée(s), {totals["QUEUED"]} à réessayer, {totals["FAILED"]} en échec'
+            )
+        )
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:51
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def mark_existing_pdfs_ready(apps, schema_editor):
+    """Factures dont le PDF existe déjà → READY (pas de nouveau rendu)"""
+    Invoice = apps.get_model('billing', 'Invoice')
+    Invoice.objects.exclude(pdf_file__isnull=True).exclude(pdf_file='').update(pdf_status='READY')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0002_alter_invoice_subscription_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_status',
+            field=models.CharField(choices=[('PENDING', 'En attente'), ('RENDERING', 'En cours'), ('READY', 'Prêt'), ('FAILED', 'Échec')], default='PENDING', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50)),
+                ('payload', models.JSONField(default=dict)),
+                ('key', models.CharField(blank=True, db_index=True, max_length=100)),
+                ('status', models.CharField(choices=[('QUEUED', 'En attente'), ('RUNNING', 'En cours'), ('DONE', 'Terminée'), ('FAILED', 'Échec')], default='QUEUED', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=3)),
+                ('last_error', models.TextField(blank=True)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('locked_by', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Tâche de fond',
+                'verbose_name_plural': 'Tâches de fond',
+                'ordering': ['run_after', 'id'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='billing_bac_status_4763a5_idx')],
+            },
+        ),
+        migrations.RunPython(mark_existing_pdfs_ready, migrations.RunPython.noop),
+    ]
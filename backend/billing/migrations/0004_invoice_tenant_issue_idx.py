@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0003_invoice_pdf_status_backgroundjob'),
+        ('members', '0004_tenant_hot_indexes'),
+        ('subscriptions', '0002_tenant_hot_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['tenant_id', '-issue_date', '-created_at'], name='invoice_tenant_issue_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0004_invoice_tenant_issue_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.CharField(max_length=100)),
+                ('period', models.CharField(help_text='AAAA-MM', max_length=7)),
+                ('status', models.CharField(choices=[('RUNNING', 'En cours'), ('DONE', 'Terminé'), ('FAILED', 'Échec')], default='RUNNING', max_length=20)),
+                ('invoices_created', models.PositiveIntegerField(default=0)),
+                ('pdfs_rendered', models.PositiveIntegerField(default=0)),
+                ('pdfs_failed', models.PositiveIntegerField(default=0)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('report', models.JSONField(blank=True, default=dict)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Facturation mensuelle',
+                'verbose_name_plural': 'Facturations mensuelles',
+                'ordering': ['-period', 'tenant_id'],
+                'constraints': [models.UniqueConstraint(fields=('tenant_id', 'period'), name='invoice_run_tenant_period_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:17
+
+from django.db import migrations, models
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    """Doublons QUEUED/RUNNING créés avant la contrainte : la plus ancienne tâche est gardée"""
+    BackgroundJob = apps.get_model('billing', 'BackgroundJob')
+    active = BackgroundJob.objects.filter(status__in=['QUEUED', 'RUNNING']).exclude(key='')
+    seen = set()
+    for job in active.order_by('key', 'id').only('id', 'key'):
+        if job.key in seen:
+            BackgroundJob.objects.filter(pk=job.pk).update(status='FAILED', last_error='Doublon (clé déjà en file)')
+        seen.add(job.key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0005_invoicerun'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='backgroundjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['QUEUED', 'RUNNING']), models.Q(('key', ''), _negated=True)), fields=('key',), name='backgroundjob_active_key_uniq'),
+        ),
+    ]
@@ -62,8 +62,15 @@ class Invoice(models.Model):
     # Notes
     notes = models.TextField(blank=True)
     
-    # PDF généré
+    # PDF généré (rendu par les workers, voir billing/jobs.py)
+    PDF_STATUS_CHOICES = [
+        ('PENDING', 'En attente'),
+        ('RENDERING', 'En cours'),
+        ('READY', 'Prêt'),
+        ('FAILED', 'Échec'),
+    ]
     pdf_file = models.FileField(upload_to='invoices/pdfs/', null=True, blank=True)
+    pdf_status = models.CharField(max_length=20, choices=PDF_STATUS_CHOICES, default='PENDING')
     
     # Multi-tenant
     tenant_id = models.CharField(max_length=100, db_index=True)
@@ -80,6 +87,8 @@ class Invoice(models.Model):
             models.Index(fields=['tenant_id', 'status']),
             models.Index(fields=['member', 'status']),
             models.Index(fields=['subscription', 'status']),  # ✅ Nouvel index
+            # ✅ Liste paginée des factures d'un centre (InvoicePagination)
+            models.Index(fields=['tenant_id', '-issue_date', '-created_at'], name='invoice_tenant_issue_idx'),
         ]
     
     def __str__(self):
@@ -90,6 +99,11 @@ class Invoice(models.Model):
         if not self.invoice_number:
             self.invoice_number = self._generate_invoice_number()
         
+        self.compute_totals()
+        super().save(*args, **kwargs)
+    
+    def compute_totals(self):
+        """TVA, total et échéance : appelé par save(), et avant bulk_create (qui ne passe pas par save)"""
         # Calculer la TVA et le total
         self.tax_amount = (self.amount * self.tax_rate) / 100
         self.total_amount = self.amount + self.tax_amount
@@ -98,29 +112,28 @@ class Invoice(models.Model):
         if not self.due_date:
             from datetime import timedelta
             self.due_date = self.issue_date + timedelta(days=30)
-        
-        super().save(*args, **kwargs)
     
     def _generate_invoice_number(self):
         """Générer un numéro de facture unique"""
+        return Invoice.allocate_invoice_numbers()[0]
+
+    @staticmethod
+    def allocate_invoice_numbers(count=1):
+        """
+        Réserver `count` numéros de facture consécutifs (FAC-2025-00001...).
+        invoice_number est unique tous centres confondus : la séquence est
+        donc annuelle et partagée, sinon deux centres obtiendraient le même numéro.
+        """
+        from authentication.sequences import allocate, last_number
+
         year = timezone.now().year
-        
-        # Compter les factures de l'année pour ce tenant
-        last_invoice = Invoice.objects.filter(
-            invoice_number__startswith=f'FAC-{year}',
-            tenant_id=self.tenant_id
-        ).order_by('-invoice_number').first()
-        
-        if last_invoice:
-            try:
-                last_num = int(last_invoice.invoice_number.split('-')[-1])
-                new_num = last_num + 1
-            except (ValueError, IndexError):
-                new_num = 1
-        else:
-            new_num = 1
-        
-        return f"FAC-{year}-{new_num:05d}"
+        numbers = allocate(
+            'invoice_number',
+            year=year,
+            count=count,
+            seed=lambda y: last_number(Invoice.objects, 'invoice_number', f'FAC-{y}-')
+        )
+        return [f"FAC-{year}-{number:05d}" for number in numbers]
     
     def mark_as_paid(self, payment_method='', payment_intent_id=''):
         """Marquer la facture comme payée"""
@@ -156,4 +169,97 @@ class Payment(models.Model):
         verbose_name_plural = 'Paiements'
     
     def __str__(self):
-        return f"Paiement {self.amount} TND - {self.invoice.invoice_number}"
\ No newline at end of file
+        return f"Paiement {self.amount} TND - {self.invoice.invoice_number}"
+
+
+class InvoiceRun(models.Model):
+    """
+    Facturation de fin de mois d'un centre (`manage.py generate_invoices`) :
+    une ligne par (centre, période), mise à jour au fil du run. Relancer la
+    commande reprend le même run là où il s'était arrêté.
+    """
+
+    STATUS_CHOICES = [
+        ('RUNNING', 'En cours'),
+        ('DONE', 'Terminé'),
+        ('FAILED', 'Échec'),
+    ]
+
+    tenant_id = models.CharField(max_length=100)
+    period = models.CharField(max_length=7, help_text="AAAA-MM")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='RUNNING')
+
+    # Progression (cumulée sur les reprises)
+    invoices_created = models.PositiveIntegerField(default=0)
+    pdfs_rendered = models.PositiveIntegerField(default=0)
+    pdfs_failed = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+
+    # Rapport du dernier passage : durées, erreurs de rendu
+    report = models.JSONField(default=dict, blank=True)
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    # Rafraîchi à chaque lot : un run RUNNING figé depuis longtemps est repris
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-period', 'tenant_id']
+        verbose_name = 'Facturation mensuelle'
+        verbose_name_plural = 'Facturations mensuelles'
+        constraints = [
+            models.UniqueConstraint(fields=['tenant_id', 'period'], name='invoice_run_tenant_period_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.tenant_id} {self.period} ({self.status})"
+
+
+class BackgroundJob(models.Model):
+    """
+    File de tâches en base (pas de broker) : une ligne par tâche,
+    traitée par `manage.py run_workers`, voir billing/jobs.py.
+    """
+
+    STATUS_CHOICES = [
+        ('QUEUED', 'En attente'),
+        ('RUNNING', 'En cours'),
+        ('DONE', 'Terminée'),
+        ('FAILED', 'Échec'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    # Clé de déduplication : une seule tâche QUEUED/RUNNING par clé
+    key = models.CharField(max_length=100, blank=True, db_index=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='QUEUED')
+
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        verbose_name = 'Tâche de fond'
+        verbose_name_plural = 'Tâches de fond'
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+        constraints = [
+            # ✅ Déduplication garantie par la base : deux enqueue() simultanés ne créent pas deux tâches
+            models.UniqueConstraint(
+                fields=['key'],
+                condition=models.Q(status__in=['QUEUED', 'RUNNING']) & ~models.Q(key=''),
+                name='backgroundjob_active_key_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
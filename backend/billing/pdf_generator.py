@@ -1,187 +1,294 @@
 # backend/billing/pdf_generator.py
 
+"""
+🧾 Rendu PDF des factures.
+
+InvoiceRenderer précompile une fois ce qui ne dépend pas de la facture :
+feuille de styles, ParagraphStyle personnalisés, TableStyle, en-tête et
+pied de page du centre. render() ne construit plus que les paragraphes
+propres à la facture, et écrit dans n'importe quel flux (mémoire, fichier,
+HttpResponse).
+
+Un renderer par (centre, thread) : les flowables partagés sont mis en page
+à chaque build, ils ne doivent pas servir à deux rendus simultanés.
+Mesure : `manage.py benchmark_invoice_pdf`.
+"""
+
+import io
+import os
+import tempfile
+import threading
+from xml.sax.saxutils import escape
+
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.enums import TA_RIGHT, TA_CENTER
+from reportlab.lib.enums import TA_CENTER
 from django.conf import settings
-import os
-from datetime import datetime
+from django.http import HttpResponse
+
+from authentication.tenant_registry import tenant_registry
+
+PRIMARY_COLOR = colors.HexColor('#00357a')
+LIGHT_GREY = colors.HexColor('#f0f0f0')
+
+INFO_TABLE_STYLE = TableStyle([
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('BACKGROUND', (0, 0), (0, 0), LIGHT_GREY),
+    ('BACKGROUND', (1, 0), (1, 0), LIGHT_GREY),
+    ('PADDING', (0, 0), (-1, -1), 10),
+    ('BOX', (0, 0), (-1, -1), 1, colors.grey),
+])
+
+LINE_ITEMS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), PRIMARY_COLOR),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('TOPPADDING', (0, 0), (-1, 0), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')]),
+    # Cellules texte simple (quantités, montants) : même rendu qu'un Paragraph « Normal » 10 pt
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ('LEADING', (0, 1), (-1, -1), 12),
+    ('ALIGN', (1, 1), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 1), (-1, -1), 'TOP'),
+])
+
+TOTALS_TABLE_STYLE = TableStyle([
+    ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
+    ('LINEABOVE', (2, 2), (-1, 2), 2, PRIMARY_COLOR),
+    ('BACKGROUND', (2, 2), (-1, 2), LIGHT_GREY),
+    ('PADDING', (2, 2), (-1, 2), 10),
+    ('FONTNAME', (3, 0), (3, 1), 'Helvetica'),
+    ('FONTSIZE', (3, 0), (3, 1), 10),
+    ('LEADING', (3, 0), (3, 1), 12),
+    ('ALIGN', (3, 0), (3, 1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+TABLE_COLUMNS = [9*cm, 2*cm, 3.5*cm, 3.5*cm]
+
+
+def _text(value):
+    """Texte saisi (nom, adresse, notes) échappé pour le balisage des Paragraph"""
+    return escape(str(value)).replace('\n', '<br/>')
+
+
+class InvoiceRenderer:
+    """Styles et flowables statiques compilés une fois, réutilisés pour chaque facture"""
+
+    def __init__(self, center_name='GymFlow'):
+        styles = getSampleStyleSheet()
+
+        self.title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=28,
+            textColor=PRIMARY_COLOR,
+            spaceAfter=20,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        )
+        self.heading_style = ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=12,
+            textColor=PRIMARY_COLOR,
+            spaceAfter=10,
+            fontName='Helvetica-Bold'
+        )
+        self.normal_style = ParagraphStyle('InvoiceNormal', parent=styles['Normal'], fontSize=10)
+        self.paid_style = ParagraphStyle(
+            'Paid',
+            parent=self.normal_style,
+            textColor=colors.green,
+            fontSize=12,
+            alignment=TA_CENTER
+        )
+        footer_style = ParagraphStyle(
+            'Footer',
+            parent=self.normal_style,
+            fontSize=8,
+            textColor=colors.grey,
+            alignment=TA_CENTER
+        )
+
+        # ===== FLOWABLES STATIQUES =====
+        self.header = [
+            Paragraph("<b>GYMFLOW</b>", self.title_style),
+            Spacer(1, 0.5*cm),
+        ]
+        self.line_items_header = [
+            Paragraph('<b>Description</b>', self.normal_style),
+            Paragraph('<b>Qté</b>', self.normal_style),
+            Paragraph('<b>Prix Unit. (TND)</b>', self.normal_style),
+            Paragraph('<b>Total (TND)</b>', self.normal_style)
+        ]
+        self.totals_labels = (
+            Paragraph('<b>Sous-total HT:</b>', self.normal_style),
+            Paragraph('<b>TOTAL TTC:</b>', self.heading_style),
+        )
+        self.notes_title = Paragraph("<b>Notes:</b>", self.heading_style)
+        self.footer = [
+            Spacer(1, 2*cm),
+            Paragraph(
+                f"Merci de votre confiance | {_text(center_name)} - Votre partenaire fitness", footer_style
+            ),
+            Paragraph("Pour toute question, contactez-nous à contact@gymflow.com", footer_style),
+        ]
+
+    def story(self, invoice):
+        normal = self.normal_style
+        story = list(self.header)
+
+        # Numéro de facture et date
+        story.append(Paragraph(
+            f"<b>FACTURE N° {invoice.invoice_number}</b><br/>"
+            f"Date d'émission: {invoice.issue_date.strftime('%d/%m/%Y')}<br/>"
+            f"Date d'échéance: {invoice.due_date.strftime('%d/%m/%Y')}",
+            self.heading_style
+        ))
+        story.append(Spacer(1, 1*cm))
+
+        # ===== INFORMATIONS SOCIÉTÉ / CLIENT =====
+        info_table = Table([[
+            Paragraph(
+                f"<b>De:</b><br/>{_text(invoice.company_name)}<br/>{_text(invoice.company_address)}"
+                f"<br/>TVA: {_text(invoice.company_tax_id or 'N/A')}", normal
+            ),
+            Paragraph(
+                f"<b>À:</b><br/>{_text(invoice.customer_name)}<br/>{_text(invoice.customer_email)}"
+                f"<br/>{_text(invoice.customer_address or 'Adresse non fournie')}", normal
+            )
+        ]], colWidths=[9*cm, 9*cm])
+        info_table.setStyle(INFO_TABLE_STYLE)
+        story.append(info_table)
+        story.append(Spacer(1, 1*cm))
+
+        # ===== LIGNES DE FACTURE =====
+        line_items_data = [self.line_items_header]
+        for item in invoice.line_items:
+            line_items_data.append([
+                Paragraph(_text(item['description']), normal),
+                # Nombres : texte simple, sans analyse de balisage ni césure
+                str(item.get('quantity', 1)),
+                f"{float(item['unit_price']):.3f}",
+                f"{float(item['total']):.3f}"
+            ])
+        line_items_table = Table(line_items_data, colWidths=TABLE_COLUMNS)
+        line_items_table.setStyle(LINE_ITEMS_TABLE_STYLE)
+        story.append(line_items_table)
+        story.append(Spacer(1, 0.5*cm))
+
+        # ===== TOTAUX =====
+        subtotal_label, total_label = self.totals_labels
+        totals_table = Table([
+            ['', '', subtotal_label, f"{float(invoice.amount):.3f} TND"],
+            ['', '', Paragraph(f'<b>TVA ({invoice.tax_rate}%):</b>', normal), f"{float(invoice.tax_amount):.3f} TND"],
+            ['', '', total_label, Paragraph(f"<b>{float(invoice.total_amount):.3f} TND</b>", self.heading_style)]
+        ], colWidths=TABLE_COLUMNS)
+        totals_table.setStyle(TOTALS_TABLE_STYLE)
+        story.append(totals_table)
+
+        # ===== STATUT PAIEMENT =====
+        if invoice.status == 'PAID':
+            story.append(Spacer(1, 1*cm))
+            payment_date = invoice.payment_date.strftime('%d/%m/%Y à %H:%M') if invoice.payment_date else 'N/A'
+            story.append(Paragraph(
+                f"<b>✓ FACTURE PAYÉE</b><br/>Méthode: {_text(invoice.payment_method)}<br/>Date: {payment_date}",
+                self.paid_style
+            ))
+
+        # ===== NOTES =====
+        if invoice.notes:
+            story.append(Spacer(1, 1*cm))
+            story.append(self.notes_title)
+            story.append(Paragraph(_text(invoice.notes), normal))
+
+        story.extend(self.footer)
+        return story
+
+    def render(self, invoice, output=None):
+        """
+        Écrire le PDF dans `output` (fichier ouvert en binaire, HttpResponse...).
+        Sans `output` : retourne le PDF en bytes.
+        """
+        buffer = io.BytesIO() if output is None else output
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=2*cm,
+            leftMargin=2*cm,
+            topMargin=2*cm,
+            bottomMargin=2*cm,
+            title=f"Facture {invoice.invoice_number}"
+        )
+        doc.build(self.story(invoice))
+        return buffer.getvalue() if output is None else None
+
+
+_renderers = threading.local()
+
+
+def renderer_for(tenant_id):
+    """Renderer du centre pour le thread courant (créé au premier usage)"""
+    cache = getattr(_renderers, 'by_tenant', None)
+    if cache is None:
+        cache = _renderers.by_tenant = {}
+    renderer = cache.get(tenant_id)
+    if renderer is None:
+        center = tenant_registry.get_by_tenant_id(tenant_id) if tenant_id else None
+        renderer = cache[tenant_id] = InvoiceRenderer(center.name if center else 'GymFlow')
+    return renderer
+
+
+def invoice_pdf_relative_path(invoice):
+    """Chemin du PDF relatif à MEDIA_ROOT (valeur de Invoice.pdf_file)"""
+    filename = f"invoice_{invoice.invoice_number.replace('/', '_')}.pdf"
+    return os.path.join('invoices', 'pdfs', filename)
+
 
 def generate_invoice_pdf(invoice):
     """
-    Générer un PDF professionnel pour une facture
-    
+    Générer le PDF d'une facture sur disque (écriture atomique)
+
     Args:
         invoice: Instance du modèle Invoice
-    
+
     Returns:
         str: Chemin relatif du fichier PDF généré
     """
-    # Créer le dossier si nécessaire
-    pdf_dir = os.path.join(settings.MEDIA_ROOT, 'invoices', 'pdfs')
-    os.makedirs(pdf_dir, exist_ok=True)
-    
-    # Nom du fichier
-    filename = f"invoice_{invoice.invoice_number.replace('/', '_')}.pdf"
-    filepath = os.path.join(pdf_dir, filename)
-    
-    # Créer le document PDF
-    doc = SimpleDocTemplate(
-        filepath,
-        pagesize=A4,
-        rightMargin=2*cm,
-        leftMargin=2*cm,
-        topMargin=2*cm,
-        bottomMargin=2*cm
-    )
-    
-    story = []
-    styles = getSampleStyleSheet()
-    
-    # ===== STYLES PERSONNALISÉS =====
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=28,
-        textColor=colors.HexColor('#00357a'),
-        spaceAfter=20,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=12,
-        textColor=colors.HexColor('#00357a'),
-        spaceAfter=10,
-        fontName='Helvetica-Bold'
-    )
-    
-    normal_style = styles['Normal']
-    normal_style.fontSize = 10
-    
-    # ===== EN-TÊTE FACTURE =====
-    story.append(Paragraph("<b>GYMFLOW</b>", title_style))
-    story.append(Spacer(1, 0.5*cm))
-    
-    # Numéro de facture et date
-    invoice_info = f"""
-    <b>FACTURE N° {invoice.invoice_number}</b><br/>
-    Date d'émission: {invoice.issue_date.strftime('%d/%m/%Y')}<br/>
-    Date d'échéance: {invoice.due_date.strftime('%d/%m/%Y')}
-    """
-    story.append(Paragraph(invoice_info, heading_style))
-    story.append(Spacer(1, 1*cm))
-    
-    # ===== INFORMATIONS SOCIÉTÉ / CLIENT =====
-    info_data = [
-        [
-            Paragraph(f"<b>De:</b><br/>{invoice.company_name}<br/>{invoice.company_address}<br/>TVA: {invoice.company_tax_id or 'N/A'}", normal_style),
-            Paragraph(f"<b>À:</b><br/>{invoice.customer_name}<br/>{invoice.customer_email}<br/>{invoice.customer_address or 'Adresse non fournie'}", normal_style)
-        ]
-    ]
-    
-    info_table = Table(info_data, colWidths=[9*cm, 9*cm])
-    info_table.setStyle(TableStyle([
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('BACKGROUND', (0, 0), (0, 0), colors.HexColor('#f0f0f0')),
-        ('BACKGROUND', (1, 0), (1, 0), colors.HexColor('#f0f0f0')),
-        ('PADDING', (0, 0), (-1, -1), 10),
-        ('BOX', (0, 0), (-1, -1), 1, colors.grey),
-    ]))
-    story.append(info_table)
-    story.append(Spacer(1, 1*cm))
-    
-    # ===== LIGNES DE FACTURE =====
-    line_items_data = [
-        [
-            Paragraph('<b>Description</b>', normal_style),
-            Paragraph('<b>Qté</b>', normal_style),
-            Paragraph('<b>Prix Unit. (TND)</b>', normal_style),
-            Paragraph('<b>Total (TND)</b>', normal_style)
-        ]
-    ]
-    
-    for item in invoice.line_items:
-        line_items_data.append([
-            Paragraph(item['description'], normal_style),
-            Paragraph(str(item.get('quantity', 1)), normal_style),
-            Paragraph(f"{float(item['unit_price']):.3f}", normal_style),
-            Paragraph(f"{float(item['total']):.3f}", normal_style)
-        ])
-    
-    line_items_table = Table(line_items_data, colWidths=[9*cm, 2*cm, 3.5*cm, 3.5*cm])
-    line_items_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#00357a')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('TOPPADDING', (0, 0), (-1, 0), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')]),
-    ]))
-    story.append(line_items_table)
-    story.append(Spacer(1, 0.5*cm))
-    
-    # ===== TOTAUX =====
-    totals_data = [
-        ['', '', Paragraph('<b>Sous-total HT:</b>', normal_style), Paragraph(f"{float(invoice.amount):.3f} TND", normal_style)],
-        ['', '', Paragraph(f'<b>TVA ({invoice.tax_rate}%):</b>', normal_style), Paragraph(f"{float(invoice.tax_amount):.3f} TND", normal_style)],
-        ['', '', Paragraph('<b>TOTAL TTC:</b>', heading_style), Paragraph(f"<b>{float(invoice.total_amount):.3f} TND</b>", heading_style)]
-    ]
-    
-    totals_table = Table(totals_data, colWidths=[9*cm, 2*cm, 3.5*cm, 3.5*cm])
-    totals_table.setStyle(TableStyle([
-        ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
-        ('LINEABOVE', (2, 2), (-1, 2), 2, colors.HexColor('#00357a')),
-        ('BACKGROUND', (2, 2), (-1, 2), colors.HexColor('#f0f0f0')),
-        ('PADDING', (2, 2), (-1, 2), 10),
-    ]))
-    story.append(totals_table)
-    
-    # ===== STATUT PAIEMENT =====
-    if invoice.status == 'PAID':
-        story.append(Spacer(1, 1*cm))
-        paid_text = f"""
-        <b>✓ FACTURE PAYÉE</b><br/>
-        Méthode: {invoice.payment_method}<br/>
-        Date: {invoice.payment_date.strftime('%d/%m/%Y à %H:%M') if invoice.payment_date else 'N/A'}
-        """
-        paid_style = ParagraphStyle(
-            'Paid',
-            parent=normal_style,
-            textColor=colors.green,
-            fontSize=12,
-            alignment=TA_CENTER
-        )
-        story.append(Paragraph(paid_text, paid_style))
-    
-    # ===== NOTES =====
-    if invoice.notes:
-        story.append(Spacer(1, 1*cm))
-        story.append(Paragraph("<b>Notes:</b>", heading_style))
-        story.append(Paragraph(invoice.notes, normal_style))
-    
-    # ===== FOOTER =====
-    story.append(Spacer(1, 2*cm))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=normal_style,
-        fontSize=8,
-        textColor=colors.grey,
-        alignment=TA_CENTER
-    )
-    story.append(Paragraph("Merci de votre confiance | GymFlow - Votre partenaire fitness", footer_style))
-    story.append(Paragraph("Pour toute question, contactez-nous à contact@gymflow.com", footer_style))
-    
-    # Générer le PDF
-    doc.build(story)
-    
+    relative_path = invoice_pdf_relative_path(invoice)
+    filepath = os.path.join(settings.MEDIA_ROOT, relative_path)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+    # Fichier temporaire unique par appel : deux threads peuvent rendre la même facture
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            renderer_for(invoice.tenant_id).render(invoice, output)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
     # Retourner le chemin relatif pour la base de données
-    return os.path.join('invoices', 'pdfs', filename)
\ No newline at end of file
+    return relative_path
+
+
+def invoice_pdf_response(invoice):
+    """PDF rendu directement dans la réponse HTTP (sans passer par le disque)"""
+    response = HttpResponse(content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="Facture_{invoice.invoice_number}.pdf"'
+    renderer_for(invoice.tenant_id).render(invoice, response)
+    return response
@@ -16,9 +16,9 @@ class InvoiceListSerializer(serializers.ModelSerializer):
             'id', 'invoice_number', 'member', 'member_name',
             'amount', 'tax_amount', 'total_amount', 'status', 'status_display',
             'issue_date', 'due_date', 'payment_date', 'payment_method',
-            'is_overdue', 'created_at'
+            'is_overdue', 'pdf_status', 'created_at'
         ]
-        read_only_fields = ['tenant_id']
+        read_only_fields = ['tenant_id', 'pdf_status']
 
 
 class InvoiceDetailSerializer(serializers.ModelSerializer):
@@ -31,7 +31,7 @@ class InvoiceDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Invoice
         fields = '__all__'
-        read_only_fields = ['tenant_id', 'invoice_number']
+        read_only_fields = ['tenant_id', 'invoice_number', 'pdf_status']
     
     def get_pdf_url(self, obj):
         if obj.pdf_file:
@@ -1,3 +1,325 @@
-from django.test import TestCase
+# backend/billing/tests.py
+# Tests de la file de rendu des PDF de factures
 
-# Create your tests here.
+import os
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from members.models import Member
+from subscriptions.models import Subscription, SubscriptionPlan
+from .invoice_run import run_invoicing
+from .jobs import claim_jobs, enqueue, enqueue_invoice_pdf, run_job
+from .models import BackgroundJob, Invoice, InvoiceRun
+from .pdf_generator import InvoiceRenderer, invoice_pdf_response, renderer_for
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='gymflow-test-media-')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class InvoicePdfQueueTestCase(TestCase):
+    """
+    Tests de la file de tâches : la création d'une facture ne rend pas le PDF,
+    le worker le rend une seule fois, les échecs sont réessayés puis marqués.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.member = Member.objects.create(
+            first_name='Membre',
+            last_name='Facturé',
+            email='member@powerfit.com',
+            phone='12345678',
+            date_of_birth=date(1990, 1, 1),
+            gender='F',
+            emergency_contact_name='Contact',
+            emergency_contact_phone='12345678',
+            tenant_id='powerfit'
+        )
+
+    def _invoice(self):
+        invoice = Invoice.objects.create(
+            member=self.member,
+            amount=100,
+            total_amount=0,
+            customer_name=self.member.full_name,
+            customer_email=self.member.email,
+            line_items=[{'description': 'Abonnement', 'quantity': 1, 'unit_price': 100, 'total': 100}],
+            status='PAID',
+            tenant_id='powerfit'
+        )
+        enqueue_invoice_pdf(invoice)
+        return invoice
+
+    def test_worker_renders_pdf_once(self):
+        """
+        Test: Tâche unique par facture, PDF rendu par le worker, pas de second rendu.
+        """
+        print("\n🧪 Test: Rendu PDF par le worker")
+
+        invoice = self._invoice()
+        enqueue_invoice_pdf(invoice)
+        self.assertEqual(BackgroundJob.objects.filter(kind='render_invoice_pdf').count(), 1)
+        self.assertFalse(invoice.pdf_file)
+
+        out = StringIO()
+        call_command('run_workers', '--once', '--processes', '0', stdout=out)
+        self.assertIn('1 tâche(s) terminée(s)', out.getvalue())
+
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.pdf_status, 'READY')
+        self.assertTrue(os.path.exists(invoice.pdf_file.path))
+
+        # PDF prêt : pas de nouvelle tâche, et une tâche en double ne régénère rien
+        self.assertIsNone(enqueue_invoice_pdf(invoice))
+        enqueue('render_invoice_pdf', {'invoice_id': invoice.pk})
+        with mock.patch('billing.pdf_generator.generate_invoice_pdf') as generate:
+            call_command('run_workers', '--once', '--processes', '0', stdout=StringIO())
+        generate.assert_not_called()
+
+        print("✅ PDF rendu une seule fois")
+
+    def test_failed_render_is_retried_then_marked(self):
+        """
+        Test: Échec de rendu → nouvelle tentative différée, puis FAILED après max_attempts.
+        """
+        print("\n🧪 Test: Réessais puis échec")
+
+        invoice = self._invoice()
+        job = BackgroundJob.objects.get(kind='render_invoice_pdf')
+
+        with mock.patch('billing.pdf_generator.generate_invoice_pdf', side_effect=OSError('disque plein')):
+            for attempt in range(1, job.max_attempts + 1):
+                BackgroundJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+                self.assertEqual(claim_jobs(10), [job.pk])
+                status = run_job(job.pk)
+                self.assertEqual(status, 'FAILED' if attempt == job.max_attempts else 'QUEUED')
+
+        job.refresh_from_db()
+        invoice.refresh_from_db()
+        self.assertEqual(job.attempts, job.max_attempts)
+        self.assertIn('disque plein', job.last_error)
+        self.assertEqual(invoice.pdf_status, 'FAILED')
+
+        # Une tâche réservée n'est pas réservée deux fois
+        self.assertEqual(claim_jobs(10), [])
+
+        print("✅ Réessais bornés, facture marquée en échec")
+
+    def test_concurrent_enqueue_single_job(self):
+        """
+        Test: Deux enqueue() simultanés (lecture manquée) → une seule tâche active, la même retournée.
+        """
+        print("\n🧪 Test: Déduplication garantie par la base")
+
+        first = enqueue('render_invoice_pdf', {'invoice_id': 1}, key='invoice_pdf:1')
+
+        # Appel concurrent : sa lecture a eu lieu avant la création de `first`
+        reads = []
+
+        def missed_then_real(queryset):
+            reads.append(queryset)
+            return None if len(reads) == 1 else real_first(queryset)
+
+        real_first = QuerySet.first
+        with mock.patch.object(QuerySet, 'first', missed_then_real):
+            second = enqueue('render_invoice_pdf', {'invoice_id': 1}, key='invoice_pdf:1')
+
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(BackgroundJob.objects.filter(key='invoice_pdf:1').count(), 1)
+
+        # Tâche terminée : la clé est de nouveau libre
+        BackgroundJob.objects.filter(pk=first.pk).update(status='DONE')
+        third = enqueue('render_invoice_pdf', {'invoice_id': 1}, key='invoice_pdf:1')
+        self.assertNotEqual(third.pk, first.pk)
+
+        print("✅ Une seule tâche active par clé")
+
+
+class InvoiceRendererTestCase(TestCase):
+    """
+    Tests du renderer PDF : rendu en mémoire, texte saisi échappé, renderer réutilisé.
+    """
+
+    def test_render_in_memory_and_reuse(self):
+        """
+        Test: render() sans sortie → bytes PDF ; caractères spéciaux du client acceptés ;
+        même renderer pour un centre dans le thread courant.
+        """
+        print("\n🧪 Test: Rendu PDF en mémoire")
+
+        invoice = Invoice(
+            invoice_number='FAC-TEST-00001',
+            amount=100,
+            tax_amount=19,
+            total_amount=119,
+            issue_date=date(2025, 1, 31),
+            due_date=date(2025, 3, 2),
+            customer_name='Dupont & Fils <SARL>',
+            customer_email='dupont@example.com',
+            line_items=[{'description': 'Cours <privé> & suivi', 'quantity': 2, 'unit_price': 50, 'total': 100}],
+            notes='Remise 10 % & livraison',
+            status='PAID',
+            tenant_id='powerfit'
+        )
+
+        pdf = InvoiceRenderer().render(invoice)
+        self.assertTrue(pdf.startswith(b'%PDF'))
+
+        response = invoice_pdf_response(invoice)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+        self.assertIs(renderer_for('powerfit'), renderer_for('powerfit'))
+
+        print("✅ PDF rendu en mémoire, texte saisi échappé")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MonthlyInvoiceRunTestCase(TestCase):
+    """
+    Tests de la facturation mensuelle : factures en masse, numéros consécutifs,
+    PDF rendus, reprise sans doublon après un échec de rendu.
+    """
+
+    def setUp(self):
+        plan = SubscriptionPlan.objects.create(name='Mensuel', duration_days=30, price=90, tenant_id='powerfit')
+        for index, start in enumerate([date(2025, 1, 5), date(2025, 1, 20), date(2025, 1, 31), date(2025, 2, 1)]):
+            member = Member.objects.create(
+                first_name=f'Membre{index}',
+                last_name='Mensuel',
+                email=f'mensuel{index}@powerfit.com',
+                phone='12345678',
+                date_of_birth=date(1990, 1, 1),
+                gender='M',
+                emergency_contact_name='Contact',
+                emergency_contact_phone='12345678',
+                tenant_id='powerfit'
+            )
+            Subscription.objects.create(
+                member=member, plan=plan, start_date=start, status='ACTIVE',
+                payment_date=timezone.now(), payment_method='Espèces', tenant_id='powerfit'
+            )
+
+    def test_run_creates_numbers_and_pdfs(self):
+        """
+        Test: 3 abonnements de janvier → 3 factures aux numéros consécutifs, PDF prêts ;
+        la relance ne crée rien de plus.
+        """
+        print("\n🧪 Test: Facturation mensuelle")
+
+        # bulk_create : jamais de save() facture par facture
+        with mock.patch.object(Invoice, 'save') as save:
+            run = run_invoicing('powerfit', '2025-01', workers=0)
+        save.assert_not_called()
+
+        invoices = list(Invoice.objects.filter(tenant_id='powerfit').order_by('invoice_number'))
+        self.assertEqual(len(invoices), 3)
+        numbers = [int(invoice.invoice_number.rsplit('-', 1)[1]) for invoice in invoices]
+        self.assertEqual(numbers, list(range(numbers[0], numbers[0] + 3)))
+        self.assertTrue(all(invoice.pdf_status == 'READY' for invoice in invoices))
+        self.assertTrue(all(os.path.exists(invoice.pdf_file.path) for invoice in invoices))
+        self.assertEqual(invoices[0].total_amount, Decimal('107.100'))
+        self.assertEqual(invoices[0].issue_date, date(2025, 1, 31))
+
+        self.assertEqual((run.status, run.invoices_created, run.pdfs_rendered), ('DONE', 3, 3))
+
+        run = run_invoicing('powerfit', '2025-01', workers=0)
+        self.assertEqual(Invoice.objects.count(), 3)
+        self.assertEqual((run.attempts, run.report['created'], run.report['to_render']), (2, 0, 0))
+
+        print("✅ 3 factures, numéros consécutifs, relance sans doublon")
+
+    def test_failed_pdfs_are_resumed(self):
+        """
+        Test: Rendu en échec → run FAILED, factures gardées ; la commande relancée
+        ne rend que les PDF manquants.
+        """
+        print("\n🧪 Test: Reprise d'un run en échec")
+
+        with mock.patch('billing.pdf_generator.generate_invoice_pdf', side_effect=OSError('disque plein')):
+            run = run_invoicing('powerfit', '2025-01', workers=0)
+        self.assertEqual((run.status, run.invoices_created, run.pdfs_failed), ('FAILED', 3, 3))
+        self.assertEqual(Invoice.objects.filter(pdf_status='FAILED').count(), 3)
+        self.assertIn('disque plein', run.report['errors'][0])
+
+        out = StringIO()
+        call_command('generate_invoices', '--tenant', 'powerfit', '--period', '2025-01', '--workers', '0', stdout=out)
+        self.assertIn('PDF rendus : 3/3', out.getvalue())
+
+        run = InvoiceRun.objects.get(tenant_id='powerfit', period='2025-01')
+        self.assertEqual((run.status, run.invoices_created, run.pdfs_rendered, run.pdfs_failed), ('DONE', 3, 3, 0))
+        self.assertEqual(Invoice.objects.count(), 3)
+
+        print("✅ PDF manquants rendus à la reprise, aucune facture en double")
+
+
+class MonthlyInvoiceRunPoolTestCase(TransactionTestCase):
+    """
+    Rendu des PDF dans le pool de processus « spawn » : les workers lisent la base
+    de test et écrivent dans le MEDIA_ROOT temporaire du processus parent.
+    """
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("Base SQLite en mémoire : invisible pour les processus de rendu")
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        plan = SubscriptionPlan.objects.create(name='Mensuel', duration_days=30, price=90, tenant_id='powerfit')
+        for index in range(4):
+            member = Member.objects.create(
+                first_name=f'Membre{index}',
+                last_name='Pool',
+                email=f'pool{index}@powerfit.com',
+                phone='12345678',
+                date_of_birth=date(1990, 1, 1),
+                gender='F',
+                emergency_contact_name='Contact',
+                emergency_contact_phone='12345678',
+                tenant_id='powerfit'
+            )
+            Subscription.objects.create(
+                member=member, plan=plan, start_date=date(2025, 3, 1 + index), status='ACTIVE',
+                payment_date=timezone.now(), payment_method='Espèces', tenant_id='powerfit'
+            )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_run_with_process_pool(self):
+        """
+        Test: run_invoicing(workers=2), un PDF par lot → 4 PDF rendus par le pool,
+        dans le MEDIA_ROOT temporaire.
+        """
+        print("\n🧪 Test: Facturation mensuelle (pool de processus)")
+
+        with mock.patch('billing.invoice_run.POOL_MIN_INVOICES', 1), mock.patch('billing.invoice_run.RENDER_CHUNK', 1):
+            run = run_invoicing('powerfit', '2025-03', workers=2)
+
+        self.assertEqual((run.status, run.invoices_created, run.pdfs_rendered, run.pdfs_failed), ('DONE', 4, 4, 0))
+        self.assertEqual(run.report['workers'], 2)
+        invoices = list(Invoice.objects.filter(tenant_id='powerfit'))
+        self.assertEqual(len(invoices), 4)
+        for invoice in invoices:
+            self.assertEqual(invoice.pdf_status, 'READY')
+            self.assertTrue(invoice.pdf_file.path.startswith(self.media_root))
+            with open(invoice.pdf_file.path, 'rb') as pdf:
+                self.assertEqual(pdf.read(4), b'%PDF')
+
+        print("✅ 4 PDF rendus par 2 processus, dans le MEDIA_ROOT du test")
@@ -7,7 +7,7 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.http import FileResponse
 from django.utils import timezone
-import os
+from datetime import timedelta
 import logging
 
 from .models import Invoice, Payment
@@ -17,23 +17,36 @@ from .serializers import (
     InvoiceCreateSerializer,
     PaymentSerializer
 )
-from .pdf_generator import generate_invoice_pdf
+from .jobs import enqueue_invoice_pdf, invoice_pdf_is_ready
+from .pdf_generator import invoice_pdf_response
 from authentication.mixins import CompleteTenantMixin
+from authentication.pagination import KeysetPagination
+from authentication.db_router import read_replica
+from members.metrics_rollup import load_daily_metrics, metrics_tenant_id, live_today_requested, INVOICE_COLUMNS
 
 logger = logging.getLogger('billing.views')
 
 
+class InvoicePagination(KeysetPagination):
+    """Factures par date d'émission décroissante"""
+    ordering = ('-issue_date', '-created_at')
+
+
 class InvoiceViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les factures avec isolation tenant
     """
-    queryset = Invoice.objects.all()
+    # ✅ member chargé avec la facture (member_name dans InvoiceListSerializer)
+    queryset = Invoice.objects.select_related('member')
+    pagination_class = InvoicePagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'member', 'payment_method']
     search_fields = ['invoice_number', 'customer_name', 'customer_email']
     ordering_fields = ['issue_date', 'total_amount', 'created_at']
     tenant_field = 'tenant_id'
+    # 📊 Requêtes SQL max par action (authentication/query_budget.py)
+    query_budget = {'list': 4}
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -52,14 +65,9 @@ class InvoiceViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
         
         invoice = serializer.save(tenant_id=tenant_id)
         
-        # Générer automatiquement le PDF
-        try:
-            pdf_path = generate_invoice_pdf(invoice)
-            invoice.pdf_file = pdf_path
-            invoice.save(update_fields=['pdf_file'])
-            logger.info(f"✅ Facture {invoice.invoice_number} créée avec PDF")
-        except Exception as e:
-            logger.error(f"❌ Erreur génération PDF: {str(e)}")
+        # ✅ PDF rendu hors requête par `manage.py run_workers`
+        enqueue_invoice_pdf(invoice)
+        logger.info(f"✅ Facture {invoice.invoice_number} créée, PDF en file de rendu")
     
     @action(detail=False, methods=['get'])
     def my_invoices(self, request):
@@ -91,12 +99,13 @@ class InvoiceViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
         """
         invoice = self.get_object()
         
-        # Générer le PDF si nécessaire
-        if not invoice.pdf_file or not os.path.exists(invoice.pdf_file.path):
+        # PDF normalement prêt (rendu par les workers) ; sinon rendu directement
+        # dans la réponse, l'enregistrement sur disque reste confié aux workers
+        if not invoice_pdf_is_ready(invoice):
             try:
-                pdf_path = generate_invoice_pdf(invoice)
-                invoice.pdf_file = pdf_path
-                invoice.save(update_fields=['pdf_file'])
+                response = invoice_pdf_response(invoice)
+                enqueue_invoice_pdf(invoice)
+                return response
             except Exception as e:
                 logger.error(f"❌ Erreur génération PDF: {str(e)}")
                 return Response({
@@ -158,25 +167,21 @@ class InvoiceViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
         })
     
     @action(detail=False, methods=['get'])
+    @read_replica
     def statistics(self, request):
         """
-        Statistiques des factures du centre
+        Statistiques des factures du centre (rollup TenantDailyMetrics, ?live=false possible)
         URL: /api/billing/invoices/statistics/
         """
-        queryset = self.get_queryset()
-        
-        total = queryset.count()
-        paid = queryset.filter(status='PAID').count()
-        pending = queryset.filter(status='PENDING').count()
-        overdue = queryset.filter(
-            status__in=['PENDING', 'DRAFT'],
-            due_date__lt=timezone.now().date()
-        ).count()
-        
-        total_revenue = sum([
-            float(inv.total_amount) 
-            for inv in queryset.filter(status='PAID')
-        ])
+        metrics = load_daily_metrics(metrics_tenant_id(request), live_today_requested(request))
+        today = timezone.now().date()
+        
+        total = metrics.total(*INVOICE_COLUMNS)
+        paid = metrics.total('invoices_paid')
+        pending = metrics.total('invoices_pending')
+        overdue = metrics.total('invoices_open_due', end=today - timedelta(days=1))
+        
+        total_revenue = float(metrics.total('invoice_revenue'))
         
         return Response({
             'total': total,
@@ -23,6 +23,7 @@ class CourseAdmin(admin.ModelAdmin):
     list_filter = ['status', 'course_type', 'date', 'coach']
     search_fields = ['title', 'description']
     date_hierarchy = 'date'
+    readonly_fields = ['confirmed_count']
     tenant_field_name = 'tenant_id'
 
     def available_spots(self, obj):
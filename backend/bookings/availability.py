@@ -0,0 +1,189 @@
+# backend/bookings/availability.py
+
+"""
+📅 Index de disponibilité des salles et coachs, en mémoire et par centre.
+
+- Fenêtre glissante (hier → +60 jours) chargée en UNE requête au premier
+  usage d'un centre, dans un IntervalIndex par (ressource, id, jour) : un
+  cours ne passe pas minuit, chaque liste reste courte et triée par début.
+- Mise à jour incrémentale par les signaux de Course, après commit.
+- Rechargée quand la fenêtre glisse (nouveau jour) ou après REFRESH_SECONDS,
+  pour reprendre les écritures faites par les autres processus.
+- Date hors fenêtre : index ponctuel chargé depuis la base pour ce jour.
+
+L'index sert les lectures (créneaux libres, conflits, cours en cours) ;
+la planification (bookings.scheduling) relit la base avant d'écrire.
+"""
+
+import threading
+import time as clock
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from django.utils import timezone
+
+from .models import Course
+from .scheduling import IntervalIndex
+
+WINDOW_DAYS_BEFORE = 1
+WINDOW_DAYS_AFTER = 60
+REFRESH_SECONDS = 60
+
+COURSE_FIELDS = ('id', 'date', 'start_time', 'end_time', 'coach_id', 'room_id', 'status')
+
+CourseSlot = namedtuple('CourseSlot', ['date', 'start_time', 'end_time', 'coach_id', 'room_id', 'status'])
+
+
+class TenantAvailability:
+    """Cours non annulés d'un centre entre start_date et end_date (inclus)"""
+
+    def __init__(self, tenant_id, start_date, end_date):
+        self.tenant_id = tenant_id
+        self.start_date = start_date
+        self.end_date = end_date
+        self.loaded_at = clock.monotonic()
+        self.index = IntervalIndex()
+        self.courses = {}
+        self.by_date = {}
+
+    @classmethod
+    def load(cls, tenant_id, start_date, end_date):
+        availability = cls(tenant_id, start_date, end_date)
+        rows = Course.objects.filter(
+            tenant_id=tenant_id,
+            date__gte=start_date,
+            date__lte=end_date
+        ).exclude(
+            status='CANCELLED'
+        ).values_list(*COURSE_FIELDS)
+
+        for course_id, *values in rows:
+            availability.add(course_id, CourseSlot(*values))
+        return availability
+
+    def covers(self, day):
+        return self.start_date <= day <= self.end_date
+
+    def add(self, course_id, slot):
+        """Ajouter ou remplacer un cours (un cours annulé ou hors fenêtre est retiré)"""
+        self.remove(course_id)
+        if slot.status == 'CANCELLED' or not self.covers(slot.date):
+            return
+        self.courses[course_id] = slot
+        self.by_date.setdefault(slot.date, set()).add(course_id)
+        self.index.add(('coach', slot.coach_id, slot.date), slot.start_time, slot.end_time, course_id)
+        self.index.add(('room', slot.room_id, slot.date), slot.start_time, slot.end_time, course_id)
+
+    def remove(self, course_id):
+        slot = self.courses.pop(course_id, None)
+        if slot is None:
+            return
+        self.by_date[slot.date].discard(course_id)
+        self.index.remove(('coach', slot.coach_id, slot.date), course_id)
+        self.index.remove(('room', slot.room_id, slot.date), course_id)
+
+    def busy(self, resources, day):
+        """Créneaux occupés (début, fin, id cours) des ressources [(type, id)], triés, sans doublon"""
+        return sorted({
+            slot
+            for resource, resource_id in resources
+            for slot in self.index.slots((resource, resource_id, day))
+        })
+
+    def conflicts(self, resources, day, start, end):
+        """[(type, id ressource, (début, fin, id cours))] qui chevauchent [start, end["""
+        return [
+            (resource, resource_id, slot)
+            for resource, resource_id in resources
+            for slot in self.index.overlapping((resource, resource_id, day), start, end)
+        ]
+
+    def ongoing(self, day, at, statuses=None):
+        """id des cours du jour en cours à l'heure `at`"""
+        ongoing = []
+        for course_id in self.by_date.get(day, ()):
+            slot = self.courses[course_id]
+            if slot.start_time <= at <= slot.end_time and (statuses is None or slot.status in statuses):
+                ongoing.append(course_id)
+        return ongoing
+
+
+def free_slots(busy, opening, closing, min_minutes=0):
+    """Créneaux libres [(début, fin)] entre opening et closing, hors `busy` (trié par début)"""
+    free = []
+    cursor = opening
+    for start, end, _ in busy:
+        if start > cursor:
+            free.append((cursor, min(start, closing)))
+        cursor = max(cursor, end)
+        if cursor >= closing:
+            break
+    if cursor < closing:
+        free.append((cursor, closing))
+
+    minimum = timedelta(minutes=min_minutes)
+    return [
+        (start, end) for start, end in free
+        if start < end and datetime.combine(date.min, end) - datetime.combine(date.min, start) >= minimum
+    ]
+
+
+class AvailabilityRegistry:
+    """Index par centre (par processus), chargés à la demande"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tenants = {}
+
+    def window(self, today=None):
+        today = today or timezone.now().date()
+        return today - timedelta(days=WINDOW_DAYS_BEFORE), today + timedelta(days=WINDOW_DAYS_AFTER)
+
+    def for_day(self, tenant_id, day):
+        """Index couvrant `day` : celui du centre si `day` est dans la fenêtre, sinon ponctuel"""
+        start_date, end_date = self.window()
+        if not start_date <= day <= end_date:
+            return TenantAvailability.load(tenant_id, day, day)
+
+        with self._lock:
+            availability = self._tenants.get(tenant_id)
+        if (
+            availability is None
+            or availability.start_date != start_date
+            or clock.monotonic() - availability.loaded_at > REFRESH_SECONDS
+        ):
+            availability = TenantAvailability.load(tenant_id, start_date, end_date)
+            with self._lock:
+                self._tenants[tenant_id] = availability
+        return availability
+
+    def invalidate(self, tenant_id=None):
+        with self._lock:
+            if tenant_id is None:
+                self._tenants.clear()
+            else:
+                self._tenants.pop(tenant_id, None)
+
+    def refresh_course(self, tenant_id, course_id):
+        """Cours créé ou modifié : relire sa ligne si le centre est chargé (une requête par pk)"""
+        with self._lock:
+            loaded = tenant_id in self._tenants
+        if not loaded:
+            return
+        row = Course.objects.filter(pk=course_id, tenant_id=tenant_id).values_list(*COURSE_FIELDS).first()
+
+        with self._lock:
+            for availability in self._tenants.values():
+                if row is not None and availability.tenant_id == tenant_id:
+                    availability.add(course_id, CourseSlot(*row[1:]))
+                else:
+                    availability.remove(course_id)
+
+    def remove_course(self, tenant_id, course_id):
+        with self._lock:
+            availability = self._tenants.get(tenant_id)
+            if availability is not None:
+                availability.remove(course_id)
+
+
+availability_index = AvailabilityRegistry()
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:43
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_confirmed_count(apps, schema_editor):
+    """Initialiser le compteur depuis les réservations CONFIRMED existantes"""
+    Course = apps.get_model('bookings', 'Course')
+    Booking = apps.get_model('bookings', 'Booking')
+
+    confirmed = Booking.objects.filter(
+        course=OuterRef('pk'),
+        status='CONFIRMED'
+    ).order_by().values('course').annotate(total=Count('id')).values('total')
+
+    Course.objects.update(confirmed_count=Coalesce(Subquery(confirmed), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='confirmed_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Réservations confirmées'),
+        ),
+        migrations.RunPython(backfill_confirmed_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_course_confirmed_count'),
+        ('members', '0004_tenant_hot_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['tenant_id', '-booking_date'], name='booking_tenant_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('checked_in', True)), fields=['tenant_id', 'check_in_time'], name='booking_tenant_checkin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['tenant_id', 'date', 'status'], name='course_tenant_date_status_idx'),
+        ),
+    ]
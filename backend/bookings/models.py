@@ -1,6 +1,7 @@
 # bookings/models.py
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Greatest
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from authentication.models import User
@@ -53,6 +54,17 @@ class CourseType(models.Model):
         return self.name
 
 
+class CourseQuerySet(models.QuerySet):
+    """QuerySet des cours avec annotations pour les listes"""
+
+    def with_booking_stats(self):
+        """
+        ✅ Cours prêts pour les listes : relations chargées en UNE requête,
+        places calculées depuis le compteur dénormalisé confirmed_count.
+        """
+        return self.select_related('course_type', 'coach', 'room')
+
+
 class Course(models.Model):
     """Cours planifiés"""
     STATUS_CHOICES = [
@@ -74,6 +86,8 @@ class Course(models.Model):
     end_time = models.TimeField(verbose_name="Heure de fin")
     
     max_participants = models.PositiveIntegerField(validators=[MinValueValidator(1)], verbose_name="Nombre max de participants")
+    # ✅ Dénormalisé : nombre de réservations CONFIRMED (maintenu par Booking.save() et bookings.services)
+    confirmed_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Réservations confirmées")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='SCHEDULED', verbose_name="Statut")
     
     notes = models.TextField(blank=True, verbose_name="Notes")
@@ -84,26 +98,47 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CourseQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date', '-start_time']
         verbose_name = "Cours"
         verbose_name_plural = "Cours"
         # Contrainte : Un coach ne peut pas avoir 2 cours en même temps dans le même centre
         unique_together = [['coach', 'date', 'start_time', 'tenant_id']]
+        indexes = [
+            # ✅ Cours du jour / à venir / en cours d'un centre
+            models.Index(fields=['tenant_id', 'date', 'status'], name='course_tenant_date_status_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.date} {self.start_time}"
 
+    def save(self, *args, **kwargs):
+        # ✅ Ligne existante : confirmed_count n'est jamais réécrit avec la valeur chargée
+        # (sinon une modification du cours efface les places prises entre-temps par book_course)
+        # Il ne change que par des UPDATE F() (bookings.services, Booking.save, signals)
+        if not self._state.adding and not kwargs.get('force_insert'):
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+            kwargs['update_fields'] = [name for name in update_fields if name != 'confirmed_count']
+        super().save(*args, **kwargs)
+
+    @property
+    def confirmed_bookings(self):
+        """Nombre de réservations confirmées (compteur dénormalisé, sans requête)"""
+        return self.confirmed_count
+
     @property
     def is_full(self):
         """Vérifier si le cours est complet"""
-        return self.bookings.filter(status='CONFIRMED').count() >= self.max_participants
+        return self.confirmed_bookings >= self.max_participants
 
     @property
     def available_spots(self):
         """Nombre de places disponibles"""
-        confirmed_count = self.bookings.filter(status='CONFIRMED').count()
-        return self.max_participants - confirmed_count
+        return self.max_participants - self.confirmed_bookings
 
     @property
     def is_past(self):
@@ -147,10 +182,27 @@ class Booking(models.Model):
         verbose_name_plural = "Réservations"
         # Un membre ne peut réserver qu'une fois le même cours
         unique_together = [['course', 'member']]
+        indexes = [
+            # ✅ Liste paginée des réservations d'un centre (BookingPagination)
+            models.Index(fields=['tenant_id', '-booking_date'], name='booking_tenant_date_idx'),
+            # ✅ Check-ins (présences) : index partiel, seules les réservations pointées
+            models.Index(
+                fields=['tenant_id', 'check_in_time'],
+                condition=models.Q(checked_in=True),
+                name='booking_tenant_checkin_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.member.full_name} - {self.course.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Statut chargé, pour répercuter les transitions sur Course.confirmed_count
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
     def cancel(self):
         """Annuler la réservation"""
         self.status = 'CANCELLED'
@@ -163,9 +215,23 @@ class Booking(models.Model):
         self.status = 'COMPLETED'
         self.save()
     
-    def save(self, *args, **kwargs):
+    def save(self, *args, update_course_counter=True, **kwargs):
         # ✅ Hériter le tenant_id du membre si non défini
         if not self.tenant_id and self.member:
             self.tenant_id = self.member.tenant_id
         
-        super().save(*args, **kwargs)
\ No newline at end of file
+        # ✅ Entrée/sortie du statut CONFIRMED → ajuster Course.confirmed_count
+        # (bookings.services réserve la place lui-même : update_course_counter=False)
+        delta = int(self.status == 'CONFIRMED') - int(getattr(self, '_loaded_status', None) == 'CONFIRMED')
+        
+        if delta and update_course_counter:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                Course.objects.filter(pk=self.course_id).update(
+                    confirmed_count=Greatest(models.F('confirmed_count') + delta, 0)
+                )
+        else:
+            super().save(*args, **kwargs)
+        
+        self._loaded_status = self.status
+
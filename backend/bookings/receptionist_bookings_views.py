@@ -9,6 +9,7 @@ from datetime import timedelta
 
 from .models import Booking, Course
 from .serializers import BookingListSerializer, CourseListSerializer
+from .services import book_course, BookingError
 from authentication.permissions import IsReceptionistOrAdmin
 
 
@@ -117,40 +118,15 @@ def create_booking(request):
         course = Course.objects.get(id=course_id, tenant_id=tenant_id)
         logger.info(f"✅ Cours trouvé: {course.title}")
         
-        # Vérifier que le membre a un abonnement actif
-        if not member.has_active_subscription:
-            logger.warning(f"❌ Membre {member_id} sans abonnement actif")
+        # ✅ Vérifications + réservation atomique de la place (bookings.services)
+        try:
+            booking = book_course(member, course, tenant_id=tenant_id)
+        except BookingError as e:
+            logger.warning(f"❌ Réservation refusée ({e.code}): member_id={member_id}, course_id={course_id}")
             return Response({
-                'error': 'Le membre n\'a pas d\'abonnement actif'
+                'error': e.message
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Vérifier que le cours n'est pas complet
-        if course.is_full:
-            logger.warning(f"❌ Cours {course_id} complet")
-            return Response({
-                'error': 'Le cours est complet'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Vérifier pas de réservation existante
-        existing = Booking.objects.filter(
-            member=member,
-            course=course
-        ).exclude(status='CANCELLED').first()
-        
-        if existing:
-            logger.warning(f"❌ Réservation existante: {existing.id}")
-            return Response({
-                'error': 'Le membre a déjà réservé ce cours'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Créer la réservation
-        booking = Booking.objects.create(
-            member=member,
-            course=course,
-            status='CONFIRMED',
-            tenant_id=tenant_id
-        )
-        
         logger.info(f"✅ Réservation créée: {booking.id}")
         
         return Response({
@@ -5,19 +5,28 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
-from django.db.models import Q, Count
+from django.db.models import Count, Exists, OuterRef, Prefetch
 from datetime import datetime, timedelta
 
 from .models import Booking, Course
+from .availability import availability_index
+from .services import book_course, BookingError
+from .views import BookingPagination
 from members.models import Member
+from members.search import search_members
 from subscriptions.models import Subscription
 from authentication.permissions import IsReceptionistOrAdmin
+from authentication.query_budget import query_budget
 
 
+@query_budget(5)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsReceptionistOrAdmin])
 def search_member_for_checkin(request):
-    """🔍 Recherche de membre avec leurs réservations du jour"""
+    """
+    🔍 Recherche de membre avec leurs réservations du jour
+    Nombre de requêtes constant (membres + réservations du jour préchargées)
+    """
     query = request.GET.get('q', '')
     
     if len(query) < 2:
@@ -26,33 +35,32 @@ def search_member_for_checkin(request):
     tenant_id = getattr(request, 'tenant_id', None)
     today = timezone.now().date()
     
-    members = Member.objects.filter(
+    # ✅ Réservations du jour (avec cours/type/coach/salle) en UNE requête pour tous les membres
+    today_bookings = Booking.objects.filter(
+        course__date=today,
         tenant_id=tenant_id
-    ).filter(
-        Q(first_name__icontains=query) |
-        Q(last_name__icontains=query) |
-        Q(member_id__icontains=query) |
-        Q(email__icontains=query) |
-        Q(phone__icontains=query)
+    ).select_related('course__course_type', 'course__coach', 'course__room')
+    
+    # 🔍 Recherche classée sur le texte normalisé (accents ignorés, member_id en tête)
+    members = search_members(
+        Member.objects.filter(tenant_id=tenant_id), query
+    ).annotate(
+        # ✅ Abonnement actif calculé dans la requête des membres
+        active_subscription=Exists(
+            Subscription.objects.filter(
+                member=OuterRef('pk'),
+                status='ACTIVE',
+                end_date__gte=today
+            )
+        )
+    ).prefetch_related(
+        Prefetch('bookings', queryset=today_bookings, to_attr='today_bookings')
     )[:10]
     
     results = []
     for member in members:
-        today_bookings = Booking.objects.filter(
-            member=member,
-            course__date=today,
-            tenant_id=tenant_id
-        ).select_related('course__course_type', 'course__coach', 'course__room')
-        
-        has_active_sub = member.has_active_subscription
-        is_checked_in = Booking.objects.filter(
-            member=member,
-            course__date=today,
-            checked_in=True
-        ).exists()
-        
         bookings_data = []
-        for booking in today_bookings:
+        for booking in member.today_bookings:
             bookings_data.append({
                 'id': booking.id,
                 'course_id': booking.course.id,
@@ -76,9 +84,9 @@ def search_member_for_checkin(request):
             'email': member.email,
             'phone': member.phone,
             'photo': member.photo.url if member.photo else None,
-            'has_active_subscription': has_active_sub,
+            'has_active_subscription': member.active_subscription,
             'subscription_expires_soon': False,
-            'is_checked_in': is_checked_in,
+            'is_checked_in': any(booking.checked_in for booking in member.today_bookings),
             'today_bookings': bookings_data
         })
     
@@ -232,6 +240,7 @@ def manual_checkin(request):
         )
 
 
+@query_budget(5)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsReceptionistOrAdmin])
 def checkin_stats(request):
@@ -254,13 +263,10 @@ def checkin_stats(request):
         course__date=today
     ).count()
     
-    ongoing_courses = Course.objects.filter(
-        tenant_id=tenant_id,
-        date=today,
-        start_time__lte=now.time(),
-        end_time__gte=now.time(),
-        status='SCHEDULED'
-    ).count()
+    # ✅ Cours en cours : index de disponibilité en mémoire (bookings.availability)
+    ongoing_courses = len(
+        availability_index.for_day(tenant_id, today).ongoing(today, now.time(), statuses={'SCHEDULED'})
+    )
     
     return Response({
         'todayCheckins': today_checkins,
@@ -288,35 +294,15 @@ def create_booking(request):
         member = Member.objects.get(member_id=member_id, tenant_id=tenant_id)
         course = Course.objects.get(id=course_id, tenant_id=tenant_id)
         
-        # Vérifier abonnement
-        if not member.has_active_subscription:
+        # ✅ Vérifications + réservation atomique de la place (bookings.services)
+        try:
+            booking = book_course(member, course, tenant_id=tenant_id)
+        except BookingError as e:
             return Response(
-                {'error': 'Le membre doit avoir un abonnement actif'},
+                {'error': e.message},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Vérifier si déjà réservé
-        if Booking.objects.filter(member=member, course=course).exists():
-            return Response(
-                {'error': 'Ce membre a déjà réservé ce cours'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Vérifier disponibilité
-        if course.is_full:
-            return Response(
-                {'error': 'Le cours est complet'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Créer la réservation
-        booking = Booking.objects.create(
-            member=member,
-            course=course,
-            status='CONFIRMED',
-            tenant_id=tenant_id
-        )
-        
         return Response({
             'success': True,
             'message': f'Réservation créée pour {member.full_name}',
@@ -372,8 +358,12 @@ def get_receptionist_bookings(request):
     
     bookings = bookings.order_by('-course__date', '-course__start_time')
     
+    # ✅ Page bornée (curseur ?cursor=, ?page_size=, ?count=true)
+    paginator = BookingPagination()
+    page = paginator.paginate_queryset(bookings, request)
+    
     results = []
-    for booking in bookings:
+    for booking in page:
         results.append({
             'id': booking.id,
             'member_id': booking.member.member_id,
@@ -390,4 +380,4 @@ def get_receptionist_bookings(request):
             'booking_date': booking.booking_date
         })
     
-    return Response({'results': results})
\ No newline at end of file
+    return paginator.get_paginated_response(results)
\ No newline at end of file
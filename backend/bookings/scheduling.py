@@ -0,0 +1,224 @@
+# backend/bookings/scheduling.py
+
+"""
+📅 Planification de cours en masse à partir de règles de récurrence hebdomadaires.
+
+1. Chaque règle (jours, horaires, période, intervalle en semaines) est
+   développée en séances, en mémoire.
+2. Les cours existants des coachs et salles concernés sont chargés en UNE
+   requête sur la période, dans un index d'intervalles par (ressource, jour).
+3. Chaque séance est confrontée à l'index (coach ET salle), puis ajoutée à
+   l'index : les séances d'une même demande ne se chevauchent pas non plus.
+4. Les séances retenues sont insérées par bulk_create.
+"""
+
+import bisect
+from collections import namedtuple
+from datetime import timedelta
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Course
+
+WEEKDAY_CODES = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+# Clés RRULE comprises ; les autres (COUNT, UNTIL, BYMONTH...) sont refusées, pas ignorées
+RRULE_KEYS = ('FREQ', 'BYDAY', 'INTERVAL')
+
+# Au-delà, la demande est refusée (une saison complète reste bien en dessous)
+MAX_SESSIONS = 5000
+
+Session = namedtuple('Session', ['rule_index', 'date', 'start_time', 'end_time', 'coach_id', 'room_id'])
+# course_id None : conflit avec une autre séance de la même demande
+Conflict = namedtuple('Conflict', ['session', 'resource', 'course_id'])
+
+
+def parse_rrule(rrule):
+    """
+    Sous-ensemble de RRULE (RFC 5545) : FREQ=WEEKLY;BYDAY=MO,WE;INTERVAL=2.
+    Retourne (jours de semaine 0-6, intervalle). Lève ValueError si non supporté.
+    """
+    parts = {}
+    for item in rrule.upper().replace('RRULE:', '').split(';'):
+        if item.strip():
+            key, _, value = item.partition('=')
+            parts[key.strip()] = value.strip()
+
+    unsupported = [key for key in parts if key not in RRULE_KEYS]
+    if unsupported:
+        raise ValueError(
+            f"Clé(s) RRULE non supportée(s) : {','.join(unsupported)} "
+            f"(seules {', '.join(RRULE_KEYS)} ; la période vient de start_date / end_date)"
+        )
+    if parts.get('FREQ', 'WEEKLY') != 'WEEKLY':
+        raise ValueError('Seule la fréquence FREQ=WEEKLY est supportée')
+    codes = [code.strip() for code in parts.get('BYDAY', '').split(',') if code.strip()]
+    if not codes:
+        raise ValueError('BYDAY doit contenir au moins un jour (MO,TU,WE,TH,FR,SA,SU)')
+    unknown = [code for code in codes if code not in WEEKDAY_CODES]
+    if unknown:
+        raise ValueError(f"Jour(s) BYDAY inconnu(s) : {','.join(unknown)} (MO,TU,WE,TH,FR,SA,SU)")
+    weekdays = [WEEKDAY_CODES.index(code) for code in codes]
+    interval = int(parts.get('INTERVAL', 1))
+    if interval < 1:
+        raise ValueError('INTERVAL doit être >= 1')
+    return sorted(set(weekdays)), interval
+
+
+def expand_weekly(start_date, end_date, weekdays, interval=1, exclude_dates=(), limit=None):
+    """
+    Dates des séances : jours `weekdays` (0 = lundi), une semaine sur `interval`.
+    `limit` : arrêt dès `limit + 1` dates (période démesurée refusée sans tout développer).
+    """
+    excluded = set(exclude_dates)
+    week_start = start_date - timedelta(days=start_date.weekday())
+    dates = []
+    while week_start <= end_date:
+        for weekday in weekdays:
+            day = week_start + timedelta(days=weekday)
+            if start_date <= day <= end_date and day not in excluded:
+                dates.append(day)
+                if limit is not None and len(dates) > limit:
+                    return dates
+        week_start += timedelta(weeks=interval)
+    return dates
+
+
+class IntervalIndex:
+    """
+    Créneaux occupés par ressource et par jour : {(ressource, date): [(début, fin, id)]}
+    trié par heure de début. La recherche s'arrête aux créneaux qui commencent
+    après la fin demandée (bisect), seuls les précédents sont examinés.
+    """
+
+    def __init__(self):
+        self._slots = {}
+
+    def add(self, key, start, end, ref):
+        bisect.insort(self._slots.setdefault(key, []), (start, end, ref))
+
+    def remove(self, key, ref):
+        slots = self._slots.get(key)
+        if slots:
+            slots[:] = [slot for slot in slots if slot[2] != ref]
+            if not slots:
+                del self._slots[key]
+
+    def slots(self, key):
+        """Créneaux (début, fin, id) de `key`, par heure de début"""
+        return list(self._slots.get(key, ()))
+
+    def overlapping(self, key, start, end):
+        """Tous les créneaux qui chevauchent [start, end["""
+        slots = self._slots.get(key, ())
+        position = bisect.bisect_left(slots, (end,))
+        return [slot for slot in slots[:position] if slot[1] > start]
+
+    def find_overlap(self, key, start, end):
+        """Référence d'un créneau qui chevauche [start, end[ , ou None"""
+        slots = self._slots.get(key)
+        if not slots:
+            return None
+        position = bisect.bisect_left(slots, (end,))
+        for slot_start, slot_end, ref in reversed(slots[:position]):
+            if slot_end > start:
+                return ref
+        return None
+
+
+def build_index(tenant_id, start_date, end_date, coach_ids, room_ids):
+    """Index des cours existants (non annulés) des coachs/salles concernés : une requête"""
+    index = IntervalIndex()
+    existing = Course.objects.filter(
+        tenant_id=tenant_id,
+        date__gte=start_date,
+        date__lte=end_date
+    ).filter(
+        Q(coach_id__in=coach_ids) | Q(room_id__in=room_ids)
+    ).exclude(
+        status='CANCELLED'
+    ).values_list('id', 'date', 'start_time', 'end_time', 'coach_id', 'room_id')
+
+    for course_id, day, start, end, coach_id, room_id in existing:
+        index.add(('coach', coach_id, day), start, end, course_id)
+        index.add(('room', room_id, day), start, end, course_id)
+    return index
+
+
+def plan_sessions(rules, tenant_id):
+    """
+    Développer les règles et détecter les conflits.
+    `rules` : dicts validés (coach, room, start_date, end_date, weekdays, interval,
+    exclude_dates, start_time, end_time...). Retourne (séances sans conflit, conflits).
+    """
+    sessions = []
+    for rule_index, rule in enumerate(rules):
+        for day in expand_weekly(
+            rule['start_date'], rule['end_date'], rule['weekdays'], rule['interval'], rule['exclude_dates'],
+            limit=MAX_SESSIONS - len(sessions)
+        ):
+            sessions.append(Session(
+                rule_index, day, rule['start_time'], rule['end_time'], rule['coach'].pk, rule['room'].pk
+            ))
+        if len(sessions) > MAX_SESSIONS:
+            raise ValueError(f'Plus de {MAX_SESSIONS} séances demandées (maximum par requête)')
+    if not sessions:
+        return [], []
+
+    index = build_index(
+        tenant_id,
+        min(s.date for s in sessions),
+        max(s.date for s in sessions),
+        {s.coach_id for s in sessions},
+        {s.room_id for s in sessions}
+    )
+
+    accepted, conflicts = [], []
+    for session in sorted(sessions, key=lambda s: (s.date, s.start_time, s.rule_index)):
+        clash = None
+        for resource, resource_id in (('coach', session.coach_id), ('room', session.room_id)):
+            ref = index.find_overlap((resource, resource_id, session.date), session.start_time, session.end_time)
+            if ref is not None:
+                clash = Conflict(session, resource, ref if ref > 0 else None)
+                break
+
+        if clash:
+            conflicts.append(clash)
+            continue
+
+        # Séance retenue : elle occupe désormais le coach et la salle (référence < 0 = même demande)
+        ref = -1 - len(accepted)
+        index.add(('coach', session.coach_id, session.date), session.start_time, session.end_time, ref)
+        index.add(('room', session.room_id, session.date), session.start_time, session.end_time, ref)
+        accepted.append(session)
+
+    return accepted, conflicts
+
+
+def create_sessions(rules, sessions, tenant_id):
+    """Insérer les séances retenues (bulk_create par lots)"""
+    courses = []
+    for session in sessions:
+        rule = rules[session.rule_index]
+        courses.append(Course(
+            course_type=rule['course_type'],
+            coach_id=session.coach_id,
+            room_id=session.room_id,
+            title=rule['title'],
+            description=rule.get('description', ''),
+            date=session.date,
+            start_time=session.start_time,
+            end_time=session.end_time,
+            max_participants=rule['max_participants'],
+            notes=rule.get('notes', ''),
+            tenant_id=tenant_id
+        ))
+
+    from .availability import availability_index  # Import ici pour éviter import circulaire
+
+    with transaction.atomic():
+        created = Course.objects.bulk_create(courses, batch_size=500)
+        # bulk_create n'envoie pas de signaux : index de disponibilité rechargé au prochain usage
+        transaction.on_commit(partial(availability_index.invalidate, tenant_id))
+    return created
@@ -1,9 +1,16 @@
 # Fichier: backend/bookings/serializers.py
 
+from datetime import time
+
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from .models import Room, CourseType, Course, Booking
+from .services import book_course, BookingError
+from .scheduling import WEEKDAY_CODES, parse_rrule
 from members.serializers import MemberListSerializer
 
+User = get_user_model()
+
 class RoomSerializer(serializers.ModelSerializer):
     courses_count = serializers.SerializerMethodField()
     
@@ -14,6 +21,10 @@ class RoomSerializer(serializers.ModelSerializer):
         read_only_fields = ['tenant_id']
     
     def get_courses_count(self, obj):
+        # ✅ Annotation de RoomViewSet.get_queryset() si disponible
+        annotated = getattr(obj, 'scheduled_courses_count', None)
+        if annotated is not None:
+            return annotated
         return obj.courses.filter(status='SCHEDULED').count()
 
 
@@ -45,7 +56,8 @@ class CourseListSerializer(serializers.ModelSerializer):
         read_only_fields = ['tenant_id']
     
     def get_bookings_count(self, obj):
-        return obj.bookings.filter(status='CONFIRMED').count()
+        # ✅ Annotation de Course.objects.with_booking_stats() si disponible
+        return obj.confirmed_bookings
 
 
 class CourseDetailSerializer(serializers.ModelSerializer):
@@ -60,7 +72,7 @@ class CourseDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = '__all__'
-        read_only_fields = ['tenant_id']
+        read_only_fields = ['tenant_id', 'confirmed_count']
 
 
 class CourseCreateUpdateSerializer(serializers.ModelSerializer):
@@ -84,6 +96,94 @@ class CourseCreateUpdateSerializer(serializers.ModelSerializer):
         return data
 
 
+class CourseScheduleRuleSerializer(serializers.Serializer):
+    """
+    Règle de récurrence hebdomadaire : jours (`weekdays` ou `rrule`),
+    horaires et période. Mêmes contrôles que CourseCreateUpdateSerializer.
+    """
+    course_type = serializers.PrimaryKeyRelatedField(queryset=CourseType.objects.all())
+    coach = serializers.PrimaryKeyRelatedField(queryset=User.objects.filter(role__in=['COACH', 'ADMIN']))
+    room = serializers.PrimaryKeyRelatedField(queryset=Room.objects.all())
+    title = serializers.CharField(max_length=200)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+    max_participants = serializers.IntegerField(min_value=1)
+
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+
+    weekdays = serializers.ListField(
+        child=serializers.ChoiceField(choices=WEEKDAY_CODES), required=False, allow_empty=False
+    )
+    rrule = serializers.CharField(required=False, help_text="Ex: FREQ=WEEKLY;BYDAY=MO,WE;INTERVAL=2")
+    interval = serializers.IntegerField(min_value=1, required=False, default=1)
+    exclude_dates = serializers.ListField(child=serializers.DateField(), required=False, default=list)
+
+    def validate(self, data):
+        if data['end_time'] <= data['start_time']:
+            raise serializers.ValidationError("L'heure de fin doit être après l'heure de début.")
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError("La date de fin doit être après la date de début.")
+        if data['max_participants'] > data['room'].capacity:
+            raise serializers.ValidationError(
+                f"Le nombre de participants ne peut pas dépasser la capacité de la salle ({data['room'].capacity})."
+            )
+
+        tenant_id = self.context.get('tenant_id')
+        for field in ['course_type', 'room', 'coach']:
+            if tenant_id and data[field].tenant_id != tenant_id:
+                raise serializers.ValidationError({field: "N'appartient pas à ce centre."})
+
+        # Jours : liste explicite ou RRULE (FREQ=WEEKLY uniquement)
+        if data.get('rrule'):
+            try:
+                data['weekdays'], data['interval'] = parse_rrule(data['rrule'])
+            except ValueError as e:
+                raise serializers.ValidationError({'rrule': str(e)})
+        elif data.get('weekdays'):
+            data['weekdays'] = sorted({WEEKDAY_CODES.index(code) for code in data['weekdays']})
+        else:
+            raise serializers.ValidationError("Indiquer les jours avec `weekdays` ou `rrule`.")
+
+        return data
+
+
+class CourseScheduleSerializer(serializers.Serializer):
+    """Planification en masse : une ou plusieurs règles, conflits bloquants ou ignorés"""
+    rules = CourseScheduleRuleSerializer(many=True, allow_empty=False)
+    skip_conflicts = serializers.BooleanField(required=False, default=False)
+    dry_run = serializers.BooleanField(required=False, default=False)
+
+
+class AvailabilityQuerySerializer(serializers.Serializer):
+    """
+    Paramètres de /availability/ : une salle et/ou un coach, un jour.
+    Avec start_time/end_time → conflits du créneau ; sinon créneaux libres
+    entre opening et closing d'au moins `duration` minutes.
+    """
+    date = serializers.DateField(required=False)
+    room = serializers.IntegerField(required=False, min_value=1)
+    coach = serializers.IntegerField(required=False, min_value=1)
+    start_time = serializers.TimeField(required=False)
+    end_time = serializers.TimeField(required=False)
+    opening = serializers.TimeField(required=False, default=time(6, 0))
+    closing = serializers.TimeField(required=False, default=time(22, 0))
+    duration = serializers.IntegerField(required=False, min_value=0, default=0)
+
+    def validate(self, data):
+        if not data.get('room') and not data.get('coach'):
+            raise serializers.ValidationError("Indiquer `room` et/ou `coach`.")
+        if ('start_time' in data) != ('end_time' in data):
+            raise serializers.ValidationError("Indiquer `start_time` et `end_time` ensemble.")
+        if 'start_time' in data and data['end_time'] <= data['start_time']:
+            raise serializers.ValidationError("L'heure de fin doit être après l'heure de début.")
+        if data['closing'] <= data['opening']:
+            raise serializers.ValidationError("L'heure de fermeture doit être après l'heure d'ouverture.")
+        return data
+
+
 class BookingListSerializer(serializers.ModelSerializer):
     """Serializer léger pour les listes"""
     member_name = serializers.CharField(source='member.full_name', read_only=True)
@@ -123,62 +223,31 @@ class BookingCreateSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         """
-        ✅ CORRECTION: Récupérer automatiquement le membre depuis request.user
+        ✅ Réserver via bookings.services (membre = utilisateur connecté)
+        Le tenant_id est hérité du membre.
         """
-        request = self.context.get('request')
-        
-        # Récupérer le membre depuis l'utilisateur connecté
         try:
-            member = request.user.member_profile
-        except AttributeError:
-            raise serializers.ValidationError({
-                'member': 'Profil membre introuvable pour cet utilisateur'
-            })
-        
-        # Ajouter le membre aux données validées
-        validated_data['member'] = member
-        
-        # Le tenant_id sera hérité du membre automatiquement dans le modèle
-        booking = Booking.objects.create(**validated_data)
-        
-        return booking
+            return book_course(
+                validated_data['member'],
+                validated_data['course'],
+                notes=validated_data.get('notes', ''),
+                require_active_subscription=False
+            )
+        except BookingError as e:
+            raise serializers.ValidationError(e.message)
     
     def validate(self, data):
         """
         ✅ Validation avec le membre récupéré du contexte
+        Complet / déjà réservé / passé / annulé : vérifiés par book_course()
         """
         request = self.context.get('request')
         
         try:
-            member = request.user.member_profile
+            data['member'] = request.user.member_profile
         except AttributeError:
             raise serializers.ValidationError({
                 'member': 'Profil membre introuvable'
             })
         
-        course = data['course']
-        
-        # Vérifier si le cours est complet
-        if course.is_full:
-            raise serializers.ValidationError("Ce cours est complet.")
-        
-        # Vérifier si le membre a déjà réservé ce cours
-        if Booking.objects.filter(
-            course=course, 
-            member=member
-        ).exclude(status='CANCELLED').exists():
-            raise serializers.ValidationError(
-                "Vous avez déjà réservé ce cours."
-            )
-        
-        # Vérifier si le cours est passé
-        if course.is_past:
-            raise serializers.ValidationError(
-                "Impossible de réserver un cours passé."
-            )
-        
-        # Vérifier si le cours est annulé
-        if course.status == 'CANCELLED':
-            raise serializers.ValidationError("Ce cours a été annulé.")
-        
         return data
@@ -0,0 +1,89 @@
+# backend/bookings/services.py
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Booking, Course
+
+
+class BookingError(Exception):
+    """Réservation refusée : code machine, titre court et message utilisateur"""
+
+    def __init__(self, code, title, message):
+        super().__init__(message)
+        self.code = code
+        self.title = title
+        self.message = message
+
+
+def _already_booked():
+    return BookingError('already_booked', 'Déjà réservé', 'Ce membre a déjà réservé ce cours.')
+
+
+def book_course(member, course, tenant_id=None, notes='', require_active_subscription=True):
+    """
+    📝 Point d'entrée unique pour réserver une place (portail, réception, API).
+
+    La place est prise par un UPDATE conditionnel :
+        UPDATE course SET confirmed_count = confirmed_count + 1
+        WHERE id = ... AND confirmed_count < max_participants AND status <> 'CANCELLED'
+    Deux réservations simultanées ne peuvent donc jamais dépasser la capacité,
+    sans COUNT(*) ni verrou applicatif. Lève BookingError si la réservation est refusée.
+    """
+    if require_active_subscription and not member.has_active_subscription:
+        raise BookingError(
+            'no_subscription', 'Abonnement requis',
+            'Un abonnement actif est requis pour réserver un cours.'
+        )
+
+    if course.status == 'CANCELLED':
+        raise BookingError('cancelled', 'Cours annulé', 'Ce cours a été annulé.')
+
+    if course.is_past:
+        raise BookingError('past', 'Cours passé', 'Impossible de réserver un cours passé.')
+
+    # Une seule ligne par (cours, membre) : une réservation annulée est réactivée
+    existing = Booking.objects.filter(course=course, member=member).only('id', 'status').first()
+    if existing and existing.status != 'CANCELLED':
+        raise _already_booked()
+
+    try:
+        with transaction.atomic():
+            reserved = Course.objects.filter(
+                pk=course.pk,
+                confirmed_count__lt=F('max_participants')
+            ).exclude(
+                status='CANCELLED'
+            ).update(confirmed_count=F('confirmed_count') + 1)
+
+            if not reserved:
+                raise BookingError(
+                    'full', 'Cours complet',
+                    f'Ce cours est complet ({course.max_participants} places).'
+                )
+
+            if existing:
+                reactivated = Booking.objects.filter(pk=existing.pk, status='CANCELLED').update(
+                    status='CONFIRMED',
+                    notes=notes,
+                    updated_at=timezone.now()
+                )
+                if not reactivated:
+                    raise _already_booked()
+                booking = Booking.objects.get(pk=existing.pk)
+            else:
+                booking = Booking(
+                    course=course,
+                    member=member,
+                    status='CONFIRMED',
+                    notes=notes,
+                    tenant_id=tenant_id or member.tenant_id
+                )
+                booking.save(update_course_counter=False)
+    except IntegrityError:
+        # Double soumission concurrente du même membre (contrainte course/member)
+        raise _already_booked()
+
+    course.confirmed_count += 1
+    return booking
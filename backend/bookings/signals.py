@@ -0,0 +1,38 @@
+# backend/bookings/signals.py
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .availability import availability_index
+from .models import Booking, Course
+
+# Champs de Course qui changent l'occupation d'une salle ou d'un coach
+AVAILABILITY_FIELDS = {'date', 'start_time', 'end_time', 'coach', 'coach_id', 'room', 'room_id', 'status', 'tenant_id'}
+
+
+@receiver(post_delete, sender=Booking)
+def release_course_spot(sender, instance, **kwargs):
+    """Suppression d'une réservation confirmée → libérer la place du cours"""
+    if getattr(instance, '_loaded_status', None) == 'CONFIRMED':
+        Course.objects.filter(pk=instance.course_id).update(
+            confirmed_count=Greatest(F('confirmed_count') - 1, 0)
+        )
+
+
+@receiver(post_save, sender=Course)
+def refresh_course_availability(sender, instance, update_fields=None, **kwargs):
+    """Cours créé ou modifié → mettre à jour l'index de disponibilité (après commit)"""
+    if update_fields is not None and not AVAILABILITY_FIELDS & set(update_fields):
+        return
+    transaction.on_commit(partial(availability_index.refresh_course, instance.tenant_id, instance.pk))
+
+
+@receiver(post_delete, sender=Course)
+def remove_course_availability(sender, instance, **kwargs):
+    """Cours supprimé → le retirer de l'index de disponibilité (après commit)"""
+    transaction.on_commit(partial(availability_index.remove_course, instance.tenant_id, instance.pk))
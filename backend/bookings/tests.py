@@ -1,3 +1,664 @@
+# backend/bookings/tests.py
+# Tests des listes de cours et réservations
+
+import time as time_module
+from datetime import date, time, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.models import GymCenter
+from authentication.tenant_registry import tenant_registry
+from members.models import Member
+from .availability import availability_index
+from .models import Room, CourseType, Course, Booking
+from .services import book_course, BookingError
+from .views import CourseViewSet
+
+User = get_user_model()
+
+
+class CourseListingQueryTestCase(TestCase):
+    """
+    Tests de non-régression : le nombre de requêtes des listes de cours
+    ne doit pas dépendre du nombre de cours affichés.
+    """
+
+    def setUp(self):
+        self.owner = User.objects.create_superuser(
+            username='owner',
+            email='owner@gymflow.com',
+            password='owner123'
+        )
+        GymCenter.objects.create(
+            name='PowerFit',
+            subdomain='powerfit',
+            email='contact@powerfit.com',
+            phone='123456',
+            address='123 Street',
+            owner=self.owner,
+            tenant_id='powerfit'
+        )
+        tenant_registry.invalidate()
+
+        self.admin = User.objects.create_user(
+            username='admin_powerfit',
+            email='admin@powerfit.com',
+            password='admin123',
+            role='ADMIN',
+            tenant_id='powerfit'
+        )
+        self.coach = User.objects.create_user(
+            username='coach_powerfit',
+            email='coach@powerfit.com',
+            password='coach123',
+            role='COACH',
+            tenant_id='powerfit',
+            first_name='Sami',
+            last_name='Coach'
+        )
+        self.room = Room.objects.create(name='Salle A', capacity=30, tenant_id='powerfit')
+        self.course_type = CourseType.objects.create(name='Yoga', tenant_id='powerfit')
+
+        self.members = []
+        for i in range(3):
+            user = User.objects.create_user(
+                username=f'member{i}',
+                email=f'member{i}@powerfit.com',
+                password='member123',
+                role='MEMBER',
+                tenant_id='powerfit'
+            )
+            self.members.append(Member.objects.create(
+                user=user,
+                first_name='Membre',
+                last_name=str(i),
+                email=f'member{i}@powerfit.com',
+                phone='12345678',
+                date_of_birth=date(1990, 1, 1),
+                gender='M',
+                emergency_contact_name='Contact',
+                emergency_contact_phone='12345678',
+                tenant_id='powerfit'
+            ))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _create_courses(self, count, start=0):
+        today = timezone.now().date()
+        for i in range(start, start + count):
+            course = Course.objects.create(
+                course_type=self.course_type,
+                coach=self.coach,
+                room=self.room,
+                title=f'Cours {i}',
+                date=today + timedelta(days=i % 5),
+                start_time=time(6 + i // 5, 0),
+                end_time=time(7 + i // 5, 0),
+                max_participants=2,
+                tenant_id='powerfit'
+            )
+            # Réservations variées : 0, 1 ou 2 confirmées + une annulée
+            for member in self.members[:i % 3]:
+                Booking.objects.create(course=course, member=member, tenant_id='powerfit')
+            if i % 3 < 2:
+                Booking.objects.create(
+                    course=course, member=self.members[2], status='CANCELLED', tenant_id='powerfit'
+                )
+
+    def _count_queries(self, method, url):
+        tenant_registry.get_default()  # Registre chaud, comme sur un worker en production
+        with CaptureQueriesContext(connection) as context:
+            response = method(url, HTTP_X_TENANT_SUBDOMAIN='powerfit')
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response.data
+
+    def test_course_list_constant_queries(self):
+        """
+        Test: /courses/, /courses/upcoming/ et /courses/today/ en nombre de requêtes constant.
+        """
+        print("\n🧪 Test: Requêtes constantes sur les listes de cours")
+
+        for url in ['/api/bookings/courses/', '/api/bookings/courses/upcoming/', '/api/bookings/courses/today/']:
+            Course.objects.all().delete()
+            self._create_courses(3)
+            small, _ = self._count_queries(self.client.get, url)
+
+            self._create_courses(12, start=3)
+            large, data = self._count_queries(self.client.get, url)
+
+            self.assertEqual(small, large, f"{url}: {small} requêtes pour 3 cours, {large} pour 15")
+            self.assertTrue(data)
+            print(f"✅ {url}: {large} requêtes pour 15 cours")
+
+    def test_course_list_values_match_model(self):
+        """
+        Test: Les valeurs de la liste sont identiques au calcul par cours.
+        """
+        print("\n🧪 Test: Valeurs de liste identiques")
+
+        self._create_courses(6)
+        _, data = self._count_queries(self.client.get, '/api/bookings/courses/')
+
+        self.assertEqual(len(data), 6)
+        for item in data:
+            course = Course.objects.get(pk=item['id'])
+            confirmed = course.bookings.filter(status='CONFIRMED').count()
+            self.assertEqual(item['bookings_count'], confirmed)
+            self.assertEqual(item['available_spots'], course.max_participants - confirmed)
+            self.assertEqual(item['is_full'], confirmed >= course.max_participants)
+
+        print("✅ bookings_count, available_spots et is_full cohérents")
+
+    def test_portal_available_courses_constant_queries(self):
+        """
+        Test: Le portail membre liste les cours disponibles en requêtes constantes.
+        """
+        print("\n🧪 Test: Portail membre - cours disponibles")
+
+        member = self.members[0]
+        self.client.force_authenticate(user=member.user)
+        url = '/api/members-portal/courses/available/'
+
+        self._create_courses(3)
+        small, _ = self._count_queries(self.client.get, url)
+
+        self._create_courses(12, start=3)
+        large, data = self._count_queries(self.client.get, url)
+
+        self.assertEqual(small, large)
+        for item in data:
+            booked = Booking.objects.filter(
+                course_id=item['id'], member=member, status__in=['CONFIRMED', 'PENDING']
+            ).exists()
+            self.assertEqual(item['already_booked'], booked)
+            self.assertEqual(item['can_book'], not item['is_full'] and not booked)
+
+        print(f"✅ {large} requêtes pour 15 cours")
+
+
+class BookingServiceTestCase(CourseListingQueryTestCase):
+    """
+    Tests du service de réservation : compteur confirmed_count atomique,
+    jamais de surréservation, compteur cohérent après chaque transition.
+    """
+
+    # Les tests de listes sont déjà exécutés par la classe parente
+    test_course_list_constant_queries = None
+    test_course_list_values_match_model = None
+    test_portal_available_courses_constant_queries = None
+
+    def setUp(self):
+        super().setUp()
+        self.course = Course.objects.create(
+            course_type=self.course_type,
+            coach=self.coach,
+            room=self.room,
+            title='Cours de 7h',
+            date=timezone.now().date() + timedelta(days=1),
+            start_time=time(7, 0),
+            end_time=time(8, 0),
+            max_participants=2,
+            tenant_id='powerfit'
+        )
+
+    def _assert_counter_consistent(self):
+        self.course.refresh_from_db()
+        self.assertEqual(
+            self.course.confirmed_count,
+            self.course.bookings.filter(status='CONFIRMED').count()
+        )
+
+    def test_stale_course_never_oversold(self):
+        """
+        Test: Deux réceptions avec une copie périmée du cours ne dépassent pas la capacité.
+        """
+        print("\n🧪 Test: Pas de surréservation")
+
+        # Chaque "requête concurrente" a chargé le cours quand il restait des places
+        copies = [Course.objects.get(pk=self.course.pk) for _ in self.members]
+        booked, refused = 0, 0
+        for member, course in zip(self.members, copies):
+            try:
+                book_course(member, course, require_active_subscription=False)
+                booked += 1
+            except BookingError as e:
+                self.assertEqual(e.code, 'full')
+                refused += 1
+
+        self.assertEqual((booked, refused), (2, 1))
+        self._assert_counter_consistent()
+        print("✅ 2 réservations, 1 refus 'full'")
+
+    def test_single_write_round_trip(self):
+        """
+        Test: Une réservation = 1 lecture + UPDATE conditionnel + INSERT.
+        """
+        print("\n🧪 Test: Requêtes d'une réservation")
+
+        with CaptureQueriesContext(connection) as context:
+            book_course(self.members[0], self.course, require_active_subscription=False)
+
+        statements = [q['sql'].split()[0].upper() for q in context.captured_queries]
+        self.assertEqual(statements.count('UPDATE'), 1)
+        self.assertEqual(statements.count('INSERT'), 1)
+        self.assertEqual(statements.count('SELECT'), 1)
+        print(f"✅ {statements}")
+
+    def test_counter_follows_transitions(self):
+        """
+        Test: Annulation, re-réservation, check-in, suppression et annulation du cours.
+        """
+        print("\n🧪 Test: Compteur et transitions")
+
+        first = book_course(self.members[0], self.course, require_active_subscription=False)
+        book_course(self.members[1], self.course, require_active_subscription=False)
+        self._assert_counter_consistent()
+
+        with self.assertRaises(BookingError) as error:
+            book_course(self.members[0], self.course, require_active_subscription=False)
+        self.assertEqual(error.exception.code, 'already_booked')
+
+        first.cancel()
+        self._assert_counter_consistent()
+
+        # Re-réservation après annulation : la ligne existante est réactivée
+        rebooked = book_course(self.members[0], self.course, require_active_subscription=False)
+        self.assertEqual(rebooked.pk, first.pk)
+        self._assert_counter_consistent()
+
+        Booking.objects.get(pk=first.pk).check_in()
+        self._assert_counter_consistent()
+
+        Booking.objects.filter(member=self.members[1]).get().delete()
+        self._assert_counter_consistent()
+
+        book_course(self.members[2], self.course, require_active_subscription=False)
+        self.client.post(f'/api/bookings/courses/{self.course.pk}/cancel/', HTTP_X_TENANT_SUBDOMAIN='powerfit')
+        self._assert_counter_consistent()
+        self.assertEqual(self.course.confirmed_count, 0)
+
+        with self.assertRaises(BookingError) as error:
+            book_course(self.members[1], self.course, require_active_subscription=False)
+        self.assertEqual(error.exception.code, 'cancelled')
+
+        print("✅ Compteur cohérent après chaque transition")
+
+    def test_api_booking_uses_service(self):
+        """
+        Test: POST /api/bookings/bookings/ passe par le service et refuse un cours complet.
+        """
+        print("\n🧪 Test: Réservation via l'API")
+
+        for member in self.members[:2]:
+            self.client.force_authenticate(user=member.user)
+            response = self.client.post(
+                '/api/bookings/bookings/', {'course': self.course.pk}, HTTP_X_TENANT_SUBDOMAIN='powerfit'
+            )
+            self.assertEqual(response.status_code, 201)
+
+        self.client.force_authenticate(user=self.members[2].user)
+        response = self.client.post(
+            '/api/bookings/bookings/', {'course': self.course.pk}, HTTP_X_TENANT_SUBDOMAIN='powerfit'
+        )
+        self.assertEqual(response.status_code, 400)
+        self._assert_counter_consistent()
+        print("✅ 3e réservation refusée : cours complet")
+
+    def test_course_update_keeps_concurrent_bookings(self):
+        """
+        Test: Une réservation prise entre get_object() et save() d'une modification du cours est conservée.
+        """
+        print("\n🧪 Test: Modification du cours pendant une réservation")
+
+        book_course(self.members[0], self.course, require_active_subscription=False)
+        get_object = CourseViewSet.get_object
+
+        def get_object_then_book(view):
+            course = get_object(view)
+            # Réservation concurrente : le cours chargé par la vue est désormais périmé
+            book_course(self.members[1], Course.objects.get(pk=course.pk), require_active_subscription=False)
+            return course
+
+        self.client.force_authenticate(user=self.admin)
+        with mock.patch.object(CourseViewSet, 'get_object', get_object_then_book):
+            response = self.client.put(f'/api/bookings/courses/{self.course.pk}/', {
+                'course_type': self.course_type.pk,
+                'coach': self.coach.pk,
+                'room': self.room.pk,
+                'title': 'Cours de 7h (salle B)',
+                'date': self.course.date.isoformat(),
+                'start_time': '07:00',
+                'end_time': '08:00',
+                'max_participants': 2,
+            }, format='json', HTTP_X_TENANT_SUBDOMAIN='powerfit')
+        self.assertEqual(response.status_code, 200)
+
+        self._assert_counter_consistent()
+        self.assertEqual(self.course.confirmed_count, 2)
+        self.assertEqual(self.course.title, 'Cours de 7h (salle B)')
+
+        # Cours complet : le compteur n'a pas été ramené à 1, la 3e place est refusée
+        with self.assertRaises(BookingError) as error:
+            book_course(self.members[2], self.course, require_active_subscription=False)
+        self.assertEqual(error.exception.code, 'full')
+        print("✅ Compteur conservé (2/2) après la modification du cours")
+
+
+class CheckinSearchTestCase(CourseListingQueryTestCase):
+    """
+    Tests de la recherche membre au check-in : requêtes constantes
+    quel que soit le nombre de membres trouvés.
+    """
+
+    test_course_list_constant_queries = None
+    test_course_list_values_match_model = None
+    test_portal_available_courses_constant_queries = None
+
+    def setUp(self):
+        super().setUp()
+        from subscriptions.models import Subscription, SubscriptionPlan
+
+        plan = SubscriptionPlan.objects.create(
+            name='Mensuel', duration_days=30, price=50, tenant_id='powerfit'
+        )
+        today = timezone.now().date()
+        Subscription.objects.create(
+            member=self.members[0], plan=plan, start_date=today, end_date=today + timedelta(days=30),
+            status='ACTIVE', amount_paid=50, tenant_id='powerfit'
+        )
+        self.receptionist = User.objects.create_user(
+            username='reception_powerfit',
+            email='reception@powerfit.com',
+            password='reception123',
+            role='RECEPTIONIST',
+            tenant_id='powerfit'
+        )
+        self.client.force_authenticate(user=self.receptionist)
+
+    def _search(self, query):
+        return self._count_queries(self.client.get, f'/api/bookings/receptionist/search-member/?q={query}')
+
+    def test_search_constant_queries(self):
+        """
+        Test: 1 ou 3 membres trouvés → même nombre de requêtes, mêmes données.
+        """
+        print("\n🧪 Test: Recherche check-in en requêtes constantes")
+
+        self._create_courses(15)
+        booking = Booking.objects.filter(member=self.members[1], course__date=timezone.now().date()).first()
+        booking.check_in()
+
+        # Hors PostgreSQL, l'index de recherche en mémoire se charge au premier appel
+        self._search('Membre')
+
+        single, data = self._search('member0@')
+        self.assertEqual(len(data['results']), 1)
+        self.assertTrue(data['results'][0]['has_active_subscription'])
+
+        several, data = self._search('Membre')
+        self.assertEqual(len(data['results']), 3)
+        self.assertEqual(single, several)
+
+        today = timezone.now().date()
+        for result in data['results']:
+            member = Member.objects.get(pk=result['id'])
+            self.assertEqual(result['has_active_subscription'], member.has_active_subscription)
+            self.assertEqual(
+                sorted(b['id'] for b in result['today_bookings']),
+                sorted(Booking.objects.filter(member=member, course__date=today).values_list('id', flat=True))
+            )
+            self.assertEqual(
+                result['is_checked_in'],
+                Booking.objects.filter(member=member, course__date=today, checked_in=True).exists()
+            )
+
+        print(f"✅ {several} requêtes pour 1 ou 3 membres")
+
+
+class CourseScheduleTestCase(CourseListingQueryTestCase):
+    """
+    Tests de la planification en masse : développement des règles,
+    conflits coach/salle détectés, insertion en un nombre fixe de requêtes.
+    """
+
+    test_course_list_constant_queries = None
+    test_course_list_values_match_model = None
+    test_portal_available_courses_constant_queries = None
+
+    def setUp(self):
+        super().setUp()
+        # Lundi prochain, début d'une saison de 12 semaines
+        today = timezone.now().date()
+        self.monday = today + timedelta(days=7 - today.weekday())
+        self.end = self.monday + timedelta(weeks=12) - timedelta(days=1)
+
+    def _rule(self, **overrides):
+        rule = {
+            'course_type': self.course_type.pk,
+            'coach': self.coach.pk,
+            'room': self.room.pk,
+            'title': 'Yoga du soir',
+            'max_participants': 20,
+            'start_date': self.monday.isoformat(),
+            'end_date': self.end.isoformat(),
+            'start_time': '18:00',
+            'end_time': '19:00',
+            'weekdays': ['MO', 'WE', 'FR'],
+        }
+        rule.update(overrides)
+        return {key: value for key, value in rule.items() if value is not None}
+
+    def _schedule(self, rules, **options):
+        tenant_registry.get_default()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                '/api/bookings/courses/schedule/',
+                {'rules': rules, **options},
+                format='json',
+                HTTP_X_TENANT_SUBDOMAIN='powerfit'
+            )
+        return response, len(context.captured_queries)
+
+    def test_season_created_in_few_queries(self):
+        """
+        Test: 2 règles × 12 semaines → 60 cours, requêtes indépendantes du nombre de séances.
+        """
+        print("\n🧪 Test: Planification d'une saison")
+
+        second_room = Room.objects.create(name='Salle B', capacity=15, tenant_id='powerfit')
+        response, queries = self._schedule([
+            self._rule(),
+            self._rule(
+                room=second_room.pk, coach=self.admin.pk, max_participants=15, title='Pilates',
+                weekdays=None, rrule='FREQ=WEEKLY;BYDAY=TU,TH', start_time='18:30', end_time='19:30'
+            ),
+        ])
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['created'], 60)
+        self.assertEqual(Course.objects.filter(tenant_id='powerfit', date__gte=self.monday).count(), 60)
+        self.assertEqual(
+            set(Course.objects.filter(title='Pilates').values_list('date__week_day', flat=True)), {3, 5}
+        )
+        self.assertLessEqual(queries, 12)
+
+        print(f"✅ 60 cours en {queries} requêtes")
+
+    def test_conflicts_block_or_are_skipped(self):
+        """
+        Test: Chevauchement coach ou salle → 409 sans création, ou séances ignorées avec skip_conflicts.
+        """
+        print("\n🧪 Test: Conflits coach / salle")
+
+        # Cours existant le 2e mercredi, 18h30-19h30, autre coach mais même salle
+        existing = Course.objects.create(
+            course_type=self.course_type, coach=self.admin, room=self.room, title='Existant',
+            date=self.monday + timedelta(days=9), start_time=time(18, 30), end_time=time(19, 30),
+            max_participants=10, tenant_id='powerfit'
+        )
+        # Deux semaines sur deux : le coach n'est libre qu'une semaine sur deux dans la demande
+        rules = [self._rule(), self._rule(title='Doublon', weekdays=['FR'], start_time='18:45', end_time='20:00')]
+
+        response, _ = self._schedule(rules)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Course.objects.filter(date__gte=self.monday).count(), 1)
+        resources = {(c['resource'], c['course_id']) for c in response.data['conflicts']}
+        self.assertEqual(resources, {('room', existing.pk), ('coach', None)})
+        self.assertEqual(len(response.data['conflicts']), 13)
+
+        response, _ = self._schedule(rules, skip_conflicts=True)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 35)
+
+        # Créneau adjacent (fin = début) : pas de conflit
+        response, _ = self._schedule([self._rule(start_time='19:00', end_time='20:00', weekdays=['MO'])])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 12)
+
+        print("✅ Conflits détectés, rien de créé sans skip_conflicts")
+
+    def test_oversized_or_invalid_rules_rejected(self):
+        """
+        Test: Période démesurée refusée sans développer toutes les dates ; jour BYDAY ou clé RRULE inconnus refusés.
+        """
+        print("\n🧪 Test: Règles démesurées ou invalides")
+
+        with mock.patch('bookings.scheduling.MAX_SESSIONS', 50):
+            started = time_module.monotonic()
+            response, _ = self._schedule([self._rule(end_date='9999-12-31')])
+            elapsed = time_module.monotonic() - started
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('50', response.data['error'])
+        self.assertLess(elapsed, 1)
+
+        response, _ = self._schedule([self._rule(weekdays=None, rrule='FREQ=WEEKLY;BYDAY=MO,XX')])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('XX', str(response.data))
+
+        # COUNT / UNTIL / BYMONTH : refusés plutôt qu'ignorés (sinon toute la période serait planifiée)
+        for rrule in ['FREQ=WEEKLY;BYDAY=MO;COUNT=4', 'FREQ=WEEKLY;BYDAY=MO;UNTIL=20300101', 'FREQ=WEEKLY;BYDAY=MO;BYMONTH=1']:
+            response, _ = self._schedule([self._rule(weekdays=None, rrule=rrule)])
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(rrule.rsplit(';', 1)[1].split('=')[0], str(response.data['rules']))
+
+        self.assertFalse(Course.objects.filter(tenant_id='powerfit', date__gte=self.monday).exists())
+        print(f"✅ Période jusqu'en 9999 refusée en {elapsed * 1000:.0f} ms, BYDAY=XX et COUNT/UNTIL/BYMONTH refusés")
+
+
+class AvailabilityTestCase(CourseListingQueryTestCase):
+    """
+    Tests de l'index de disponibilité : réponses sans requête une fois chargé,
+    index tenu à jour par les signaux de Course.
+    """
+
+    test_course_list_constant_queries = None
+    test_course_list_values_match_model = None
+    test_portal_available_courses_constant_queries = None
+
+    def setUp(self):
+        super().setUp()
+        availability_index.invalidate()
+        self.day = timezone.now().date() + timedelta(days=2)
+
+    def _course(self, start, end, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Course.objects.create(
+                course_type=self.course_type, coach=self.coach, room=self.room, title='Cours',
+                date=self.day, start_time=start, end_time=end, max_participants=10,
+                tenant_id='powerfit', **fields
+            )
+
+    def _availability(self, **params):
+        tenant_registry.get_default()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                '/api/bookings/availability/',
+                {'date': self.day.isoformat(), **params},
+                HTTP_X_TENANT_SUBDOMAIN='powerfit'
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        # Requêtes sur les cours (hors authentification / tenant)
+        return response.data, sum('"bookings_course"' in q['sql'] for q in context.captured_queries)
+
+    def test_free_slots_and_conflicts(self):
+        """
+        Test: Créneaux libres d'une salle, conflits coach, index chargé une seule fois.
+        """
+        print("\n🧪 Test: Disponibilités salle / coach")
+
+        morning = self._course(time(9, 0), time(10, 0))
+        self._course(time(10, 0), time(11, 30))
+        self._course(time(14, 0), time(15, 0), status='CANCELLED')
+
+        data, queries = self._availability(room=self.room.pk, opening='08:00', closing='18:00', duration=60)
+        self.assertEqual(queries, 1)
+        self.assertEqual([slot['start_time'] for slot in data['busy']], ['09:00', '10:00'])
+        self.assertEqual(data['free'], [
+            {'start_time': '08:00', 'end_time': '09:00'},
+            {'start_time': '11:30', 'end_time': '18:00'},
+        ])
+
+        # Index chaud : aucune requête sur les cours
+        data, queries = self._availability(coach=self.admin.pk, start_time='09:30', end_time='10:15')
+        self.assertTrue(data['available'])
+        self.assertEqual(queries, 0)
+
+        data, _ = self._availability(coach=self.coach.pk, start_time='09:30', end_time='10:15')
+        self.assertFalse(data['available'])
+        self.assertEqual(len(data['conflicts']), 2)
+        self.assertEqual(data['conflicts'][0]['course_id'], morning.pk)
+
+        # Adjacent (fin = début) : libre
+        data, _ = self._availability(room=self.room.pk, start_time='11:30', end_time='12:00')
+        self.assertTrue(data['available'])
+
+        print("✅ Disponibilités servies depuis l'index, sans requête sur les cours")
+
+    def test_index_follows_course_changes(self):
+        """
+        Test: Déplacement, annulation et suppression d'un cours répercutés dans l'index.
+        """
+        print("\n🧪 Test: Index mis à jour par les signaux")
+
+        course = self._course(time(18, 0), time(19, 0))
+        data, _ = self._availability(room=self.room.pk, start_time='18:00', end_time='19:00')
+        self.assertFalse(data['available'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            course.start_time, course.end_time = time(20, 0), time(21, 0)
+            course.save()
+        data, _ = self._availability(room=self.room.pk, start_time='18:00', end_time='19:00')
+        self.assertTrue(data['available'])
+        data, _ = self._availability(room=self.room.pk, start_time='20:30', end_time='21:30')
+        self.assertFalse(data['available'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/bookings/courses/{course.pk}/cancel/', HTTP_X_TENANT_SUBDOMAIN='powerfit')
+        data, _ = self._availability(room=self.room.pk, start_time='20:30', end_time='21:30')
+        self.assertTrue(data['available'])
+
+        # Date hors fenêtre : chargée depuis la base
+        far = self._course(time(8, 0), time(9, 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            far.date = self.day + timedelta(days=365)
+            far.save()
+        response = self.client.get(
+            '/api/bookings/availability/',
+            {'date': far.date.isoformat(), 'room': self.room.pk},
+            HTTP_X_TENANT_SUBDOMAIN='powerfit'
+        )
+        self.assertEqual([slot['course_id'] for slot in response.data['busy']], [far.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            far.delete()
+        data, _ = self._availability(room=self.room.pk)
+        self.assertEqual(data['busy'], [])
 
-# Create your tests here.
+        print("✅ Index à jour après modification, annulation et suppression")
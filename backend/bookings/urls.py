@@ -15,6 +15,9 @@ router.register(r'bookings', views.BookingViewSet, basename='booking')
 urlpatterns = [
     path('', include(router.urls)),
     
+    # ✅ DISPONIBILITÉ SALLES / COACHS (index en mémoire)
+    path('availability/', views.availability, name='availability'),
+    
     # ✅ ENDPOINTS RÉCEPTIONNISTE - CHECK-IN
     path('receptionist/search-member/', receptionist_views.search_member_for_checkin, name='receptionist-search'),
     path('check-in/quick/', receptionist_views.quick_checkin, name='quick-checkin'),
@@ -1,24 +1,36 @@
 # Fichier: backend/bookings/views.py
 
 from rest_framework import viewsets, status, filters
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
+from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import datetime, timedelta
-import logging
 
 from .models import Room, CourseType, Course, Booking
 from .serializers import (
     RoomSerializer, CourseTypeSerializer,
     CourseListSerializer, CourseDetailSerializer, CourseCreateUpdateSerializer,
-    BookingListSerializer, BookingDetailSerializer, BookingCreateSerializer
+    BookingListSerializer, BookingDetailSerializer, BookingCreateSerializer,
+    CourseScheduleSerializer, AvailabilityQuerySerializer
 )
 from authentication.mixins import CompleteTenantMixin
+from authentication.pagination import KeysetPagination
+from authentication.permissions import IsAdminOrReceptionist
+from authentication.structured_logging import get_logger
+from authentication.db_router import read_replica
+from .scheduling import plan_sessions, create_sessions
+from .availability import availability_index, free_slots
+from members.metrics_rollup import (
+    load_daily_metrics, metrics_tenant_id, live_today_requested,
+    COURSE_COLUMNS, BOOKING_COLUMNS
+)
 
-logger = logging.getLogger('bookings.views')
+logger = get_logger('bookings.views')
 
 
 class BaseTenantViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
@@ -28,14 +40,14 @@ class BaseTenantViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
     
     def create(self, request, *args, **kwargs):
         """✅ Override create pour injecter tenant_id AVANT validation"""
-        logger.debug(f"🔍 create() appelé - {self.__class__.__name__}")
-        logger.debug(f"📦 request.data = {request.data}")
+        # Noms des champs seulement : le contenu peut être volumineux ou personnel
+        logger.debug("🔍 create()", view=self.__class__.__name__, fields=lambda: sorted(request.data.keys()))
         
         # ✅ Déterminer le tenant_id
         tenant_id = self._get_tenant_id(request)
         
         if not tenant_id:
-            logger.error("❌ Aucun tenant_id trouvé!")
+            logger.error("❌ Aucun tenant_id trouvé", view=self.__class__.__name__)
             raise PermissionDenied("Impossible de créer cette ressource : aucun centre associé.")
         
         # ✅ Valider les données (sans tenant_id)
@@ -43,7 +55,6 @@ class BaseTenantViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         
         # ✅ Sauvegarder avec tenant_id
-        logger.debug(f"✅ Sauvegarde avec tenant_id={tenant_id}")
         self.perform_create(serializer, tenant_id=tenant_id)
         
         headers = self.get_success_headers(serializer.data)
@@ -52,10 +63,10 @@ class BaseTenantViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
     def perform_create(self, serializer, tenant_id=None):
         """✅ Sauvegarder avec le tenant_id"""
         if tenant_id:
-            logger.debug(f"✅ perform_create: sauvegarde avec tenant_id={tenant_id}")
+            logger.debug("✅ perform_create", view=self.__class__.__name__, tenant_id=tenant_id)
             serializer.save(tenant_id=tenant_id)
         else:
-            logger.error("❌ perform_create appelé sans tenant_id!")
+            logger.error("❌ perform_create appelé sans tenant_id", view=self.__class__.__name__)
             serializer.save()
     
     def _get_tenant_id(self, request):
@@ -63,16 +74,13 @@ class BaseTenantViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
         gym_center = getattr(request, 'gym_center', None)
         
         if gym_center:
-            logger.debug(f"✅ tenant_id depuis gym_center: {gym_center.tenant_id}")
             return gym_center.tenant_id
         
         tenant_id = getattr(request, 'tenant_id', None)
         if tenant_id:
-            logger.debug(f"✅ tenant_id depuis request: {tenant_id}")
             return tenant_id
         
         if request.user.is_authenticated and hasattr(request.user, 'tenant_id'):
-            logger.debug(f"✅ tenant_id depuis user: {request.user.tenant_id}")
             return request.user.tenant_id
         
         return None
@@ -86,6 +94,14 @@ class RoomViewSet(BaseTenantViewSet):
     search_fields = ['name', 'description']
     filterset_fields = ['is_active']
     tenant_field = 'tenant_id'
+    # 📊 Requêtes SQL max par action (authentication/query_budget.py)
+    query_budget = {'list': 4}
+    
+    def get_queryset(self):
+        # ✅ Nombre de cours planifiés par salle calculé dans la requête de la liste
+        return super().get_queryset().annotate(
+            scheduled_courses_count=Count('courses', filter=Q(courses__status='SCHEDULED'))
+        )
 
 
 class CourseTypeViewSet(BaseTenantViewSet):
@@ -106,6 +122,17 @@ class CourseViewSet(BaseTenantViewSet):
     search_fields = ['title', 'description']
     ordering_fields = ['date', 'start_time']
     tenant_field = 'tenant_id'
+    # 📊 Requêtes SQL max par action (authentication/query_budget.py)
+    query_budget = {'list': 4, 'today': 3, 'upcoming': 3}
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        
+        # ✅ Listes : nombre de réservations confirmées annoté en une requête
+        if self.action in ['list', 'upcoming', 'today']:
+            queryset = queryset.with_booking_stats()
+        
+        return queryset
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -114,6 +141,54 @@ class CourseViewSet(BaseTenantViewSet):
             return CourseCreateUpdateSerializer
         return CourseDetailSerializer
     
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsAdminOrReceptionist])
+    def schedule(self, request):
+        """
+        📅 Planifier des cours récurrents en une requête
+        URL: /api/bookings/courses/schedule/
+        Body: {"rules": [{..., "weekdays": ["MO", "WE"] | "rrule": "FREQ=WEEKLY;BYDAY=MO,WE",
+               "start_date", "end_date", "start_time", "end_time"}], "skip_conflicts": false, "dry_run": false}
+        Conflits coach/salle : 409 sans rien créer, sauf skip_conflicts=true.
+        """
+        tenant_id = self._get_tenant_id(request)
+        if not tenant_id:
+            raise PermissionDenied("Impossible de créer cette ressource : aucun centre associé.")
+        
+        serializer = CourseScheduleSerializer(data=request.data, context={'tenant_id': tenant_id})
+        serializer.is_valid(raise_exception=True)
+        rules = serializer.validated_data['rules']
+        
+        try:
+            sessions, conflicts = plan_sessions(rules, tenant_id)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        conflicts_data = [{
+            'rule': conflict.session.rule_index,
+            'date': conflict.session.date,
+            'start_time': conflict.session.start_time,
+            'end_time': conflict.session.end_time,
+            'resource': conflict.resource,
+            'course_id': conflict.course_id,
+        } for conflict in conflicts]
+        
+        if conflicts and not serializer.validated_data['skip_conflicts']:
+            return Response({
+                'error': f'{len(conflicts)} séance(s) en conflit (coach ou salle déjà occupé)',
+                'conflicts': conflicts_data
+            }, status=status.HTTP_409_CONFLICT)
+        
+        if serializer.validated_data['dry_run']:
+            return Response({'created': 0, 'planned': len(sessions), 'conflicts': conflicts_data})
+        
+        created = create_sessions(rules, sessions, tenant_id)
+        logger.info("📅 Cours planifiés", tenant_id=tenant_id, created=len(created), conflicts=len(conflicts))
+        
+        return Response({
+            'created': len(created),
+            'conflicts': conflicts_data
+        }, status=status.HTTP_201_CREATED)
+    
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         """Cours à venir (7 prochains jours) du centre"""
@@ -149,23 +224,27 @@ class CourseViewSet(BaseTenantViewSet):
     def cancel(self, request, pk=None):
         """Annuler un cours"""
         course = self.get_object()
-        course.status = 'CANCELLED'
-        course.save()
         
-        # Annuler toutes les réservations
-        course.bookings.filter(status='CONFIRMED').update(status='CANCELLED')
+        # Annuler le cours et toutes les réservations (compteur remis à zéro)
+        with transaction.atomic():
+            course.bookings.filter(status='CONFIRMED').update(status='CANCELLED')
+            course.status = 'CANCELLED'
+            course.save()
+            # Course.save() n'écrit pas confirmed_count
+            Course.objects.filter(pk=course.pk).update(confirmed_count=0)
         
         return Response({'message': 'Cours annulé avec succès'})
     
     @action(detail=False, methods=['get'])
+    @read_replica
     def statistics(self, request):
-        """Statistiques des cours du centre"""
-        queryset = self.get_queryset()
+        """Statistiques des cours du centre (rollup TenantDailyMetrics, ?live=false possible)"""
+        metrics = load_daily_metrics(metrics_tenant_id(request), live_today_requested(request))
         
-        total = queryset.count()
-        scheduled = queryset.filter(status='SCHEDULED').count()
-        completed = queryset.filter(status='COMPLETED').count()
-        cancelled = queryset.filter(status='CANCELLED').count()
+        total = metrics.total(*COURSE_COLUMNS)
+        scheduled = metrics.total('courses_scheduled')
+        completed = metrics.total('courses_completed')
+        cancelled = metrics.total('courses_cancelled')
         
         return Response({
             'total': total,
@@ -175,14 +254,31 @@ class CourseViewSet(BaseTenantViewSet):
         })
 
 
+class BookingPagination(KeysetPagination):
+    """Réservations de la plus récente à la plus ancienne"""
+    ordering = ('-booking_date',)
+
+
 class BookingViewSet(BaseTenantViewSet):
     queryset = Booking.objects.all()
+    pagination_class = BookingPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'member', 'course', 'checked_in']
     search_fields = ['member__first_name', 'member__last_name', 'course__title']
     ordering_fields = ['booking_date']
     tenant_field = 'tenant_id'
+    # 📊 Requêtes SQL max par action (authentication/query_budget.py)
+    query_budget = {'list': 4, 'my_bookings': 4}
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        
+        # ✅ Listes : membre et cours chargés dans la même requête (pas de requête par ligne)
+        if self.action in ['list', 'my_bookings']:
+            queryset = queryset.select_related('member', 'course')
+        
+        return queryset
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -241,15 +337,16 @@ class BookingViewSet(BaseTenantViewSet):
             return Response([], status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['get'])
+    @read_replica
     def statistics(self, request):
-        """Statistiques des réservations du centre"""
-        queryset = self.get_queryset()
+        """Statistiques des réservations du centre (rollup TenantDailyMetrics, ?live=false possible)"""
+        metrics = load_daily_metrics(metrics_tenant_id(request), live_today_requested(request))
         
-        total = queryset.count()
-        confirmed = queryset.filter(status='CONFIRMED').count()
-        cancelled = queryset.filter(status='CANCELLED').count()
-        completed = queryset.filter(status='COMPLETED').count()
-        no_show = queryset.filter(status='NO_SHOW').count()
+        total = metrics.total(*BOOKING_COLUMNS)
+        confirmed = metrics.total('bookings_confirmed')
+        cancelled = metrics.total('bookings_cancelled')
+        completed = metrics.total('bookings_completed')
+        no_show = metrics.total('bookings_no_show')
         
         return Response({
             'total': total,
@@ -258,4 +355,56 @@ class BookingViewSet(BaseTenantViewSet):
             'completed': completed,
             'no_show': no_show,
             'attendance_rate': (completed / total * 100) if total > 0 else 0
-        })
\ No newline at end of file
+        })
+
+
+def _slot_time(value):
+    return value.strftime('%H:%M')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def availability(request):
+    """
+    📅 Disponibilité d'une salle et/ou d'un coach (index en mémoire, sans requête
+    pour les 60 prochains jours)
+    URL: /api/bookings/availability/?date=2025-01-20&room=3&coach=7
+         &start_time=18:00&end_time=19:00  → {available, conflicts}
+         sinon &opening=06:00&closing=22:00&duration=60  → {busy, free}
+    """
+    tenant_id = getattr(request, 'tenant_id', None)
+    if not tenant_id:
+        raise PermissionDenied("Aucun centre associé.")
+
+    serializer = AvailabilityQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+
+    day = params.get('date') or timezone.now().date()
+    resources = [(resource, params[resource]) for resource in ('room', 'coach') if params.get(resource)]
+    index = availability_index.for_day(tenant_id, day)
+
+    if 'start_time' in params:
+        conflicts = index.conflicts(resources, day, params['start_time'], params['end_time'])
+        return Response({
+            'date': day,
+            'available': not conflicts,
+            'conflicts': [{
+                'resource': resource,
+                'resource_id': resource_id,
+                'course_id': course_id,
+                'start_time': _slot_time(start),
+                'end_time': _slot_time(end),
+            } for resource, resource_id, (start, end, course_id) in conflicts]
+        })
+
+    busy = index.busy(resources, day)
+    free = free_slots(busy, params['opening'], params['closing'], params['duration'])
+    return Response({
+        'date': day,
+        'busy': [
+            {'course_id': course_id, 'start_time': _slot_time(start), 'end_time': _slot_time(end)}
+            for start, end, course_id in busy
+        ],
+        'free': [{'start_time': _slot_time(start), 'end_time': _slot_time(end)} for start, end in free]
+    })
@@ -17,6 +17,9 @@ from rest_framework.decorators import api_view, permission_classes
 from datetime import date, timedelta
 from django.db.models import Count, Avg
 from bookings.models import Course  
+from authentication.query_budget import query_budget
+from authentication.structured_logging import get_logger
+from authentication.db_router import read_replica
 import io
 from .models import (
     ExerciseCategory, Exercise, TrainingProgram,
@@ -31,6 +34,8 @@ from .serializers import (
     ProgressTrackingSerializer, WorkoutLogSerializer, WorkoutLogCreateSerializer, WorkoutExerciseSerializer
 )
 
+logger = get_logger('coaching.views')
+
 
 class ExerciseCategoryViewSet(viewsets.ModelViewSet):
     """CRUD pour les catégories d'exercices"""
@@ -79,23 +84,18 @@ class TrainingProgramViewSet(viewsets.ModelViewSet):
         
         if tenant_id:
             queryset = queryset.filter(tenant_id=tenant_id)
-            print(f"[DEBUG] 🔍 Filtrage par tenant_id: {tenant_id}")
         else:
-            print(f"[WARNING] ⚠️ Aucun tenant_id trouvé - retour de tous les programmes")
+            logger.warning("⚠️ Aucun tenant_id trouvé - retour de tous les programmes", user_id=user.id)
         
         # Filtrer selon le rôle
         if user.role == 'member':
             # Filtrer par email du membre
             queryset = queryset.filter(member__email=user.email)
-            print(f"[DEBUG] 👤 Filtrage membre: {user.email}")
         elif user.role == 'COACH':
             # Les coachs voient les programmes qu'ils ont créés
             queryset = queryset.filter(coach=user)
-            print(f"[DEBUG] 🏋️ Filtrage coach: {user.email}")
-        else:
-            print(f"[DEBUG] 🔧 Admin/réceptionniste - pas de filtre supplémentaire")
         
-        print(f"[DEBUG] 📊 Programmes trouvés: {queryset.count()}")
+        logger.debug("🔍 Programmes filtrés", user_id=user.id, role=user.role, tenant_id=tenant_id)
         return queryset
     
     def get_serializer_class(self):
@@ -113,19 +113,15 @@ class TrainingProgramViewSet(viewsets.ModelViewSet):
         user = self.request.user
         tenant_id = self._get_tenant_id()
         
-        print(f"[DEBUG] 🚀 Création programme - User: {user.email}, Tenant: {tenant_id}")
-        
         # Vérifier que le tenant_id est disponible
         if not tenant_id:
-            print(f"[WARNING] ⚠️ Aucun tenant_id trouvé - vérification du membre")
             # Essayer de récupérer le tenant_id du membre
             member = serializer.validated_data.get('member')
             if member and hasattr(member, 'tenant_id') and member.tenant_id:
                 tenant_id = member.tenant_id
-                print(f"[DEBUG] ✅ Tenant_id récupéré du membre: {tenant_id}")
         
         if not tenant_id:
-            print(f"[ERROR] ❌ Aucun tenant_id disponible pour la création")
+            logger.error("❌ Aucun tenant_id disponible pour la création", user_id=user.id)
             raise serializers.ValidationError({
                 "tenant_id": "Impossible de déterminer le tenant_id pour la création du programme"
             })
@@ -139,7 +135,9 @@ class TrainingProgramViewSet(viewsets.ModelViewSet):
             tenant_id=tenant_id
         )
         
-        print(f"[DEBUG] ✅ Programme créé avec tenant_id: {tenant_id}")
+        logger.debug(
+            "✅ Programme créé", program_id=serializer.instance.id, user_id=user.id, tenant_id=tenant_id
+        )
     
     def perform_update(self, serializer):
         """
@@ -148,7 +146,6 @@ class TrainingProgramViewSet(viewsets.ModelViewSet):
         # Supprimer tenant_id des données validées si présent
         if 'tenant_id' in serializer.validated_data:
             del serializer.validated_data['tenant_id']
-            print(f"[DEBUG] 🔒 Tenant_id supprimé des données de mise à jour")
         
         serializer.save()
     
@@ -169,7 +166,6 @@ class TrainingProgramViewSet(viewsets.ModelViewSet):
         if not tenant_id:
             tenant_id = getattr(self.request, 'tenant_id', None)
         
-        print(f"[DEBUG] 🏢 Tenant_id récupéré: {tenant_id}")
         return tenant_id
     
     def get_serializer_context(self):
@@ -187,8 +183,6 @@ class TrainingProgramViewSet(viewsets.ModelViewSet):
         user = request.user
         tenant_id = self._get_tenant_id()
         
-        print(f"[DEBUG] 🔄 Duplication programme {original_program.id} - Tenant: {tenant_id}")
-        
         # Créer une copie du programme
         new_program = TrainingProgram.objects.create(
             title=f"{original_program.title} (Copie)",
@@ -232,7 +226,9 @@ class TrainingProgramViewSet(viewsets.ModelViewSet):
                 )
         
         serializer = self.get_serializer(new_program)
-        print(f"[DEBUG] ✅ Programme dupliqué: {new_program.id}")
+        logger.info(
+            "🔄 Programme dupliqué", program_id=original_program.id, copy_id=new_program.id, tenant_id=tenant_id
+        )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     @action(detail=True, methods=['get'])
@@ -297,21 +293,7 @@ class TrainingProgramViewSet(viewsets.ModelViewSet):
         
         # Admin et réceptionniste ont accès
         return True
-    
-    def list(self, request, *args, **kwargs):
-        """Override list pour ajouter des logs"""
-        print(f"[DEBUG] 📋 TrainingProgramViewSet.list() - User: {request.user.email}")
-        return super().list(request, *args, **kwargs)
-    
-    def retrieve(self, request, *args, **kwargs):
-        """Override retrieve pour ajouter des logs"""
-        print(f"[DEBUG] 🔍 TrainingProgramViewSet.retrieve() - User: {request.user.email}")
-        return super().retrieve(request, *args, **kwargs)
-    
-    def create(self, request, *args, **kwargs):
-        """Override create pour ajouter des logs"""
-        print(f"[DEBUG] 🆕 TrainingProgramViewSet.create() - User: {request.user.email}")
-        return super().create(request, *args, **kwargs)
+
 
 class WorkoutSessionViewSet(viewsets.ModelViewSet):
     """CRUD pour les sessions d'entraînement"""
@@ -361,6 +343,7 @@ class ProgressTrackingViewSet(viewsets.ModelViewSet):
         return queryset
     
     @action(detail=False, methods=['get'])
+    @read_replica
     def statistics(self, request):
         """Statistiques de progression pour un membre"""
         member_id = request.query_params.get('member')
@@ -448,13 +431,11 @@ class MemberSelectionViewSet(viewsets.ReadOnlyModelViewSet):
             if not tenant_id:
                 tenant_id = getattr(self.request, 'tenant_id', None)
 
-            print(f"[DEBUG] 🏢 Tenant ID reçu: {tenant_id}")
-            print(f"[DEBUG] 👤 User: {user.email}, Role: {user.role}")
-            print(f"[DEBUG] 📋 Headers: Tenant-ID={self.request.headers.get('Tenant-ID')}, X-Tenant-Subdomain={self.request.headers.get('X-Tenant-Subdomain')}")
+            logger.debug("🏢 Sélection de membres", user_id=user.id, role=user.role, tenant_id=tenant_id)
 
             # 2️⃣ Si pas de tenant_id, retourner tous les membres actifs (fallback)
             if not tenant_id:
-                print("[WARNING] ⚠️ Aucun Tenant fourni — retour de TOUS les membres actifs")
+                logger.warning("⚠️ Aucun tenant fourni - retour de TOUS les membres actifs", user_id=user.id)
                 queryset = Member.objects.filter(status="ACTIVE").order_by("first_name", "last_name")
             else:
                 # 3️⃣ Filtrer les membres du tenant
@@ -463,18 +444,10 @@ class MemberSelectionViewSet(viewsets.ReadOnlyModelViewSet):
                     tenant_id=tenant_id,
                 ).order_by("first_name", "last_name")
 
-            print(f"[DEBUG] ✅ Membres actifs trouvés: {queryset.count()}")
-            
-            # 4️⃣ Debug: afficher les 3 premiers membres
-            for member in queryset[:3]:
-                print(f"   - {member.full_name} (ID: {member.id}, Email: {member.email})")
-
             return queryset
             
-        except Exception as e:
-            print(f"[ERROR] ❌ Erreur dans get_queryset: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("❌ Erreur dans MemberSelectionViewSet.get_queryset")
             return Member.objects.none()
 
     def get_serializer_class(self):
@@ -491,14 +464,11 @@ class MemberSelectionViewSet(viewsets.ReadOnlyModelViewSet):
         return MemberSimpleSerializer
     
     def list(self, request, *args, **kwargs):
-        """Override list pour ajouter des logs détaillés"""
+        """Override list : erreur journalisée avec sa trace, réponse 500 explicite"""
         try:
-            print(f"[DEBUG] 🚀 MemberSelectionViewSet.list() called")
             return super().list(request, *args, **kwargs)
         except Exception as e:
-            print(f"[ERROR] ❌ Erreur dans list(): {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Erreur dans MemberSelectionViewSet.list")
             return Response(
                 {"error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -531,6 +501,7 @@ class WorkoutExerciseViewSet(viewsets.ModelViewSet):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_replica
 def coach_dashboard_stats(request):
     """
     Statistiques pour le dashboard du coach
@@ -571,6 +542,7 @@ def coach_dashboard_stats(request):
     })
 
 
+@query_budget(3)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def coach_upcoming_sessions(request):
@@ -579,10 +551,8 @@ def coach_upcoming_sessions(request):
     """
     user = request.user
     
-    # Debug: afficher le rôle de l'utilisateur
-    print(f"User: {user.email}, Role: {user.role}")
-    
     if user.role != 'COACH':
+        logger.warning("⚠️ Accès coach refusé", user_id=user.id, role=user.role)
         return Response({'error': 'Access denied. Coach role required.'}, status=403)
     
     try:
@@ -592,14 +562,13 @@ def coach_upcoming_sessions(request):
             coach=user,
             date__gte=today
         ).select_related('course_type', 'room').order_by('date', 'start_time')[:10]
-        
-        print(f"Found {upcoming_courses.count()} courses")  # Debug
+        upcoming_courses = list(upcoming_courses)
         
         sessions_data = []
         for course in upcoming_courses:
             try:
-                # Compter les réservations confirmées
-                participants_count = course.bookings.filter(status='CONFIRMED').count()
+                # ✅ Réservations confirmées : compteur dénormalisé (pas de requête par cours)
+                participants_count = course.confirmed_count
                 
                 session_dict = {
                     'id': course.id,
@@ -614,22 +583,20 @@ def coach_upcoming_sessions(request):
                 
                 sessions_data.append(session_dict)
                 
-            except Exception as e:
-                print(f"Error processing course {course.id}: {str(e)}")
-                import traceback
-                traceback.print_exc()
+            except Exception:
+                logger.exception("❌ Cours ignoré dans coach_upcoming_sessions", course_id=course.id)
                 continue
         
+        logger.debug("📅 Cours à venir du coach", user_id=user.id, courses=len(sessions_data))
         return Response(sessions_data)
         
-    except Exception as e:
-        print(f"Error in coach_upcoming_sessions: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("❌ Erreur dans coach_upcoming_sessions", user_id=user.id)
         
         # Retourner une liste vide au lieu d'une erreur 500
         return Response([])
 
+@query_budget(3)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def coach_my_members(request):
@@ -638,39 +605,21 @@ def coach_my_members(request):
     """
     user = request.user
     
-    # 🔍 DEBUG - Informations utilisateur
-    print("\n" + "="*80)
-    print("🔍 DEBUG coach_my_members")
-    print("="*80)
-    print(f"User: {user.email}")
-    print(f"Role: {user.role}")
-    print(f"Tenant ID: {user.tenant_id}")
-    print(f"Is authenticated: {user.is_authenticated}")
-    
     # Vérifier le rôle
     if user.role != 'COACH':
-        print(f"❌ Access denied - User role is {user.role}, not COACH")
+        logger.warning("⚠️ Accès coach refusé", user_id=user.id, role=user.role)
         return Response({
             'error': 'Access denied. Coach role required.',
             'user_role': user.role
         }, status=403)
     
     try:
-        # 🔍 DEBUG - Compter tous les programmes du coach
-        all_programs = TrainingProgram.objects.filter(coach=user)
-        print(f"\n📊 Total programmes du coach: {all_programs.count()}")
-        
-        for prog in all_programs:
-            print(f"  - ID: {prog.id}, Titre: {prog.title}, Status: {prog.status}, Member: {prog.member.full_name if prog.member else 'None'}")
-        
         # Récupérer les programmes actifs du coach avec optimisation des requêtes
         programs = TrainingProgram.objects.filter(
             coach=user,
             status='active'
         ).select_related('member').order_by('-created_at')
         
-        print(f"\n✅ Programmes ACTIFS trouvés: {programs.count()}")
-        
         members_data = []
         seen_members = set()  # Pour éviter les doublons
         
@@ -678,25 +627,13 @@ def coach_my_members(request):
             try:
                 member = program.member
                 
-                # 🔍 DEBUG - Détails du programme
-                print(f"\n📋 Programme ID: {program.id}")
-                print(f"   Titre: {program.title}")
-                print(f"   Status: {program.status}")
-                print(f"   Dates: {program.start_date} → {program.end_date}")
-                
                 # Vérifier que le membre existe
                 if not member:
-                    print(f"   ⚠️ WARNING: Aucun membre assigné")
+                    logger.warning("⚠️ Programme actif sans membre", program_id=program.id)
                     continue
                 
-                print(f"   Membre: {member.full_name}")
-                print(f"   Membre ID: {member.id}")
-                print(f"   Membre email: {member.email}")
-                print(f"   Membre tenant_id: {member.tenant_id}")
-                
                 # Éviter les doublons (un membre peut avoir plusieurs programmes actifs)
                 if member.id in seen_members:
-                    print(f"   ℹ️ Membre déjà traité (doublon évité)")
                     continue
                 seen_members.add(member.id)
                 
@@ -710,8 +647,6 @@ def coach_my_members(request):
                 else:
                     progress = 0
                 
-                print(f"   📊 Progression: {progress}% ({elapsed_days}/{total_days} jours)")
-                
                 # Construire l'objet membre
                 member_dict = {
                     'id': program.id,  # ID du programme
@@ -729,24 +664,16 @@ def coach_my_members(request):
                 }
                 
                 members_data.append(member_dict)
-                print(f"   ✅ Membre ajouté à la réponse")
                 
-            except Exception as prog_error:
-                print(f"   ❌ ERROR processing program {program.id}: {str(prog_error)}")
-                import traceback
-                traceback.print_exc()
+            except Exception:
+                logger.exception("❌ Programme ignoré dans coach_my_members", program_id=program.id)
                 continue
         
-        print(f"\n📤 Returning {len(members_data)} members")
-        print("="*80 + "\n")
-        
+        logger.debug("👥 Membres du coach", user_id=user.id, tenant_id=user.tenant_id, members=len(members_data))
         return Response(members_data)
     
-    except Exception as e:
-        print(f"\n❌ ERROR in coach_my_members: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
-        print("="*80 + "\n")
+    except Exception:
+        logger.exception("❌ Erreur dans coach_my_members", user_id=user.id)
         
         # Retourner une liste vide au lieu d'une erreur 500
         return Response([])
@@ -785,10 +712,8 @@ def member_programs(request):
         
         return Response(serializer.data)
         
-    except Exception as e:
-        print(f"[ERROR] Erreur member_programs: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("❌ Erreur member_programs", user_id=user.id)
         return Response(
             {'error': 'Erreur lors de la récupération des programmes'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -828,8 +753,8 @@ def member_program_detail(request, program_id):
             {'error': 'Programme non trouvé ou accès non autorisé'},
             status=status.HTTP_404_NOT_FOUND
         )
-    except Exception as e:
-        print(f"[ERROR] Erreur member_program_detail: {e}")
+    except Exception:
+        logger.exception("❌ Erreur member_program_detail", user_id=user.id, program_id=program_id)
         return Response(
             {'error': 'Erreur lors de la récupération du programme'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
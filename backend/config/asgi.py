@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+⚡ Servi par uvicorn, avec les lectures async du portail membre :
+    uvicorn config.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+MEMBER_PORTAL_ASYNC=False pour garder les vues synchrones du portail.
 """
 
 import os
@@ -12,5 +16,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('MEMBER_PORTAL_ASYNC', 'True')
 
 application = get_asgi_application()
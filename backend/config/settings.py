@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 from datetime import timedelta
 
@@ -18,6 +19,14 @@ if not GEMINI_API_KEY:
     print("⚠️  Attention : Utilisation d'une clé API par défaut (à remplacer)")
     GEMINI_API_KEY = "demo-key"
 
+# 🤖 Plan santé Gemini (site_utils/gemini.py)
+GEMINI_API_ENDPOINT = os.getenv('GEMINI_API_ENDPOINT') or None  # autre point d'accès REST (proxy, faux serveur de test)
+GEMINI_MODELS_TTL = int(os.getenv('GEMINI_MODELS_TTL', '3600'))  # secondes entre deux lectures du catalogue
+GEMINI_HEDGE_AFTER = float(os.getenv('GEMINI_HEDGE_AFTER', '4'))  # attente max avant de lancer le modèle suivant
+GEMINI_PLAN_DEADLINE = float(os.getenv('GEMINI_PLAN_DEADLINE', '20'))  # au-delà : plan de secours
+GEMINI_BREAKER_FAILURES = int(os.getenv('GEMINI_BREAKER_FAILURES', '3'))
+GEMINI_BREAKER_COOLDOWN = float(os.getenv('GEMINI_BREAKER_COOLDOWN', '60'))
+
 
 # ✅ Configuration Email - VERSION FINALE
 if DEBUG:
@@ -78,6 +87,7 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'authentication.User'
 
 MIDDLEWARE = [
+    'authentication.middleware.QueryBudgetMiddleware',  # 📊 En tête : compte aussi les autres middlewares
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -87,6 +97,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'authentication.middleware.AdminTenantMiddleware',
+    'authentication.middleware.ReplicaPinMiddleware',  # 📖 Lire ses propres écritures après un POST/PUT/DELETE
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -120,6 +131,22 @@ DATABASES = {
     }
 }
 
+# 📖 Réplica en lecture (tableaux de bord, statistiques, rapports superadmin)
+# Vues marquées @read_replica, voir authentication/db_router.py ; sans réplica, tout reste sur `default`
+if os.getenv('POSTGRES_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('POSTGRES_REPLICA_HOST'),
+        'PORT': os.getenv('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+        # Tests : même base que default (pas de réplication à simuler)
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['authentication.db_router.ReplicaRouter']
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', '10'))  # secondes ; au-delà, lectures sur default
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', '5'))
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '30'))  # lire ses écritures après un POST/PUT/DELETE
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -225,7 +252,8 @@ else:
 # 📝 Configuration REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT avec claims role / tenant_id / is_superuser : User chargé seulement si nécessaire
+        'authentication.jwt_claims.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -239,15 +267,47 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # 🌐 Domaine parent pour le développement
 PARENT_DOMAIN = 'gymflow.com'  # Utilisez localhost en développement
 
+# 🏢 Durée de vie (secondes) du registre des centres en mémoire
+TENANT_REGISTRY_TTL = int(os.getenv('TENANT_REGISTRY_TTL', '300'))
+
+# 📊 Instrumentation SQL par requête (Server-Timing, N+1, budgets par vue)
+# Active par défaut en DEBUG et pendant `manage.py test` ; en tests, un budget dépassé fait échouer la requête
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+QUERY_INSTRUMENTATION = os.getenv('QUERY_INSTRUMENTATION', str(DEBUG or TESTING)) == 'True'
+QUERY_BUDGET_ENFORCE = os.getenv('QUERY_BUDGET_ENFORCE', str(TESTING)) == 'True'
+
+# ⚡ Portail membre : lectures async (members/portal_async_views.py)
+# Vrai par défaut sous ASGI (config/asgi.py) ; sous WSGI, les vues async coûteraient une boucle par requête
+MEMBER_PORTAL_ASYNC = os.getenv('MEMBER_PORTAL_ASYNC', 'False') == 'True'
+
 # 🔧 Configuration JWT
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
+    # Ancien refresh token révoqué à la rotation (authentication/revocation.py, sans token_blacklist)
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
-# 📊 Configuration Logging pour DEBUG
+# 🔐 Révocation des refresh tokens : filtre de Bloom par processus devant la table RevokedToken
+# TTL (s) : délai maximal avant qu'un processus voie une révocation faite ailleurs
+# Purge des jours expirés : `manage.py prune_revoked_tokens` (cron quotidien)
+TOKEN_REVOCATION_FILTER_TTL = int(os.getenv('TOKEN_REVOCATION_FILTER_TTL', '30'))
+TOKEN_REVOCATION_ERROR_RATE = float(os.getenv('TOKEN_REVOCATION_ERROR_RATE', '0.01'))
+
+# 📝 Logs structurés (authentication/structured_logging.py)
+# LOG_FORMAT=json : une ligne JSON par événement ; LOG_LEVEL : niveau des modules applicatifs
+# LOG_SAMPLE_RATES="authentication.middleware=0.01,bookings.views=0.1" : part des DEBUG/INFO émis
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG' if DEBUG else 'INFO')
+LOG_SAMPLE_RATES = {
+    name.strip(): float(rate)
+    for name, _, rate in (
+        item.partition('=') for item in os.getenv('LOG_SAMPLE_RATES', '').split(',') if '=' in item
+    )
+}
+
+# 📊 Configuration Logging
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -256,11 +316,14 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'authentication.structured_logging.JsonFormatter',
+        },
     },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
         },
     },
     'root': {
@@ -273,22 +336,16 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': False,
         },
-        # ✅ Logger pour les middlewares
-        'authentication.middleware': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': False,
-        },
-        # ✅ Logger pour les ViewSets
-        'bookings.views': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': False,
-        },
-        'subscriptions.views': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': False,
+        # ✅ Modules applicatifs : DEBUG seulement si demandé (DEBUG=True ou LOG_LEVEL)
+        **{
+            name: {'handlers': ['console'], 'level': LOG_LEVEL, 'propagate': False}
+            for name in (
+                'authentication.middleware',
+                'authentication.query_budget',
+                'bookings.views',
+                'subscriptions.views',
+                'coaching.views',
+            )
         },
     },
 }
@@ -331,9 +388,15 @@ if not DEBUG:
         conn_max_age=600,
         ssl_require=True
     )
+    if os.getenv('DATABASE_REPLICA_URL'):
+        DATABASES['replica'] = dj_database_url.config(
+            env='DATABASE_REPLICA_URL',
+            conn_max_age=600,
+            ssl_require=True
+        )
     
     # WhiteNoise
-    MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
+    MIDDLEWARE.insert(MIDDLEWARE.index('corsheaders.middleware.CorsMiddleware') + 1, 'whitenoise.middleware.WhiteNoiseMiddleware')
     STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
     
     # Security
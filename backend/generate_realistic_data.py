@@ -22,16 +22,22 @@ class Command(BaseCommand):
             action='store_true',
             help='Générer toutes les données (plus long)',
         )
+        parser.add_argument(
+            '--members',
+            type=int,
+            default=None,
+            help='Nombre de membres par centre (volume des tests de plans d\'exécution)',
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('🚀 Génération de données réalistes...'))
         
         with transaction.atomic():
             # 1. SuperAdmin
-            self.create_superadmin()
+            superadmin = self.create_superadmin()
             
-            # 2. Centres de fitness
-            centers = self.create_gym_centers()
+            # 2. Centres de fitness (propriétaire : le SuperAdmin, remplacé par l'admin du centre)
+            centers = self.create_gym_centers(superadmin)
             
             # 3. Pour chaque centre
             for center in centers:
@@ -44,7 +50,7 @@ class Command(BaseCommand):
                 plans = self.create_subscription_plans(center)
                 
                 # Membres
-                num_members = 30 if options['full'] else 15
+                num_members = options.get('members') or (30 if options['full'] else 15)
                 members = self.create_members(center, num_members)
                 
                 # Abonnements
@@ -88,8 +94,9 @@ class Command(BaseCommand):
             user.set_password('superadmin123')
             user.save()
             self.stdout.write(self.style.SUCCESS('✓ SuperAdmin créé'))
+        return user
 
-    def create_gym_centers(self):
+    def create_gym_centers(self, owner):
         """Créer les centres de fitness"""
         centers_data = [
             {
@@ -98,14 +105,6 @@ class Command(BaseCommand):
                 'email': 'contact@powerfit.tn',
                 'phone': '+216 71 123 456',
                 'address': '123 Avenue Habib Bourguiba',
-                'city': 'Tunis',
-                'status': 'ACTIVE',
-                'subscription_plan': 'PRO',
-                'subscription_start': timezone.now().date() - timedelta(days=180),
-                'subscription_end': timezone.now().date() + timedelta(days=185),
-                'max_members': 200,
-                'max_coaches': 20,
-                'max_admins': 5,
             },
             {
                 'name': 'MoveUp Fitness Sousse',
@@ -113,14 +112,6 @@ class Command(BaseCommand):
                 'email': 'info@moveup.tn',
                 'phone': '+216 73 234 567',
                 'address': '456 Rue de la République',
-                'city': 'Sousse',
-                'status': 'ACTIVE',
-                'subscription_plan': 'BASIC',
-                'subscription_start': timezone.now().date() - timedelta(days=60),
-                'subscription_end': timezone.now().date() + timedelta(days=30),
-                'max_members': 50,
-                'max_coaches': 5,
-                'max_admins': 2,
             },
             {
                 'name': 'Elite Gym Sfax',
@@ -128,19 +119,12 @@ class Command(BaseCommand):
                 'email': 'contact@elitegym.tn',
                 'phone': '+216 74 345 678',
                 'address': '789 Avenue de la Liberté',
-                'city': 'Sfax',
-                'status': 'TRIAL',
-                'subscription_plan': 'BASIC',
-                'subscription_start': timezone.now().date() - timedelta(days=7),
-                'subscription_end': timezone.now().date() + timedelta(days=7),
-                'max_members': 50,
-                'max_coaches': 5,
-                'max_admins': 2,
             },
         ]
         
         centers = []
         for data in centers_data:
+            data['owner'] = owner
             center, created = GymCenter.objects.get_or_create(
                 subdomain=data['subdomain'],
                 defaults=data
@@ -211,7 +195,7 @@ class Command(BaseCommand):
                 user.save()
                 
                 # Définir le propriétaire du centre
-                if data['role'] == 'ADMIN' and not center.owner:
+                if data['role'] == 'ADMIN' and center.owner.is_superuser:
                     center.owner = user
                     center.save()
             
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class MembersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'members'
\ No newline at end of file
+    name = 'members'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,152 @@
+# Fichier : backend/members/card_export.py
+
+"""
+🪪 Export groupé des cartes membres : archive ZIP ou planche PDF A4.
+
+- Entrées des cartes lues en deux requêtes (membres + abonnements actifs),
+  puis rendu des seules cartes absentes du cache (members/card_generator.py).
+- Rendu lié au CPU (PIL, QR code) : au-delà de POOL_MIN_CARDS cartes à
+  rendre, pool de processus « spawn » (aucune connexion SQL héritée ;
+  chaque worker initialise Django et charge ses polices une fois).
+- ZIP produit au fil de l'eau, carte par carte, PNG stockés sans
+  recompression : jamais l'ensemble des images en mémoire.
+- PDF : 10 cartes CR80 (85,6 × 54 mm) par page A4, contour gris pour la découpe.
+"""
+
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from authentication.structured_logging import get_logger
+from .card_generator import (
+    active_subscriptions, latest_active_subscription,
+    card_inputs, card_fingerprint, card_path
+)
+from .card_worker import init_worker, render_job
+
+logger = get_logger('members.card_export')
+
+# Au-delà : export refusé (une intake = quelques centaines de cartes)
+MAX_EXPORT_CARDS = 2000
+# En dessous : rendu dans le processus courant (démarrer un pool coûte plus cher)
+POOL_MIN_CARDS = 16
+
+CARD_PDF_WIDTH = 85.6 * mm
+CARD_PDF_HEIGHT = 54 * mm
+PDF_COLUMNS = 2
+PDF_ROWS = 5
+
+
+def export_workers():
+    """Nombre de processus de rendu (settings.CARD_EXPORT_WORKERS, défaut : nombre de CPU)"""
+    return getattr(settings, 'CARD_EXPORT_WORKERS', None) or os.cpu_count() or 1
+
+
+def export_queryset(queryset, created_after=None, member_ids=None):
+    """Membres à exporter, dans l'ordre d'impression (nom, prénom)"""
+    if created_after:
+        queryset = queryset.filter(created_at__date__gte=created_after)
+    if member_ids:
+        queryset = queryset.filter(pk__in=member_ids)
+    return queryset.order_by('last_name', 'first_name', 'pk')
+
+
+def export_jobs(queryset, limit=None):
+    """[(member_id, entrées, chemin de la carte)] : tout ce qu'il faut pour rendre sans la base"""
+    members = queryset.only(
+        'id', 'member_id', 'first_name', 'last_name', 'photo', 'tenant_id'
+    ).prefetch_related(active_subscriptions())
+    if limit is not None:
+        members = members[:limit]
+
+    jobs = []
+    for member in members.iterator(chunk_size=500):
+        inputs = card_inputs(member, latest_active_subscription(member))
+        jobs.append((member.member_id, inputs, card_path(member.tenant_id, member.member_id, card_fingerprint(inputs))))
+    return jobs
+
+
+def iter_cards(jobs, workers=None):
+    """
+    (member_id, chemin) dans l'ordre des jobs ; les cartes en cache sont
+    servies tout de suite, les autres au fur et à mesure de leur rendu.
+    """
+    missing = [index for index, (_, _, path) in enumerate(jobs) if not os.path.exists(path)]
+    workers = export_workers() if workers is None else workers
+    logger.info("🪪 Export de cartes", cards=len(jobs), to_render=len(missing), workers=workers)
+
+    if workers <= 1 or len(missing) < POOL_MIN_CARDS:
+        for job in jobs:
+            yield render_job(job)
+        return
+
+    missing_set = set(missing)
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(missing)),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker
+    ) as pool:
+        rendered = pool.map(render_job, [jobs[index] for index in missing], chunksize=4)
+        for index, (member_id, _, path) in enumerate(jobs):
+            yield next(rendered) if index in missing_set else (member_id, path)
+
+
+class _ChunkBuffer:
+    """Destination non seekable de zipfile : les octets écrits sont repris après chaque carte"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(cards):
+    """Générateur d'octets d'une archive ZIP (member_card_<member_id>.png)"""
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for member_id, path in cards:
+            archive.write(path, arcname=f'member_card_{member_id}.png')
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def write_pdf(cards, output):
+    """Planche A4 (PDF_COLUMNS × PDF_ROWS cartes par page) écrite dans `output` → nombre de cartes"""
+    pdf = canvas.Canvas(output, pagesize=A4)
+    pdf.setTitle('Cartes membres')
+    page_width, page_height = A4
+    left = (page_width - PDF_COLUMNS * CARD_PDF_WIDTH) / 2
+    top = page_height - (page_height - PDF_ROWS * CARD_PDF_HEIGHT) / 2
+    per_page = PDF_COLUMNS * PDF_ROWS
+
+    count = 0
+    for _, path in cards:
+        slot = count % per_page
+        if count and not slot:
+            pdf.showPage()
+        x = left + (slot % PDF_COLUMNS) * CARD_PDF_WIDTH
+        y = top - (slot // PDF_COLUMNS + 1) * CARD_PDF_HEIGHT
+        pdf.drawImage(path, x, y, width=CARD_PDF_WIDTH, height=CARD_PDF_HEIGHT)
+        pdf.setStrokeColorRGB(0.75, 0.75, 0.75)
+        pdf.setLineWidth(0.25)
+        pdf.rect(x, y, CARD_PDF_WIDTH, CARD_PDF_HEIGHT)
+        count += 1
+
+    pdf.save()
+    return count
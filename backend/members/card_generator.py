@@ -1,136 +1,239 @@
 # Fichier : backend/members/card_generator.py
 
+"""
+🪪 Cartes membres (PNG) pré-rendues et mises en cache sur disque.
+
+- Une carte ne dépend que de quelques entrées (nom, member_id, plan,
+  expiration, date de modification de la photo) : leur empreinte (hash) fait
+  partie du nom du fichier et sert d'ETag.
+- Carte déjà rendue pour ces entrées : un stat() du fichier, pas de rendu.
+- Entrées modifiées : nouvelle empreinte → nouveau rendu, l'ancien fichier
+  est supprimé. Aucune invalidation explicite à gérer.
+- Polices chargées une seule fois par processus.
+"""
+
+import glob
+import hashlib
+import json
 import os
+import tempfile
+from functools import lru_cache
+
 from PIL import Image, ImageDraw, ImageFont
 import qrcode
 from django.conf import settings
-from django.utils import timezone
+from django.db.models import Prefetch
+
+from authentication.structured_logging import get_logger
 from .models import Member
 from subscriptions.models import Subscription
 
+logger = get_logger('members.card_generator')
+
 # ---------------- CONFIGURATION ----------------
 CARD_WIDTH = 856  # Taille standard d'une carte de crédit/fidélité (pixels)
-CARD_HEIGHT = 540 
-OUTPUT_DIR = os.path.join(settings.MEDIA_ROOT, 'membership_cards')
+CARD_HEIGHT = 540
 FONT_PATH = os.path.join(settings.BASE_DIR, 'static/fonts/Roboto-Bold.ttf') # 👈 Ajustez ce chemin !
 
-# Assurez-vous que le répertoire de sortie existe
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+# À incrémenter quand la mise en page change : toutes les cartes sont rendues à nouveau
+CARD_LAYOUT_VERSION = 1
+
+RED_COLOR = "#9b0e16"
+BLUE_COLOR = "#00357a"
 # ----------------------------------------------
 
 
+def cards_dir(tenant_id=None):
+    """Répertoire des cartes d'un centre (MEDIA_ROOT/membership_cards/<tenant_id>)"""
+    return os.path.join(settings.MEDIA_ROOT, 'membership_cards', tenant_id or '_')
+
+
+@lru_cache(maxsize=None)
+def card_fonts():
+    """(titre, libellé, donnée) : polices TrueType chargées une fois par processus"""
+    try:
+        return (
+            ImageFont.truetype(FONT_PATH, 40),
+            ImageFont.truetype(FONT_PATH, 24),
+            ImageFont.truetype(FONT_PATH, 32),
+        )
+    except IOError:
+        font = ImageFont.load_default()
+        return font, font, font
+
+
+def active_subscriptions():
+    """Prefetch des abonnements actifs (plan inclus), le plus récent en premier"""
+    return Prefetch(
+        'subscriptions',
+        queryset=Subscription.objects.filter(status='ACTIVE').select_related('plan').order_by('-end_date'),
+        to_attr='active_subscriptions'
+    )
+
+
+def latest_active_subscription(member):
+    """Abonnement actif le plus récent (prefetch active_subscriptions si présent)"""
+    if hasattr(member, 'active_subscriptions'):
+        return member.active_subscriptions[0] if member.active_subscriptions else None
+    return Subscription.objects.filter(
+        member=member, status='ACTIVE'
+    ).select_related('plan').order_by('-end_date').first()
+
+
+def card_inputs(member, subscription):
+    """Tout ce qui apparaît sur la carte (dict sérialisable, passé tel quel à render_card)"""
+    photo_path = None
+    photo_mtime = None
+    if member.photo:
+        try:
+            photo_path = member.photo.path
+            photo_mtime = os.stat(photo_path).st_mtime_ns
+        except (OSError, NotImplementedError, ValueError):
+            photo_path = None
+
+    return {
+        'layout': CARD_LAYOUT_VERSION,
+        'full_name': f"{member.first_name} {member.last_name}",
+        'member_id': member.member_id,
+        'plan_name': subscription.plan.name if subscription else "N/A",
+        'expiry': subscription.end_date.strftime("%d/%m/%Y") if subscription else "Abonnement Expiré",
+        'photo_path': photo_path,
+        'photo_mtime': photo_mtime,
+    }
+
+
+def card_fingerprint(inputs):
+    """Empreinte des entrées : nom de fichier et ETag"""
+    payload = json.dumps(inputs, sort_keys=True, default=str).encode()
+    return hashlib.sha256(payload).hexdigest()[:20]
+
+
+def card_path(tenant_id, member_id, fingerprint):
+    return os.path.join(cards_dir(tenant_id), f"card_{member_id}_{fingerprint}.png")
+
+
+def render_card(inputs):
+    """Dessine la carte à partir des entrées (sans accès à la base) → Image PIL"""
+    img = Image.new('RGB', (CARD_WIDTH, CARD_HEIGHT), color='#FFFFFF')
+    draw = ImageDraw.Draw(img)
+    font_title, font_label, font_data = card_fonts()
+
+    # Photo du membre si disponible (en haut à droite)
+    photo_size = 150
+    photo_margin = 30
+    if inputs['photo_path']:
+        try:
+            with Image.open(inputs['photo_path']) as photo:
+                member_photo = photo.convert('RGB')
+            # Redimensionner l'image tout en conservant le ratio
+            member_photo.thumbnail((photo_size, photo_size))
+            img.paste(member_photo, (CARD_WIDTH - photo_size - photo_margin, photo_margin))
+        except Exception:
+            logger.warning("⚠️ Photo illisible, carte sans photo", member_id=inputs['member_id'])
+
+    # Informations de la salle de sport
+    draw.text((30, 30), "GYMFLOW", fill=RED_COLOR, font=font_title)
+    draw.text((30, 80), "Carte Membre", fill=BLUE_COLOR, font=font_label)
+
+    # Nom complet
+    draw.text((30, 150), "NOM COMPLET", fill=BLUE_COLOR, font=font_label)
+    draw.text((30, 185), inputs['full_name'], fill=RED_COLOR, font=font_data)
+
+    # ID Membre
+    draw.text((30, 270), "ID MEMBRE", fill=BLUE_COLOR, font=font_label)
+    draw.text((30, 305), inputs['member_id'], fill=RED_COLOR, font=font_data)
+
+    # Plan
+    draw.text((30, 390), "PLAN", fill=BLUE_COLOR, font=font_label)
+    draw.text((30, 425), inputs['plan_name'], fill=RED_COLOR, font=font_data)
+
+    # Date d'expiration
+    draw.text((350, 390), "EXPIRATION", fill=BLUE_COLOR, font=font_label)
+    draw.text((350, 425), inputs['expiry'], fill=RED_COLOR, font=font_data)
+
+    # QR Code (member_id) en bas à droite
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=5,
+        border=2,
+    )
+    qr.add_data(inputs['member_id'])
+    qr.make(fit=True)
+    qr_img = qr.make_image(fill_color=RED_COLOR, back_color="white").convert('RGB')
+
+    qr_margin = 30
+    img.paste(qr_img, (CARD_WIDTH - qr_img.size[0] - qr_margin, CARD_HEIGHT - qr_img.size[1] - qr_margin))
+    return img
+
+
+def write_card(inputs, path):
+    """Rend la carte dans `path` (écriture atomique) et supprime ses versions précédentes"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Un lecteur concurrent ne voit jamais de fichier partiel ; fichier temporaire unique
+    # par appel (deux threads du même processus peuvent rendre la même carte)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            render_card(inputs).save(tmp_file, format='PNG')
+        os.chmod(tmp_path, 0o644)  # mkstemp crée en 0600 : carte lisible comme les autres médias
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # Versions précédentes de la carte (entrées modifiées)
+    for old_path in glob.glob(os.path.join(os.path.dirname(path), f"card_{inputs['member_id']}_*.png")):
+        if old_path != path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+
+def get_membership_card(member, subscription=None, force=False):
+    """
+    (chemin, empreinte) de la carte à jour du membre ; rendue seulement si
+    absente du cache (ou si force).
+    """
+    if subscription is None:
+        subscription = latest_active_subscription(member)
+    inputs = card_inputs(member, subscription)
+    fingerprint = card_fingerprint(inputs)
+    path = card_path(member.tenant_id, member.member_id, fingerprint)
+
+    if force or not os.path.exists(path):
+        write_card(inputs, path)
+        logger.debug("🪪 Carte rendue", member_id=member.member_id, tenant_id=member.tenant_id, fingerprint=fingerprint)
+    return path, fingerprint
+
+
+def prerender_tenant_cards(tenant_id, force=False):
+    """Rend les cartes manquantes des membres d'un centre → (rendues, déjà en cache)"""
+    members = Member.objects.filter(tenant_id=tenant_id).prefetch_related(active_subscriptions())
+    rendered = cached = 0
+    for member in members.iterator(chunk_size=500):
+        inputs = card_inputs(member, latest_active_subscription(member))
+        path = card_path(tenant_id, member.member_id, card_fingerprint(inputs))
+        if not force and os.path.exists(path):
+            cached += 1
+            continue
+        write_card(inputs, path)
+        rendered += 1
+    return rendered, cached
+
+
 def generate_membership_card(member_id):
     """
-    Génère une carte membre au format image (PNG).
+    Génère (ou reprend du cache) la carte membre au format image (PNG).
+    Retourne le chemin du fichier, None si le membre n'existe pas.
     """
     try:
-        member = Member.objects.get(member_id=member_id)
-        
-        # Récupérer l'abonnement actif (ou le plus récent)
-        latest_sub = Subscription.objects.filter(member=member, status='ACTIVE').order_by('-end_date').first()
-        
-        if not latest_sub:
-            # Gérer le cas où il n'y a pas d'abonnement actif
-            expiry_date_str = "Abonnement Expiré"
-            plan_name = "N/A"
-        else:
-            expiry_date_str = latest_sub.end_date.strftime("%d/%m/%Y")
-            plan_name = latest_sub.plan.name
-        
-        # 1. Créer une image de base (fond blanc)
-        img = Image.new('RGB', (CARD_WIDTH, CARD_HEIGHT), color='#FFFFFF')
-        draw = ImageDraw.Draw(img)
-
-        # Définir les couleurs
-        RED_COLOR = "#9b0e16"
-        BLUE_COLOR = "#00357a"
-
-        # Charger la police
-        try:
-            font_title = ImageFont.truetype(FONT_PATH, 40)
-            font_label = ImageFont.truetype(FONT_PATH, 24)
-            font_data = ImageFont.truetype(FONT_PATH, 32)
-        except IOError:
-            font_title = ImageFont.load_default()
-            font_label = ImageFont.load_default()
-            font_data = ImageFont.load_default()
-
-        # 2. Ajouter la photo du membre si disponible
-        photo_size = 150
-        photo_margin = 30
-        if member.photo:
-            try:
-                member_photo = Image.open(member.photo.path).convert('RGB')
-                # Redimensionner l'image tout en conservant le ratio
-                member_photo.thumbnail((photo_size, photo_size))
-                # Calculer la position pour coller la photo (en haut à droite)
-                photo_x = CARD_WIDTH - photo_size - photo_margin
-                photo_y = photo_margin
-                img.paste(member_photo, (photo_x, photo_y))
-            except Exception as e:
-                print(f"Erreur lors du chargement de la photo: {e}")
-
-        # 3. Informations de la salle de sport
-        draw.text((30, 30), "GYMFLOW", fill=RED_COLOR, font=font_title)
-        draw.text((30, 80), "Carte Membre", fill=BLUE_COLOR, font=font_label)
-        
-        # 4. Informations du membre
-        full_name = f"{member.first_name} {member.last_name}"
-        
-        # Nom complet
-        draw.text((30, 150), "NOM COMPLET", fill=BLUE_COLOR, font=font_label)
-        draw.text((30, 185), full_name, fill=RED_COLOR, font=font_data)
-
-        # ID Membre
-        draw.text((30, 270), "ID MEMBRE", fill=BLUE_COLOR, font=font_label)
-        draw.text((30, 305), member.member_id, fill=RED_COLOR, font=font_data)
-
-        # Plan
-        draw.text((30, 390), "PLAN", fill=BLUE_COLOR, font=font_label)
-        draw.text((30, 425), plan_name, fill=RED_COLOR, font=font_data)
-
-        # Date d'expiration
-        draw.text((350, 390), "EXPIRATION", fill=BLUE_COLOR, font=font_label)
-        draw.text((350, 425), expiry_date_str, fill=RED_COLOR, font=font_data)
-        
-        # 5. Génération du QR Code
-        qr_data = member.member_id 
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=5,
-            border=2,
-        )
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        
-        qr_img = qr.make_image(fill_color=RED_COLOR, back_color="white").convert('RGB')
-        
-        # Positionner le QR code en bas à droite
-        qr_margin = 30
-        qr_pos_x = CARD_WIDTH - qr_img.size[0] - qr_margin
-        qr_pos_y = CARD_HEIGHT - qr_img.size[1] - qr_margin
-        img.paste(qr_img, (qr_pos_x, qr_pos_y))
-        
-
-        # 5. Sauvegarde du fichier
-        file_name = f"card_{member_id}.png"
-        file_path = os.path.join(OUTPUT_DIR, file_name)
-        img.save(file_path)
-        return file_path
-        full_path = os.path.join(OUTPUT_DIR, file_name)
-        
-        img.save(full_path)
-        
-        # 6. Mise à jour du modèle
-        member.membership_card_path = f"membership_cards/{file_name}" # Chemin relatif pour l'URL
-        member.save(update_fields=['membership_card_path'])
-        
-        return member.membership_card_path
-        
+        member = Member.objects.prefetch_related(active_subscriptions()).get(member_id=member_id)
     except Member.DoesNotExist:
-        print(f"Erreur : Membre ID {member_id} non trouvé.")
+        logger.warning("⚠️ Membre introuvable pour la carte", member_id=member_id)
         return None
-    except Exception as e:
-        print(f"Erreur lors de la génération de la carte : {e}")
-        return None
\ No newline at end of file
+    return get_membership_card(member)[0]
@@ -0,0 +1,24 @@
+# Fichier : backend/members/card_worker.py
+
+"""
+Point d'entrée des processus de rendu de cartes (members/card_export.py).
+Chargé par les workers « spawn » avant django.setup() : aucun modèle importé au chargement.
+"""
+
+import os
+
+import django
+
+
+def init_worker():
+    django.setup()
+
+
+def render_job(job):
+    """(member_id, entrées, chemin) → (member_id, chemin), carte rendue si absente"""
+    from .card_generator import write_card
+
+    member_id, inputs, path = job
+    if not os.path.exists(path):
+        write_card(inputs, path)
+    return member_id, path
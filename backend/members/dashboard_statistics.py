@@ -0,0 +1,82 @@
+# backend/members/dashboard_statistics.py
+
+"""
+📊 Calcul des statistiques du dashboard à partir des métriques journalières.
+
+Les chiffres sont des sommes par période sur un DailyMetrics
+(rollup TenantDailyMetrics, voir metrics_rollup.py) : le dashboard d'un
+centre se charge en un nombre borné de requêtes, en O(jours) et non en
+O(lignes), quelle que soit la période affichée.
+"""
+
+from datetime import timedelta
+
+from .metrics_rollup import MEMBER_COLUMNS, COURSE_COLUMNS, BOOKING_COLUMNS
+
+
+def member_stats(metrics, new_since):
+    """Compteurs des membres par statut + nouveaux membres depuis `new_since` (date)"""
+    return {
+        'total': metrics.total(*MEMBER_COLUMNS),
+        'active': metrics.total('members_active'),
+        'inactive': metrics.total('members_inactive'),
+        'suspended': metrics.total('members_suspended'),
+        'expired': metrics.total('members_expired'),
+        'new_members': metrics.total(*MEMBER_COLUMNS, start=new_since),
+    }
+
+
+def members_evolution(metrics, start_date, end_date):
+    """
+    📈 Nombre cumulé de membres actifs par jour entre start_date et end_date.
+    Somme cumulée des membres actifs créés chaque jour, à partir du total antérieur.
+    """
+    created_per_day = metrics.per_day('members_active', start_date, end_date)
+
+    evolution = []
+    running_total = metrics.total('members_active', end=start_date - timedelta(days=1))
+    for offset in range((end_date - start_date).days + 1):
+        date = start_date + timedelta(days=offset)
+        running_total += created_per_day.get(date, 0)
+        evolution.append({
+            'date': date.isoformat(),
+            'count': running_total
+        })
+
+    return evolution
+
+
+def subscription_stats(metrics, today, start_of_month, last_month_start):
+    """Abonnements actifs, expirant sous 7 jours et revenus du mois (courant et précédent)"""
+    return {
+        'active': metrics.total('subscriptions_active_ending', start=today),
+        'expiring_soon': metrics.total(
+            'subscriptions_active_ending', start=today, end=today + timedelta(days=7)
+        ),
+        'monthly_revenue': metrics.total('subscription_revenue', start=start_of_month),
+        'last_month_revenue': metrics.total(
+            'subscription_revenue', start=last_month_start, end=start_of_month - timedelta(days=1)
+        ),
+    }
+
+
+def course_stats(metrics, today, start_of_month):
+    """Cours à venir (7 jours), cours du jour et capacité planifiée du mois"""
+    return {
+        'upcoming': metrics.total('courses_scheduled', start=today, end=today + timedelta(days=7)),
+        'today': metrics.total(*COURSE_COLUMNS, start=today, end=today),
+        'month_capacity': metrics.total('courses_capacity', start=start_of_month),
+    }
+
+
+def booking_stats(metrics, start_of_month):
+    """Réservations du mois (toutes et confirmées)"""
+    return {
+        'total': metrics.total(*BOOKING_COLUMNS, start=start_of_month),
+        'confirmed': metrics.total('bookings_confirmed', start=start_of_month),
+    }
+
+
+def percentage(part, whole):
+    """Pourcentage protégé contre la division par zéro"""
+    return (part / whole * 100) if whole > 0 else 0
@@ -0,0 +1,207 @@
+# backend/members/management/commands/benchmark_member_portal.py
+
+"""
+⚡ Latence du portail membre sous charge concurrente : vues WSGI (portal_views)
+servies par WSGIHandler, vues async (portal_async_views) servies par ASGIHandler.
+
+Les deux handlers Django sont appelés dans ce processus, middlewares compris,
+sans serveur HTTP : la mesure porte sur Django, pas sur gunicorn ni uvicorn.
+- WSGI : `--concurrency` threads, comme un worker gunicorn --threads.
+- ASGI : `--concurrency` requêtes en vol sur une boucle, comme un worker uvicorn.
+--db-latency ajoute un délai à chaque requête SQL, pour simuler une base
+distante avec une base locale (SQLite, PostgreSQL sur la même machine).
+"""
+
+import asyncio
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+
+from authentication.tenant_registry import tenant_registry
+from authentication.views import TenantTokenObtainPairSerializer
+from members import portal_async_views, portal_views
+from members.models import Member
+from members.portal_urls import portal_urlconf
+
+ENDPOINTS = [
+    '/api/members-portal/dashboard/',
+    '/api/members-portal/courses/available/',
+    '/api/members-portal/bookings/',
+    '/api/members-portal/programs/',
+    '/api/members-portal/progress/',
+]
+
+
+def percentile(latencies, rank):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * rank / 100))]
+
+
+@contextmanager
+def simulated_db_latency(seconds):
+    """Délai ajouté à chaque requête SQL des connexions ouvertes pendant la mesure"""
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        connection.execute_wrappers.append(delay)
+
+    if not seconds:
+        yield
+        return
+    # Connexions rouvertes pendant la mesure (CONN_MAX_AGE=0 : une par requête HTTP)
+    connections.close_all()
+    connection_created.connect(install)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(install)
+        connections.close_all()
+
+
+def run_wsgi(path, headers, total, concurrency):
+    """Latences (s) de `total` requêtes GET, `concurrency` threads"""
+    handler = WSGIHandler()
+    query = path.partition('?')[2]
+    base_environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path.partition('?')[0],
+        'QUERY_STRING': query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '8000',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.url_scheme': 'http',
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        **{'HTTP_' + name.upper().replace('-', '_'): value for name, value in headers.items()},
+    }
+
+    def one(_):
+        statuses = []
+        environ = {**base_environ, 'wsgi.input': io.BytesIO(b'')}
+        started = time.perf_counter()
+        response = handler(environ, lambda status, response_headers: statuses.append(status))
+        b''.join(response)
+        response.close()
+        elapsed = time.perf_counter() - started
+        if not statuses[0].startswith('200'):
+            raise CommandError(f'WSGI {path} : {statuses[0]}')
+        return elapsed
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(total)))
+
+
+async def run_asgi(path, headers, total, concurrency):
+    """Latences (s) de `total` requêtes GET, au plus `concurrency` en vol"""
+    handler = ASGIHandler()
+    raw_path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': raw_path,
+        'raw_path': raw_path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'server': ('localhost', 8000),
+        'client': ('127.0.0.1', 50000),
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+    }
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one():
+        sent = []
+        body_received = False
+        disconnected = asyncio.Event()
+
+        async def receive():
+            nonlocal body_received
+            if not body_received:
+                body_received = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # Client toujours connecté : Django annule cette attente après la réponse
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        async with slots:
+            started = time.perf_counter()
+            await handler(dict(scope), receive, send)
+            elapsed = time.perf_counter() - started
+        status = sent[0]['status']
+        if status != 200:
+            raise CommandError(f'ASGI {path} : {status}')
+        return elapsed
+
+    return await asyncio.gather(*(one() for _ in range(total)))
+
+
+class Command(BaseCommand):
+    help = 'Compare p50/p99 du portail membre sous charge : vues WSGI vs vues async sous ASGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help='Utilisateur MEMBER mesuré (défaut : premier membre lié à un compte)')
+        parser.add_argument('--requests', type=int, default=200, help='Requêtes par endpoint et par mode')
+        parser.add_argument('--concurrency', type=int, default=20, help='Requêtes simultanées (threads WSGI / requêtes en vol ASGI)')
+        parser.add_argument('--db-latency', type=float, default=0, help='Délai ajouté par requête SQL, en ms (base distante simulée)')
+
+    def handle(self, *args, **options):
+        members = Member.objects.filter(user__role='MEMBER').select_related('user')
+        if options['email']:
+            members = members.filter(user__email=options['email'])
+        member = members.order_by('pk').first()
+        if member is None:
+            raise CommandError('Aucun membre lié à un compte MEMBER')
+
+        headers = {'Authorization': f'Bearer {TenantTokenObtainPairSerializer.get_token(member.user).access_token}'}
+        gym_center = tenant_registry.get_by_tenant_id(member.tenant_id)
+        if gym_center:
+            headers['X-Tenant-Subdomain'] = gym_center.subdomain
+
+        total, concurrency = options['requests'], options['concurrency']
+        self.stdout.write(
+            f'Membre {member.member_id} ({member.user.email}) : {total} requêtes par endpoint, '
+            f'{concurrency} simultanées, latence SQL ajoutée {options["db_latency"]:g} ms'
+        )
+        self.stdout.write(f'{"endpoint":<40} {"WSGI p50":>9} {"p99":>8} {"ASGI p50":>9} {"p99":>8}   (ms)   débit WSGI / ASGI')
+
+        # Hors mesure : instrumentation SQL (tests / DEBUG) ; requêtes locales en HTTP sur localhost
+        local = override_settings(
+            QUERY_INSTRUMENTATION=False, DEBUG=False, ALLOWED_HOSTS=['localhost'], SECURE_SSL_REDIRECT=False
+        )
+        with local, simulated_db_latency(options['db_latency'] / 1000):
+            for path in ENDPOINTS:
+                with override_settings(ROOT_URLCONF=portal_urlconf(portal_views)):
+                    run_wsgi(path, headers, min(total, concurrency), concurrency)  # Échauffement
+                    started = time.perf_counter()
+                    wsgi = run_wsgi(path, headers, total, concurrency)
+                    wsgi_seconds = time.perf_counter() - started
+                with override_settings(ROOT_URLCONF=portal_urlconf(portal_async_views)):
+                    asyncio.run(run_asgi(path, headers, min(total, concurrency), concurrency))
+                    started = time.perf_counter()
+                    asgi = asyncio.run(run_asgi(path, headers, total, concurrency))
+                    asgi_seconds = time.perf_counter() - started
+
+                self.stdout.write(
+                    f'{path:<40} {percentile(wsgi, 50) * 1000:>9.1f} {percentile(wsgi, 99) * 1000:>8.1f} '
+                    f'{percentile(asgi, 50) * 1000:>9.1f} {percentile(asgi, 99) * 1000:>8.1f}'
+                    f'   {total / wsgi_seconds:>6.0f} / {total / asgi_seconds:.0f} req/s'
+                )
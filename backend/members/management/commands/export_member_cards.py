@@ -0,0 +1,45 @@
+# Fichier: backend/members/management/commands/export_member_cards.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from members.card_export import export_queryset, export_jobs, iter_cards, stream_zip, write_pdf
+from members.models import Member
+
+
+class Command(BaseCommand):
+    help = 'Exporte les cartes membres d\'un centre dans une archive ZIP ou une planche PDF A4'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', required=True, help='tenant_id du centre')
+        parser.add_argument('--output', required=True, help='Fichier de sortie (.zip ou .pdf)')
+        parser.add_argument('--status', help='Statut des membres (ex. ACTIVE)')
+        parser.add_argument('--since', help='Membres créés depuis cette date (AAAA-MM-JJ)')
+        parser.add_argument('--workers', type=int, help='Processus de rendu (défaut : nombre de CPU)')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        if not output.endswith(('.zip', '.pdf')):
+            raise CommandError('--output doit se terminer par .zip ou .pdf')
+
+        queryset = Member.objects.filter(tenant_id=options['tenant'])
+        if options['status']:
+            queryset = queryset.filter(status=options['status'])
+
+        started = time.monotonic()
+        jobs = export_jobs(export_queryset(queryset, created_after=options['since']))
+        if not jobs:
+            raise CommandError('Aucun membre ne correspond aux filtres')
+
+        cards = iter_cards(jobs, workers=options['workers'])
+        if output.endswith('.pdf'):
+            write_pdf(cards, output)
+        else:
+            with open(output, 'wb') as archive:
+                for chunk in stream_zip(cards):
+                    archive.write(chunk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(jobs)} carte(s) exportée(s) dans {output} en {time.monotonic() - started:.2f}s'
+        ))
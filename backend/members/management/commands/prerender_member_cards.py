@@ -0,0 +1,40 @@
+# Fichier: backend/members/management/commands/prerender_member_cards.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from authentication.models import GymCenter
+from members.card_generator import prerender_tenant_cards
+
+
+class Command(BaseCommand):
+    help = 'Pré-rend les cartes membres (PNG) manquantes ou périmées dans le cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='tenant_id du centre à traiter (défaut : tous les centres)')
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rendre à nouveau toutes les cartes, même à jour (changement de police ou de gabarit)'
+        )
+
+    def handle(self, *args, **options):
+        if options['tenant']:
+            tenant_ids = [options['tenant']]
+        else:
+            tenant_ids = list(GymCenter.objects.order_by('tenant_id').values_list('tenant_id', flat=True))
+
+        total_rendered = 0
+        for tenant_id in tenant_ids:
+            started = time.monotonic()
+            rendered, cached = prerender_tenant_cards(tenant_id, force=options['force'])
+            total_rendered += rendered
+            self.stdout.write(
+                f'{tenant_id}: {rendered} carte(s) rendue(s), {cached} déjà à jour '
+                f'en {time.monotonic() - started:.2f}s'
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{total_rendered} carte(s) rendue(s) pour {len(tenant_ids)} centre(s)')
+        )
@@ -0,0 +1,39 @@
+# Fichier: backend/members/management/commands/refresh_tenant_metrics.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from authentication.models import GymCenter
+from members.metrics_rollup import refresh_tenant_metrics
+
+
+class Command(BaseCommand):
+    help = 'Met à jour le rollup TenantDailyMetrics (jours touchés depuis le dernier passage)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='tenant_id du centre à traiter (défaut : tous les centres)')
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recalculer tout l\'historique (après suppressions ou changements de date)'
+        )
+
+    def handle(self, *args, **options):
+        if options['tenant']:
+            tenant_ids = [options['tenant']]
+        else:
+            tenant_ids = list(GymCenter.objects.order_by('tenant_id').values_list('tenant_id', flat=True))
+
+        total_days = 0
+        for tenant_id in tenant_ids:
+            started = time.monotonic()
+            days = refresh_tenant_metrics(tenant_id, full=options['full'])
+            total_days += days
+            self.stdout.write(
+                f'{tenant_id}: {days} jour(s) recalculé(s) en {time.monotonic() - started:.2f}s'
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{total_days} jour(s) recalculé(s) pour {len(tenant_ids)} centre(s)')
+        )
@@ -0,0 +1,279 @@
+# backend/members/metrics_rollup.py
+
+"""
+📊 Rollup journalier des statistiques par centre (TenantDailyMetrics).
+
+- compute_daily_metrics() : agrège les tables brutes d'un centre par jour,
+  en une requête GROUP BY par source.
+- refresh_tenant_metrics() : recalcule uniquement les jours touchés depuis
+  le dernier passage (updated_at >= dernier refreshed_at du centre).
+- load_daily_metrics() : lit le rollup (O(jours)) et, en option, recalcule
+  le jour courant en direct ("live today delta").
+
+⚠️ Les suppressions et les changements de date de référence (ex : cours
+déplacé) ne marquent pas l'ancien jour comme touché : utiliser --full.
+"""
+
+from collections import namedtuple
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import TenantDailyMetrics
+
+
+MetricSource = namedtuple('MetricSource', ['model', 'date_field', 'is_datetime', 'counts', 'sums'])
+
+METRIC_SOURCES = [
+    MetricSource('members.Member', 'created_at', True, {
+        'members_active': Q(status='ACTIVE'),
+        'members_inactive': Q(status='INACTIVE'),
+        'members_suspended': Q(status='SUSPENDED'),
+        'members_expired': Q(status='EXPIRED'),
+    }, {}),
+    MetricSource('subscriptions.Subscription', 'start_date', False, {
+        'subscriptions_pending': Q(status='PENDING'),
+        'subscriptions_active': Q(status='ACTIVE'),
+        'subscriptions_expired': Q(status='EXPIRED'),
+        'subscriptions_cancelled': Q(status='CANCELLED'),
+    }, {
+        'subscription_revenue': ('amount_paid', Q(status='ACTIVE')),
+    }),
+    MetricSource('subscriptions.Subscription', 'end_date', False, {
+        'subscriptions_active_ending': Q(status='ACTIVE'),
+    }, {}),
+    MetricSource('bookings.Course', 'date', False, {
+        'courses_scheduled': Q(status='SCHEDULED'),
+        'courses_ongoing': Q(status='ONGOING'),
+        'courses_completed': Q(status='COMPLETED'),
+        'courses_cancelled': Q(status='CANCELLED'),
+    }, {
+        'courses_capacity': ('max_participants', Q(status='SCHEDULED')),
+    }),
+    MetricSource('bookings.Booking', 'course__date', False, {
+        'bookings_pending': Q(status='PENDING'),
+        'bookings_confirmed': Q(status='CONFIRMED'),
+        'bookings_cancelled': Q(status='CANCELLED'),
+        'bookings_completed': Q(status='COMPLETED'),
+        'bookings_no_show': Q(status='NO_SHOW'),
+    }, {}),
+    MetricSource('billing.Invoice', 'issue_date', False, {
+        'invoices_draft': Q(status='DRAFT'),
+        'invoices_paid': Q(status='PAID'),
+        'invoices_pending': Q(status='PENDING'),
+        'invoices_cancelled': Q(status='CANCELLED'),
+        'invoices_refunded': Q(status='REFUNDED'),
+    }, {
+        'invoice_revenue': ('total_amount', Q(status='PAID')),
+    }),
+    MetricSource('billing.Invoice', 'due_date', False, {
+        'invoices_open_due': Q(status__in=['PENDING', 'DRAFT']),
+    }, {}),
+]
+
+METRIC_COLUMNS = [
+    column
+    for source in METRIC_SOURCES
+    for column in list(source.counts) + list(source.sums)
+]
+
+MEMBER_COLUMNS = ['members_active', 'members_inactive', 'members_suspended', 'members_expired']
+SUBSCRIPTION_COLUMNS = [
+    'subscriptions_pending', 'subscriptions_active', 'subscriptions_expired', 'subscriptions_cancelled'
+]
+COURSE_COLUMNS = ['courses_scheduled', 'courses_ongoing', 'courses_completed', 'courses_cancelled']
+BOOKING_COLUMNS = [
+    'bookings_pending', 'bookings_confirmed', 'bookings_cancelled', 'bookings_completed', 'bookings_no_show'
+]
+INVOICE_COLUMNS = [
+    'invoices_draft', 'invoices_paid', 'invoices_pending', 'invoices_cancelled', 'invoices_refunded'
+]
+
+# Limite de paramètres par requête (SQLite) lors du filtrage par liste de jours
+DATES_CHUNK_SIZE = 500
+
+
+class DailyMetrics:
+    """Série de métriques journalières {date: {colonne: valeur}} avec sommes par période"""
+
+    def __init__(self, days=None):
+        self.days = days or {}
+
+    def total(self, *columns, start=None, end=None):
+        """Somme des colonnes sur [start, end] (bornes incluses, None = illimité)"""
+        result = 0
+        for date, values in self.days.items():
+            if start is not None and date < start:
+                continue
+            if end is not None and date > end:
+                continue
+            for column in columns:
+                result += values.get(column, 0)
+        return result
+
+    def per_day(self, column, start, end):
+        """{date: valeur} pour une colonne sur [start, end]"""
+        return {
+            date: values.get(column, 0)
+            for date, values in self.days.items()
+            if start <= date <= end
+        }
+
+
+def _empty_metrics():
+    values = dict.fromkeys(METRIC_COLUMNS, 0)
+    for source in METRIC_SOURCES:
+        for column in source.sums:
+            values[column] = Decimal('0')
+    return values
+
+
+def _date_chunks(dates):
+    if dates is None:
+        yield None
+        return
+    dates = sorted(dates)
+    for i in range(0, len(dates), DATES_CHUNK_SIZE):
+        yield dates[i:i + DATES_CHUNK_SIZE]
+
+
+def _source_queryset(source, tenant_id):
+    queryset = apps.get_model(source.model).objects.all()
+    if tenant_id is not None:
+        queryset = queryset.filter(tenant_id=tenant_id)
+    date_expression = TruncDate(source.date_field) if source.is_datetime else F(source.date_field)
+    return queryset.annotate(metric_date=date_expression)
+
+
+def compute_daily_metrics(tenant_id=None, dates=None):
+    """
+    Agrège les tables brutes : une requête GROUP BY jour par source.
+
+    tenant_id=None : tous les centres. dates=None : tout l'historique.
+    Retourne {date: {colonne: valeur}}.
+    """
+    buckets = {}
+
+    for source in METRIC_SOURCES:
+        aggregates = {
+            column: Count('id', filter=condition)
+            for column, condition in source.counts.items()
+        }
+        aggregates.update({
+            column: Sum(field, filter=condition)
+            for column, (field, condition) in source.sums.items()
+        })
+
+        for chunk in _date_chunks(dates):
+            queryset = _source_queryset(source, tenant_id)
+            if chunk is not None:
+                queryset = queryset.filter(metric_date__in=chunk)
+
+            rows = queryset.exclude(metric_date=None).order_by().values('metric_date').annotate(**aggregates)
+            for row in rows:
+                values = buckets.setdefault(row['metric_date'], _empty_metrics())
+                for column in aggregates:
+                    values[column] += row[column] or 0
+
+    return buckets
+
+
+def touched_dates(tenant_id, since):
+    """Jours de référence des lignes modifiées depuis `since`, toutes sources confondues"""
+    dates = set()
+    for source in METRIC_SOURCES:
+        dates.update(
+            _source_queryset(source, tenant_id).filter(
+                updated_at__gte=since
+            ).exclude(metric_date=None).order_by().values_list('metric_date', flat=True).distinct()
+        )
+    return dates
+
+
+def refresh_tenant_metrics(tenant_id, full=False):
+    """
+    Met à jour le rollup d'un centre.
+    Sans historique (ou full=True) : recalcul complet. Sinon : jours touchés
+    depuis le dernier refreshed_at du centre. Retourne le nombre de jours écrits.
+    """
+    started_at = timezone.now()
+    existing = TenantDailyMetrics.objects.filter(tenant_id=tenant_id)
+
+    watermark = None if full else existing.aggregate(last=Max('refreshed_at'))['last']
+    dates = touched_dates(tenant_id, watermark) if watermark else None
+    if dates is not None and not dates:
+        return 0
+
+    buckets = compute_daily_metrics(tenant_id, dates)
+    days = sorted(buckets) if dates is None else sorted(dates)
+
+    with transaction.atomic():
+        if dates is None:
+            existing.delete()
+        else:
+            for chunk in _date_chunks(dates):
+                existing.filter(date__in=chunk).delete()
+
+        TenantDailyMetrics.objects.bulk_create([
+            TenantDailyMetrics(
+                tenant_id=tenant_id,
+                date=day,
+                refreshed_at=started_at,
+                **buckets.get(day, _empty_metrics())
+            )
+            for day in days
+        ], batch_size=500)
+
+    return len(days)
+
+
+def load_daily_metrics(tenant_id, live_today=True):
+    """
+    Métriques journalières d'un centre.
+    - tenant_id=None (vue globale) ou rollup jamais calculé : calcul direct.
+    - Sinon : lignes du rollup + jour courant recalculé en direct si live_today.
+    """
+    if tenant_id is None:
+        return DailyMetrics(compute_daily_metrics())
+
+    today = timezone.now().date()
+    rows = TenantDailyMetrics.objects.filter(tenant_id=tenant_id)
+    if live_today:
+        rows = rows.exclude(date=today)
+
+    days = {
+        row.pop('date'): row
+        for row in rows.order_by().values('date', *METRIC_COLUMNS)
+    }
+    if not days:
+        # Rollup pas encore calculé pour ce centre : calcul direct
+        return DailyMetrics(compute_daily_metrics(tenant_id))
+
+    if live_today:
+        days.update(compute_daily_metrics(tenant_id, [today]))
+
+    return DailyMetrics(days)
+
+
+def metrics_tenant_id(request):
+    """
+    Centre couvert par les statistiques, mêmes règles que TenantQuerysetMixin.
+    None = tous les centres (super-admin ou utilisateur sans centre).
+    """
+    user = request.user
+    if user.is_superuser:
+        return None
+
+    gym_center = getattr(request, 'gym_center', None)
+    if gym_center:
+        return gym_center.tenant_id
+    return user.tenant_id or None
+
+
+def live_today_requested(request):
+    """?live=false désactive le recalcul en direct du jour courant"""
+    return request.query_params.get('live', 'true').lower() not in ('0', 'false', 'no')
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantDailyMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.CharField(max_length=100, verbose_name='ID du centre')),
+                ('date', models.DateField(verbose_name='Jour')),
+                ('members_active', models.PositiveIntegerField(default=0)),
+                ('members_inactive', models.PositiveIntegerField(default=0)),
+                ('members_suspended', models.PositiveIntegerField(default=0)),
+                ('members_expired', models.PositiveIntegerField(default=0)),
+                ('subscriptions_pending', models.PositiveIntegerField(default=0)),
+                ('subscriptions_active', models.PositiveIntegerField(default=0)),
+                ('subscriptions_expired', models.PositiveIntegerField(default=0)),
+                ('subscriptions_cancelled', models.PositiveIntegerField(default=0)),
+                ('subscriptions_active_ending', models.PositiveIntegerField(default=0)),
+                ('subscription_revenue', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('courses_scheduled', models.PositiveIntegerField(default=0)),
+                ('courses_ongoing', models.PositiveIntegerField(default=0)),
+                ('courses_completed', models.PositiveIntegerField(default=0)),
+                ('courses_cancelled', models.PositiveIntegerField(default=0)),
+                ('courses_capacity', models.PositiveIntegerField(default=0)),
+                ('bookings_pending', models.PositiveIntegerField(default=0)),
+                ('bookings_confirmed', models.PositiveIntegerField(default=0)),
+                ('bookings_cancelled', models.PositiveIntegerField(default=0)),
+                ('bookings_completed', models.PositiveIntegerField(default=0)),
+                ('bookings_no_show', models.PositiveIntegerField(default=0)),
+                ('invoices_draft', models.PositiveIntegerField(default=0)),
+                ('invoices_paid', models.PositiveIntegerField(default=0)),
+                ('invoices_pending', models.PositiveIntegerField(default=0)),
+                ('invoices_cancelled', models.PositiveIntegerField(default=0)),
+                ('invoices_refunded', models.PositiveIntegerField(default=0)),
+                ('invoices_open_due', models.PositiveIntegerField(default=0)),
+                ('invoice_revenue', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('refreshed_at', models.DateTimeField(verbose_name='Dernier recalcul')),
+            ],
+            options={
+                'verbose_name': 'Métriques journalières',
+                'verbose_name_plural': 'Métriques journalières',
+                'ordering': ['tenant_id', 'date'],
+                'indexes': [models.Index(fields=['tenant_id', 'refreshed_at'], name='members_ten_tenant__cdcb55_idx')],
+                'unique_together': {('tenant_id', 'date')},
+            },
+        ),
+    ]
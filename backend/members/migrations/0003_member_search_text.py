@@ -0,0 +1,67 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:47
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _normalize(text):
+    """Copie figée de members.search.normalize"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    folded = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(folded.lower().split())
+
+
+def backfill_search_text(apps, schema_editor):
+    """Remplir search_text pour les membres existants"""
+    Member = apps.get_model('members', 'Member')
+
+    batch = []
+    for member in Member.objects.only(
+        'id', 'first_name', 'last_name', 'member_id', 'email', 'phone'
+    ).iterator(chunk_size=1000):
+        member.search_text = _normalize(' '.join(
+            value for value in [
+                member.first_name, member.last_name, member.member_id, member.email, member.phone
+            ] if value
+        ))[:500]
+        batch.append(member)
+        if len(batch) >= 1000:
+            Member.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    if batch:
+        Member.objects.bulk_update(batch, ['search_text'])
+
+
+def create_trigram_index(apps, schema_editor):
+    """PostgreSQL uniquement : index GIN pg_trgm pour LIKE '%...%' sur search_text"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS members_member_search_trgm '
+        'ON members_member USING gin (search_text gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS members_member_search_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0002_tenantdailymetrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='search_text',
+            field=models.CharField(blank=True, default='', editable=False, max_length=500),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
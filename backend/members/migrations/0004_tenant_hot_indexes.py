@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0003_member_search_text'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['tenant_id', '-created_at'], name='member_tenant_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['tenant_id', 'status', '-created_at'], name='member_tenant_status_idx'),
+        ),
+    ]
@@ -62,9 +62,17 @@ class Member(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     tenant_id = models.CharField(max_length=100, null=True, blank=True, verbose_name="ID du centre") 
+
+    # 🔍 Texte de recherche normalisé (minuscules, sans accents), voir members/search.py
+    search_text = models.CharField(max_length=500, blank=True, default='', editable=False)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # ✅ Liste des membres d'un centre (tri par date d'inscription, filtre par statut)
+            models.Index(fields=['tenant_id', '-created_at'], name='member_tenant_created_idx'),
+            models.Index(fields=['tenant_id', 'status', '-created_at'], name='member_tenant_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.member_id})"
@@ -113,19 +121,30 @@ class Member(models.Model):
             self.status = 'EXPIRED'
             self.save(update_fields=['status', 'updated_at'])
     
+    @staticmethod
+    def allocate_member_ids(count=1):
+        """Réserver `count` member_id consécutifs (imports en masse : un seul aller-retour)"""
+        from authentication.sequences import allocate, last_number
+
+        year = timezone.now().year
+        numbers = allocate(
+            'member_id',
+            year=year,
+            count=count,
+            seed=lambda y: last_number(Member.objects, 'member_id', f'MEM{y}')
+        )
+        return [f"MEM{year}{number:04d}" for number in numbers]
+
     def save(self, *args, **kwargs):
         if not self.member_id:
-            # Générer un ID unique (ex: MEM2025001)
-            last_member = Member.objects.order_by('-id').first()
-            if last_member and last_member.member_id:
-                try:
-                    last_id = int(last_member.member_id[7:])
-                    new_id = last_id + 1
-                except (ValueError, IndexError):
-                    new_id = 1
-            else:
-                new_id = 1
-            self.member_id = f"MEM{timezone.now().year}{new_id:04d}"
+            # ✅ Numéro réservé dans le compteur de séquence (ex: MEM20250001)
+            self.member_id = Member.allocate_member_ids()[0]
+
+        from .search import build_search_text, SEARCH_SOURCE_FIELDS
+        self.search_text = build_search_text(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and SEARCH_SOURCE_FIELDS & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'search_text'}
         super().save(*args, **kwargs)
 
 
@@ -144,4 +163,67 @@ class MemberMeasurement(models.Model):
         ordering = ['-date']
     
     def __str__(self):
-        return f"{self.member.full_name} - {self.date}"
\ No newline at end of file
+        return f"{self.member.full_name} - {self.date}"
+
+class TenantDailyMetrics(models.Model):
+    """
+    📊 Agrégats journaliers par centre (rollup des statistiques).
+
+    Une ligne par (tenant_id, date) : compteurs par statut des membres
+    (date de création), abonnements (date de début / de fin), cours (date),
+    réservations (date du cours) et factures (émission / échéance).
+    Alimenté par `manage.py refresh_tenant_metrics` (voir metrics_rollup.py).
+    """
+    tenant_id = models.CharField(max_length=100, verbose_name="ID du centre")
+    date = models.DateField(verbose_name="Jour")
+
+    # 👥 Membres (par date de création)
+    members_active = models.PositiveIntegerField(default=0)
+    members_inactive = models.PositiveIntegerField(default=0)
+    members_suspended = models.PositiveIntegerField(default=0)
+    members_expired = models.PositiveIntegerField(default=0)
+
+    # 💳 Abonnements (par date de début, sauf *_ending : par date de fin)
+    subscriptions_pending = models.PositiveIntegerField(default=0)
+    subscriptions_active = models.PositiveIntegerField(default=0)
+    subscriptions_expired = models.PositiveIntegerField(default=0)
+    subscriptions_cancelled = models.PositiveIntegerField(default=0)
+    subscriptions_active_ending = models.PositiveIntegerField(default=0)
+    subscription_revenue = models.DecimalField(max_digits=14, decimal_places=3, default=0)
+
+    # 📅 Cours (par date du cours)
+    courses_scheduled = models.PositiveIntegerField(default=0)
+    courses_ongoing = models.PositiveIntegerField(default=0)
+    courses_completed = models.PositiveIntegerField(default=0)
+    courses_cancelled = models.PositiveIntegerField(default=0)
+    courses_capacity = models.PositiveIntegerField(default=0)
+
+    # 📊 Réservations (par date du cours)
+    bookings_pending = models.PositiveIntegerField(default=0)
+    bookings_confirmed = models.PositiveIntegerField(default=0)
+    bookings_cancelled = models.PositiveIntegerField(default=0)
+    bookings_completed = models.PositiveIntegerField(default=0)
+    bookings_no_show = models.PositiveIntegerField(default=0)
+
+    # 🧾 Factures (par date d'émission, sauf open_due : par date d'échéance)
+    invoices_draft = models.PositiveIntegerField(default=0)
+    invoices_paid = models.PositiveIntegerField(default=0)
+    invoices_pending = models.PositiveIntegerField(default=0)
+    invoices_cancelled = models.PositiveIntegerField(default=0)
+    invoices_refunded = models.PositiveIntegerField(default=0)
+    invoices_open_due = models.PositiveIntegerField(default=0)
+    invoice_revenue = models.DecimalField(max_digits=14, decimal_places=3, default=0)
+
+    refreshed_at = models.DateTimeField(verbose_name="Dernier recalcul")
+
+    class Meta:
+        ordering = ['tenant_id', 'date']
+        verbose_name = "Métriques journalières"
+        verbose_name_plural = "Métriques journalières"
+        unique_together = [['tenant_id', 'date']]
+        indexes = [
+            models.Index(fields=['tenant_id', 'refreshed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.tenant_id} - {self.date}"
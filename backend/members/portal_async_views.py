@@ -0,0 +1,229 @@
+# backend/members/portal_async_views.py
+
+"""
+⚡ Lectures du portail membre en async, servies sous ASGI (config/asgi.py, uvicorn).
+
+Mêmes réponses que member_dashboard, available_courses, my_bookings,
+my_programs et my_progress (members/portal_views.py), avec l'ORM async :
+les requêtes indépendantes d'une vue sont lancées ensemble (asyncio.gather).
+Le profil Member est lu en même temps que les données, filtrées par
+member__user_id : aucune requête n'attend le résultat d'une autre.
+
+- Authentification par les claims du token (ClaimsJWTAuthentication.aauthenticate) :
+  ni requête SQL ni thread.
+- Vues Django natives (@api_view est synchrone) : réponse rendue par
+  JSONRenderer, erreurs DRF (401, 405, curseur invalide) au même format.
+- Limite de Django 5.2 : l'ORM async passe par sync_to_async, et les requêtes
+  d'une même requête HTTP s'exécutent dans son thread, sur sa connexion. Le
+  gain vient de la concurrence entre requêtes HTTP (aucun middleware synchrone
+  sur ce chemin) ; gather laisse les requêtes indépendantes prêtes pour un
+  pilote de base async.
+
+Choix du chemin : settings.MEMBER_PORTAL_ASYNC (vrai par défaut sous ASGI).
+Mesure : `manage.py benchmark_member_portal` (p50/p99 WSGI vs ASGI).
+"""
+
+import asyncio
+from datetime import timedelta
+from functools import wraps
+
+from django.db.models import Exists, OuterRef
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import APIException, MethodNotAllowed, NotAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from authentication.jwt_claims import ClaimsJWTAuthentication
+from authentication.query_budget import query_budget
+from bookings.models import Booking, Course
+from bookings.serializers import BookingDetailSerializer, CourseListSerializer
+from bookings.views import BookingPagination
+from coaching.serializers import TrainingProgramSerializer
+from subscriptions.models import Subscription
+from subscriptions.serializers import SubscriptionListSerializer
+from .models import Member, MemberMeasurement
+from .portal_views import member_programs, progress_summary
+from .serializers import MemberMeasurementSerializer
+
+_renderer = JSONRenderer()
+
+
+def json_response(data, status=200):
+    return HttpResponse(_renderer.render(data), content_type='application/json', status=status)
+
+
+async def as_list(queryset):
+    return [obj async for obj in queryset]
+
+
+async def member_of(user):
+    """Profil Member de l'utilisateur, None s'il n'en a pas"""
+    return await Member.objects.filter(user_id=user.pk).afirst()
+
+
+def member_not_found():
+    return json_response({'error': 'Profil membre introuvable'}, status=404)
+
+
+def async_portal_view(view):
+    """GET authentifié par JWT ; exceptions DRF rendues comme par @api_view"""
+    @wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        authenticator = ClaimsJWTAuthentication()
+        try:
+            if request.method not in ('GET', 'HEAD'):
+                raise MethodNotAllowed(request.method)
+            authenticated = await authenticator.aauthenticate(request)
+            if authenticated is None:
+                raise NotAuthenticated()
+            request.user = authenticated[0]
+            return await view(request, *args, **kwargs)
+        except APIException as e:
+            response = json_response(e.detail, status=e.status_code)
+            if e.status_code == 401:
+                response['WWW-Authenticate'] = authenticator.authenticate_header(request)
+            return response
+    return wrapped
+
+
+@async_portal_view
+async def member_dashboard(request):
+    """📊 Dashboard membre : profil, abonnement actif, abonnements en attente, total"""
+    user = request.user
+    if user.role != 'MEMBER':
+        return json_response({'error': 'Accès refusé'}, status=403)
+
+    today = timezone.now().date()
+    subscriptions = Subscription.objects.filter(member__user_id=user.pk)
+    member, active_subscription, pending_subscriptions, total_subscriptions = await asyncio.gather(
+        member_of(user),
+        subscriptions.filter(status='ACTIVE', end_date__gte=today).select_related('plan').afirst(),
+        as_list(subscriptions.filter(status='PENDING').select_related('member', 'plan')),
+        subscriptions.acount(),
+    )
+    if member is None:
+        return member_not_found()
+
+    return json_response({
+        'member': {
+            'id': member.id,
+            'member_id': member.member_id,
+            'full_name': member.full_name,
+            'email': member.email,
+            'status': member.status,
+        },
+        'active_subscription': {
+            'id': active_subscription.id,
+            'plan_name': active_subscription.plan.name,
+            'end_date': active_subscription.end_date,
+            'days_remaining': active_subscription.days_remaining,
+        } if active_subscription else None,
+        'pending_subscriptions': SubscriptionListSerializer(pending_subscriptions, many=True).data,
+        'statistics': {
+            'total_subscriptions': total_subscriptions,
+        }
+    })
+
+
+@query_budget(4)
+@async_portal_view
+async def available_courses(request):
+    """📅 Cours disponibles pour réservation (filtres : date_from, date_to, course_type, coach)"""
+    user = request.user
+    date_from = request.GET.get('date_from', timezone.now().date())
+    date_to = request.GET.get('date_to', timezone.now().date() + timedelta(days=14))
+    course_type = request.GET.get('course_type')
+    coach = request.GET.get('coach')
+
+    courses = Course.objects.filter(
+        tenant_id=request.tenant_id,
+        date__gte=date_from,
+        date__lte=date_to,
+        status='SCHEDULED'
+    ).with_booking_stats().annotate(
+        member_already_booked=Exists(
+            Booking.objects.filter(
+                course=OuterRef('pk'),
+                member__user_id=user.pk,
+                status__in=['CONFIRMED', 'PENDING']
+            )
+        )
+    )
+    if course_type:
+        courses = courses.filter(course_type_id=course_type)
+    if coach:
+        courses = courses.filter(coach_id=coach)
+
+    member, courses = await asyncio.gather(member_of(user), as_list(courses))
+    if member is None:
+        return member_not_found()
+
+    return json_response([
+        {
+            **CourseListSerializer(course).data,
+            'already_booked': course.member_already_booked,
+            'can_book': not course.is_full and not course.member_already_booked
+        }
+        for course in courses
+    ])
+
+
+@query_budget(4)
+@async_portal_view
+async def my_bookings(request):
+    """📋 Historique des réservations du membre (page par curseur, comme la version WSGI)"""
+    user = request.user
+    status_filter = request.GET.get('status')
+    date_from = request.GET.get('date_from')
+    date_to = request.GET.get('date_to')
+
+    bookings = Booking.objects.filter(
+        member__user_id=user.pk
+    ).select_related('member', 'course__course_type', 'course__coach', 'course__room')
+    if status_filter:
+        bookings = bookings.filter(status=status_filter)
+    if date_from:
+        bookings = bookings.filter(course__date__gte=date_from)
+    if date_to:
+        bookings = bookings.filter(course__date__lte=date_to)
+    bookings = bookings.order_by('-course__date', '-course__start_time')
+
+    # Request DRF : query_params et build_absolute_uri pour le curseur
+    paginator = BookingPagination()
+    member, page = await asyncio.gather(
+        member_of(user),
+        paginator.apaginate_queryset(bookings, Request(request))
+    )
+    if member is None:
+        return member_not_found()
+    return json_response(paginator.get_paginated_data(BookingDetailSerializer(page, many=True).data))
+
+
+@async_portal_view
+async def my_programs(request):
+    """🏋️ Programmes d'entraînement du membre, séances et exercices compris"""
+    user = request.user
+    member, programs = await asyncio.gather(
+        member_of(user),
+        as_list(member_programs().filter(member__user_id=user.pk))
+    )
+    if member is None:
+        return member_not_found()
+    return json_response(TrainingProgramSerializer(programs, many=True).data)
+
+
+@async_portal_view
+async def my_progress(request):
+    """📈 12 dernières mesures et évolution poids / masse grasse"""
+    user = request.user
+    member, measurements = await asyncio.gather(
+        member_of(user),
+        as_list(MemberMeasurement.objects.filter(member__user_id=user.pk).order_by('-date')[:12])
+    )
+    if member is None:
+        return member_not_found()
+    return json_response({
+        'measurements': MemberMeasurementSerializer(measurements, many=True).data,
+        'summary': progress_summary(measurements)
+    })
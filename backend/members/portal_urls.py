@@ -1,26 +1,43 @@
 # backend/members/portal_urls.py
 
-from django.urls import path
-from members import portal_views
-
-urlpatterns = [
-    # Dashboard
-    path('dashboard/', portal_views.member_dashboard, name='member-dashboard'),
-    
-    # Cours & Réservations
-    path('courses/available/', portal_views.available_courses, name='available-courses'),
-    path('bookings/', portal_views.my_bookings, name='my-bookings'),
-    path('bookings/book/', portal_views.book_course, name='book-course'),
-    path('bookings/<int:booking_id>/cancel/', portal_views.cancel_booking, name='cancel-booking'),
-    
-    # Programmes
-    path('programs/', portal_views.my_programs, name='my-programs'),
-    
-    # Progression
-    path('progress/', portal_views.my_progress, name='my-progress'),
-    
-    # Abonnements
-    path('subscriptions/', portal_views.my_subscriptions, name='my-subscriptions'),
-    path('subscriptions/history/', portal_views.my_subscription_history, name='my-subscription-history'),
-    path('subscriptions/plans/', portal_views.subscription_plans_list, name='subscription-plans'),
-]
\ No newline at end of file
+from types import ModuleType
+
+from django.conf import settings
+from django.urls import include, path
+from members import portal_views, portal_async_views
+
+
+def portal_patterns(read_views):
+    """Routes du portail ; lectures servies par `read_views` (portal_views ou portal_async_views)"""
+    return [
+        # Dashboard
+        path('dashboard/', read_views.member_dashboard, name='member-dashboard'),
+        
+        # Cours & Réservations
+        path('courses/available/', read_views.available_courses, name='available-courses'),
+        path('bookings/', read_views.my_bookings, name='my-bookings'),
+        path('bookings/book/', portal_views.book_course, name='book-course'),
+        path('bookings/<int:booking_id>/cancel/', portal_views.cancel_booking, name='cancel-booking'),
+        
+        # Programmes
+        path('programs/', read_views.my_programs, name='my-programs'),
+        
+        # Progression
+        path('progress/', read_views.my_progress, name='my-progress'),
+        
+        # Abonnements
+        path('subscriptions/', portal_views.my_subscriptions, name='my-subscriptions'),
+        path('subscriptions/history/', portal_views.my_subscription_history, name='my-subscription-history'),
+        path('subscriptions/plans/', portal_views.subscription_plans_list, name='subscription-plans'),
+    ]
+
+
+def portal_urlconf(read_views):
+    """URLconf réduite au portail (ROOT_URLCONF des tests et du benchmark WSGI / ASGI)"""
+    urlconf = ModuleType(f'portal_urlconf.{read_views.__name__}')
+    urlconf.urlpatterns = [path('api/members-portal/', include(portal_patterns(read_views)))]
+    return urlconf
+
+
+# ⚡ Lectures en async sous ASGI (voir members/portal_async_views.py)
+urlpatterns = portal_patterns(portal_async_views if settings.MEMBER_PORTAL_ASYNC else portal_views)
@@ -6,15 +6,18 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
 from datetime import timedelta
-from django.db.models import Q
+from django.db.models import Q, Exists, OuterRef, Prefetch
 
 from .models import Member, MemberMeasurement
 from .serializers import MemberDetailSerializer, MemberMeasurementSerializer
 from subscriptions.models import Subscription, SubscriptionPlan
-from subscriptions.serializers import SubscriptionDetailSerializer, SubscriptionPlanSerializer
+from subscriptions.serializers import SubscriptionDetailSerializer, SubscriptionListSerializer, SubscriptionPlanSerializer
 from bookings.models import Booking, Course
+from bookings import services as booking_service
 from bookings.serializers import BookingDetailSerializer, CourseListSerializer
-from coaching.models import TrainingProgram
+from bookings.views import BookingPagination
+from authentication.query_budget import query_budget
+from coaching.models import TrainingProgram, WorkoutExercise
 from coaching.serializers import TrainingProgramSerializer
 
 
@@ -100,7 +103,7 @@ def member_dashboard(request):
         pending_subscriptions = Subscription.objects.filter(
             member=member,
             status='PENDING'
-        ).select_related('plan')
+        ).select_related('member', 'plan')
         
         # Statistiques
         total_subscriptions = Subscription.objects.filter(member=member).count()
@@ -134,6 +137,7 @@ def member_dashboard(request):
             'message': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@query_budget(4)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def available_courses(request):
@@ -156,7 +160,16 @@ def available_courses(request):
         date__gte=date_from,
         date__lte=date_to,
         status='SCHEDULED'
-    ).select_related('course_type', 'coach', 'room')
+    ).with_booking_stats().annotate(
+        # ✅ Réservation existante du membre, calculée dans la même requête
+        member_already_booked=Exists(
+            Booking.objects.filter(
+                course=OuterRef('pk'),
+                member=member,
+                status__in=['CONFIRMED', 'PENDING']
+            )
+        )
+    )
     
     # Filtres optionnels
     if course_type:
@@ -167,12 +180,7 @@ def available_courses(request):
     # Annoter avec places disponibles
     courses_data = []
     for course in courses:
-        # Vérifier si membre a déjà réservé
-        already_booked = Booking.objects.filter(
-            course=course,
-            member=member,
-            status__in=['CONFIRMED', 'PENDING']
-        ).exists()
+        already_booked = course.member_already_booked
         
         courses_data.append({
             **CourseListSerializer(course).data,
@@ -193,15 +201,6 @@ def book_course(request):
     member = user.member_profile
     course_id = request.data.get('course_id')
     
-    # 1️⃣ VÉRIFICATIONS
-    
-    # Vérifier abonnement actif
-    if not member.has_active_subscription:
-        return Response({
-            'error': 'Abonnement requis',
-            'message': 'Vous devez avoir un abonnement actif pour réserver un cours'
-        }, status=status.HTTP_400_BAD_REQUEST)
-    
     try:
         course = Course.objects.select_related('course_type', 'room', 'coach').get(id=course_id)
     except Course.DoesNotExist:
@@ -209,48 +208,15 @@ def book_course(request):
             'error': 'Cours introuvable'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    # Vérifier que le cours n'est pas complet
-    if course.is_full:
-        return Response({
-            'error': 'Cours complet',
-            'message': f'Ce cours affiche complet ({course.max_participants} places)'
-        }, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Vérifier que le cours n'est pas passé
-    if course.is_past:
-        return Response({
-            'error': 'Cours passé',
-            'message': 'Impossible de réserver un cours déjà terminé'
-        }, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Vérifier que le cours n'est pas annulé
-    if course.status == 'CANCELLED':
-        return Response({
-            'error': 'Cours annulé',
-            'message': 'Ce cours a été annulé'
-        }, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Vérifier pas de réservation existante
-    existing_booking = Booking.objects.filter(
-        course=course,
-        member=member,
-        status__in=['CONFIRMED', 'PENDING']
-    ).first()
-    
-    if existing_booking:
+    # ✅ Vérifications + réservation atomique de la place (bookings.services)
+    try:
+        booking = booking_service.book_course(member, course, tenant_id=request.tenant_id)
+    except booking_service.BookingError as e:
         return Response({
-            'error': 'Déjà réservé',
-            'message': 'Vous avez déjà réservé ce cours'
+            'error': e.title,
+            'message': e.message
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # 2️⃣ CRÉER LA RÉSERVATION
-    booking = Booking.objects.create(
-        course=course,
-        member=member,
-        status='CONFIRMED',
-        tenant_id=request.tenant_id
-    )
-    
     return Response({
         'message': 'Réservation confirmée',
         'booking': BookingDetailSerializer(booking).data
@@ -306,6 +272,7 @@ def cancel_booking(request, booking_id):
     })
 
 
+@query_budget(4)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_bookings(request):
@@ -322,7 +289,7 @@ def my_bookings(request):
     
     bookings = Booking.objects.filter(
         member=member
-    ).select_related('course__course_type', 'course__coach', 'course__room')
+    ).select_related('member', 'course__course_type', 'course__coach', 'course__room')
     
     if status_filter:
         bookings = bookings.filter(status=status_filter)
@@ -333,7 +300,21 @@ def my_bookings(request):
     
     bookings = bookings.order_by('-course__date', '-course__start_time')
     
-    return Response(BookingDetailSerializer(bookings, many=True).data)
+    # ✅ Page bornée (curseur ?cursor=, ?page_size=, ?count=true)
+    paginator = BookingPagination()
+    page = paginator.paginate_queryset(bookings, request)
+    return paginator.get_paginated_response(BookingDetailSerializer(page, many=True).data)
+
+
+def member_programs():
+    """Programmes prêts pour TrainingProgramSerializer : membre, coach, séances et exercices préchargés"""
+    return TrainingProgram.objects.select_related('member', 'coach').prefetch_related(
+        'workout_sessions',
+        Prefetch(
+            'workout_sessions__exercises',
+            queryset=WorkoutExercise.objects.select_related('exercise__category')
+        )
+    )
 
 
 @api_view(['GET'])
@@ -345,13 +326,29 @@ def my_programs(request):
     user = request.user
     member = user.member_profile
     
-    programs = TrainingProgram.objects.filter(
-        member=member
-    ).select_related('coach').prefetch_related('workout_sessions__exercises')
+    programs = member_programs().filter(member=member)
     
     return Response(TrainingProgramSerializer(programs, many=True).data)
 
 
+def progress_summary(measurements):
+    """Évolution entre la plus ancienne et la plus récente des mesures (triées de la plus récente)"""
+    weight_change = 0
+    bf_change = 0
+    if len(measurements) >= 2:
+        latest = measurements[0]
+        oldest = measurements[-1]
+        
+        weight_change = float(latest.weight - oldest.weight) if latest.weight and oldest.weight else 0
+        bf_change = float(latest.body_fat_percentage - oldest.body_fat_percentage) if latest.body_fat_percentage and oldest.body_fat_percentage else 0
+    
+    return {
+        'weight_change': weight_change,
+        'body_fat_change': bf_change,
+        'total_measurements': len(measurements)
+    }
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_progress(request):
@@ -361,28 +358,14 @@ def my_progress(request):
     user = request.user
     member = user.member_profile
     
-    measurements = MemberMeasurement.objects.filter(
+    # ✅ 12 dernières mesures lues une fois (last() est impossible sur une tranche)
+    measurements = list(MemberMeasurement.objects.filter(
         member=member
-    ).order_by('-date')[:12]  # 12 dernières mesures
-    
-    # Calcul des changements
-    if measurements.count() >= 2:
-        latest = measurements.first()
-        oldest = measurements.last()
-        
-        weight_change = float(latest.weight - oldest.weight) if latest.weight and oldest.weight else 0
-        bf_change = float(latest.body_fat_percentage - oldest.body_fat_percentage) if latest.body_fat_percentage and oldest.body_fat_percentage else 0
-    else:
-        weight_change = 0
-        bf_change = 0
+    ).order_by('-date')[:12])
     
     return Response({
         'measurements': MemberMeasurementSerializer(measurements, many=True).data,
-        'summary': {
-            'weight_change': weight_change,
-            'body_fat_change': bf_change,
-            'total_measurements': measurements.count()
-        }
+        'summary': progress_summary(measurements)
     })
 
 
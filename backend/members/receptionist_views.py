@@ -5,9 +5,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
 
 from .models import Member
+from .search import search_members
 from .serializers import MemberListSerializer, MemberDetailSerializer
 from authentication.permissions import IsReceptionistOrAdmin, BelongsToTenant
 
@@ -38,12 +38,8 @@ class ReceptionistMemberViewSet(viewsets.ModelViewSet):
         if len(query) < 2:
             return Response([])
         
-        members = self.get_queryset().filter(
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query) |
-            Q(member_id__icontains=query) |
-            Q(email__icontains=query)
-        )[:10]  # Limiter les résultats
+        # 🔍 Recherche classée sur le texte normalisé (accents ignorés)
+        members = search_members(self.get_queryset(), query)[:10]  # Limiter les résultats
         
         serializer = self.get_serializer(members, many=True)
         return Response(serializer.data)
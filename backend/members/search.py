@@ -0,0 +1,201 @@
+# backend/members/search.py
+
+"""
+🔍 Recherche de membres sur une colonne normalisée (Member.search_text).
+
+search_text = prénom, nom, member_id, email et téléphone en minuscules,
+sans accents. Deux moteurs, choisis selon la base :
+- PostgreSQL : LIKE sur search_text, accéléré par un index GIN pg_trgm
+  (migration members 0003), classement par similarité trigramme.
+- Autres bases (SQLite des tests) : index trigramme en mémoire, en pur Python,
+  invalidé par les signaux post_save / post_delete de Member.
+
+Dans les deux cas, un member_id égal ou commençant par la recherche passe devant.
+"""
+
+import threading
+import unicodedata
+
+from django.db import connections
+from django.db.models import Case, FloatField, IntegerField, Q, Value, When
+from django.db.models.functions import Cast
+from rest_framework import filters
+
+# Nombre max de résultats classés par l'index en mémoire
+FALLBACK_MAX_RESULTS = 500
+
+# Champs qui composent search_text
+SEARCH_SOURCE_FIELDS = {'first_name', 'last_name', 'member_id', 'email', 'phone'}
+
+
+def normalize(text):
+    """Minuscules, sans accents, espaces simples : 'Éloïse  DUPONT' → 'eloise dupont'"""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    folded = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(folded.lower().split())
+
+
+def build_search_text(member):
+    """Valeur de Member.search_text"""
+    return normalize(' '.join(
+        str(value) for value in [
+            member.first_name, member.last_name, member.member_id, member.email, member.phone
+        ] if value
+    ))[:500]
+
+
+def trigrams(text):
+    """Trigrammes à la manière de pg_trgm (mots complétés par des espaces)"""
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _rank(query, member_id, search_text, query_grams):
+    """Score de pertinence : boost member_id (exact > préfixe), préfixe de mot, similarité"""
+    member_id = (member_id or '').lower()
+    score = 0.0
+    if member_id == query:
+        score += 3
+    elif member_id.startswith(query):
+        score += 2
+    if search_text.startswith(query) or f' {query}' in search_text:
+        score += 1
+    text_grams = trigrams(search_text)
+    if query_grams and text_grams:
+        score += len(query_grams & text_grams) / len(query_grams | text_grams)
+    return score
+
+
+class InMemoryMemberIndex:
+    """
+    Index trigramme en mémoire (par processus) : {trigramme: {pk}}.
+    Chargé en une requête au premier usage, invalidé à chaque écriture d'un membre.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = None
+        self._postings = None
+
+    def invalidate(self):
+        with self._lock:
+            self._entries = None
+            self._postings = None
+
+    def _ensure_loaded(self, using):
+        from .models import Member  # Import ici pour éviter import circulaire
+
+        with self._lock:
+            if self._entries is not None:
+                return self._entries, self._postings
+
+        entries = {
+            pk: (member_id, search_text)
+            for pk, member_id, search_text in Member.objects.using(using).values_list(
+                'pk', 'member_id', 'search_text'
+            )
+        }
+        postings = {}
+        for pk, (_, search_text) in entries.items():
+            for gram in trigrams(search_text):
+                postings.setdefault(gram, set()).add(pk)
+
+        with self._lock:
+            self._entries, self._postings = entries, postings
+        return entries, postings
+
+    def search(self, query, using='default', among=None):
+        """
+        pk des membres contenant tous les mots de la recherche, du plus pertinent au moins pertinent.
+        `among` : pk autorisés (centre, filtres de l'appelant), appliqués avant le classement et la troncature.
+        """
+        entries, postings = self._ensure_loaded(using)
+        tokens = query.split()
+
+        # Candidats : membres possédant tous les trigrammes d'au moins un mot (filtre rapide)
+        candidates = None
+        for token in tokens:
+            token_grams = {g for g in trigrams(token) if g.strip() and len(g.strip()) == 3}
+            if not token_grams:
+                continue
+            matches = set.intersection(*(postings.get(g, set()) for g in token_grams))
+            candidates = matches if candidates is None else candidates & matches
+        if candidates is None:
+            candidates = entries.keys()
+        if among is not None:
+            candidates = among & candidates
+
+        query_grams = trigrams(query)
+        ranked = [
+            (_rank(query, entries[pk][0], entries[pk][1], query_grams), pk)
+            for pk in candidates
+            if all(token in entries[pk][1] for token in tokens)
+        ]
+        ranked.sort(key=lambda item: (-item[0], -item[1]))
+        return [pk for _, pk in ranked[:FALLBACK_MAX_RESULTS]]
+
+
+member_search_index = InMemoryMemberIndex()
+
+
+def search_members(queryset, query):
+    """
+    Filtre et classe `queryset` (membres) par pertinence pour `query`.
+    Retourne un QuerySet ordonné (les annotations/prefetch de l'appelant sont conservés).
+    """
+    query = normalize(query)
+    if not query:
+        return queryset.none()
+
+    if connections[queryset.db].vendor == 'postgresql':
+        return _search_postgresql(queryset, query)
+
+    # pk du queryset (centre, statut...) : les membres des autres centres ne prennent pas les places du classement
+    allowed_pks = set(queryset.values_list('pk', flat=True))
+    ranked_pks = member_search_index.search(query, using=queryset.db, among=allowed_pks)
+    if not ranked_pks:
+        return queryset.none()
+    # Même forme de tri que PostgreSQL (search_rank décroissant) : compatible pagination par clé
+    return queryset.filter(pk__in=ranked_pks).annotate(
+        search_rank=Case(
+            *[When(pk=pk, then=Value(-position)) for position, pk in enumerate(ranked_pks)],
+            output_field=IntegerField()
+        )
+    ).order_by('-search_rank', '-pk')
+
+
+def _search_postgresql(queryset, query):
+    """LIKE '%mot%' par mot (index GIN gin_trgm_ops) + classement SQL"""
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    condition = Q()
+    for token in query.split():
+        condition &= Q(search_text__contains=token)
+
+    return queryset.filter(condition).annotate(
+        search_rank=Case(
+            When(member_id__iexact=query, then=Value(3.0)),
+            When(member_id__istartswith=query, then=Value(2.0)),
+            default=Value(0.0),
+            output_field=FloatField()
+        ) + Case(
+            When(Q(search_text__startswith=query) | Q(search_text__contains=f' {query}'), then=Value(1.0)),
+            default=Value(0.0),
+            output_field=FloatField()
+        ) + Cast(TrigramSimilarity('search_text', query), FloatField())
+    ).order_by('-search_rank', '-pk')
+
+
+class MemberSearchFilter(filters.SearchFilter):
+    """SearchFilter DRF (?search=) branché sur search_members : même paramètre, résultats classés"""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return search_members(queryset, ' '.join(terms))
@@ -186,4 +186,20 @@ class MemberCreateUpdateSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         
         instance.save()
-        return instance
\ No newline at end of file
+        return instance
+
+class CardExportQuerySerializer(serializers.Serializer):
+    """
+    Paramètres de /cards-export/ (en plus des filtres de la liste : status,
+    gender, search) : format de sortie, membres créés depuis une date,
+    liste explicite d'id (ids=12,15,18).
+    """
+    output = serializers.ChoiceField(choices=['zip', 'pdf'], required=False, default='zip')
+    created_after = serializers.DateField(required=False)
+    ids = serializers.CharField(required=False)
+
+    def validate_ids(self, value):
+        try:
+            return [int(pk) for pk in value.split(',') if pk.strip()]
+        except ValueError:
+            raise serializers.ValidationError("Liste d'id invalide (ex. ids=12,15,18).")
@@ -0,0 +1,16 @@
+# backend/members/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Member
+from .search import member_search_index
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def invalidate_member_search_index(sender, update_fields=None, **kwargs):
+    """Un membre créé, modifié ou supprimé → recharger l'index de recherche en mémoire"""
+    if update_fields is not None and 'search_text' not in update_fields:
+        return  # ex: activate() / deactivate() ne touchent que le statut
+    member_search_index.invalidate()
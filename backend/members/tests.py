@@ -1,3 +1,733 @@
-from django.test import TestCase
+# backend/members/tests.py
+# Tests du dashboard, des statistiques membres et du cache des cartes membres
 
-# Create your tests here.
+import io
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.models import GymCenter
+from authentication.tenant_registry import tenant_registry
+from .card_generator import card_fingerprint, card_inputs, card_path, cards_dir, render_card, write_card
+from .models import Member, TenantDailyMetrics
+from .metrics_rollup import refresh_tenant_metrics
+
+User = get_user_model()
+
+
+class PowerFitMembersMixin:
+    """Centre PowerFit avec 20 membres créés à des dates et statuts variés"""
+
+    def setUp(self):
+        self.owner = User.objects.create_superuser(
+            username='owner',
+            email='owner@gymflow.com',
+            password='owner123'
+        )
+        GymCenter.objects.create(
+            name='PowerFit',
+            subdomain='powerfit',
+            email='contact@powerfit.com',
+            phone='123456',
+            address='123 Street',
+            owner=self.owner,
+            tenant_id='powerfit'
+        )
+        tenant_registry.invalidate()
+
+        self.admin = User.objects.create_user(
+            username='admin_powerfit',
+            email='admin@powerfit.com',
+            password='admin123',
+            role='ADMIN',
+            tenant_id='powerfit'
+        )
+
+        # Membres créés à des dates variées, statuts mélangés
+        now = timezone.now()
+        statuses = ['ACTIVE', 'ACTIVE', 'INACTIVE', 'SUSPENDED', 'EXPIRED']
+        for i in range(20):
+            member = Member.objects.create(
+                first_name='Membre',
+                last_name=str(i),
+                email=f'member{i}@powerfit.com',
+                phone='12345678',
+                date_of_birth=date(1990, 1, 1),
+                gender='F',
+                emergency_contact_name='Contact',
+                emergency_contact_phone='12345678',
+                status=statuses[i % len(statuses)],
+                tenant_id='powerfit'
+            )
+            Member.objects.filter(pk=member.pk).update(created_at=now - timedelta(days=i * 3))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _get_stats(self, days):
+        tenant_registry.get_default()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                f'/api/members/dashboard-stats/?days={days}',
+                HTTP_X_TENANT_SUBDOMAIN='powerfit'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('error', response.data)
+        return len(context.captured_queries), response.data
+
+    def assert_dashboard_matches_raw_tables(self):
+        _, data = self._get_stats(30)
+        evolution = data['membersEvolution']
+        today = timezone.now().date()
+
+        self.assertEqual(len(evolution), 31)
+        for point in evolution:
+            expected = Member.objects.filter(
+                tenant_id='powerfit',
+                created_at__date__lte=date.fromisoformat(point['date']),
+                status='ACTIVE'
+            ).count()
+            self.assertEqual(point['count'], expected, point['date'])
+        self.assertEqual(evolution[-1]['date'], today.isoformat())
+
+        self.assertEqual(data['overview']['totalMembers'], 20)
+        self.assertEqual(data['overview']['activeMembers'], 8)
+        self.assertEqual(data['overview']['newMembersThisWeek'], 3)
+        self.assertEqual(data['memberStats'], {'active': 8, 'inactive': 4, 'suspended': 4, 'expired': 4})
+
+
+class DashboardStatsTestCase(PowerFitMembersMixin, TestCase):
+    """
+    Tests du dashboard admin : résultats identiques à l'ancien calcul jour
+    par jour et nombre de requêtes indépendant de la période.
+    """
+
+    def test_members_evolution_matches_daily_counts(self):
+        """
+        Test: membersEvolution identique au COUNT jour par jour.
+        """
+        print("\n🧪 Test: Évolution des membres")
+
+        self.assert_dashboard_matches_raw_tables()
+
+        print("✅ Évolution et compteurs cohérents")
+
+    def test_query_count_independent_of_range(self):
+        """
+        Test: Le nombre de requêtes ne dépend pas de la période demandée.
+        """
+        print("\n🧪 Test: Requêtes bornées du dashboard")
+
+        short, _ = self._get_stats(7)
+        long, data = self._get_stats(365)
+
+        self.assertEqual(short, long)
+        self.assertEqual(len(data['membersEvolution']), 366)
+        self.assertLessEqual(long, 12)
+
+        print(f"✅ {long} requêtes pour 7 ou 365 jours")
+
+
+class TenantMetricsRollupTestCase(PowerFitMembersMixin, TestCase):
+    """
+    Tests du rollup TenantDailyMetrics : recalcul incrémental et lecture
+    par les endpoints de statistiques.
+    """
+
+    def _members_statistics(self, live=True):
+        tenant_registry.get_default()
+        response = self.client.get(
+            f'/api/members/statistics/?live={"true" if live else "false"}',
+            HTTP_X_TENANT_SUBDOMAIN='powerfit'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_command_builds_rollup_matching_raw_tables(self):
+        """
+        Test: Le rollup complet donne les mêmes chiffres que les tables brutes.
+        """
+        print("\n🧪 Test: Construction du rollup")
+
+        out = StringIO()
+        call_command('refresh_tenant_metrics', stdout=out)
+        self.assertIn('powerfit', out.getvalue())
+        self.assertEqual(TenantDailyMetrics.objects.filter(tenant_id='powerfit').count(), 20)
+
+        data = self._members_statistics(live=False)
+        self.assertEqual(data['total'], Member.objects.filter(tenant_id='powerfit').count())
+        self.assertEqual(data['active'], Member.objects.filter(tenant_id='powerfit', status='ACTIVE').count())
+        self.assertEqual(data['inactive'], Member.objects.filter(tenant_id='powerfit', status='INACTIVE').count())
+
+        # Le dashboard lit le rollup et reste identique au calcul direct
+        self.assert_dashboard_matches_raw_tables()
+
+        print("✅ Rollup cohérent avec les tables brutes")
+
+    def test_incremental_refresh_only_touched_days(self):
+        """
+        Test: Seuls les jours modifiés depuis le dernier passage sont recalculés.
+        """
+        print("\n🧪 Test: Recalcul incrémental")
+
+        refresh_tenant_metrics('powerfit')
+        self.assertEqual(refresh_tenant_metrics('powerfit'), 0)
+
+        member = Member.objects.filter(tenant_id='powerfit', status='INACTIVE').order_by('created_at').first()
+        member.status = 'ACTIVE'
+        member.save()
+
+        self.assertEqual(refresh_tenant_metrics('powerfit'), 1)
+        data = self._members_statistics(live=False)
+        self.assertEqual(data['active'], 9)
+        self.assertEqual(data['inactive'], 3)
+
+        print("✅ Un seul jour recalculé")
+
+    def test_live_today_delta(self):
+        """
+        Test: Le jour courant est recalculé en direct sauf avec ?live=false.
+        """
+        print("\n🧪 Test: Delta du jour en direct")
+
+        refresh_tenant_metrics('powerfit')
+        Member.objects.create(
+            first_name='Nouveau',
+            last_name='Membre',
+            email='nouveau@powerfit.com',
+            phone='12345678',
+            date_of_birth=date(1995, 5, 5),
+            gender='M',
+            emergency_contact_name='Contact',
+            emergency_contact_phone='12345678',
+            status='ACTIVE',
+            tenant_id='powerfit'
+        )
+
+        self.assertEqual(self._members_statistics(live=True)['total'], 21)
+        self.assertEqual(self._members_statistics(live=False)['total'], 20)
+
+        print("✅ Membre du jour visible en direct uniquement")
+
+
+class MemberSearchTestCase(PowerFitMembersMixin, TestCase):
+    """
+    Tests de la recherche de membres : texte normalisé (accents ignorés),
+    classement avec priorité au member_id, mêmes résultats sur tous les endpoints.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.eloise = Member.objects.create(
+            first_name='Éloïse',
+            last_name='Dupré',
+            email='eloise@powerfit.com',
+            phone='22334455',
+            date_of_birth=date(1992, 3, 3),
+            gender='F',
+            emergency_contact_name='Contact',
+            emergency_contact_phone='12345678',
+            status='ACTIVE',
+            tenant_id='powerfit'
+        )
+
+    def _search(self, url):
+        tenant_registry.get_default()
+        response = self.client.get(url, HTTP_X_TENANT_SUBDOMAIN='powerfit')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_search_text_is_normalized(self):
+        """
+        Test: search_text en minuscules, sans accents, mis à jour à la sauvegarde.
+        """
+        print("\n🧪 Test: Normalisation du texte de recherche")
+
+        self.assertTrue(self.eloise.search_text.startswith('eloise dupre '))
+        self.assertIn(self.eloise.member_id.lower(), self.eloise.search_text)
+
+        self.eloise.last_name = 'Léger'
+        self.eloise.save(update_fields=['last_name'])
+        self.eloise.refresh_from_db()
+        self.assertTrue(self.eloise.search_text.startswith('eloise leger '))
+
+        print("✅ Texte normalisé et maintenu")
+
+    def test_accent_insensitive_search(self):
+        """
+        Test: 'eloise DUPRE' trouve 'Éloïse Dupré' sur les trois recherches.
+        """
+        print("\n🧪 Test: Recherche insensible aux accents")
+
+        data = self._search('/api/members/?search=eloise DUPRE')['results']
+        self.assertEqual([m['id'] for m in data], [self.eloise.id])
+
+        receptionist = User.objects.create_user(
+            username='reception_powerfit',
+            email='reception@powerfit.com',
+            password='reception123',
+            role='RECEPTIONIST',
+            tenant_id='powerfit'
+        )
+        self.client.force_authenticate(user=receptionist)
+
+        data = self._search('/api/receptionist/members/members/search/?q=Éloïse')
+        self.assertEqual([m['id'] for m in data], [self.eloise.id])
+
+        data = self._search('/api/bookings/receptionist/search-member/?q=dupre')
+        self.assertEqual([m['id'] for m in data['results']], [self.eloise.id])
+
+        print("✅ Accents et casse ignorés")
+
+    def test_member_id_prefix_ranked_first(self):
+        """
+        Test: Un member_id commençant par la recherche passe devant les autres correspondances.
+        """
+        print("\n🧪 Test: Priorité au member_id")
+
+        # L'email d'Éloïse contient aussi le member_id recherché
+        target = Member.objects.get(tenant_id='powerfit', last_name='7')
+        self.eloise.email = f'{target.member_id.lower()}.fan@powerfit.com'
+        self.eloise.save()
+
+        data = self._search(f'/api/members/?search={target.member_id}')['results']
+        self.assertEqual([m['id'] for m in data], [target.id, self.eloise.id])
+
+        data = self._search('/api/members/?search=membre&count=true')
+        self.assertEqual(data['count'], 20)
+
+        print("✅ member_id en tête du classement")
+
+    def test_other_tenant_does_not_crowd_out_results(self):
+        """
+        Test: Index en mémoire : les membres d'un autre centre ne prennent pas les places du classement.
+        """
+        print("\n🧪 Test: Recherche limitée au centre avant troncature")
+
+        # Autre centre : 20 membres 'Embre' (préfixe de mot : mieux classés que 'Membre' pour la recherche 'embre')
+        for i in range(20):
+            Member.objects.create(
+                first_name='Embre',
+                last_name=str(i),
+                email=f'member{i}@ironclub.com',
+                phone='12345678',
+                date_of_birth=date(1990, 1, 1),
+                gender='M',
+                emergency_contact_name='Contact',
+                emergency_contact_phone='12345678',
+                tenant_id='ironclub'
+            )
+
+        with mock.patch('members.search.FALLBACK_MAX_RESULTS', 20):
+            data = self._search('/api/members/?search=embre&count=true')
+
+        self.assertEqual(data['count'], 20)
+        self.assertEqual({m['email'].split('@')[1] for m in data['results']}, {'powerfit.com'})
+        print("✅ 20 membres PowerFit trouvés malgré 20 correspondances IronClub mieux classées")
+
+
+class KeysetPaginationTestCase(PowerFitMembersMixin, TestCase):
+    """
+    Tests de la pagination par curseur : parcours complet sans doublon ni trou,
+    taille de page bornée, total optionnel et curseurs invalides refusés.
+    """
+
+    def _get(self, url):
+        tenant_registry.get_default()
+        return self.client.get(url, HTTP_X_TENANT_SUBDOMAIN='powerfit')
+
+    def _walk(self, url):
+        """Suivre les liens `next` et retourner les id dans l'ordre"""
+        ids, pages = [], 0
+        while url:
+            response = self._get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [m['id'] for m in response.data['results']]
+            url = response.data['next']
+            pages += 1
+        return ids, pages
+
+    def test_walk_all_pages(self):
+        """
+        Test: Parcours par pages de 7 = liste complète dans l'ordre -created_at, id.
+        """
+        print("\n🧪 Test: Parcours par curseur")
+
+        # Deux membres à la même date de création : départagés par l'id
+        same_time = Member.objects.get(last_name='3').created_at
+        Member.objects.filter(last_name='4').update(created_at=same_time)
+
+        ids, pages = self._walk('/api/members/?page_size=7')
+        expected = list(Member.objects.order_by('-created_at', '-pk').values_list('pk', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+        # Tri demandé par le client (?ordering=) : même parcours complet
+        ids, _ = self._walk('/api/members/?ordering=last_name&page_size=6')
+        expected = list(Member.objects.order_by('last_name', 'pk').values_list('pk', flat=True))
+        self.assertEqual(ids, expected)
+
+        print("✅ Aucun doublon, aucun trou")
+
+    def test_page_size_cap_count_and_invalid_cursor(self):
+        """
+        Test: page_size plafonné, ?count=true, curseur altéré → 404.
+        """
+        print("\n🧪 Test: Bornes de la pagination")
+
+        response = self._get('/api/members/?page_size=100000&count=true')
+        self.assertEqual(response.data['count'], 20)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertIsNone(response.data['next'])
+        self.assertNotIn('count', self._get('/api/members/').data)
+
+        response = self._get('/api/members/?cursor=pas-un-curseur')
+        self.assertEqual(response.status_code, 404)
+
+        # Curseur émis pour un autre tri
+        next_url = self._get('/api/members/?page_size=5').data['next']
+        response = self._get(next_url + '&ordering=last_name')
+        self.assertEqual(response.status_code, 404)
+
+        print("✅ Pagination bornée et curseurs vérifiés")
+
+
+class CardMediaMixin(PowerFitMembersMixin):
+    """Cartes écrites dans un MEDIA_ROOT temporaire, supprimé après chaque test"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _cards(self):
+        return sorted(os.listdir(cards_dir('powerfit')))
+
+
+class MembershipCardCacheTestCase(CardMediaMixin, TestCase):
+    """
+    Tests du cache des cartes membres : rendu unique par jeu d'entrées,
+    ETag / If-None-Match, invalidation par empreinte, pré-rendu d'un centre.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.member = Member.objects.filter(tenant_id='powerfit').order_by('pk').first()
+        self.url = f'/api/members/generate-card/{self.member.member_id}/'
+
+    def test_card_rendered_once_then_revalidated(self):
+        """
+        Test: 1er appel → rendu ; appels suivants → fichier en cache, 304 si ETag connu.
+        """
+        print("\n🧪 Test: Carte servie depuis le cache")
+
+        with mock.patch('members.card_generator.render_card', wraps=render_card) as render:
+            first = self.client.get(self.url)
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(b''.join(first.streaming_content)[:8], b'\x89PNG\r\n\x1a\n')
+            etag = first['ETag']
+
+            second = self.client.get(self.url)
+            self.assertEqual(second.status_code, 200)
+            self.assertEqual(second['ETag'], etag)
+            second.close()
+
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(not_modified.status_code, 304)
+
+        self.assertEqual(render.call_count, 1)
+        print("✅ Une seule génération, puis cache et 304")
+
+    def test_changed_inputs_invalidate_card(self):
+        """
+        Test: Nom modifié → nouvelle empreinte, nouveau fichier, ancien supprimé.
+        """
+        print("\n🧪 Test: Invalidation par empreinte")
+
+        etag = self.client.get(self.url)['ETag']
+        old_cards = self._cards()
+
+        Member.objects.filter(pk=self.member.pk).update(last_name='Renommé')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        response.close()
+        self.assertEqual(len(self._cards()), 1)
+        self.assertNotEqual(self._cards(), old_cards)
+
+        print("✅ Carte régénérée après modification")
+
+    def test_concurrent_renders_of_same_card(self):
+        """
+        Test: Même carte rendue par plusieurs threads du même processus → fichier complet, aucun temporaire restant.
+        """
+        print("\n🧪 Test: Rendus concurrents d'une même carte")
+
+        inputs = card_inputs(self.member, None)
+        path = card_path('powerfit', self.member.member_id, card_fingerprint(inputs))
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            list(pool.map(lambda _: write_card(inputs, path), range(12)))
+
+        self.assertEqual(self._cards(), [os.path.basename(path)])
+        with Image.open(path) as card:
+            card.verify()
+        print("✅ 12 rendus simultanés, une seule carte PNG valide")
+
+    def test_prerender_command(self):
+        """
+        Test: prerender_member_cards rend toutes les cartes du centre, puis rien au 2e passage.
+        """
+        print("\n🧪 Test: Pré-rendu des cartes d'un centre")
+
+        out = StringIO()
+        call_command('prerender_member_cards', tenant='powerfit', stdout=out)
+        self.assertIn('20 carte(s) rendue(s), 0 déjà à jour', out.getvalue())
+        self.assertEqual(len(self._cards()), 20)
+
+        out = StringIO()
+        call_command('prerender_member_cards', tenant='powerfit', stdout=out)
+        self.assertIn('0 carte(s) rendue(s), 20 déjà à jour', out.getvalue())
+
+        print("✅ Cartes pré-rendues")
+
+
+class MemberCardExportTestCase(CardMediaMixin, TestCase):
+    """
+    Tests de l'export groupé des cartes : ZIP streamé filtré comme la liste
+    des membres, planche PDF A4, commande avec pool de processus.
+    """
+
+    def _export(self, query):
+        tenant_registry.get_default()
+        return self.client.get(f'/api/members/cards-export/?{query}', HTTP_X_TENANT_SUBDOMAIN='powerfit')
+
+    def test_zip_export_filtered(self):
+        """
+        Test: ?status=ACTIVE → une carte PNG par membre actif dans un ZIP streamé.
+        """
+        print("\n🧪 Test: Export ZIP des cartes")
+
+        response = self._export('status=ACTIVE')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        active_ids = Member.objects.filter(tenant_id='powerfit', status='ACTIVE').values_list('member_id', flat=True)
+        self.assertEqual(sorted(archive.namelist()), sorted(f'member_card_{mid}.png' for mid in active_ids))
+        self.assertTrue(all(archive.read(name).startswith(b'\x89PNG') for name in archive.namelist()))
+
+        # Cartes gardées en cache pour les téléchargements individuels
+        self.assertEqual(len(self._cards()), len(active_ids))
+
+        print("✅ Archive complète, cartes en cache")
+
+    def test_pdf_export_and_errors(self):
+        """
+        Test: 12 cartes en PDF → 2 pages A4 ; aucun membre ou id invalides → 400 ; membre → 403.
+        """
+        print("\n🧪 Test: Export PDF des cartes")
+
+        ids = ','.join(str(pk) for pk in Member.objects.order_by('pk').values_list('pk', flat=True)[:12])
+        response = self._export(f'output=pdf&ids={ids}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        pdf = b''.join(response.streaming_content)
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertEqual(len(re.findall(rb'/Type /Page\b(?!s)', pdf)), 2)
+
+        self.assertEqual(self._export('ids=abc').status_code, 400)
+        self.assertEqual(self._export('status=ACTIVE&gender=M').status_code, 400)
+
+        member_user = User.objects.create_user(
+            username='member_user', email='member_user@powerfit.com', password='member123',
+            role='MEMBER', tenant_id='powerfit'
+        )
+        self.client.force_authenticate(user=member_user)
+        self.assertEqual(self._export('status=ACTIVE').status_code, 403)
+
+        print("✅ Planche PDF, erreurs gérées")
+
+    def test_command_with_process_pool(self):
+        """
+        Test: export_member_cards --workers 2 → rendu en parallèle, ZIP complet.
+        """
+        print("\n🧪 Test: Commande d'export (pool de processus)")
+
+        output = os.path.join(self.media_root, 'cartes.zip')
+        out = StringIO()
+        call_command('export_member_cards', tenant='powerfit', output=output, workers=2, stdout=out)
+
+        self.assertIn('20 carte(s) exportée(s)', out.getvalue())
+        with zipfile.ZipFile(output) as archive:
+            self.assertEqual(len(archive.namelist()), 20)
+            self.assertIsNone(archive.testzip())
+        self.assertEqual(len(self._cards()), 20)
+
+        print("✅ 20 cartes rendues par le pool")
+
+
+class MemberPortalAsyncTestCase(TestCase):
+    """
+    Tests des lectures async du portail membre (members/portal_async_views.py) :
+    réponses identiques aux vues WSGI, sous WSGI comme sous ASGI.
+    """
+
+    ENDPOINTS = [
+        '/api/members-portal/dashboard/',
+        '/api/members-portal/courses/available/',
+        '/api/members-portal/bookings/?page_size=1&count=true',
+        '/api/members-portal/programs/',
+        '/api/members-portal/progress/',
+    ]
+
+    def setUp(self):
+        from authentication.views import TenantTokenObtainPairSerializer
+        from bookings.models import Booking, Course, CourseType, Room
+        from coaching.models import Exercise, ExerciseCategory, TrainingProgram, WorkoutExercise, WorkoutSession
+        from subscriptions.models import Subscription, SubscriptionPlan
+        from .models import MemberMeasurement
+
+        owner = User.objects.create_superuser(username='owner', email='owner@gymflow.com', password='owner123')
+        GymCenter.objects.create(
+            name='PowerFit', subdomain='powerfit', email='contact@powerfit.com',
+            phone='123456', address='123 Street', owner=owner, tenant_id='powerfit'
+        )
+        tenant_registry.invalidate()
+
+        coach = User.objects.create_user(
+            username='coach', email='coach@powerfit.com', password='coach123',
+            role='COACH', tenant_id='powerfit', first_name='Sami', last_name='Coach'
+        )
+        self.user = User.objects.create_user(
+            username='membre', email='membre@powerfit.com', password='membre123',
+            role='MEMBER', tenant_id='powerfit'
+        )
+        member = Member.objects.create(
+            user=self.user, first_name='Lina', last_name='Ben Ali', email='membre@powerfit.com',
+            phone='12345678', date_of_birth=date(1995, 5, 5), gender='F',
+            emergency_contact_name='Contact', emergency_contact_phone='12345678', tenant_id='powerfit'
+        )
+
+        today = timezone.now().date()
+        plan = SubscriptionPlan.objects.create(name='Mensuel', duration_days=30, price=90, tenant_id='powerfit')
+        for status in ['ACTIVE', 'PENDING', 'PENDING']:
+            Subscription.objects.create(
+                member=member, plan=plan, start_date=today, end_date=today + timedelta(days=30),
+                status=status, amount_paid=90, tenant_id='powerfit'
+            )
+
+        room = Room.objects.create(name='Salle A', capacity=30, tenant_id='powerfit')
+        course_type = CourseType.objects.create(name='Yoga', tenant_id='powerfit')
+        for i in range(3):
+            course = Course.objects.create(
+                course_type=course_type, coach=coach, room=room, title=f'Cours {i}',
+                date=today + timedelta(days=i + 1), start_time=timezone.datetime(2025, 1, 1, 9).time(),
+                end_time=timezone.datetime(2025, 1, 1, 10).time(), max_participants=10, tenant_id='powerfit'
+            )
+            if i < 2:
+                Booking.objects.create(course=course, member=member, tenant_id='powerfit')
+
+        category = ExerciseCategory.objects.create(name='Force')
+        exercise = Exercise.objects.create(name='Squat', description='Squat', category=category)
+        program = TrainingProgram.objects.create(
+            title='Prise de masse', description='12 semaines', member=member, coach=coach,
+            start_date=today, end_date=today + timedelta(weeks=12), duration_weeks=12,
+            goal='Force', tenant_id='powerfit'
+        )
+        session = WorkoutSession.objects.create(program=program, title='Jambes', day_of_week=1)
+        WorkoutExercise.objects.create(workout_session=session, exercise=exercise, reps='10')
+
+        for weeks, weight in [(0, 70), (4, 73), (8, 75)]:
+            measurement = MemberMeasurement.objects.create(member=member, weight=weight, body_fat_percentage=20)
+            MemberMeasurement.objects.filter(pk=measurement.pk).update(date=today - timedelta(weeks=weeks))
+
+        token = TenantTokenObtainPairSerializer.get_token(self.user).access_token
+        self.headers = {'Authorization': f'Bearer {token}', 'X-Tenant-Subdomain': 'powerfit'}
+
+    def _get_all(self, read_views):
+        from .portal_urls import portal_urlconf
+
+        tenant_registry.get_default()
+        with override_settings(ROOT_URLCONF=portal_urlconf(read_views)):
+            return {url: self.client.get(url, headers=self.headers) for url in self.ENDPOINTS}
+
+    def test_async_views_match_sync_views(self):
+        """
+        Test: Les 5 lectures async renvoient exactement le JSON des vues WSGI.
+        """
+        print("\n🧪 Test: Portail async = portail WSGI")
+        from . import portal_async_views, portal_views
+
+        sync_responses = self._get_all(portal_views)
+        async_responses = self._get_all(portal_async_views)
+
+        for url in self.ENDPOINTS:
+            self.assertEqual(sync_responses[url].status_code, 200, url)
+            self.assertEqual(async_responses[url].status_code, 200, url)
+            self.assertEqual(async_responses[url].json(), sync_responses[url].json(), url)
+
+        dashboard = async_responses['/api/members-portal/dashboard/'].json()
+        self.assertEqual(len(dashboard['pending_subscriptions']), 2)
+        self.assertEqual(dashboard['statistics']['total_subscriptions'], 3)
+        bookings = async_responses['/api/members-portal/bookings/?page_size=1&count=true'].json()
+        self.assertEqual(bookings['count'], 2)
+        self.assertIsNotNone(bookings['next'])
+        progress = async_responses['/api/members-portal/progress/'].json()
+        self.assertEqual(progress['summary']['weight_change'], -5.0)
+
+        print("✅ dashboard, cours, réservations, programmes et progression identiques")
+
+    async def test_asgi_auth_and_errors(self):
+        """
+        Test: Sous ASGI : 200 avec un token, 401 sans, 405 en POST, 404 sans profil membre.
+        """
+        print("\n🧪 Test: Portail async sous ASGI")
+        from asgiref.sync import sync_to_async
+        from django.test import AsyncClient
+        from . import portal_async_views
+        from .portal_urls import portal_urlconf
+
+        await sync_to_async(tenant_registry.get_default)()
+        client = AsyncClient()
+        url = '/api/members-portal/dashboard/'
+        with override_settings(ROOT_URLCONF=portal_urlconf(portal_async_views)):
+            response = await client.get(url, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['member']['full_name'], 'Lina Ben Ali')
+            # QueryBudgetMiddleware en mode async : requêtes comptées dans le thread de l'ORM
+            self.assertIn('4 requetes', response['Server-Timing'])
+
+            response = await client.get(url, headers={'X-Tenant-Subdomain': 'powerfit'})
+            self.assertEqual(response.status_code, 401)
+            self.assertIn('Bearer', response['WWW-Authenticate'])
+
+            response = await client.post(url, headers=self.headers)
+            self.assertEqual(response.status_code, 405)
+
+            await Member.objects.filter(user=self.user).aupdate(user=None)
+            response = await client.get('/api/members-portal/programs/', headers=self.headers)
+            self.assertEqual(response.status_code, 404)
+
+        print("✅ 200 / 401 / 405 / 404 comme les vues DRF")
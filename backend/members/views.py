@@ -3,28 +3,46 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
 from .models import Member, MemberMeasurement
 from .serializers import (
     MemberListSerializer, 
     MemberDetailSerializer, 
     MemberCreateUpdateSerializer,
-    MemberMeasurementSerializer
+    MemberMeasurementSerializer,
+    CardExportQuerySerializer
 )
 from authentication.mixins import TenantQuerysetMixin
+from authentication.pagination import KeysetPagination
+from authentication.permissions import IsAdminOrReceptionist
+from authentication.db_router import read_replica
+from .search import MemberSearchFilter
+from .metrics_rollup import load_daily_metrics, metrics_tenant_id, live_today_requested, MEMBER_COLUMNS
+from .card_export import MAX_EXPORT_CARDS, export_queryset, export_jobs, iter_cards, stream_zip, write_pdf
 import logging
+import tempfile
 
 logger = logging.getLogger('members.views')
 
 
+class MemberPagination(KeysetPagination):
+    """Membres du plus récent au plus ancien (ou par pertinence avec ?search=)"""
+    ordering = ('-created_at',)
+
+
 class MemberViewSet(TenantQuerysetMixin, viewsets.ModelViewSet):
     queryset = Member.objects.all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = MemberPagination
+    filter_backends = [DjangoFilterBackend, MemberSearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'gender']
     search_fields = ['first_name', 'last_name', 'email', 'phone', 'member_id']
     ordering_fields = ['created_at', 'first_name', 'last_name']
     tenant_field = 'tenant_id'
+    # 📊 Requêtes SQL max par action (authentication/query_budget.py)
+    query_budget = {'list': 4, 'cards_export': 4}
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -105,15 +123,49 @@ class MemberViewSet(TenantQuerysetMixin, viewsets.ModelViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @read_replica
     def statistics(self, request):
-        """Statistiques globales des membres"""
-        queryset = self.get_queryset()
-        total = queryset.count()
-        active = queryset.filter(status='ACTIVE').count()
-        inactive = queryset.filter(status='INACTIVE').count()
+        """Statistiques globales des membres (rollup TenantDailyMetrics, ?live=false possible)"""
+        metrics = load_daily_metrics(metrics_tenant_id(request), live_today_requested(request))
+        total = metrics.total(*MEMBER_COLUMNS)
+        active = metrics.total('members_active')
+        inactive = metrics.total('members_inactive')
         return Response({
             'total': total,
             'active': active,
             'inactive': inactive,
             'active_percentage': (active / total * 100) if total > 0 else 0
-        })
\ No newline at end of file
+        })
+    
+    @action(detail=False, methods=['get'], url_path='cards-export', permission_classes=[IsAdminOrReceptionist])
+    def cards_export(self, request):
+        """
+        🪪 Cartes des membres filtrés, en un seul téléchargement (members/card_export.py)
+        URL: /api/members/cards-export/?status=ACTIVE&created_after=2025-01-01&output=zip|pdf
+        """
+        serializer = CardExportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        queryset = export_queryset(
+            self.filter_queryset(self.get_queryset()),
+            created_after=params.get('created_after'),
+            member_ids=params.get('ids')
+        )
+        jobs = export_jobs(queryset, limit=MAX_EXPORT_CARDS + 1)
+        if not jobs:
+            raise ValidationError("Aucun membre ne correspond aux filtres.")
+        if len(jobs) > MAX_EXPORT_CARDS:
+            raise ValidationError(f"Export limité à {MAX_EXPORT_CARDS} cartes : affinez les filtres.")
+
+        filename = f"cartes_membres_{timezone.now():%Y%m%d_%H%M}"
+        if params['output'] == 'pdf':
+            # Planche construite dans un fichier temporaire, supprimé à la fin de l'envoi
+            output = tempfile.TemporaryFile()
+            write_pdf(iter_cards(jobs), output)
+            output.seek(0)
+            return FileResponse(output, as_attachment=True, filename=f"{filename}.pdf", content_type='application/pdf')
+
+        response = StreamingHttpResponse(stream_zip(iter_cards(jobs)), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.zip"'
+        return response
@@ -1,72 +1,73 @@
-import os
-from django.http import FileResponse, HttpResponse
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from authentication.jwt_claims import ClaimsJWTAuthentication
 from rest_framework.response import Response
 from rest_framework import status
-from .card_generator import generate_membership_card
+from authentication.structured_logging import get_logger
+from .card_generator import active_subscriptions, get_membership_card
 from .models import Member
 
+logger = get_logger('members.views_card')
+
+
 @api_view(['GET'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def generate_member_card(request, member_id):
     """
-    Génère et renvoie la carte de membre au format PNG.
+    Renvoie la carte de membre au format PNG.
+
+    La carte est servie depuis le cache (members/card_generator.py) et n'est
+    rendue que si ses entrées ont changé. ETag = empreinte des entrées :
+    If-None-Match identique → 304 sans lire le fichier.
     """
     try:
-        print(f"🔍 Tentative de génération de carte pour le membre: {member_id}")
-        print(f"🔍 Utilisateur authentifié: {request.user.username}")
-        print(f"🔍 User is staff: {request.user.is_staff}")
-        print(f"🔍 User has coach attr: {hasattr(request.user, 'coach')}")
-        
         # Vérifier si le membre existe
-        member = Member.objects.get(member_id=member_id)
-        print(f"✅ Membre trouvé: {member.first_name} {member.last_name}")
+        member = Member.objects.prefetch_related(active_subscriptions()).get(member_id=member_id)
 
         # ✅ PERMISSIONS SIMPLIFIÉES - Autoriser tous les utilisateurs authentifiés
         # (Vous pouvez ajuster cette logique plus tard)
         has_permission = True  # Temporairement autoriser tous les utilisateurs authentifiés
 
         if not has_permission:
-            print("❌ Permission refusée")
             return Response(
                 {"error": "Vous n'avez pas les droits pour accéder à cette carte"},
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        print("✅ Permission accordée, génération de la carte...")
-        
-        # Générer la carte
-        card_path = generate_membership_card(member_id)
-        
-        if not card_path or not os.path.exists(card_path):
-            print("❌ Erreur: chemin de carte invalide")
-            return Response(
-                {"error": "Erreur lors de la génération de la carte"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        card_path, fingerprint = get_membership_card(member)
+        etag = f'"{fingerprint}"'
 
-        print(f"✅ Carte générée avec succès: {card_path}")
-        
-        # Renvoyer le fichier
-        response = FileResponse(
-            open(card_path, 'rb'),
-            content_type='image/png'
-        )
-        response['Content-Disposition'] = f'attachment; filename="member_card_{member_id}.png"'
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+            response = HttpResponseNotModified()
+        else:
+            try:
+                card_file = open(card_path, 'rb')
+            except FileNotFoundError:
+                # Carte remplacée entre-temps par un autre processus : la rendre à nouveau
+                card_path, fingerprint = get_membership_card(member, force=True)
+                etag = f'"{fingerprint}"'
+                card_file = open(card_path, 'rb')
+
+            response = FileResponse(card_file, content_type='image/png')
+            response['Content-Disposition'] = f'attachment; filename="member_card_{member_id}.png"'
+
+        response['ETag'] = etag
+        # Donnée personnelle : pas de cache partagé, revalidation à chaque usage
+        response['Cache-Control'] = 'private, no-cache'
         return response
 
     except Member.DoesNotExist:
-        print(f"❌ Membre non trouvé: {member_id}")
         return Response(
             {"error": "Membre non trouvé"},
             status=status.HTTP_404_NOT_FOUND
         )
     except Exception as e:
-        print(f"❌ Erreur inattendue: {str(e)}")
+        logger.exception("❌ Erreur lors de la génération de la carte", member_id=member_id)
         return Response(
             {"error": f"Erreur serveur: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
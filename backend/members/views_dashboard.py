@@ -4,32 +4,43 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.utils import timezone
-from django.db.models import Sum, Count, Q, Avg
-from datetime import timedelta, datetime
+from django.db.models import Count, Q
+from datetime import timedelta
 import logging
 
 from .models import Member
+from . import dashboard_statistics as stats
+from .metrics_rollup import load_daily_metrics, live_today_requested
+from authentication.db_router import read_replica
 
 logger = logging.getLogger('members.views_dashboard')
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_replica
 def dashboard_stats(request):
     """
     📊 Statistiques complètes pour le dashboard
     Filtré automatiquement par tenant_id
+    Paramètres optionnels: ?days=N (période de membersEvolution, 30 par défaut),
+    ?live=false (rollup seul, sans recalcul du jour courant)
     """
     now = timezone.now()
     today = now.date()
     start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    start_of_week = today - timedelta(days=today.weekday())
+    
+    try:
+        evolution_days = min(max(int(request.GET.get('days', 30)), 1), 365)
+    except (TypeError, ValueError):
+        evolution_days = 30
     
     try:
         user = request.user
         tenant_id = getattr(request, 'tenant_id', None)
         gym_center = getattr(request, 'gym_center', None)
         
-        logger.debug(f"🔍 Dashboard pour user: {user.email}, tenant_id: {tenant_id}")
+        # user.pk plutôt que user.email : pas de chargement du User construit depuis le JWT
+        logger.debug("🔍 Dashboard pour user: %s, tenant_id: %s", user.pk, tenant_id)
         
         # 📦 Import local pour éviter la circularité
         from subscriptions.models import Subscription, SubscriptionPlan
@@ -39,7 +50,7 @@ def dashboard_stats(request):
         center_info = {
             'name': gym_center.name if gym_center else 'Gym Flow',
             'subdomain': gym_center.subdomain if gym_center else None,
-            'logo': gym_center.logo.url if gym_center and gym_center.logo else None,
+            'logo': gym_center.logo_url if gym_center else None,
         }
         
         # 🔒 FILTRAGE PAR RÔLE
@@ -48,81 +59,29 @@ def dashboard_stats(request):
             members_qs = Member.objects.filter(tenant_id=tenant_id) if tenant_id else Member.objects.all()
             subscriptions_qs = Subscription.objects.filter(tenant_id=tenant_id) if tenant_id else Subscription.objects.all()
             courses_qs = Course.objects.filter(tenant_id=tenant_id) if tenant_id else Course.objects.all()
-            bookings_qs = Booking.objects.filter(tenant_id=tenant_id) if tenant_id else Booking.objects.all()
-            
-            # 📊 STATISTIQUES PRINCIPALES
-            total_members = members_qs.count()
-            active_members = members_qs.filter(status='ACTIVE').count()
-            inactive_members = members_qs.filter(status='INACTIVE').count()
             
-            # 📈 ABONNEMENTS
-            active_subscriptions = subscriptions_qs.filter(
-                status='ACTIVE',
-                end_date__gte=today
-            ).count()
-            
-            expiring_soon = subscriptions_qs.filter(
-                status='ACTIVE',
-                end_date__gte=today,
-                end_date__lte=today + timedelta(days=7)
-            ).count()
-            
-            # 💰 REVENUS
-            monthly_revenue = subscriptions_qs.filter(
-                start_date__gte=start_of_month,
-                status='ACTIVE'
-            ).aggregate(total=Sum('amount_paid'))['total'] or 0
-            
-            # Revenus du mois dernier pour comparaison
+            # 📊 STATISTIQUES PRINCIPALES (rollup journalier + jour courant en direct)
+            metrics = load_daily_metrics(tenant_id or None, live_today_requested(request))
             last_month_start = (start_of_month - timedelta(days=1)).replace(day=1)
-            last_month_revenue = subscriptions_qs.filter(
-                start_date__gte=last_month_start,
-                start_date__lt=start_of_month,
-                status='ACTIVE'
-            ).aggregate(total=Sum('amount_paid'))['total'] or 0
-            
-            revenue_change = ((monthly_revenue - last_month_revenue) / last_month_revenue * 100) if last_month_revenue > 0 else 0
+            evolution_start = today - timedelta(days=evolution_days)
             
-            # 📅 COURS
-            upcoming_courses = courses_qs.filter(
-                date__gte=today,
-                date__lte=today + timedelta(days=7),
-                status='SCHEDULED'
-            ).count()
+            member_counts = stats.member_stats(metrics, today - timedelta(days=7))
+            subscription_counts = stats.subscription_stats(
+                metrics, today, start_of_month.date(), last_month_start.date()
+            )
+            course_counts = stats.course_stats(metrics, today, start_of_month.date())
+            booking_counts = stats.booking_stats(metrics, start_of_month.date())
             
-            today_courses = courses_qs.filter(
-                date=today
-            ).count()
+            # 💰 REVENUS (comparaison avec le mois dernier)
+            monthly_revenue = subscription_counts['monthly_revenue']
+            last_month_revenue = subscription_counts['last_month_revenue']
+            revenue_change = stats.percentage(monthly_revenue - last_month_revenue, last_month_revenue)
             
             # 📊 RÉSERVATIONS
-            total_bookings = bookings_qs.filter(
-                course__date__gte=start_of_month
-            ).count()
-            
-            confirmed_bookings = bookings_qs.filter(
-                course__date__gte=start_of_month,
-                status='CONFIRMED'
-            ).count()
+            attendance_rate = stats.percentage(booking_counts['confirmed'], booking_counts['total'])
             
-            attendance_rate = (confirmed_bookings / total_bookings * 100) if total_bookings > 0 else 0
-            
-            # 👥 NOUVEAUX MEMBRES (7 derniers jours)
-            new_members_count = members_qs.filter(
-                created_at__gte=now - timedelta(days=7)
-            ).count()
-            
-            # 📈 ÉVOLUTION DES MEMBRES (30 derniers jours)
-            members_evolution = []
-            for i in range(30, -1, -1):
-                date = today - timedelta(days=i)
-                count = members_qs.filter(
-                    created_at__date__lte=date,
-                    status='ACTIVE'
-                ).count()
-                members_evolution.append({
-                    'date': date.isoformat(),
-                    'count': count
-                })
+            # 📈 ÉVOLUTION DES MEMBRES (cumul des créations journalières)
+            members_evolution = stats.members_evolution(metrics, evolution_start, today)
             
             # 💳 PLANS D'ABONNEMENT LES PLUS POPULAIRES
             popular_plans = subscriptions_qs.filter(
@@ -155,35 +114,25 @@ def dashboard_stats(request):
             
             # 📊 STATISTIQUES PAR STATUT DE MEMBRE
             member_status_stats = {
-                'active': active_members,
-                'inactive': inactive_members,
-                'suspended': members_qs.filter(status='SUSPENDED').count(),
-                'expired': members_qs.filter(status='EXPIRED').count(),
+                'active': member_counts['active'],
+                'inactive': member_counts['inactive'],
+                'suspended': member_counts['suspended'],
+                'expired': member_counts['expired'],
             }
             
             # 🎯 TAUX D'OCCUPATION DES COURS
-            total_course_capacity = courses_qs.filter(
-                date__gte=start_of_month,
-                status='SCHEDULED'
-            ).aggregate(total=Sum('max_participants'))['total'] or 0
-            
-            total_course_bookings = bookings_qs.filter(
-                course__date__gte=start_of_month,
-                status='CONFIRMED'
-            ).count()
-            
-            course_occupancy_rate = (total_course_bookings / total_course_capacity * 100) if total_course_capacity > 0 else 0
+            course_occupancy_rate = stats.percentage(booking_counts['confirmed'], course_counts['month_capacity'])
             
             return Response({
                 'center': center_info,
                 'overview': {
-                    'totalMembers': total_members,
-                    'activeMembers': active_members,
-                    'newMembersThisWeek': new_members_count,
-                    'activeSubscriptions': active_subscriptions,
-                    'expiringSubscriptions': expiring_soon,
-                    'upcomingCourses': upcoming_courses,
-                    'todayCourses': today_courses,
+                    'totalMembers': member_counts['total'],
+                    'activeMembers': member_counts['active'],
+                    'newMembersThisWeek': member_counts['new_members'],
+                    'activeSubscriptions': subscription_counts['active'],
+                    'expiringSubscriptions': subscription_counts['expiring_soon'],
+                    'upcomingCourses': course_counts['upcoming'],
+                    'todayCourses': course_counts['today'],
                     'monthlyRevenue': float(monthly_revenue),
                     'revenueChange': round(revenue_change, 1),
                     'attendanceRate': round(attendance_rate, 1),
@@ -203,13 +152,14 @@ def dashboard_stats(request):
                 tenant_id=tenant_id
             ) if tenant_id else Course.objects.filter(coach=user)
             
-            upcoming_courses = coach_courses.filter(
-                date__gte=today,
-                date__lte=today + timedelta(days=7),
-                status='SCHEDULED'
-            ).count()
-            
-            today_courses = coach_courses.filter(date=today).count()
+            course_counts = coach_courses.aggregate(
+                upcoming=Count('id', filter=Q(
+                    date__gte=today,
+                    date__lte=today + timedelta(days=7),
+                    status='SCHEDULED'
+                )),
+                today=Count('id', filter=Q(date=today)),
+            )
             
             upcoming_courses_details = list(
                 coach_courses.filter(
@@ -229,8 +179,8 @@ def dashboard_stats(request):
                     'newMembersThisWeek': 0,
                     'activeSubscriptions': 0,
                     'expiringSubscriptions': 0,
-                    'upcomingCourses': upcoming_courses,
-                    'todayCourses': today_courses,
+                    'upcomingCourses': course_counts['upcoming'],
+                    'todayCourses': course_counts['today'],
                     'monthlyRevenue': 0,
                     'revenueChange': 0,
                     'attendanceRate': 0,
@@ -0,0 +1,313 @@
+# backend/site_utils/gemini.py
+
+"""
+🤖 Génération Gemini du plan santé (generate_health_plan).
+
+- Catalogue des modèles : genai.list_models() au plus toutes les
+  GEMINI_MODELS_TTL secondes par processus, pas à chaque requête. Seuls les
+  modèles generateContent sont gardés, les flash-lite d'abord, puis flash,
+  pro et les autres. Liste impossible : DEFAULT_MODELS, avec une nouvelle
+  tentative après MODELS_RETRY secondes.
+- Disjoncteur par modèle : GEMINI_BREAKER_FAILURES échecs consécutifs (un
+  seul pour un modèle introuvable ou un quota épuisé) écartent le modèle
+  pendant GEMINI_BREAKER_COOLDOWN secondes, puis un essai unique le réintègre
+  ou le rouvre.
+- Latence : durées des derniers appels réussis par modèle ; leur p95 sert de
+  délai de couverture.
+- Requêtes couvertes (hedging) : si le modèle en cours ne répond pas dans son
+  délai (p95, au plus GEMINI_HEDGE_AFTER secondes), le modèle suivant est
+  lancé en parallèle, jusqu'à MAX_IN_FLIGHT appels. La première réponse
+  gagne ; un échec lance aussitôt le suivant.
+- Délai maximal GEMINI_PLAN_DEADLINE : au-delà, GeminiUnavailable (la vue
+  répond avec generate_fallback_plan). Les appels encore en vol se terminent
+  en arrière-plan, leur timeout HTTP étant le temps restant.
+
+GEMINI_API_ENDPOINT : autre point d'accès en transport REST (faux serveur
+Gemini local des tests, proxy).
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import google.generativeai as genai
+from django.conf import settings
+from google.api_core import exceptions as google_exceptions
+
+from authentication.structured_logging import get_logger
+
+logger = get_logger('site_utils.gemini')
+
+# Modèles essayés quand le catalogue ne peut pas être lu
+DEFAULT_MODELS = [
+    'gemini-2.5-flash',
+    'gemini-2.5-flash-latest',
+    'gemini-2.5-flash-preview-09-2025',
+    'gemini-2.0-flash',
+    'gemini-2.0-flash-001',
+    'gemini-2.0-flash-exp',
+    'gemini-2.0-flash-lite',
+    'gemini-2.0-flash-lite-001',
+    'gemini-2.5-flash-lite',
+    'gemini-flash-latest',
+    'gemini-2.5-pro',
+    'gemini-2.0-pro-exp',
+    'gemini-pro-latest',
+    'gemini-exp-1206',
+]
+# Catalogue illisible : DEFAULT_MODELS utilisé, nouvelle lecture après ce délai (s)
+MODELS_RETRY = 60
+# Timeout de genai.list_models() (s)
+LIST_TIMEOUT = 5
+# Appels simultanés au plus pour une même génération (premier essai + couvertures)
+MAX_IN_FLIGHT = 3
+# Durées gardées par modèle, et minimum avant d'utiliser leur p95
+LATENCY_SAMPLES = 50
+MIN_LATENCY_SAMPLES = 5
+# ModelHealth.allow() : appel d'essai d'un disjoncteur ouvert, après la pause
+TRIAL = 'trial'
+# Erreurs qui ouvrent le disjoncteur dès le premier échec
+TRIPPING_ERRORS = (google_exceptions.NotFound, google_exceptions.ResourceExhausted)
+
+# Appels bloquants (HTTP) hors du thread de la requête
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='gemini')
+
+_configure_lock = threading.Lock()
+_configured_with = None
+
+
+class GeminiUnavailable(Exception):
+    """Aucun modèle n'a répondu avant le délai maximal"""
+
+
+def configure_gemini():
+    """genai.configure() une fois par processus (et après un changement de clé ou de point d'accès)"""
+    global _configured_with
+    options = (settings.GEMINI_API_KEY, getattr(settings, 'GEMINI_API_ENDPOINT', None))
+    if _configured_with == options:
+        return
+    with _configure_lock:
+        if _configured_with == options:
+            return
+        api_key, endpoint = options
+        if endpoint:
+            genai.configure(api_key=api_key, transport='rest', client_options={'api_endpoint': endpoint})
+        else:
+            genai.configure(api_key=api_key)
+        _configured_with = options
+
+
+def prioritize(model_names):
+    """flash-lite (gratuits / économiques), puis flash, puis pro, puis les autres"""
+    ranked = []
+    for matches in (
+        lambda name: 'flash' in name and 'lite' in name,
+        lambda name: 'flash' in name,
+        lambda name: 'pro' in name,
+        lambda name: True,
+    ):
+        ranked += [name for name in model_names if matches(name.lower()) and name not in ranked]
+    return ranked
+
+
+class ModelCatalogue:
+    """Modèles generateContent du compte, relus au plus toutes les `ttl` secondes"""
+
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._models = None
+        self._expires_at = 0.0
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'GEMINI_MODELS_TTL', 3600)
+
+    def invalidate(self):
+        with self._lock:
+            self._expires_at = 0.0
+
+    def models(self):
+        if time.monotonic() < self._expires_at:
+            return self._models
+        with self._lock:
+            if time.monotonic() >= self._expires_at:
+                self._models, lifetime = self._load()
+                self._expires_at = time.monotonic() + lifetime
+            return self._models
+
+    def _load(self):
+        """→ (modèles par priorité, durée de validité)"""
+        configure_gemini()
+        try:
+            names = [
+                model.name.removeprefix('models/')
+                for model in genai.list_models(request_options={'timeout': LIST_TIMEOUT})
+                if 'generateContent' in model.supported_generation_methods
+            ]
+        except Exception as e:
+            logger.warning("⚠️ Catalogue Gemini illisible, modèles par défaut", error=str(e))
+            return DEFAULT_MODELS, MODELS_RETRY
+        if not names:
+            logger.warning("⚠️ Aucun modèle generateContent, modèles par défaut")
+            return DEFAULT_MODELS, MODELS_RETRY
+        logger.info("🤖 Catalogue Gemini chargé", models=len(names))
+        return prioritize(names), self.ttl
+
+
+class ModelHealth:
+    """Disjoncteur et latences d'un modèle (partagés par les threads du processus)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def allow(self):
+        """
+        → True (disjoncteur fermé), TRIAL (seul appel d'essai après la pause) ou False.
+        Un essai accordé se termine par record_success / record_failure, ou release_trial s'il n'a pas eu lieu.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            cooldown = getattr(settings, 'GEMINI_BREAKER_COOLDOWN', 60)
+            if self.trial_running or time.monotonic() - self.opened_at < cooldown:
+                return False
+            self.trial_running = True
+            return TRIAL
+
+    def release_trial(self):
+        """Essai annulé avant l'appel (file de _executor) : un autre essai pourra être accordé"""
+        with self._lock:
+            self.trial_running = False
+
+    def record_success(self, seconds):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+            self.latencies.append(seconds)
+
+    def record_failure(self, trip=False):
+        with self._lock:
+            self.failures += 1
+            threshold = getattr(settings, 'GEMINI_BREAKER_FAILURES', 3)
+            # Essai raté après la pause : le disjoncteur se rouvre pour une nouvelle pause
+            if trip or self.trial_running or self.failures >= threshold:
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+    def hedge_delay(self):
+        """Attente avant de lancer le modèle suivant : p95 des appels réussis, au plus GEMINI_HEDGE_AFTER"""
+        ceiling = getattr(settings, 'GEMINI_HEDGE_AFTER', 4)
+        with self._lock:
+            samples = sorted(self.latencies)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return ceiling
+        return min(samples[int(0.95 * (len(samples) - 1))], ceiling)
+
+
+class ModelHealthRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._health = defaultdict(ModelHealth)
+
+    def __getitem__(self, model_name):
+        with self._lock:
+            return self._health[model_name]
+
+    def reset(self):
+        with self._lock:
+            self._health.clear()
+
+
+def _call_model(model_name, prompt, timeout):
+    """Un appel generateContent (thread de _executor) ; disjoncteur et latences mis à jour"""
+    health = model_health[model_name]
+    started = time.monotonic()
+    try:
+        response = genai.GenerativeModel(f'models/{model_name}').generate_content(
+            prompt, request_options={'timeout': max(timeout, 0.1)}
+        )
+        text = response.text
+    except Exception as e:
+        health.record_failure(trip=isinstance(e, TRIPPING_ERRORS))
+        raise
+    health.record_success(time.monotonic() - started)
+    return text
+
+
+def generate(prompt, deadline=None):
+    """
+    Générer avec le meilleur modèle disponible → (modèle, texte).
+    GeminiUnavailable si aucun modèle n'a répondu dans `deadline` secondes (GEMINI_PLAN_DEADLINE).
+    """
+    configure_gemini()
+    deadline_at = time.monotonic() + (deadline or getattr(settings, 'GEMINI_PLAN_DEADLINE', 20))
+    candidates = iter(model_catalogue.models())
+    in_flight = {}
+    last_launch = None
+    errors = []
+
+    def launch_next():
+        """Lancer le prochain modèle dont le disjoncteur laisse passer → False s'il n'y en a plus"""
+        nonlocal last_launch
+        for model_name in candidates:
+            health = model_health[model_name]
+            permit = health.allow()
+            if permit:
+                future = _executor.submit(_call_model, model_name, prompt, deadline_at - time.monotonic())
+                if permit == TRIAL:
+                    # Annulé dans la file (délai dépassé) : _call_model ne libérera pas l'essai
+                    future.add_done_callback(lambda f, health=health: f.cancelled() and health.release_trial())
+                in_flight[future] = model_name
+                last_launch = (model_name, time.monotonic())
+                return True
+        return False
+
+    exhausted = not launch_next()
+    try:
+        while in_flight:
+            now = time.monotonic()
+            if now >= deadline_at:
+                break
+            timeout = deadline_at - now
+            if not exhausted and len(in_flight) < MAX_IN_FLIGHT:
+                model_name, launched_at = last_launch
+                timeout = min(timeout, max(model_health[model_name].hedge_delay() - (now - launched_at), 0))
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                model_name = in_flight.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    errors.append(f'{model_name}: {e}')
+                    logger.warning("⚠️ Modèle Gemini en échec", model=model_name, error=str(e)[:200])
+                    continue
+                logger.info("✅ Plan généré", model=model_name, in_flight=len(in_flight), failed=len(errors))
+                return model_name, text
+
+            # Un modèle suivant par échec, tout de suite ; pas de réponse dans le délai : un de plus (couverture).
+            # Places libres recalculées après wait() : des échecs simultanés ne vident pas in_flight
+            launches = len(done) or 1
+            while launches and not exhausted and len(in_flight) < MAX_IN_FLIGHT and time.monotonic() < deadline_at:
+                exhausted = not launch_next()
+                launches -= 1
+    finally:
+        # Appels pas encore démarrés : inutiles ; ceux en cours finissent en arrière-plan
+        for future in in_flight:
+            future.cancel()
+
+    reason = 'délai dépassé' if time.monotonic() >= deadline_at else 'aucun modèle disponible'
+    raise GeminiUnavailable(f"Gemini indisponible ({reason}) : {'; '.join(errors[-3:]) or 'aucune réponse'}")
+
+
+model_catalogue = ModelCatalogue()
+model_health = ModelHealthRegistry()
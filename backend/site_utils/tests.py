@@ -1,3 +1,193 @@
-from django.test import TestCase
+# backend/site_utils/tests.py
+# Tests du plan santé Gemini contre un faux serveur Gemini local
 
-# Create your tests here.
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from . import gemini
+from .gemini import model_catalogue, model_health
+
+PLAN_DATA = {'bmi': 24.2, 'classification': 'Normal', 'height': 178, 'weight': 77, 'goals': 'endurance'}
+
+
+class FakeGemini(ThreadingHTTPServer):
+    """
+    API REST Gemini minimale : GET /v1beta/models et POST /v1beta/models/<modèle>:generateContent.
+    `behaviour` : modèle → (délai en secondes ou threading.Barrier, statut HTTP) ; `hits` : appels reçus par modèle.
+    """
+    daemon_threads = True
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+        self.hits = Counter()
+        self.lock = threading.Lock()
+        super().__init__(('127.0.0.1', 0), FakeGeminiHandler)
+
+    def hit(self, name):
+        with self.lock:
+            self.hits[name] += 1
+
+    def handle_error(self, request, client_address):
+        # Client parti avant la réponse (délai maximal dépassé) : BrokenPipeError attendu
+        pass
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.hit('list_models')
+        self.reply(200, {'models': [
+            {'name': f'models/{name}', 'supportedGenerationMethods': ['generateContent']}
+            for name in self.server.behaviour
+        ]})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        name = self.path.split('/models/')[1].split(':')[0]
+        self.server.hit(name)
+        delay, status = self.server.behaviour[name]
+        if isinstance(delay, threading.Barrier):
+            delay.wait(timeout=5)  # Réponses simultanées des modèles qui partagent la barrière
+        else:
+            time.sleep(delay)
+        if status != 200:
+            self.reply(status, {'error': {'code': status, 'message': 'erreur simulée', 'status': 'INTERNAL'}})
+            return
+        self.reply(200, {'candidates': [{
+            'content': {'parts': [{'text': f'## Plan {name}'}], 'role': 'model'},
+            'finishReason': 'STOP',
+            'index': 0,
+        }]})
+
+
+class HealthPlanGeminiTestCase(TestCase):
+    """Catalogue en cache, requêtes couvertes, disjoncteur et délai maximal"""
+
+    def serve(self, behaviour):
+        server = FakeGemini(behaviour)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        settings_override = override_settings(
+            GEMINI_API_KEY='test-key',
+            GEMINI_API_ENDPOINT=f'http://127.0.0.1:{server.server_port}',
+            GEMINI_HEDGE_AFTER=0.2,
+            GEMINI_PLAN_DEADLINE=3,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        return server
+
+    def setUp(self):
+        model_catalogue.invalidate()
+        model_health.reset()
+        self.client = APIClient()
+
+    def request_plan(self):
+        started = time.monotonic()
+        response = self.client.post('/api/generate-health-plan/', PLAN_DATA, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json(), time.monotonic() - started
+
+    def test_01_hedged_request_and_cached_catalogue(self):
+        """Test 1 : modèle prioritaire lent → le suivant, lancé en couverture, répond ; catalogue lu une fois"""
+        print("\n🧪 Test: Requête couverte et catalogue en cache")
+        # flash-lite passe en premier (prioritize), mais répond en 1,5 s
+        server = self.serve({'gemini-2.5-flash': (0, 200), 'gemini-2.0-flash-lite': (1.5, 200)})
+
+        for _ in range(2):
+            data, elapsed = self.request_plan()
+            self.assertEqual(data['model_used'], 'gemini-2.5-flash')
+            self.assertEqual(data['plan'], '## Plan gemini-2.5-flash')
+            self.assertLess(elapsed, 1.2)
+
+        self.assertEqual(server.hits['list_models'], 1)
+        self.assertEqual(server.hits['gemini-2.0-flash-lite'], 2)
+        print(f"✅ Réponse du modèle de couverture en {elapsed * 1000:.0f} ms, catalogue lu une seule fois")
+
+    def test_02_circuit_breaker_skips_failing_model(self):
+        """Test 2 : après GEMINI_BREAKER_FAILURES échecs, le modèle n'est plus appelé"""
+        print("\n🧪 Test: Disjoncteur par modèle")
+        server = self.serve({'gemini-2.0-flash-lite': (0, 500), 'gemini-2.5-pro': (0, 200)})
+
+        for _ in range(5):
+            data, _ = self.request_plan()
+            self.assertEqual(data['model_used'], 'gemini-2.5-pro')
+
+        self.assertEqual(server.hits['gemini-2.0-flash-lite'], 3)
+        self.assertEqual(server.hits['gemini-2.5-pro'], 5)
+        print("✅ Modèle en échec écarté après 3 erreurs")
+
+    def test_03_deadline_falls_back(self):
+        """Test 3 : aucun modèle dans le délai maximal → plan de secours, sans attendre les modèles"""
+        print("\n🧪 Test: Délai maximal et plan de secours")
+        self.serve({'gemini-2.5-flash': (2, 200), 'gemini-2.0-flash': (2, 200), 'gemini-2.5-pro': (2, 200)})
+
+        with override_settings(GEMINI_PLAN_DEADLINE=0.6):
+            data, elapsed = self.request_plan()
+
+        self.assertEqual(data['model_used'], 'fallback')
+        self.assertIn('Plan', data['plan'])
+        self.assertLess(elapsed, 1.5)
+        print(f"✅ Plan de secours en {elapsed * 1000:.0f} ms")
+
+    def test_04_cancelled_trial_released(self):
+        """Test 4 : essai d'un disjoncteur ouvert annulé dans la file de l'exécuteur → un nouvel essai reste possible"""
+        print("\n🧪 Test: Essai annulé avant l'appel")
+        server = self.serve({'gemini-2.5-flash': (0, 200)})
+        health = model_health['gemini-2.5-flash']
+        health.record_failure(trip=True)
+
+        # Exécuteur occupé : l'essai reste dans la file jusqu'au délai maximal, puis est annulé
+        release = threading.Event()
+        busy = [gemini._executor.submit(release.wait) for _ in range(gemini._executor._max_workers)]
+        try:
+            with override_settings(GEMINI_BREAKER_COOLDOWN=0):
+                with self.assertRaises(gemini.GeminiUnavailable):
+                    gemini.generate('plan', deadline=0.3)
+        finally:
+            release.set()
+            for future in busy:
+                future.result()
+        self.assertEqual(server.hits['gemini-2.5-flash'], 0)
+
+        with override_settings(GEMINI_BREAKER_COOLDOWN=0):
+            data, _ = self.request_plan()
+        self.assertEqual(data['model_used'], 'gemini-2.5-flash')
+        self.assertIsNone(health.opened_at)
+        print("✅ Essai libéré, le modèle est réintégré au prochain appel")
+
+    def test_05_simultaneous_failures_launch_next_models(self):
+        """Test 5 : MAX_IN_FLIGHT modèles en échec au même moment → les suivants sont lancés, le 4e répond"""
+        print("\n🧪 Test: Échecs simultanés")
+        failing = threading.Barrier(3)
+        server = self.serve({
+            'gemini-2.0-flash-lite': (failing, 500),
+            'gemini-2.5-flash-lite': (failing, 500),
+            'gemini-2.0-flash': (failing, 500),
+            'gemini-2.5-pro': (0, 200),
+        })
+
+        with override_settings(GEMINI_HEDGE_AFTER=0.05):
+            data, elapsed = self.request_plan()
+
+        self.assertEqual(data['model_used'], 'gemini-2.5-pro')
+        self.assertEqual(server.hits['gemini-2.5-pro'], 1)
+        self.assertLess(elapsed, 1)
+        print(f"✅ 3 échecs simultanés, 4e modèle en {elapsed * 1000:.0f} ms")
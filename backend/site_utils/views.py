@@ -12,6 +12,8 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 
+from . import gemini
+
 User = get_user_model()
 
 # Contact Form (inchangé)
@@ -64,9 +66,6 @@ def generate_health_plan(request):
                 'error': 'Clé API Gemini non configurée'
             }, status=500)
         
-        # Configurer Gemini
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        
         # Récupérer les données
         data = request.data
         bmi = float(data.get('bmi', 0))
@@ -82,98 +81,8 @@ def generate_health_plan(request):
                 'error': 'Données invalides. Taille, poids et IMC doivent être positifs.'
             }, status=400)
         
-        # ✅ LISTE DES MODÈLES DISPONIBLES DANS VOTRE COMPTE (Gemini 2.0/2.5)
-        available_models = [
-            # Modèles Gemini 2.5 (les plus récents)
-            'gemini-2.5-flash',                    # Rapide et efficace
-            'gemini-2.5-flash-latest',             # Dernière version
-            'models/gemini-2.5-flash',             # Format complet
-            'gemini-2.5-flash-preview-09-2025',    # Version preview
-            
-            # Modèles Gemini 2.0 (très stables)
-            'gemini-2.0-flash',                    # Flash standard
-            'gemini-2.0-flash-001',                # Version spécifique
-            'models/gemini-2.0-flash',             # Format complet
-            'gemini-2.0-flash-exp',                # Version expérimentale
-            
-            # Modèles légers (gratuits/économiques)
-            'gemini-2.0-flash-lite',               # Version allégée
-            'gemini-2.0-flash-lite-001',           # Lite spécifique
-            'gemini-2.5-flash-lite',               # Lite 2.5
-            'gemini-flash-latest',                 # Dernière version flash
-            
-            # Modèles Pro
-            'gemini-2.5-pro',                      # Pro 2.5
-            'gemini-2.0-pro-exp',                  # Pro expérimental
-            'gemini-pro-latest',                   # Dernier pro
-            
-            # Modèles expérimentaux
-            'gemini-exp-1206',                     # Expérimental déc 2024
-            'models/gemini-exp-1206',              # Format complet
-        ]
-        
-        # Vérification des modèles disponibles
-        try:
-            available_model_list = genai.list_models()
-            all_model_names = [model.name for model in available_model_list]
-            print(f"📋 Modèles disponibles via l'API: {all_model_names}")
-            
-            # Filtrer pour ne garder que les modèles de génération de contenu
-            generation_models = []
-            for model in available_model_list:
-                if 'generateContent' in model.supported_generation_methods:
-                    # Extraire le nom court du modèle
-                    model_name = model.name
-                    if model_name.startswith('models/'):
-                        model_name = model_name[7:]  # Enlever 'models/'
-                    generation_models.append(model_name)
-            
-            if generation_models:
-                # Utiliser d'abord les modèles vérifiés comme disponibles
-                print(f"✅ Modèles avec generateContent: {generation_models}")
-                
-                # Créer une liste prioritaire basée sur les modèles disponibles
-                priority_models = []
-                
-                # Ajouter d'abord les modèles flash (gratuits/économiques)
-                for model in generation_models:
-                    if 'flash' in model.lower() and 'lite' in model.lower():
-                        priority_models.append(model)
-                
-                # Ajouter les autres modèles flash
-                for model in generation_models:
-                    if 'flash' in model.lower() and model not in priority_models:
-                        priority_models.append(model)
-                
-                # Ajouter les modèles pro
-                for model in generation_models:
-                    if 'pro' in model.lower() and model not in priority_models:
-                        priority_models.append(model)
-                
-                # Ajouter les autres modèles
-                for model in generation_models:
-                    if model not in priority_models:
-                        priority_models.append(model)
-                
-                # Ajouter les modèles de secours
-                priority_models.extend([m for m in available_models if m not in priority_models])
-                
-                available_models = priority_models
-                print(f"🎯 Modèles prioritaires: {available_models[:10]}...")  # Afficher les 10 premiers
-        except Exception as list_error:
-            print(f"⚠️ Impossible de lister les modèles: {list_error}")
-            # Continuer avec la liste par défaut
-        
-        plan = None
-        last_error = None
-        used_model = None
-        
-        # Essayer chaque modèle jusqu'à ce que l'un fonctionne
-        for model_name in available_models:
-            try:
-                print(f"🔄 Essai du modèle: {model_name}")
-                
-                prompt = f"""
+        # ✅ Modèle choisi par site_utils/gemini.py : catalogue en cache, disjoncteurs, requêtes couvertes
+        prompt = f"""
 Tu es un expert en nutrition et fitness. L'utilisateur a ces caractéristiques :
 - IMC : {bmi}
 - Classification : {classification}
@@ -209,35 +118,12 @@ Rappel important de consulter un professionnel de santé
 Ton : Professionnel, motivant, encourageant.
 Format : Markdown bien structuré.
 """
-                
-                # Essayer le modèle avec le nom correct
-                if model_name.startswith('models/'):
-                    full_model_name = model_name
-                else:
-                    full_model_name = f"models/{model_name}"
-                
-                model = genai.GenerativeModel(full_model_name)
-                response = model.generate_content(prompt)
-                plan = response.text
-                used_model = model_name
-                print(f"✅ Modèle réussi: {model_name}")
-                print(f"📝 Longueur de la réponse: {len(plan)} caractères")
-                break
-                
-            except Exception as model_error:
-                last_error = str(model_error)
-                if "404" in str(model_error):
-                    print(f"❌ Modèle {model_name} non trouvé")
-                elif "quota" in str(model_error).lower():
-                    print(f"⚠️ Quota dépassé pour {model_name}")
-                else:
-                    print(f"❌ Modèle {model_name} échoué: {model_error}")
-                continue
         
-        # Si aucun modèle ne fonctionne, utiliser un plan de secours
-        if not plan:
-            print(f"⚠️ Tous les modèles ont échoué, utilisation du plan de secours")
-            print(f"Dernière erreur: {last_error}")
+        try:
+            used_model, plan = gemini.generate(prompt)  # Modèle retenu et échecs journalisés par generate()
+        except gemini.GeminiUnavailable as e:
+            # Aucun modèle dans le délai maximal : plan de secours
+            gemini.logger.warning("⚠️ Plan de secours", reason=str(e)[:300])
             plan = generate_fallback_plan(bmi, classification, height, weight, goals)
             used_model = "fallback"
         
@@ -406,7 +292,7 @@ def chatbot_assistant(request):
             })
         
         # Configurer Gemini
-        genai.configure(api_key=settings.GEMINI_API_KEY)
+        gemini.configure_gemini()
         
         # Prompt pour le chatbot
         prompt = f"""
@@ -0,0 +1,87 @@
+# backend/subscriptions/expiry.py
+
+"""
+⏰ Expiration des abonnements en masse.
+
+Équivalent ensembliste de Subscription.mark_as_expired() : pour chaque lot
+d'abonnements ACTIVE dont la date de fin est passée,
+  1. UPDATE des abonnements du lot → EXPIRED
+  2. UPDATE des membres concernés sans autre abonnement actif → EXPIRED
+Deux requêtes d'écriture par lot au lieu de 3 par abonnement.
+updated_at est renseigné comme pour save(), le rollup TenantDailyMetrics
+voit donc les jours touchés.
+"""
+
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from members.models import Member
+from .models import Subscription
+
+DEFAULT_BATCH_SIZE = 1000
+
+ExpiryResult = namedtuple('ExpiryResult', ['subscriptions', 'members', 'batches'])
+
+
+def expirable_subscriptions(today):
+    """Abonnements ACTIVE dont la date de fin est dépassée"""
+    return Subscription.objects.filter(status='ACTIVE', end_date__lt=today)
+
+
+def expirable_tenant_ids(today):
+    """tenant_id ayant au moins un abonnement à expirer"""
+    return list(
+        expirable_subscriptions(today).order_by('tenant_id').values_list('tenant_id', flat=True).distinct()
+    )
+
+
+def _members_to_expire(member_ids, today):
+    """Membres du lot sans abonnement encore actif (même règle que Member.mark_as_expired)"""
+    still_active = Subscription.objects.filter(
+        member=OuterRef('pk'),
+        status='ACTIVE',
+        end_date__gte=today
+    )
+    return Member.objects.filter(pk__in=member_ids).exclude(status='EXPIRED').exclude(Exists(still_active))
+
+
+def expire_tenant_subscriptions(tenant_id, today=None, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    Expire les abonnements d'un centre par lots de `batch_size` (parcours par id croissant).
+    Avec dry_run=True, rien n'est écrit : les compteurs indiquent ce qui serait modifié.
+    Retourne un ExpiryResult(subscriptions, members, batches).
+    """
+    today = today or timezone.now().date()
+    queryset = expirable_subscriptions(today).filter(tenant_id=tenant_id).order_by('pk')
+
+    subscriptions = members = batches = 0
+    would_expire = set()  # dry_run : un membre peut apparaître dans plusieurs lots
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).values_list('pk', 'member_id')[:batch_size])
+        if not batch:
+            break
+
+        subscription_ids = [pk for pk, _ in batch]
+        member_ids = {member_id for _, member_id in batch}
+        last_pk = subscription_ids[-1]
+        batches += 1
+
+        if dry_run:
+            subscriptions += len(subscription_ids)
+            would_expire.update(_members_to_expire(member_ids, today).values_list('pk', flat=True))
+            members = len(would_expire)
+            continue
+
+        now = timezone.now()
+        with transaction.atomic():
+            subscriptions += Subscription.objects.filter(
+                pk__in=subscription_ids,
+                status='ACTIVE'
+            ).update(status='EXPIRED', updated_at=now)
+            members += _members_to_expire(member_ids, today).update(status='EXPIRED', updated_at=now)
+
+    return ExpiryResult(subscriptions, members, batches)
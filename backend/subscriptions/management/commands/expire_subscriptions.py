@@ -1,25 +1,57 @@
 # Fichier: backend/subscriptions/management/commands/expire_subscriptions.py
 
+import time
+
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from subscriptions.models import Subscription
+
+from subscriptions.expiry import DEFAULT_BATCH_SIZE, expirable_tenant_ids, expire_tenant_subscriptions
+
 
 class Command(BaseCommand):
     help = 'Expire les abonnements dont la date de fin est dépassée'
 
-    def handle(self, *args, **kwargs):
-        today = timezone.now().date()
-        
-        expired_subscriptions = Subscription.objects.filter(
-            status='ACTIVE',
-            end_date__lt=today
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='tenant_id du centre à traiter (défaut : tous les centres)')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Abonnements traités par lot (défaut : {DEFAULT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Afficher ce qui serait expiré sans rien modifier'
         )
-        
-        count = 0
-        for subscription in expired_subscriptions:
-            subscription.mark_as_expired()
-            count += 1
-        
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        dry_run = options['dry_run']
+        batch_size = max(options['batch_size'], 1)
+
+        if options['tenant']:
+            tenant_ids = [options['tenant']]
+        else:
+            tenant_ids = expirable_tenant_ids(today)
+
+        started_all = time.monotonic()
+        total_subscriptions = total_members = 0
+        for tenant_id in tenant_ids:
+            started = time.monotonic()
+            result = expire_tenant_subscriptions(tenant_id, today, batch_size=batch_size, dry_run=dry_run)
+            total_subscriptions += result.subscriptions
+            total_members += result.members
+            self.stdout.write(
+                f'{tenant_id}: {result.subscriptions} abonnement(s), {result.members} membre(s) '
+                f'en {result.batches} lot(s), {time.monotonic() - started:.2f}s'
+            )
+
+        prefix = '[dry-run] ' if dry_run else ''
         self.stdout.write(
-            self.style.SUCCESS(f'{count} abonnement(s) expiré(s)')
-        )
\ No newline at end of file
+            self.style.SUCCESS(
+                f'{prefix}{total_subscriptions} abonnement(s) expiré(s), '
+                f'{total_members} membre(s) expiré(s) pour {len(tenant_ids)} centre(s) '
+                f'en {time.monotonic() - started_all:.2f}s'
+            )
+        )
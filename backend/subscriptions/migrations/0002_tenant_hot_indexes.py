@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0004_tenant_hot_indexes'),
+        ('subscriptions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['member', 'status', 'end_date'], name='sub_member_status_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['tenant_id', '-start_date'], name='sub_tenant_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['tenant_id', 'end_date'], name='sub_active_end_idx'),
+        ),
+    ]
@@ -69,6 +69,18 @@ class Subscription(models.Model):
         ordering = ['-start_date']
         verbose_name = "Abonnement"
         verbose_name_plural = "Abonnements"
+        indexes = [
+            # ✅ Abonnement actif d'un membre (status='ACTIVE', end_date >= aujourd'hui)
+            models.Index(fields=['member', 'status', 'end_date'], name='sub_member_status_end_idx'),
+            # ✅ Liste paginée des abonnements d'un centre (SubscriptionPagination)
+            models.Index(fields=['tenant_id', '-start_date'], name='sub_tenant_start_idx'),
+            # ✅ Expiration (expire_subscriptions) : index partiel sur les seuls abonnements actifs
+            models.Index(
+                fields=['tenant_id', 'end_date'],
+                condition=models.Q(status='ACTIVE'),
+                name='sub_active_end_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.member.full_name} - {self.plan.name} ({self.status})"
@@ -231,7 +231,7 @@ def create_invoice_for_subscription(subscription, payment_intent_id=''):
     """
     try:
         from billing.models import Invoice
-        from billing.pdf_generator import generate_invoice_pdf
+        from billing.jobs import enqueue_invoice_pdf
         
         logger.info(f"📄 Création facture pour subscription {subscription.id}...")
         
@@ -268,14 +268,9 @@ def create_invoice_for_subscription(subscription, payment_intent_id=''):
             payment_intent_id=payment_intent_id
         )
         
-        # Générer le PDF
-        try:
-            pdf_path = generate_invoice_pdf(invoice)
-            invoice.pdf_file = pdf_path
-            invoice.save(update_fields=['pdf_file'])
-            logger.info(f"✅ PDF généré : {pdf_path}")
-        except Exception as pdf_error:
-            logger.error(f"❌ Erreur génération PDF: {str(pdf_error)}")
+        # ✅ PDF rendu hors requête par `manage.py run_workers` : le webhook répond tout de suite
+        enqueue_invoice_pdf(invoice)
+        logger.info(f"📄 PDF facture {invoice.invoice_number} en file de rendu")
         
         logger.info(f"✅✅✅ FACTURE COMPLÈTE : {invoice.invoice_number}")
         return invoice
@@ -1,3 +1,134 @@
+# backend/subscriptions/tests.py
+# Tests de l'expiration des abonnements en masse
+
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from members.models import Member
+from .expiry import expire_tenant_subscriptions
+from .models import Subscription, SubscriptionPlan
+
+
+class ExpireSubscriptionsTestCase(TestCase):
+    """
+    Tests de expire_subscriptions : mêmes résultats que mark_as_expired()
+    abonnement par abonnement, en un nombre de requêtes indépendant du volume.
+    """
+
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.plan = SubscriptionPlan.objects.create(
+            name='Mensuel',
+            duration_days=30,
+            price=50,
+            tenant_id='powerfit'
+        )
+        self.members = [self._member(i, 'powerfit') for i in range(6)]
+
+        # Membres 0-3 : abonnement expiré ; membre 3 a aussi un abonnement en cours
+        for member in self.members[:4]:
+            self._subscription(member, self.today - timedelta(days=1))
+        self._subscription(self.members[3], self.today + timedelta(days=10))
+        # Membre 4 : abonnement en cours uniquement ; membre 5 : deux abonnements expirés
+        self._subscription(self.members[4], self.today + timedelta(days=3))
+        self._subscription(self.members[5], self.today - timedelta(days=40))
+        self._subscription(self.members[5], self.today - timedelta(days=2))
+
+        # Autre centre
+        self.other = self._member(99, 'ironclub')
+        self._subscription(self.other, self.today - timedelta(days=5))
+
+    def _member(self, index, tenant_id):
+        return Member.objects.create(
+            first_name='Membre',
+            last_name=str(index),
+            email=f'member{index}@{tenant_id}.com',
+            phone='12345678',
+            date_of_birth=date(1990, 1, 1),
+            gender='F',
+            emergency_contact_name='Contact',
+            emergency_contact_phone='12345678',
+            status='ACTIVE',
+            tenant_id=tenant_id
+        )
+
+    def _subscription(self, member, end_date):
+        return Subscription.objects.create(
+            member=member,
+            plan=self.plan,
+            start_date=end_date - timedelta(days=30),
+            end_date=end_date,
+            status='ACTIVE',
+            tenant_id=member.tenant_id
+        )
+
+    def _statuses(self):
+        return {
+            'subscriptions': dict(Subscription.objects.values_list('pk', 'status')),
+            'members': dict(Member.objects.values_list('pk', 'status')),
+        }
+
+    def test_bulk_matches_mark_as_expired(self):
+        """
+        Test: Le moteur ensembliste donne les mêmes statuts que la boucle mark_as_expired().
+        """
+        print("\n🧪 Test: Expiration en masse = boucle historique")
+
+        # Résultat attendu : ancienne boucle, annulée ensuite via un savepoint
+        sid = connection.savepoint()
+        for subscription in Subscription.objects.filter(status='ACTIVE', end_date__lt=self.today):
+            subscription.mark_as_expired()
+        expected = self._statuses()
+        connection.savepoint_rollback(sid)
+
+        out = StringIO()
+        call_command('expire_subscriptions', '--batch-size', '2', stdout=out)
+
+        self.assertEqual(self._statuses(), expected)
+        self.assertEqual(
+            [m.status for m in Member.objects.filter(tenant_id='powerfit').order_by('pk')],
+            ['EXPIRED', 'EXPIRED', 'EXPIRED', 'ACTIVE', 'ACTIVE', 'EXPIRED']
+        )
+        self.assertIn('7 abonnement(s) expiré(s), 5 membre(s) expiré(s) pour 2 centre(s)', out.getvalue())
+
+        print("✅ Statuts identiques")
+
+    def test_dry_run_writes_nothing(self):
+        """
+        Test: --dry-run compte sans modifier, y compris sur plusieurs lots.
+        """
+        print("\n🧪 Test: Mode dry-run")
+
+        before = self._statuses()
+        result = expire_tenant_subscriptions('powerfit', self.today, batch_size=2, dry_run=True)
+
+        self.assertEqual(self._statuses(), before)
+        self.assertEqual((result.subscriptions, result.members, result.batches), (6, 4, 3))
+
+        out = StringIO()
+        call_command('expire_subscriptions', '--dry-run', '--tenant', 'ironclub', stdout=out)
+        self.assertIn('[dry-run] 1 abonnement(s)', out.getvalue())
+        self.assertEqual(self._statuses(), before)
+
+        print("✅ Aucune écriture")
+
+    def test_queries_per_batch_not_per_subscription(self):
+        """
+        Test: Nombre de requêtes fixe par lot, indépendant du nombre d'abonnements.
+        """
+        print("\n🧪 Test: Requêtes par lot")
+
+        with CaptureQueriesContext(connection) as context:
+            result = expire_tenant_subscriptions('powerfit', self.today, batch_size=1000)
+
+        self.assertEqual((result.subscriptions, result.members, result.batches), (6, 4, 1))
+        # SELECT lot + 2 UPDATE (+ savepoint) + SELECT du lot vide
+        self.assertLessEqual(len(context.captured_queries), 6)
 
-# Create your tests here.
+        print(f"✅ {len(context.captured_queries)} requêtes pour 6 abonnements")
@@ -6,7 +6,6 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
-import logging
 
 from .models import SubscriptionPlan, Subscription
 from .serializers import (
@@ -16,8 +15,12 @@ from .serializers import (
     SubscriptionCreateSerializer,
 )
 from authentication.mixins import CompleteTenantMixin
+from authentication.pagination import KeysetPagination
+from authentication.structured_logging import get_logger
+from authentication.db_router import read_replica
+from members.metrics_rollup import load_daily_metrics, live_today_requested, SUBSCRIPTION_COLUMNS
 
-logger = logging.getLogger('subscriptions.views')
+logger = get_logger('subscriptions.views')
 
 
 class SubscriptionPlanViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
@@ -33,7 +36,7 @@ class SubscriptionPlanViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
     
     def create(self, request, *args, **kwargs):
         """✅ Override create pour injecter tenant_id AVANT validation"""
-        logger.debug("🔍 create() appelé - SubscriptionPlanViewSet")
+        logger.debug("🔍 create()", view='SubscriptionPlanViewSet')
         
         # ✅ Déterminer le tenant_id
         gym_center = getattr(request, 'gym_center', None)
@@ -74,17 +77,25 @@ class SubscriptionPlanViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+class SubscriptionPagination(KeysetPagination):
+    """Abonnements par date de début décroissante"""
+    ordering = ('-start_date',)
+
+
 class SubscriptionViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
     """
     ✅ CORRECTION: ViewSet pour les abonnements avec FILTRAGE PAR TENANT
     """
     queryset = Subscription.objects.all()
+    pagination_class = SubscriptionPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'member', 'plan']
     search_fields = ['member__first_name', 'member__last_name', 'member__member_id']
     ordering_fields = ['start_date', 'end_date', 'created_at']
     tenant_field = 'tenant_id'  # ✅ IMPORTANT
+    # 📊 Requêtes SQL max par action (authentication/query_budget.py)
+    query_budget = {'list': 5}
     
     def get_queryset(self):
         """
@@ -93,13 +104,11 @@ class SubscriptionViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
         user = self.request.user
         tenant_id = getattr(self.request, 'tenant_id', None)
         
-        logger.debug(f"🔍 SubscriptionViewSet.get_queryset()")
-        logger.debug(f"   User: {user.username} (Role: {user.role})")
-        logger.debug(f"   Tenant ID: {tenant_id}")
+        logger.debug("🔍 SubscriptionViewSet.get_queryset()", user_id=user.id, role=user.role, tenant_id=tenant_id)
         
         # ✅ BASE: Toujours filtrer par tenant_id
         if not tenant_id:
-            logger.error("❌ Aucun tenant_id trouvé!")
+            logger.error("❌ Aucun tenant_id trouvé", user_id=user.id)
             return Subscription.objects.none()
         
         base_queryset = Subscription.objects.filter(
@@ -111,20 +120,17 @@ class SubscriptionViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
             # Les membres ne voient que LEURS abonnements
             try:
                 member = user.member_profile
-                queryset = base_queryset.filter(member=member)
-                logger.debug(f"   → Membre: {queryset.count()} abonnements")
-                return queryset
+                return base_queryset.filter(member=member)
             except:
-                logger.warning(f"   → Membre sans profil")
+                logger.warning("⚠️ Membre sans profil", user_id=user.id)
                 return Subscription.objects.none()
         
         elif user.role in ['ADMIN', 'RECEPTIONIST', 'COACH']:
             # Admin/Réceptionniste/Coach voient tous les abonnements DU CENTRE
-            logger.debug(f"   → Staff: {base_queryset.count()} abonnements du centre")
             return base_queryset
         
         else:
-            logger.error(f"   → Rôle non autorisé: {user.role}")
+            logger.error("❌ Rôle non autorisé", user_id=user.id, role=user.role)
             return Subscription.objects.none()
     
     def get_serializer_class(self):
@@ -136,7 +142,7 @@ class SubscriptionViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
     
     def create(self, request, *args, **kwargs):
         """✅ Override create pour injecter tenant_id"""
-        logger.debug("🔍 create() appelé - SubscriptionViewSet")
+        logger.debug("🔍 create()", view='SubscriptionViewSet')
         
         tenant_id = getattr(request, 'tenant_id', None)
         
@@ -202,7 +208,7 @@ class SubscriptionViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
         subscription.cancelled_at = timezone.now()
         subscription.save()
         
-        logger.info(f"Abonnement {subscription.id} annulé par l'utilisateur {request.user.id}")
+        logger.info("Abonnement annulé", subscription_id=subscription.id, user_id=request.user.id)
         
         return Response({
             'success': True,
@@ -211,8 +217,23 @@ class SubscriptionViewSet(CompleteTenantMixin, viewsets.ModelViewSet):
         })
     
     @action(detail=False, methods=['get'])
+    @read_replica
     def statistics(self, request):
         """📊 Statistiques des abonnements du centre"""
+        tenant_id = getattr(request, 'tenant_id', None)
+        
+        # ✅ Vue centre (staff) : rollup TenantDailyMetrics, ?live=false possible
+        if tenant_id and request.user.role in ['ADMIN', 'RECEPTIONIST', 'COACH']:
+            metrics = load_daily_metrics(tenant_id, live_today_requested(request))
+            return Response({
+                'total': metrics.total(*SUBSCRIPTION_COLUMNS),
+                'active': metrics.total('subscriptions_active'),
+                'pending': metrics.total('subscriptions_pending'),
+                'expired': metrics.total('subscriptions_expired'),
+                'cancelled': metrics.total('subscriptions_cancelled'),
+            })
+        
+        # Membre : uniquement ses propres abonnements
         queryset = self.get_queryset()
         
         total = queryset.count()